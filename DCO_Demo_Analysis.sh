@@ -30,6 +30,10 @@
 
 chmod u+x **/*.sh
 
+# Both analyses (and the plotting outputs) resolve the same ages of the same plate model, so share a resolved
+# topology cache between them (each output of an age is then resolved once). Set DCO_RESOLVE_CACHE to use another directory.
+export DCO_RESOLVE_CACHE=${DCO_RESOLVE_CACHE:-$(pwd)/ResolveCache}
+
 ########################### Run DCO Subduction Zone Analysis #############################
 
 # Make sure all arguments are enclosed in double quotes
@@ -41,7 +41,9 @@
 # time dependent .grd files at each timestep, depicting predicted CO2 concentration in the upper crust.
 # It will also produce a Results folder containing two .dat files (sz_crust_age_data.dat
 # and sz_crust_co2_data.dat), containing the statistics of the subducting crust age and
-# co2 levels in the upper crust. A folder called PlateBoundaryFeatures will be produced,
+# co2 levels in the upper crust, and global_*carbon_flux_data.dat, the CO2 flux (Mt/yr) entering the subduction
+# zones. A folder called CarbonFlux holds the per-point carbon flux along the subduction zones at each timestep.
+# A folder called PlateBoundaryFeatures will be produced,
 # containing resolved plate boundaries (subduction, MOR and transform) at each time step.
 
 # For more information on this project's methodologies, refer to the blog on the EarthByte Website:
@@ -262,8 +264,6 @@ local sed_grid_prefix=$9
 # Helper variables
 local outfile_format="gmt"
 local sz_layer=''
-local age_grid_file=''
-local co2_grid_file=''
 
 # Raw dat file containing grid values sampled along subduction zones
 local raw_dat_crust_age=''
@@ -295,44 +295,66 @@ if [ ! -d "PlateBoundaryFeatures" ]; then
 mkdir "PlateBoundaryFeatures"
 fi
 
-# Iterates through each 1 m.yr timestep conducting subduction zone analyses
+# Iterates through each 1 m.yr timestep resolving the subduction zones
 while (( $age <= from_age ))
 do
 
 echo >&2 "Time Step: $age"
 
-age_grid_file="${age_grid_direc}/${age_grid_prefix}${age}.nc"
-sed_grid_file="${sed_grid_direc}/${sed_grid_prefix}${age}.nc"
-
-# Use pygplates to export resolved topologies and remove duplicate segments
+# Use pygplates to export resolved topologies and remove duplicate segments (only the subduction zones are sampled)
 python3 $directory/scripts/resolve_topologies_V.2.py -r ${rotfile} -m $topologies -t ${age} -e ${outfile_format} \
--- ${outfilename_prefix}
+--outputs subduction_boundaries ${profile_args} ${cache_args} -- ${outfilename_prefix}
+
+# Move all resolved feature files at each timestep to a new age-stamped folder within the PlateBoundaryFeatures folder
+mkdir -p PlateBoundaryFeatures/$age
+mv *.gmt *.xml PlateBoundaryFeatures/$age
+
+# Increment age
+age=$(( $age + 1 ))
+done
+
+# Sample the crustal age, CO2 content in the upper crust and seafloor sediment thickness along the subduction zones
+# of every timestep in one pass (bicubic, as gmt grdtrack). The time-dependent grids of CO2 content in the upper
+# crust are written to CO2_Grid_Files from the age grid tiles, which are cached for the age and CO2 samples.
+# The sediment grids are optional (validate_arguments only warns when they are missing)
+sed_args=
+if [ -n "$sed_grid_direc" ] && [ -d "$sed_grid_direc" ]; then
+sed_args="-s ${sed_grid_direc}"
+fi
+sz_layer="PlateBoundaryFeatures/{time}/${outfilename_prefix}subduction_boundaries_{time}.00Ma.gmt"
+python3 $directory/scripts/grid_stack.py -a ${age_grid_direc} ${sed_args} -l ${sz_layer} \
+-t $(seq $3 $from_age) -o RawSamples -g CO2_Grid_Files
+
+# Calculates the statistics of each timestep
+age=$3
+while (( $age <= from_age ))
+do
 
-sz_layer=${outfilename_prefix}subduction_boundaries_${age}.00Ma.gmt
+raw_dat_crust_age=RawSamples/crust_age_${age}.dat
+raw_dat_crust_co2=RawSamples/crust_co2_${age}.dat
+raw_dat_crust_sed=RawSamples/crust_sed_${age}.dat
 
 # Analysis of crustal age as it intersects with subduction zones
-raw_dat_crust_age=$(samples_grid_with_sz $age_grid_file $sz_layer)
 calculate_stats $raw_dat_crust_age $global_crust_age $age
 
 # Analysis of CO2 content in the upper crust as it intersects with subduction zones
-co2_grid_file=$(build_co2_grid $age_grid_file $age)
-raw_dat_crust_co2=$(samples_grid_with_sz $co2_grid_file $sz_layer)
 calculate_stats $raw_dat_crust_co2 $global_crust_co2 $age
 
 # Analysis of seafloor sediment thickness as it intesects with subduction zones
-raw_dat_crust_sed=$(samples_grid_with_sz $sed_grid_file $sz_layer)
 calculate_stats $raw_dat_crust_sed $global_crust_sed $age
 
-# Move all resolved feature files at each timestep to a new age-stamped folder within the PlateBoundaryFeatures folder
-mkdir -p PlateBoundaryFeatures/$age
-mv *.gmt *.xml PlateBoundaryFeatures/$age
-
 # Increment age
 age=$(( $age + 1 ))
 done
 
 # Remove legacy files
-rm $raw_dat_crust_age $raw_dat_crust_co2 $raw_dat_crust_sed 'gmt.history'
+rm -r RawSamples 'gmt.history'
+
+# Carbon flux entering the subduction zones, combining the trench-normal convergence rates from the rotation model
+# with the crustal age, CO2 content in the upper crust and sediment thickness. Ages are processed in parallel.
+python3 $directory/scripts/subduction_carbon_flux.py -r ${rotfile} -m $topologies -t $(seq $3 $from_age) \
+-a ${age_grid_direc} ${sed_args} -o CarbonFlux -- ${outfilename_prefix}carbon_flux
+mv CarbonFlux/*.dat .
 
 # Move final statistics results to Results folder
 mv *.dat Results
@@ -345,6 +367,12 @@ local raw_results=$1
 local global_stats=$2
 local age=$3
 
+# Ages skipped by grid_stack.py (missing subduction zone file or grid) have no samples
+if [[ ! -f $raw_results ]]; then
+echo >&2 "***** WARNING ***** $raw_results: no samples at $age Ma, skipping"
+return
+fi
+
 local mean=$(awk 'BEGIN {count=0;sum = 0} {if ($1 != "NaN") {sum=sum+$1; count++;}} \
 END { average=sum/count; print average; }' $raw_results)
 
@@ -366,74 +394,16 @@ echo $age $mean $stdev $median $max $min $samplesize >> $global_stats
 }
 
 
-# Function receives grid file and subduction zone layer of a given age. Using gmt grdtrack the grid values are
-# sampled along the subduction zone layer geometry at 10 km intervals. The results are extracted from the grdtrack
-# output and listed in single column of a dat file.
-samples_grid_with_sz(){
-
-local grid_file=$1
-local sz_layer=$2
-
-local prof_spacing=10
-local prof_interval=1
-local prof_length=2k
-
-local grid_file_xyz="tmp_grid.xyz"
-local raw_dat="raw_dat.dat"
-
-gmt grdtrack $sz_layer -G${grid_file} -C${prof_length}/${prof_interval}/${prof_spacing} > $grid_file_xyz -V
-
-awk 'BEGIN {count=0; prevlatlong=0;} {if(($1 == ">")&&(prevlatlong!=$7)) {count = 1; prevlatlong=$7;}
-if((count==3)&&($5!="NaN")&&($5>0)){print $5; count=0;} if(count>=1){count++;}}' $grid_file_xyz > $raw_dat
-
-rm $grid_file_xyz
-
-echo $raw_dat
-
-}
-
-# Computes oceanic crustal CO2 content of subducting oceanic crust.
-# Function receives agegrid file (grd) at a given timestep.
-# Converts age to crustal CO2 content using linear log-age-CO2 relationship from Jarrard (2003, G-cubed)
-# # CO2 (wt %) = -1.55 + 2.49 * log(age)
-build_co2_grid(){
-
-local age_grid_file=$1
-local age=$2
-local tmp_co2_grid="tmp_co2_grid.nc"
-
-local prof_spacing=10
-local prof_interval=1
-local prof_length=2k
-
-local frame=-180/180/-90/90
-local grdint=0.1/0.1
-
-local raw_dat_crust_co2="raw_dat_crust_co2.dat"
-local co2_grid_file_xyz="tmp_co2_grid.xyz"
-
-
-echo -e >&2 "\n\t   Converting $agegrd to $tmp_co2_grid\n"
-
-gmt grdmath -V ${age_grid_file} LOG10 2.49 MUL -1.55 ADD = tmp.grd
-
-# Remove all negative values
-gmt grd2xyz tmp.grd -V >tmp1.xyz
-awk '{ if ($3 < 0 ) $3 = 0
-print ($1, $2, $3)}' tmp1.xyz >tmp2.xyz
-
-gmt xyz2grd tmp2.xyz -R${frame} -I${grdint} -G${tmp_co2_grid} -fg -V
-
-mv -f $tmp_co2_grid "CO2_Grid_Files/co2_grid_file_${age}.nc"
-
-rm tmp.grd tmp?.xyz $co2_grid_file_xyz
-
-echo "CO2_Grid_Files/co2_grid_file_${age}.nc"
-
-}
-
 # Global Variable
 directory="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 
+# Opt-in profiling of the resolve script: set DCO_PROFILE_DIR to an absolute directory to keep the profiles of
+# the slowest ages there (see scripts/age_profiler.py)
+profile_args=${DCO_PROFILE_DIR:+--profile_dir ${DCO_PROFILE_DIR}}
+
+# Opt-in resolved topology cache: set DCO_RESOLVE_CACHE to an absolute directory to resolve each output of an age once across
+# runs and workflows (see scripts/resolve_cache.py)
+cache_args=${DCO_RESOLVE_CACHE:+--cache_dir ${DCO_RESOLVE_CACHE}}
+
 ####################### CALL MAIN #######################
 main "$@"
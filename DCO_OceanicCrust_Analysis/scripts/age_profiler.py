@@ -0,0 +1,195 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import cProfile
+import fcntl
+import os
+import os.path
+import pstats
+import time
+import uuid
+
+
+INDEX_FILENAME = 'index.dat'
+LOCK_FILENAME = '.lock'
+DEFAULT_TOP_K = 10
+DEFAULT_NUMBER_OF_HOTSPOTS = 5
+
+
+###################### Command line #####################
+
+
+# Adds the (opt-in) profiling options to the parser of an entry point
+def add_arguments(parser):
+    parser.add_argument('--profile_dir', type=str,
+            help='Profile each time with cProfile and keep the profiles of the slowest times in this directory, '
+                "with an index ('{0}') of every profiled time, its profile file and hotspots. The directory can "
+                'be shared by several runs and entry points.'.format(INDEX_FILENAME))
+    parser.add_argument('--profile_top', type=int, default=DEFAULT_TOP_K,
+            help='Number of slowest times (per entry point) whose profiles are kept. Defaults to {0}.'.format(DEFAULT_TOP_K))
+    parser.add_argument('--profile_hotspots', type=int, default=DEFAULT_NUMBER_OF_HOTSPOTS,
+            help='Number of hotspots (by own time) listed in the index. Defaults to {0}.'.format(DEFAULT_NUMBER_OF_HOTSPOTS))
+
+
+###################### Index #####################
+
+
+# Reads the index as a list of [entry, age, seconds, profile filename ('-' if not kept), hotspots]
+def read_index(profile_dir):
+    entries = []
+    index_filename = os.path.join(profile_dir, INDEX_FILENAME)
+    if not os.path.exists(index_filename):
+        return entries
+    with open(index_filename, 'r') as index_file:
+        next(index_file, None)
+        for line in index_file:
+            values = line.split()
+            if len(values) >= 4:
+                entries.append([values[0], float(values[1]), float(values[2]), values[3], ' '.join(values[4:])])
+    return entries
+
+
+# Writes the index, slowest first, replacing it atomically
+def write_index(profile_dir, entries):
+    temporary_filename = os.path.join(profile_dir, '{0}.{1}'.format(INDEX_FILENAME, uuid.uuid4().hex))
+    with open(temporary_filename, 'w') as index_file:
+        index_file.write('Entry Age Seconds Profile Hotspots\n')
+        for entry, age, seconds, profile_filename, hotspots in sorted(entries, key=lambda entry: -entry[2]):
+            index_file.write('{0} {1:g} {2:.3f} {3} {4}\n'.format(entry, age, seconds, profile_filename, hotspots))
+    os.rename(temporary_filename, os.path.join(profile_dir, INDEX_FILENAME))
+
+
+# The functions with the largest own time, as 'file:line(function)=seconds' without spaces
+def hotspots(stats, number_of_hotspots):
+    functions = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:number_of_hotspots]
+    labels = []
+    for (filename, line_number, function_name), (calls, primitive_calls, own_time, cumulative_time, callers) in functions:
+        if filename == '~':
+            # Built-in (e.g. pygplates) functions
+            label = function_name
+        else:
+            label = '{0}:{1}({2})'.format(os.path.basename(filename), line_number, function_name)
+        labels.append('{0}={1:.3f}'.format(label.replace(' ', '_'), own_time))
+    return ','.join(labels)
+
+
+###################### Profiler #####################
+
+
+# Runs the work of each age under cProfile and records it in the profile directory. Only the 'top_k' slowest
+# ages of each entry point keep their pstats file - a profile pushed out of the top K is deleted - but every
+# age stays in the index with its time and hotspots. With no profile directory the work just runs.
+class AgeProfiler(object):
+
+    def __init__(self, profile_dir, entry, top_k=DEFAULT_TOP_K, number_of_hotspots=DEFAULT_NUMBER_OF_HOTSPOTS):
+        self.profile_dir = profile_dir
+        self.entry = entry
+        self.top_k = top_k
+        self.number_of_hotspots = number_of_hotspots
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @classmethod
+    def from_arguments(cls, args, entry):
+        return cls(args.profile_dir, entry, args.profile_top, args.profile_hotspots)
+
+    @property
+    def enabled(self):
+        return bool(self.profile_dir)
+
+    def run(self, reconstruction_time, function, *args, **kwargs):
+        if not self.enabled:
+            return function(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._record(reconstruction_time, time.perf_counter() - start, profile)
+
+    def _record(self, reconstruction_time, seconds, profile):
+        profile_filename = '{0}_{1:0.2f}Ma.pstats'.format(self.entry, reconstruction_time)
+        stats = pstats.Stats(profile)
+        temporary_filename = os.path.join(self.profile_dir, '{0}.{1}'.format(profile_filename, uuid.uuid4().hex))
+        stats.dump_stats(temporary_filename)
+
+        # Several runs (e.g. one process per age) can share the directory, so the index is updated under a lock
+        with open(os.path.join(self.profile_dir, LOCK_FILENAME), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = [entry for entry in read_index(self.profile_dir)
+                    if not (entry[0] == self.entry and entry[1] == reconstruction_time)]
+            entries.append([self.entry, reconstruction_time, seconds, profile_filename,
+                    hotspots(stats, self.number_of_hotspots)])
+
+            # Keep the profiles of the slowest ages of this entry point only
+            entry_indices = sorted((index for index, entry in enumerate(entries) if entry[0] == self.entry),
+                    key=lambda index: -entries[index][2])
+            for rank, index in enumerate(entry_indices):
+                if rank < self.top_k:
+                    continue
+                if entries[index][1] == reconstruction_time:
+                    os.remove(temporary_filename)
+                    temporary_filename = None
+                elif entries[index][3] != '-' and os.path.exists(os.path.join(self.profile_dir, entries[index][3])):
+                    os.remove(os.path.join(self.profile_dir, entries[index][3]))
+                entries[index][3] = '-'
+
+            if temporary_filename is not None:
+                os.rename(temporary_filename, os.path.join(self.profile_dir, profile_filename))
+            write_index(self.profile_dir, entries)
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Show the profiling index of a profile directory written with --profile_dir (by resolve_topologies_V.2.py
+    or reconstruct_feature.py), slowest times first, and optionally the statistics of one kept profile.
+
+    For example...
+
+    python %(prog)s profiles -n 20
+    python %(prog)s profiles --show resolve_240.00Ma.pstats --sort cumulative"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('profile_dir', type=str,
+            help='The profile directory.')
+    parser.add_argument('-n', '--number', type=int, default=DEFAULT_TOP_K,
+            help='Number of index rows (or statistics lines) to show. Defaults to {0}.'.format(DEFAULT_TOP_K))
+    parser.add_argument('--show', type=str,
+            help='A profile file of the directory to print the statistics of.')
+    parser.add_argument('--sort', type=str, default='tottime',
+            help="Sort key of the statistics (e.g. 'tottime', 'cumulative'). Defaults to 'tottime'.")
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if args.show:
+        pstats.Stats(os.path.join(args.profile_dir, args.show)).sort_stats(args.sort).print_stats(args.number)
+    else:
+        for entry, age, seconds, profile_filename, spots in sorted(read_index(args.profile_dir), key=lambda entry: -entry[2])[:args.number]:
+            print('{0:<12} {1:>8g} Ma {2:>9.3f} s  {3}'.format(entry, age, seconds, profile_filename))
+            for spot in spots.split(','):
+                if spot:
+                    print('    {0}'.format(spot))
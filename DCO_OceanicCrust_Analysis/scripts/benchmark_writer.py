@@ -0,0 +1,232 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import os.path
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import pygplates
+
+# The resolve script is not a valid module name, so it is loaded from its file
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+
+DEFAULT_NUMBER_OF_TIMES = 20
+DEFAULT_WRITE_QUEUE_SIZE = 8
+WRITERS = ['inline', 'thread', 'process']
+# The overlap is measured on one write of the outputs of the first time repeated this many times
+OVERLAP_REPEATS = 20
+
+
+# Writer thread with the interface of resolve_topologies_V2.BackgroundWriter, to compare against. pygplates holds
+# the GIL while writing, so it cannot overlap the resolve loop.
+class ThreadWriter(object):
+
+    def __init__(self, max_queued_writes):
+        self.write_queue = queue.Queue(max_queued_writes)
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                self.write_queue.task_done()
+                break
+            for feature_collection, filename in item:
+                feature_collection.write(filename)
+            self.write_queue.task_done()
+
+    def write(self, writes):
+        self.write_queue.put(writes)
+
+    def close(self):
+        self.write_queue.put(None)
+        self.thread.join()
+
+    @property
+    def busy(self):
+        return self.write_queue.unfinished_tasks > 0
+
+
+# Wraps a writer to time how long the resolve loop waits in its write calls (the whole writes when inline)
+class TimedWriter(object):
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.seconds = 0.0
+
+    def write(self, writes):
+        start = time.perf_counter()
+        resolve_topologies_V2.write_feature_collections(writes, self.writer)
+        self.seconds += time.perf_counter() - start
+
+
+# Speed (iterations per second) of a pure-Python loop that runs until 'done()', checked every 'chunk' iterations
+def loop_speed(done, chunk=10000):
+    iterations = 0
+    start = time.perf_counter()
+    while not done():
+        for index in range(chunk):
+            pass
+        iterations += chunk
+    return iterations / (time.perf_counter() - start)
+
+
+# Speed of a pure-Python loop (standing in for the resolve loop) while a writer writes 'feature_collection', as a
+# percentage of its speed alone. A writer that overlaps the loop leaves it at 100% with a spare CPU (about 50% on
+# a single CPU, which both share); a writer holding the GIL stalls it.
+def write_overlap(writer_name, feature_collection, filename):
+    end = time.perf_counter() + 1.0
+    alone = loop_speed(lambda: time.perf_counter() > end)
+
+    if writer_name == 'thread':
+        writer = ThreadWriter(1)
+        writer.write([(feature_collection, filename)])
+        during = loop_speed(lambda: not writer.busy)
+    else:
+        writer = resolve_topologies_V2.BackgroundWriter(1)
+        writer.write([(feature_collection, filename)])
+        def done():
+            writer.reap()
+            return not writer.writing
+        during = loop_speed(done)
+    writer.close()
+    return 100.0 * during / alone
+
+
+# Resolves and writes every output class of each time (as resolve_topologies_V.2.py does with a '-t' list), writing
+# inline, on a writer thread or in forked writer processes. Returns the wall time of the loop (including waiting for
+# the last writes) and the time the loop spent in write calls.
+def run_benchmark(rotation_model, topological_features, reconstruction_times, anchor_plate_id, output_filename_extension,
+        writer_name, write_queue_size):
+
+    scratch_directory = tempfile.mkdtemp(prefix='benchmark_writer_')
+    try:
+        start = time.perf_counter()
+        writer = None
+        if writer_name == 'thread':
+            writer = ThreadWriter(write_queue_size)
+        elif writer_name == 'process':
+            writer = resolve_topologies_V2.BackgroundWriter(write_queue_size)
+        timed_writer = TimedWriter(writer)
+
+        for time_index, reconstruction_time in enumerate(reconstruction_times):
+            output_collections = resolve_topologies_V2.resolve_output_collections(
+                    rotation_model, topological_features, reconstruction_time, anchor_plate_id)
+            timed_writer.write([(feature_collection, os.path.join(scratch_directory, 'topology_{0}_{1}.{2}'.format(
+                    name, time_index, output_filename_extension)))
+                for name, feature_collection in output_collections.items()])
+
+        if writer is not None:
+            writer.close()
+        return time.perf_counter() - start, timed_writer.seconds
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Measure how much of the writing of output files the background writer of resolve_topologies_V.2.py overlaps
+    with resolving the next times. Resolves and writes (by default) {0} times with the files written inline, on a
+    writer thread (as the background writer first did) and in forked writer processes (the background writer), and
+    reports the wall time and the time the resolve loop spent waiting in its write calls. The wall time only drops
+    with a spare CPU. The last column is the speed of a pure-Python loop while one large write is in flight,
+    relative to its speed alone: near 0% when the writer holds the GIL, about 50% on one CPU and 100% with a spare
+    CPU when it overlaps.
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -e gmt""".format(DEFAULT_NUMBER_OF_TIMES)
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-n', '--number_of_times', type=int, default=DEFAULT_NUMBER_OF_TIMES,
+            help='Number of times to resolve. Defaults to {0}.'.format(DEFAULT_NUMBER_OF_TIMES))
+    parser.add_argument('--start_time', type=float, default=0,
+            help='First time (Ma). Defaults to 0.')
+    parser.add_argument('--time_step', type=float, default=1,
+            help='Interval between the times (Myr). Defaults to 1.')
+    parser.add_argument('-e', '--output_filename_extension', type=str, default=resolve_topologies_V2.DEFAULT_OUTPUT_FILENAME_EXTENSION,
+            help="The extension of the (discarded) output files. Defaults to '{0}'.".format(
+                resolve_topologies_V2.DEFAULT_OUTPUT_FILENAME_EXTENSION))
+    parser.add_argument('-w', '--write_queue_size', type=int, default=DEFAULT_WRITE_QUEUE_SIZE,
+            help='Maximum number of times whose files are written at once. Defaults to {0}.'.format(
+                DEFAULT_WRITE_QUEUE_SIZE))
+    parser.add_argument('--writers', type=str, nargs='+', choices=WRITERS, default=WRITERS,
+            help='Writers to compare. Defaults to all of them: {0}.'.format(', '.join(WRITERS)))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    reconstruction_times = [args.start_time + index * args.time_step for index in range(args.number_of_times)]
+    rotation_model = pygplates.RotationModel(args.rotation_filenames)
+    topological_features = [pygplates.FeatureCollection(topology_filename)
+            for topology_filename in args.topology_filenames]
+
+    print('{0} times, {1} files, {2} CPUs'.format(len(reconstruction_times), args.output_filename_extension,
+            multiprocessing.cpu_count()))
+    # The outputs of the first time, repeated so that one write lasts long enough to measure the overlap
+    output_collections = resolve_topologies_V2.resolve_output_collections(
+            rotation_model, topological_features, reconstruction_times[0], args.anchor_plate_id)
+    overlap_collection = pygplates.FeatureCollection(
+            [feature for feature_collection in output_collections.values() for feature in feature_collection] * OVERLAP_REPEATS)
+    scratch_directory = tempfile.mkdtemp(prefix='benchmark_writer_')
+
+    print('{0:>8} {1:>9} {2:>14} {3:>22}'.format('Writer', 'Seconds', 'Write wait (s)', 'Loop speed in write (%)'))
+    try:
+        for writer_name in args.writers:
+            seconds, write_seconds = run_benchmark(rotation_model, topological_features, reconstruction_times,
+                    args.anchor_plate_id, args.output_filename_extension, writer_name, args.write_queue_size)
+            overlap = '-'
+            if writer_name != 'inline':
+                overlap = '{0:.1f}'.format(write_overlap(writer_name, overlap_collection,
+                        os.path.join(scratch_directory, 'overlap.{0}'.format(args.output_filename_extension))))
+            print('{0:>8} {1:>9.2f} {2:>14.2f} {3:>22}'.format(writer_name, seconds, write_seconds, overlap))
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
@@ -0,0 +1,367 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import collections
+import os
+import re
+import sys
+import numpy as np
+import netCDF4
+
+import spherical_tools
+
+
+# Grid files are matched on the time that ends their name, e.g. 'agegrid_110.nc' or 'sed_thickness-110.00Ma.nc'
+DEFAULT_GRID_FILENAME_PATTERN = r'(?P<time>\d+(?:\.\d+)?)(?:Ma)?\.(?:nc|grd)$'
+DEFAULT_TILE_SIZE = 256
+DEFAULT_CACHE_SIZE_MB = 512
+
+# Interpolation of the samples, 'bicubic' (as 'gmt grdtrack', the default) or 'bilinear', and the GMT threshold
+# ('-n+t') of the summed weights of the nodes that are not NaN
+INTERPOLATION_METHODS = ('bicubic', 'bilinear')
+DEFAULT_INTERPOLATION = 'bicubic'
+INTERPOLATION_THRESHOLD = 0.5
+
+
+###################### Tile cache #####################
+
+
+# Least recently used cache of grid tiles, bounded by the total number of bytes held.
+# A single cache can be shared by several grid stacks (e.g. age grids and the CO2 derived from them).
+class TileCache(object):
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.tiles = collections.OrderedDict()
+
+    # Returns the tile stored under 'key', calling 'loader' to read it on a cache miss
+    def get(self, key, loader):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        tile = loader()
+        self.tiles[key] = tile
+        self.current_bytes += tile.nbytes
+
+        # Evict the least recently used tiles, but always keep the tile just read
+        while self.current_bytes > self.max_bytes and len(self.tiles) > 1:
+            evicted_key, evicted_tile = self.tiles.popitem(last=False)
+            self.current_bytes -= evicted_tile.nbytes
+
+        return tile
+
+
+###################### Grid stacks #####################
+
+
+# Finds the grid files in a directory and returns a dictionary mapping each file's time to its path
+def discover_grid_files(grid_directory, pattern=DEFAULT_GRID_FILENAME_PATTERN):
+    regex = re.compile(pattern)
+    grid_files = {}
+    for entry in sorted(os.listdir(grid_directory)):
+        match = regex.search(entry)
+        if match:
+            grid_files[float(match.group('time'))] = os.path.join(grid_directory, entry)
+    return grid_files
+
+
+# A (time, lat, lon) view over a directory of time-dependent global grids (e.g. 'InputGrids/*').
+# Grids are opened lazily and only the tiles containing the sampled points are read, through the tile cache.
+class GridStack(object):
+
+    def __init__(self, grid_directory, pattern=DEFAULT_GRID_FILENAME_PATTERN, tile_size=DEFAULT_TILE_SIZE, cache=None):
+        self.name = grid_directory
+        self.grid_files = discover_grid_files(grid_directory, pattern)
+        self.tile_size = tile_size
+        self.cache = cache if cache is not None else TileCache(DEFAULT_CACHE_SIZE_MB * 1024 * 1024)
+        self.headers = {}
+
+    @property
+    def times(self):
+        return sorted(self.grid_files)
+
+    def has_time(self, time):
+        return float(time) in self.grid_files
+
+    # Opens a grid and reads only its coordinate axes (not the grid values)
+    def header(self, time):
+        time = float(time)
+        if time not in self.headers:
+            with netCDF4.Dataset(self.grid_files[time], 'r') as dataset:
+                lon_name, lat_name, z_name = find_grid_variables(dataset)
+                self.headers[time] = (
+                    np.asarray(dataset.variables[lon_name][:], dtype=float),
+                    np.asarray(dataset.variables[lat_name][:], dtype=float),
+                    z_name)
+        return self.headers[time]
+
+    # Reads one tile (a window of at most tile_size by tile_size nodes) of a grid
+    def read_tile(self, time, tile_row, tile_col):
+        lons, lats, z_name = self.header(time)
+        row_start = tile_row * self.tile_size
+        col_start = tile_col * self.tile_size
+        with netCDF4.Dataset(self.grid_files[float(time)], 'r') as dataset:
+            window = dataset.variables[z_name][row_start:row_start + self.tile_size, col_start:col_start + self.tile_size]
+        return np.ma.filled(np.ma.asarray(window, dtype=float), np.nan)
+
+    def get_tile(self, time, tile_row, tile_col):
+        return self.cache.get((self.name, float(time), tile_row, tile_col),
+                              lambda: self.read_tile(time, tile_row, tile_col))
+
+    # Gathers the grid node values at integer (row, col) indices, reading only the tiles they fall in
+    def node_values(self, time, rows, cols):
+        values = np.full(rows.shape, np.nan)
+        tile_rows = rows // self.tile_size
+        tile_cols = cols // self.tile_size
+        tile_keys, inverse = np.unique(np.stack((tile_rows, tile_cols), axis=-1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for index, (tile_row, tile_col) in enumerate(tile_keys):
+            in_tile = inverse == index
+            tile = self.get_tile(time, int(tile_row), int(tile_col))
+            values[in_tile] = tile[rows[in_tile] - tile_row * self.tile_size, cols[in_tile] - tile_col * self.tile_size]
+        return values
+
+    # Interpolation of the grid at 'time' at the given points, bicubic by default as 'gmt grdtrack'.
+    # Longitudes are wrapped into the grid's longitude range, and points outside the grid are NaN.
+    def sample(self, time, lons, lats, method=DEFAULT_INTERPOLATION):
+        grid_lons, grid_lats, z_name = self.header(time)
+        lons = np.asarray(lons, dtype=float).ravel()
+        lats = np.asarray(lats, dtype=float).ravel()
+        if lons.size == 0:
+            return np.empty(0)
+
+        dlon = grid_lons[1] - grid_lons[0]
+        dlat = grid_lats[1] - grid_lats[0]
+        nlon = grid_lons.size
+        nlat = grid_lats.size
+        lons = (lons - grid_lons[0]) % 360.0 + grid_lons[0]
+
+        col_f = (lons - grid_lons[0]) / dlon
+        row_f = (lats - grid_lats[0]) / dlat
+        col0 = np.floor(col_f).astype(np.int64)
+        row0 = np.floor(row_f).astype(np.int64)
+
+        # Global grids wrap around in longitude (gridline registered ones repeat the first column at +360 degrees)
+        period = int(round(360.0 / abs(dlon)))
+        is_global = period in (nlon, nlon - 1)
+        valid = (row_f >= 0) & (row_f <= nlat - 1) & (is_global | ((col_f >= 0) & (col_f <= nlon - 1)))
+
+        values = np.full(lons.shape, np.nan)
+        if not valid.any():
+            return values
+
+        row_offsets, row_weights = interpolation_weights(method, row_f[valid] - row0[valid])
+        col_offsets, col_weights = interpolation_weights(method, col_f[valid] - col0[valid])
+        rows = np.clip(row0[valid, np.newaxis] + row_offsets, 0, nlat - 1)
+        cols = col0[valid, np.newaxis] + col_offsets
+        cols = cols % period if is_global else np.clip(cols, 0, nlon - 1)
+
+        # Nodes around each point (points x rows x columns), and their weights
+        node_rows = np.broadcast_to(rows[:, :, np.newaxis], rows.shape + (cols.shape[1],))
+        node_cols = np.broadcast_to(cols[:, np.newaxis, :], node_rows.shape)
+        weights = row_weights[:, :, np.newaxis] * col_weights[:, np.newaxis, :]
+        nodes = self.node_values(time, node_rows.ravel(), node_cols.ravel()).reshape(node_rows.shape)
+
+        # As GMT, NaN nodes are left out and the weights of the others renormalised, unless they sum to half or less
+        known = np.isfinite(nodes)
+        weight_sums = np.sum(np.where(known, weights, 0.0), axis=(1, 2))
+        weighted_sums = np.sum(weights * np.where(known, nodes, 0.0), axis=(1, 2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values[valid] = np.where(weight_sums > INTERPOLATION_THRESHOLD, weighted_sums / weight_sums, np.nan)
+        return values
+
+
+# Node offsets (from the node preceding each point) along one grid axis, and the weights of those nodes
+# (points x offsets), given the fractional position of the points past their preceding node
+def interpolation_weights(method, fractions):
+    if method == 'bilinear':
+        return np.array([0, 1]), np.column_stack((1.0 - fractions, fractions))
+    # Cubic convolution (Keys, a = -0.5), the bicubic interpolation of GMT
+    distances = np.abs(fractions[:, np.newaxis] - np.array([-1.0, 0.0, 1.0, 2.0]))
+    weights = np.where(distances <= 1.0, (1.5 * distances - 2.5) * distances**2 + 1.0,
+            ((-0.5 * distances + 2.5) * distances - 4.0) * distances + 2.0)
+    return np.array([-1, 0, 1, 2]), weights
+
+
+# A grid stack derived node by node from another stack (e.g. crustal CO2 from crustal age).
+# Derived tiles are computed from the source stack's cached tiles, so both share the same disk reads.
+class DerivedGridStack(GridStack):
+
+    def __init__(self, name, source_stack, function):
+        self.name = name
+        self.source_stack = source_stack
+        self.function = function
+        self.grid_files = source_stack.grid_files
+        self.tile_size = source_stack.tile_size
+        self.cache = source_stack.cache
+        self.headers = source_stack.headers
+
+    def header(self, time):
+        return self.source_stack.header(time)
+
+    def read_tile(self, time, tile_row, tile_col):
+        return self.function(self.source_stack.get_tile(time, tile_row, tile_col))
+
+
+# Returns the names of the longitude, latitude and value variables of a netCDF grid (COARDS or GMT style)
+def find_grid_variables(dataset):
+    variable_names = list(dataset.variables)
+    lon_name = next(name for name in variable_names if name.lower() in ('lon', 'longitude', 'x'))
+    lat_name = next(name for name in variable_names if name.lower() in ('lat', 'latitude', 'y'))
+    z_name = next(name for name in variable_names if len(dataset.variables[name].dimensions) == 2)
+    return lon_name, lat_name, z_name
+
+
+# Converts age to crustal CO2 content using linear log-age-CO2 relationship from Jarrard (2003, G-cubed)
+# CO2 (wt %) = -1.55 + 2.49 * log(age), with negative values set to zero (as in build_co2_grid)
+def crust_co2_from_age(age):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        co2 = -1.55 + 2.49 * np.log10(age)
+    return np.where(co2 < 0, 0.0, co2)
+
+
+# Writes the grid of a stack at 'time' to a netCDF file (COARDS, as GMT writes them) on the lattice of the stack's
+# grid file. The tiles go through the tile cache, so sampling the same time afterwards reads nothing more.
+def write_grid(grid_stack, time, filename, long_name):
+    lons, lats, z_name = grid_stack.header(time)
+    with netCDF4.Dataset(grid_stack.grid_files[float(time)], 'r') as source_dataset, \
+            netCDF4.Dataset(filename, 'w') as dataset:
+        source_lon_name, source_lat_name, source_z_name = find_grid_variables(source_dataset)
+        for name, source_name, values in (('lon', source_lon_name, lons), ('lat', source_lat_name, lats)):
+            dataset.createDimension(name, values.size)
+            variable = dataset.createVariable(name, 'f8', (name,))
+            variable.setncatts({attribute: source_dataset.variables[source_name].getncattr(attribute)
+                    for attribute in source_dataset.variables[source_name].ncattrs()
+                    if attribute not in ('_FillValue', 'actual_range')})
+            variable[:] = values
+        z_variable = dataset.createVariable('z', 'f4', ('lat', 'lon'), zlib=True, fill_value=np.float32(np.nan))
+        z_variable.long_name = long_name
+        # Pixel or gridline registration, as the source grid
+        if 'node_offset' in source_dataset.variables[source_z_name].ncattrs():
+            z_variable.node_offset = source_dataset.variables[source_z_name].node_offset
+
+        for tile_row in range(int(np.ceil(lats.size / grid_stack.tile_size))):
+            for tile_col in range(int(np.ceil(lons.size / grid_stack.tile_size))):
+                tile = grid_stack.get_tile(time, tile_row, tile_col)
+                row_start = tile_row * grid_stack.tile_size
+                col_start = tile_col * grid_stack.tile_size
+                z_variable[row_start:row_start + tile.shape[0], col_start:col_start + tile.shape[1]] = tile
+
+
+###################### Sampling along subduction zones #####################
+
+
+# Samples a grid stack at 'time' along the subduction zones, every 'spacing' kms (as samples_grid_with_sz does
+# with the centre point of its 'gmt grdtrack -C' profiles), keeping values that are neither NaN nor negative/zero.
+def sample_grid_with_sz(grid_stack, time, sz_segments, spacing, method=DEFAULT_INTERPOLATION):
+    sample_lons = []
+    sample_lats = []
+    for lons, lats in sz_segments:
+        segment_lons, segment_lats, azimuths = spherical_tools.sample_polyline(lons, lats, spacing)
+        sample_lons.append(segment_lons)
+        sample_lats.append(segment_lats)
+    if not sample_lons:
+        return np.empty(0)
+
+    values = grid_stack.sample(time, np.concatenate(sample_lons), np.concatenate(sample_lats), method)
+    return values[np.isfinite(values) & (values > 0)]
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Sample the crustal age, crustal CO2 (derived from age) and sediment thickness grids along the subduction
+    zones of each time, reading only the grid tiles the sample points fall in. Writes one raw dat file per
+    metric and time (one value per line) to the output directory. The grids are interpolated bicubically at the
+    samples by default, as 'gmt grdtrack'. With '-g', the crustal CO2 grid of each time is also written (computed
+    from the age grid tiles, which the samples then reuse).
+
+    For example...
+
+    python %(prog)s -a AgeGrids -s SedimentGrids -l "PlateBoundaryFeatures/{time}/sz_{time}.00Ma.gmt" -t 0 1 2 -o RawSamples -g CO2_Grid_Files"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-a', '--age_grid_directory', type=str, required=True,
+            help='Directory containing the time-dependent age grids.')
+    parser.add_argument('-s', '--sediment_grid_directory', type=str,
+            help='Directory containing the time-dependent sediment thickness grids.')
+    parser.add_argument('-l', '--subduction_filename_template', type=str, required=True,
+            help="Subduction zone file (GMT/xy) of each time, with '{time}' standing for the time.")
+    parser.add_argument('-t', '--reconstruction_times', type=int, nargs='+', required=True,
+            metavar='reconstruction_time', help='One or more times to sample.')
+    parser.add_argument('-o', '--output_directory', type=str, default='.',
+            help="Directory of the raw sample files 'crust_{age,co2,sed}_<time>.dat'.")
+    parser.add_argument('-d', '--spacing', type=float, default=10.0,
+            help='Sample spacing along the subduction zones (km). Defaults to 10.')
+    parser.add_argument('-p', '--pattern', type=str, default=DEFAULT_GRID_FILENAME_PATTERN,
+            help="Regular expression matching grid filenames, with a named group 'time'.")
+    parser.add_argument('-c', '--cache_size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+            help='Size of the grid tile cache (MB). Defaults to {0}.'.format(DEFAULT_CACHE_SIZE_MB))
+    parser.add_argument('-g', '--co2_grid_directory', type=str,
+            help="Also write the crustal CO2 grid of each time to 'co2_grid_file_<time>.nc' in this directory.")
+    parser.add_argument('-n', '--interpolation', type=str, choices=INTERPOLATION_METHODS, default=DEFAULT_INTERPOLATION,
+            help="Interpolation of the grids at the samples. Defaults to {0} (as 'gmt grdtrack').".format(DEFAULT_INTERPOLATION))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    for directory in (args.output_directory, args.co2_grid_directory):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    # One cache is shared by all grid stacks, so the CO2 metric reuses the age grid tiles
+    cache = TileCache(int(args.cache_size * 1024 * 1024))
+    age_stack = GridStack(args.age_grid_directory, args.pattern, cache=cache)
+    grid_stacks = [('age', age_stack), ('co2', DerivedGridStack('co2', age_stack, crust_co2_from_age))]
+    if args.sediment_grid_directory:
+        grid_stacks.append(('sed', GridStack(args.sediment_grid_directory, args.pattern, cache=cache)))
+
+    for reconstruction_time in args.reconstruction_times:
+        # The CO2 grid reads the whole age grid into the cache, which the samples below then reuse
+        if args.co2_grid_directory:
+            if age_stack.has_time(reconstruction_time):
+                write_grid(grid_stacks[1][1], reconstruction_time,
+                        os.path.join(args.co2_grid_directory, 'co2_grid_file_{0}.nc'.format(reconstruction_time)),
+                        'Crustal CO2 (wt %)')
+            else:
+                print('{0}: Warning - no CO2 grid at {1} Ma, no age grid of that time in "{2}"'.format(
+                        os.path.basename(__file__), reconstruction_time, age_stack.name), file=sys.stderr)
+
+        # A missing age is skipped (with a warning) rather than aborting the other ages of the pass
+        subduction_filename = args.subduction_filename_template.format(time=reconstruction_time)
+        if not os.path.isfile(subduction_filename):
+            print('{0}: Warning - skipping {1} Ma, subduction zone file "{2}" does not exist'.format(
+                    os.path.basename(__file__), reconstruction_time, subduction_filename), file=sys.stderr)
+            continue
+        sz_segments = spherical_tools.read_gmt_segments(subduction_filename)
+
+        for metric, grid_stack in grid_stacks:
+            if not grid_stack.has_time(reconstruction_time):
+                print('{0}: Warning - skipping the {1} metric at {2} Ma, no grid of that time in "{3}"'.format(
+                        os.path.basename(__file__), metric, reconstruction_time, grid_stack.name), file=sys.stderr)
+                continue
+            values = sample_grid_with_sz(grid_stack, reconstruction_time, sz_segments, args.spacing, args.interpolation)
+            raw_dat = os.path.join(args.output_directory, 'crust_{0}_{1}.dat'.format(metric, reconstruction_time))
+            np.savetxt(raw_dat, values, fmt='%.10g')
@@ -19,34 +19,45 @@
 
 import argparse
 import math
+import os
 import sys
 import os.path
 import pygplates
 
+import age_profiler
+import memory_monitor
+import resolve_cache
+
 DEFAULT_OUTPUT_FILENAME_PREFIX = 'topology_'
 DEFAULT_OUTPUT_FILENAME_EXTENSION = 'shp'
+# Output files are written in the resolve loop by default. The background writer only pays off with spare CPUs:
+# on one CPU it was slower than writing inline for both 'gmt' and 'shp' outputs (see benchmark_writer.py).
+DEFAULT_WRITE_QUEUE_SIZE = 0
+
+# Classes of output files. Each class is named after the files it produces, and 'anomalous' stands for the
+# diagnostic files of the anomalous segments removed from the requested ridge/transform and subduction classes.
+OUTPUT_CLASSES = ['boundary_polygons', 'ridge_transform_boundaries', 'subduction_boundaries',
+                  'subduction_boundaries_sL', 'subduction_boundaries_sR', 'anomalous']
+SUBDUCTION_OUTPUT_CLASSES = ['subduction_boundaries', 'subduction_boundaries_sL', 'subduction_boundaries_sR']
+
+# Created once rather than for every boundary section
+SUBDUCTION_ZONE_TYPE = pygplates.FeatureType.create_gpml('SubductionZone')
+SUBDUCTION_POLARITY_PROPERTY_NAME = pygplates.PropertyName.create_gpml('subductionPolarity')
 
 
 ###################### Functions to identify and remove anomalous duplicates #####################
 
 
-# Set global variable (a maximum search radius of 50 km in radians)
-global max_distance
+# Default maximum search radius (50 km in radians) of the anomalous segment filter. The functions below take
+# the search radius as a parameter defaulting to it.
 max_distance = (1/pygplates.Earth.mean_radius_in_kms) * 50 # kms
 
-# Function used to remove anomalous feature from resolved feature collection
-def filter_anomalous(anomalous_feature_collection, resolved_topology_feature_collection):
-    
-    black_list_ids = []
-
-    # Creates an anomalous feature list sorted by their polyline lengths
-    anomalous_feature_list = sort_fl_by_length(anomalous_feature_collection)
-    # Creates a blacklist from anomalous feature list
-    black_list = build_blacklist(anomalous_feature_list)
-    # Collates a list of feature ID from list of features
-    for feature_item in black_list:
-        black_list_ids.append(feature_item.get_feature_id())
-    
+
+# Function used to remove the features with black listed IDs from resolved feature collection
+def remove_black_listed_features(resolved_topology_feature_collection, black_list_ids):
+
+    black_list_ids = set(black_list_ids)
+
     # Remove blacklist items from subduction zone feature collection.
     filtered_resolved_topology_features = []
     for feature in resolved_topology_feature_collection:
@@ -56,6 +67,29 @@ def filter_anomalous(anomalous_feature_collection, resolved_topology_feature_col
     return pygplates.FeatureCollection(filtered_resolved_topology_features)
 
 
+# Function returns the feature IDs of the anomalous segments to be removed from a resolved feature collection
+def find_segment_blacklist_ids(anomalous_segments, max_distance=max_distance):
+
+    # Creates an anomalous segment list sorted by their polyline lengths
+    anomalous_segment_list = sort_segments_by_length(anomalous_segments)
+    # Creates a blacklist from anomalous segment list
+    black_list = build_blacklist(anomalous_segment_list, max_distance)
+    # Collates a list of feature ID from list of segments
+    return [segment.feature.get_feature_id() for segment in black_list]
+
+
+# An anomalous sub-segment: its resolved feature and, when it comes from the topology graph, the ID of the
+# topological section feature it is part of and the range of section vertices it covers
+class AnomalousSegment(object):
+
+    def __init__(self, feature, source_feature_id=None, vertex_range=None):
+        self.feature = feature
+        self.geometries = feature.get_geometries()
+        self.length = get_geometries_total_length(self.geometries)
+        self.source_feature_id = source_feature_id
+        self.vertex_range = vertex_range
+
+
 # Gathers the total length (in kms) of a feature with multiple geometries.  
 # Handles polyline feature with single or multiple geometries
 def get_geometries_total_length(geometries):
@@ -65,38 +99,10 @@ def get_geometries_total_length(geometries):
     return total_length
 
 
-# Recieves a feature collection of polyline geometry and returns a list of 
-# features ordered by polyline length (largest to smallest)
-def sort_fl_by_length(anomalous_feature_collection):
-    anomalous_feature_list = []
-    anomalous_geolength_list = []
-    anomalous_geo_list = []
-    anomalous_feature_list_sorted = []
+# Recieves a list of anomalous segments and returns it ordered by polyline length (largest to smallest)
+def sort_segments_by_length(anomalous_segments):
 
-    # Creates a list of features from feature collection
-    for feature in anomalous_feature_collection:
-        anomalous_feature_list.append(feature)
-
-    # Creates a list of geometries from list of features
-    for feature in anomalous_feature_list:
-        anomalous_geo_list.append(feature.get_geometries())
-
-    # Creates a list of geometry lengths from list of geometries
-    for geo in anomalous_geo_list:
-        # Handles cases where there are multiple geometries per feature
-        anomalous_geolength_list.append(get_geometries_total_length(geo))
-        
-    # Zips together feature list and geometry lengths lists 
-    zipped = list(zip(anomalous_feature_collection,anomalous_geolength_list))
-    
-    # Reorders zipped list by geometry lengths in reversed order
-    zipped.sort(key = lambda a: a[1], reverse=True)
-
-    # Creates ordered feature list from zipped list
-    for item in zipped:
-        anomalous_feature_list_sorted.append(item[0])
-
-    return anomalous_feature_list_sorted
+    return sorted(anomalous_segments, key = lambda segment: segment.length, reverse=True)
 
 
 # Function used to determine if geometries overlap and how they overlap. If they over lap by more than 
@@ -107,9 +113,9 @@ def sort_fl_by_length(anomalous_feature_collection):
 # If the feature and observed segments are a match, then the string 'duplicate' is returned. 
 # In the case that there is only a single vertex match, 'None' is returned.
 # Likewise, in the case they do not intercept at any point, 'None' is also returned.
-def adjacency_type(feature, observed):
+def adjacency_type(feature, observed, max_distance=max_distance):
     
-    # If geometries of feature and observed do not intercept within 50 km of each other, 'adjacency type' is returned as 'None'
+    # If geometries of feature and observed do not intercept within 'max_distance' of each other, 'adjacency type' is returned as 'None'
     if pygplates.GeometryOnSphere.distance(feature,observed) > max_distance:
         return None
 
@@ -153,7 +159,7 @@ def adjacency_type(feature, observed):
 # Function will find 'adjacency type' in the case that either or both feature and observed are 
 # multiple set of geometries.  Function will identify whether observed and feature geometries are a 
 # adjacency type duplicate, subset, superset or none
-def compare_multiple_geometries(feature_geometries, observed_geometries):
+def compare_multiple_geometries(feature_geometries, observed_geometries, max_distance=max_distance):
     
     # Gets the total polyline length of the geometry sets of feature and observed 
     feature_length = get_geometries_total_length(feature_geometries)
@@ -164,7 +170,7 @@ def compare_multiple_geometries(feature_geometries, observed_geometries):
     # Test for 'duplicates' type 
     if(len(observed_geometries)==len(feature_geometries)):
         for f_geo, o_geo in zip(feature_geometries, observed_geometries):
-            adj_type = adjacency_type(f_geo,o_geo)    
+            adj_type = adjacency_type(f_geo,o_geo,max_distance)    
             if adj_type!='duplicate':
                 break
         
@@ -175,7 +181,7 @@ def compare_multiple_geometries(feature_geometries, observed_geometries):
     for f_geo in feature_geometries:
         for o_geo in observed_geometries:
 
-            adj_type = adjacency_type(f_geo,o_geo)  
+            adj_type = adjacency_type(f_geo,o_geo,max_distance)  
         
             # In the case that a matching segment is found
             if adj_type == 'subset' or adj_type == 'superset' or adj_type == 'duplicate':
@@ -188,70 +194,340 @@ def compare_multiple_geometries(feature_geometries, observed_geometries):
     return None
 
 
-# Function collates a list of anomalous features to be removed from a 
-# resolved feature collection.  It recieves an ordered (by poyline length) list of anomalous 
-# features and returns a black list of features
-def build_blacklist(anomalous_feature_list):
-    
-    # Initialise black list 
+# Adjacency type of two sub-segments of the same topological section, from the ranges of section vertices they
+# cover (no geometry comparison needed). As in adjacency_type(), they overlap if they share more than two
+# vertices, and the shorter one is then the subset.
+def vertex_range_adjacency_type(feature, observed):
+
+    if feature.vertex_range == observed.vertex_range:
+        return 'duplicate'
+
+    # Number of section vertices covered by both
+    shared_vertices = (math.floor(min(feature.vertex_range[1], observed.vertex_range[1])) -
+            math.ceil(max(feature.vertex_range[0], observed.vertex_range[0])) + 1)
+    if shared_vertices > 2 and observed.length > feature.length:
+        return 'subset'
+    elif shared_vertices > 2 and observed.length < feature.length:
+        return 'superset'
+    return None
+
+
+# Whether a sub-segment starts and ends at section vertices (not at an intersection between two vertices, as
+# rubber-band pieces do, whose half-vertex ranges say little about their extent)
+def is_vertex_range(vertex_range):
+    return vertex_range is not None and vertex_range[0] == int(vertex_range[0]) and vertex_range[1] == int(vertex_range[1])
+
+
+# Finds the 'adjacency type' of two anomalous segments. Sub-segments of the same topological section that both
+# start and end at section vertices are compared by the section vertices they cover, all the others (including
+# the rubber-band pieces ending between two vertices) by comparing geometries.
+def segment_adjacency_type(feature, observed, max_distance=max_distance):
+
+    if (feature.source_feature_id is not None and feature.source_feature_id == observed.source_feature_id and
+            is_vertex_range(feature.vertex_range) and is_vertex_range(observed.vertex_range)):
+        return vertex_range_adjacency_type(feature, observed)
+
+    # If either feature or observed are single sets of geometries
+    if len(observed.geometries) == 1 and len(feature.geometries) == 1:
+        return adjacency_type(feature.geometries[0], observed.geometries[0], max_distance)
+
+    # If either feature or observed consist of multiple geometries
+    return compare_multiple_geometries(feature.geometries, observed.geometries, max_distance)
+
+
+# Function collates a list of anomalous segments to be removed from a
+# resolved feature collection.  It recieves an ordered (by poyline length) list of anomalous
+# segments and returns a black list of segments
+def build_blacklist(anomalous_segment_list, max_distance=max_distance):
+
+    # Initialise black list (and the set of its members, for quick lookups)
     black_list = []
-    adj_type = ''
+    black_listed = set()
 
-    # Iterate through anomalous feature set, for each item 'feature' 
-    # is compared to every other item in the feaure set 'observed'
-    for feature in anomalous_feature_list:
+    # Iterate through anomalous segment set, for each item 'feature'
+    # is compared to every other item in the segment set 'observed'
+    for feature in anomalous_segment_list:
         # Ignore iteration if feature is in black list
-        if feature in black_list:
+        if id(feature) in black_listed:
             continue
 
-        feature_geometry = feature.get_geometries()
-
-        for observed in anomalous_feature_list:
-            
-            adj_type = ''
+        for observed in anomalous_segment_list:
 
-            # For testing
-            ob_id = observed.get_feature_id()
-            f_id = feature.get_feature_id()
-    
-            observed_geometry = observed.get_geometries()
-
-            # If observed is in black list or feature and observed are the same, skip this comparison  
-            if observed == feature or observed in black_list:
+            # If observed is in black list or feature and observed are the same, skip this comparison
+            if observed is feature or id(observed) in black_listed:
                 continue
-            
-            # If either feature or observed are single sets of geometries
-            elif len(observed_geometry) == 1 and len(feature_geometry) == 1:
-                
-                # Finds 'adjacency type'
-                adj_type = adjacency_type(feature_geometry[0], observed_geometry[0])
-                
-           
-            # If either feature or observed consist of multiple geometries
-            else:
-                # Finds 'adjacency type'
-                adj_type = compare_multiple_geometries(feature_geometry, observed_geometry)
+
+            # Finds 'adjacency type'
+            adj_type = segment_adjacency_type(feature, observed, max_distance)
 
             # Black list action to be taken after recieving an 'adjacency type' if the type is 'None', than no action is taken
-            if adj_type == 'superset' or adj_type == 'duplicate':     
-                
+            if adj_type == 'superset' or adj_type == 'duplicate':
+
                 black_list.append(observed)
-                
+                black_listed.add(id(observed))
+
             if adj_type== 'subset':
                 black_list.append(feature)
+                black_listed.add(id(feature))
                 # Skip to the next feature comparison in the case that feature is a subset
                 break
-    
+
     return black_list
 
 
+###################### Topology graph of one reconstruction time #####################
+
+
+# Key used to match the vertices of a sub-segment with those of its topological section
+def point_key(point):
+    lat, lon = point.to_lat_lon()
+    return (round(lat, 7), round(lon, 7))
+
+
+# Range of the vertices of its topological section covered by a sub-segment geometry. The ends of a sub-segment are
+# usually intersections with the neighbouring sections, between two section vertices, and then extend the range
+# by half a vertex. Returns None if none of its vertices is a section vertex.
+def sub_segment_vertex_range(section_vertex_indices, sub_segment_geometry):
+
+    indices = [section_vertex_indices.get(point_key(point)) for point in sub_segment_geometry.get_points()]
+    matched_indices = [index for index in indices if index is not None]
+    if not matched_indices:
+        return None
+
+    start = min(matched_indices)
+    end = max(matched_indices)
+    increasing = matched_indices[-1] >= matched_indices[0]
+    if indices[0] is None:
+        if increasing:
+            start -= 0.5
+        else:
+            end += 0.5
+    if indices[-1] is None:
+        if increasing:
+            end += 0.5
+        else:
+            start -= 0.5
+    return (start, end)
+
+
+# A sub-segment of a shared boundary section: the pygplates shared sub-segment and its resolved feature, the IDs
+# of the resolved topologies sharing it, and for anomalous sub-segments (not shared by exactly two topologies)
+# the section vertices it covers
+class SubSegmentNode(object):
+
+    __slots__ = ('shared_sub_segment', 'feature', 'section_index', 'sharing_topology_ids', 'vertex_range')
+
+    def __init__(self, shared_sub_segment, section_index, sharing_topology_ids):
+        self.shared_sub_segment = shared_sub_segment
+        self.feature = shared_sub_segment.get_resolved_feature()
+        self.section_index = section_index
+        self.sharing_topology_ids = sharing_topology_ids
+        self.vertex_range = None
+
+    @property
+    def anomalous(self):
+        return len(self.sharing_topology_ids) != 2
+
+
+# Graph linking the shared boundary sections of one reconstruction time, their sub-segments and the resolved
+# topologies sharing them. It is built in one pass over the sections (the sub-segments and the topologies sharing
+# them are queried once), and the black list of anomalous segments is found once per class of section.
+# Only the sections for which 'want_section(is_subduction)' is true are included (all by default).
+class TopologyGraph(object):
+
+    def __init__(self, shared_boundary_sections, want_section=None):
+
+        # Per section: (source feature ID, is subduction zone, polarity, sub-segment nodes)
+        self.sections = []
+        # Resolved topology feature ID -> sub-segment nodes on its boundary
+        self.topology_sub_segments = {}
+        self.black_list_ids = {}
+
+        for shared_boundary_section in shared_boundary_sections:
+            section_feature = shared_boundary_section.get_feature()
+            is_subduction = section_feature.get_feature_type() == SUBDUCTION_ZONE_TYPE
+            if want_section is not None and not want_section(is_subduction):
+                continue
+
+            polarity = None
+            if is_subduction:
+                polarity_property = section_feature.get(SUBDUCTION_POLARITY_PROPERTY_NAME)
+                if polarity_property:
+                    polarity = polarity_property.get_value().get_content()
+
+            section_index = len(self.sections)
+            section_vertex_indices = None
+            nodes = []
+            for shared_sub_segment in shared_boundary_section.get_shared_sub_segments():
+                node = SubSegmentNode(shared_sub_segment, section_index,
+                        [topology.get_feature().get_feature_id()
+                            for topology in shared_sub_segment.get_sharing_resolved_topologies()])
+
+                if node.anomalous:
+                    # The section vertices are only indexed for sections with anomalous sub-segments
+                    if section_vertex_indices is None:
+                        section_vertex_indices = {}
+                        for index, point in enumerate(shared_boundary_section.get_topological_section_geometry().get_points()):
+                            section_vertex_indices.setdefault(point_key(point), index)
+                    node.vertex_range = sub_segment_vertex_range(section_vertex_indices, shared_sub_segment.get_resolved_geometry())
+
+                for topology_id in node.sharing_topology_ids:
+                    self.topology_sub_segments.setdefault(topology_id, []).append(node)
+                nodes.append(node)
+
+            self.sections.append((section_feature.get_feature_id(), is_subduction, polarity, nodes))
+
+    # Sub-segments of the subduction zones (of a polarity, if given) or the other sections
+    def section_nodes(self, is_subduction, polarity=None):
+        return [node
+                for source_feature_id, section_is_subduction, section_polarity, nodes in self.sections
+                if section_is_subduction == is_subduction and (polarity is None or section_polarity == polarity)
+                for node in nodes]
+
+    # Resolved features of the sub-segments of the subduction zones (of a polarity, if given) or the other sections
+    def section_features(self, is_subduction, polarity=None):
+        return [node.feature for node in self.section_nodes(is_subduction, polarity)]
+
+    # Sub-segments of the subduction zones (of a polarity, if given) or the other sections that are left once the
+    # black-listed anomalous sub-segments are removed
+    def filtered_section_nodes(self, is_subduction, polarity=None, max_distance=max_distance):
+        black_list_ids = self.blacklist_ids(is_subduction, max_distance)
+        return [node for node in self.section_nodes(is_subduction, polarity)
+                if node.feature.get_feature_id() not in black_list_ids]
+
+    # Anomalous sub-segments of the subduction zones or the other sections
+    def anomalous_segments(self, is_subduction):
+        return [AnomalousSegment(node.feature, source_feature_id, node.vertex_range)
+                for source_feature_id, section_is_subduction, section_polarity, nodes in self.sections
+                if section_is_subduction == is_subduction
+                for node in nodes if node.anomalous]
+
+    def anomalous_features(self, is_subduction):
+        return [node.feature
+                for source_feature_id, section_is_subduction, section_polarity, nodes in self.sections
+                if section_is_subduction == is_subduction
+                for node in nodes if node.anomalous]
+
+    # IDs of the features to remove from the subduction zones or the other sections, found once per class
+    # (and search radius)
+    def blacklist_ids(self, is_subduction, max_distance=max_distance):
+        if (is_subduction, max_distance) not in self.black_list_ids:
+            self.black_list_ids[(is_subduction, max_distance)] = set(
+                    find_segment_blacklist_ids(self.anomalous_segments(is_subduction), max_distance))
+        return self.black_list_ids[(is_subduction, max_distance)]
+
+
+
+###################### Background writing of output files #####################
+
+
+# Writes feature collections to file in background processes, so that the next reconstruction time can be
+# resolved while the outputs of earlier times are still being written. pygplates holds the GIL while writing a
+# feature collection (so a writer thread would not overlap the resolve loop), and pickling resolved features to a
+# writer process costs about as much as writing them. Instead the files of each reconstruction time are written by
+# a forked child process, which shares the feature collections with the resolve loop (copy-on-write) without
+# copying them. At most 'max_queued_writes' times are written at once; the resolve loop then waits for the oldest.
+# A failed write is reported by the resolve loop on its next write or when closing.
+# Without os.fork (Windows) the files are written in the resolve loop.
+class BackgroundWriter(object):
+
+    def __init__(self, max_queued_writes):
+        self.max_queued_writes = max(max_queued_writes, 1)
+        # Process ID -> filenames being written, oldest first
+        self.writing = {}
+        self.error_filename = None
+
+    def check_error(self):
+        if self.error_filename is not None:
+            raise RuntimeError('Failed to write {0} (see the error above)'.format(self.error_filename))
+
+    # Reaps the finished writes, or waits for the oldest one if 'wait_for_oldest'
+    def reap(self, wait_for_oldest=False):
+        for pid in list(self.writing):
+            finished_pid, status = os.waitpid(pid, 0 if wait_for_oldest else os.WNOHANG)
+            wait_for_oldest = False
+            if finished_pid == 0:
+                continue
+            filenames = self.writing.pop(pid)
+            if status != 0 and self.error_filename is None:
+                self.error_filename = ' or '.join(filenames)
+
+    # Writes a list of (feature collection, filename)
+    def write(self, writes):
+        self.check_error()
+        if not hasattr(os, 'fork'):
+            for feature_collection, filename in writes:
+                feature_collection.write(filename)
+            return
+
+        self.reap()
+        while len(self.writing) >= self.max_queued_writes:
+            self.reap(wait_for_oldest=True)
+
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                for feature_collection, filename in writes:
+                    feature_collection.write(filename)
+            except Exception as error:
+                print('{0}: Error - failed to write {1}: {2}'.format(os.path.basename(__file__), filename, error),
+                        file=sys.stderr)
+                status = 1
+            finally:
+                sys.stderr.flush()
+                os._exit(status)
+        self.writing[pid] = [filename for feature_collection, filename in writes]
+
+    # Waits for all queued writes to finish
+    def close(self):
+        while self.writing:
+            self.reap(wait_for_oldest=True)
+        self.check_error()
+
+
+# Writes a list of (feature collection, filename), through the background writer if there is one
+def write_feature_collections(writes, writer=None):
+    if not writes:
+        return
+    if writer is not None:
+        writer.write(writes)
+    else:
+        for feature_collection, filename in writes:
+            feature_collection.write(filename)
+
+
 
 ###################### Resolve Topologies Function #####################
 
 
-def resolve_topologies(rotation_model, topological_features, reconstruction_time, output_filename_prefix, \
-    output_filename_extension, anchor_plate_id):
+# Names of the output files (without prefix, time and extension) that the requested classes of output produce
+def output_names(outputs=None):
+    if outputs is None:
+        outputs = OUTPUT_CLASSES
+    names = [output for output in OUTPUT_CLASSES if output != 'anomalous' and output in outputs]
+    if 'anomalous' in outputs:
+        names.extend(['anomalous_{0}'.format(output) for output in OUTPUT_CLASSES
+                if output in outputs and output not in ('boundary_polygons', 'anomalous')])
+    return names
+
+
+def output_filename(output_filename_prefix, name, reconstruction_time, output_filename_extension):
+    return '{0}{1}_{2:0.2f}Ma.{3}'.format(output_filename_prefix, name, reconstruction_time, output_filename_extension)
+
+
+# Resolves the topologies at 'reconstruction_time' and returns the feature collections of the requested classes
+# of output as a dictionary keyed by output file name (see output_names). Empty collections are left out.
+def resolve_output_collections(rotation_model, topological_features, reconstruction_time, anchor_plate_id, outputs=None):
     
+    # Only the requested classes of output are built, filtered and written (all of them by default)
+    if outputs is None:
+        outputs = OUTPUT_CLASSES
+    outputs = set(outputs)
+    want_ridge_transforms = 'ridge_transform_boundaries' in outputs
+    want_subduction = any(output in outputs for output in SUBDUCTION_OUTPUT_CLASSES)
+    want_anomalous = 'anomalous' in outputs
+
 
     # FIXME: Temporary fix to avoid getting OGR GMT/Shapefile error "Mismatch in field names..." and
     # missing geometries when saving resolved topologies/sections to GMT/Shapefile.
@@ -270,139 +546,125 @@ def resolve_topologies(rotation_model, topological_features, reconstruction_time
             topological_features, rotation_model, resolved_topologies, reconstruction_time, shared_boundary_sections, \
             anchor_plate_id)
 
+    # Link the boundary sections of the requested classes, their sub-segments and the topologies sharing them.
+    topology_graph = TopologyGraph(shared_boundary_sections,
+            lambda is_subduction: want_subduction if is_subduction else want_ridge_transforms)
+
     # We'll create a feature for each boundary polygon feature and each type of
     # resolved topological section feature we find.
     resolved_topology_features = []
-    ridge_transform_boundary_section_features = []
+    if 'boundary_polygons' in outputs:
+        for resolved_topology in resolved_topologies:
+            resolved_topology_features.append(resolved_topology.get_resolved_feature())
+
+    # Put all ridges in one collection/file, all subduction zones in another and also in left/right collections/files.
+    ridge_transform_boundary_section_features = topology_graph.section_features(False)
     subduction_boundary_section_features = []
     left_subduction_boundary_section_features = []
     right_subduction_boundary_section_features = []
-
-    #anomalous feature lists
-    anomalous_sz = []
-    anomalous_ridge = []
-
-    # Iterate over the resolved topologies.
-    for resolved_topology in resolved_topologies:
-        resolved_topology_features.append(resolved_topology.get_resolved_feature())
-
-    # Iterate over the shared boundary sections.
-    for shared_boundary_section in shared_boundary_sections:
-        
-        # Get all the geometries of the current boundary section.
-        boundary_section_features = [shared_sub_segment.get_resolved_feature()
-                for shared_sub_segment in shared_boundary_section.get_shared_sub_segments()]
-        
-        #Creates a list of anomalous list of features per feature type ie subduction zones and ridge transform
-        for shared_sub_segment, b_s_f in zip(shared_boundary_section.get_shared_sub_segments(), boundary_section_features):
-            # Condition identifies anomalous segment
-            if len(shared_sub_segment.get_sharing_resolved_topologies()) != 2:
-                if shared_boundary_section.get_feature().get_feature_type() == pygplates.FeatureType.create_gpml('SubductionZone'):
-                    anomalous_sz.append(b_s_f)
-                else:
-                    anomalous_ridge.append(b_s_f)
-
-        
-        # Add the feature to the correct list depending on feature type, etc.
-        if shared_boundary_section.get_feature().get_feature_type() == pygplates.FeatureType.create_gpml('SubductionZone'):
-            
-            # Put all subduction zones in one collection/file.
-            subduction_boundary_section_features.extend(boundary_section_features)
-            
-            # Also put subduction zones in left/right collection/file.
-            polarity_property = shared_boundary_section.get_feature().get(
-                    pygplates.PropertyName.create_gpml('subductionPolarity'))
-            if polarity_property:
-                polarity = polarity_property.get_value().get_content()
-                if polarity == 'Left':
-                    left_subduction_boundary_section_features.extend(boundary_section_features)
-                elif polarity == 'Right':
-                    right_subduction_boundary_section_features.extend(boundary_section_features)
-            
-            
-        else:
-            # Put all ridges in one collection/file.
-            ridge_transform_boundary_section_features.extend(boundary_section_features)
-
+    if 'subduction_boundaries' in outputs:
+        subduction_boundary_section_features = topology_graph.section_features(True)
+    if 'subduction_boundaries_sL' in outputs:
+        left_subduction_boundary_section_features = topology_graph.section_features(True, 'Left')
+    if 'subduction_boundaries_sR' in outputs:
+        right_subduction_boundary_section_features = topology_graph.section_features(True, 'Right')
+
+    # Anomalous sub-segments (not shared by exactly two topologies) per feature type ie subduction zones and ridge transform
+    anomalous_sz = topology_graph.anomalous_features(True)
+    anomalous_ridge = topology_graph.anomalous_features(False)
+
+    output_collections = {}
     if resolved_topology_features:
         # Put the features in a feature collection so we can write them to a file.
-        resolved_topology_feature_collection= pygplates.FeatureCollection(resolved_topology_features)
-        resolved_topology_features_filename = '{0}boundary_polygons_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-        resolved_topology_feature_collection.write(resolved_topology_features_filename)
+        output_collections['boundary_polygons'] = pygplates.FeatureCollection(resolved_topology_features)
         
     if ridge_transform_boundary_section_features:
         # Put the features in a feature collection so we can write them to a file.
         ridge_transform_boundary_section_feature_collection = pygplates.FeatureCollection(ridge_transform_boundary_section_features)    
 
         if anomalous_ridge:
-            anomalous_feature_collection = pygplates.FeatureCollection(anomalous_ridge)
             # Anomalous segments are filtered from resolved feature collection
-            ridge_transform_boundary_section_feature_collection = filter_anomalous(anomalous_feature_collection,\
-                ridge_transform_boundary_section_feature_collection)
-            anomalous_ridges_transforms_filename='{0}anomalous_ridge_transform_boundaries_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-            anomalous_feature_collection.write(anomalous_ridges_transforms_filename)
-
+            ridge_transform_boundary_section_feature_collection = remove_black_listed_features(
+                ridge_transform_boundary_section_feature_collection, topology_graph.blacklist_ids(False))
+            if want_anomalous:
+                output_collections['anomalous_ridge_transform_boundaries'] = pygplates.FeatureCollection(anomalous_ridge)
 
-        ridge_transform_boundary_section_features_filename = '{0}ridge_transform_boundaries_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-        ridge_transform_boundary_section_feature_collection.write(ridge_transform_boundary_section_features_filename)
+        output_collections['ridge_transform_boundaries'] = ridge_transform_boundary_section_feature_collection
         
-    if subduction_boundary_section_features:
+    # All subduction zones, and the left and right polarity ones
+    for name, section_features in (
+            ('subduction_boundaries', subduction_boundary_section_features),
+            ('subduction_boundaries_sL', left_subduction_boundary_section_features),
+            ('subduction_boundaries_sR', right_subduction_boundary_section_features)):
+        if not section_features:
+            continue
         # Put the features in a feature collection so we can write them to a file.
-        subduction_boundary_section_feature_collection = pygplates.FeatureCollection(subduction_boundary_section_features)
+        section_feature_collection = pygplates.FeatureCollection(section_features)
         
         # In the case that there are anomalous (duplicated) features present, anomalous segments are added to a feature collection and 
         # written to a file
         if anomalous_sz:
-            # Write a file containing all of the anomalous subduction zones
-            anomalous_feature_collection = pygplates.FeatureCollection(anomalous_sz)
             # Anomalous segments are filtered from resolved feature collection
-            subduction_boundary_section_feature_collection = filter_anomalous(anomalous_feature_collection,\
-                subduction_boundary_section_feature_collection)
-            anomalous_subduction_boundaries_filename='{0}anomalous_subduction_boundaries_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-            anomalous_feature_collection.write(anomalous_subduction_boundaries_filename)
-
-        subduction_boundary_section_features_filename = '{0}subduction_boundaries_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-        subduction_boundary_section_feature_collection.write(subduction_boundary_section_features_filename)
-        
-    if left_subduction_boundary_section_features:
-        # Put the features in a feature collection so we can write them to a file.
-        left_subduction_boundary_section_feature_collection = pygplates.FeatureCollection(left_subduction_boundary_section_features)
-        
-        if anomalous_sz:
-            anomalous_feature_collection = pygplates.FeatureCollection(anomalous_sz)
-            # Anomalous segments are filtered from resolved feature collection
-            left_subduction_boundary_section_feature_collection = filter_anomalous(anomalous_feature_collection,\
-                left_subduction_boundary_section_feature_collection)
-            anomalous_left_subduction_filename = '{0}anomalous_subduction_boundaries_sL_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-            anomalous_feature_collection.write(anomalous_left_subduction_filename)
+            section_feature_collection = remove_black_listed_features(
+                section_feature_collection, topology_graph.blacklist_ids(True))
+            if want_anomalous:
+                # A file containing all of the anomalous subduction zones
+                output_collections['anomalous_{0}'.format(name)] = pygplates.FeatureCollection(anomalous_sz)
+
+        output_collections[name] = section_feature_collection
+
+    return output_collections
 
-        
-        left_subduction_boundary_section_features_filename = '{0}subduction_boundaries_sL_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-        left_subduction_boundary_section_feature_collection.write(left_subduction_boundary_section_features_filename)
-        
-    if right_subduction_boundary_section_features:
-        # Put the features in a feature collection so we can write them to a file.
-        right_subduction_boundary_section_feature_collection = pygplates.FeatureCollection(right_subduction_boundary_section_features)
-        
-        if anomalous_sz:
-            anomalous_feature_collection = pygplates.FeatureCollection(anomalous_sz)
-            # Anomalous segments are filtered from resolved feature collection
-            right_subduction_boundary_section_feature_collection = filter_anomalous(anomalous_feature_collection,\
-                right_subduction_boundary_section_feature_collection)
-            anomalous_right_subduction_filename = '{0}anomalous_subduction_boundaries_sR_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-            anomalous_feature_collection.write(anomalous_right_subduction_filename)
-        
-        right_subduction_boundary_section_features_filename = '{0}subduction_boundaries_sR_{1:0.2f}Ma.{2}'.format(
-                output_filename_prefix, reconstruction_time, output_filename_extension)
-        right_subduction_boundary_section_feature_collection.write(right_subduction_boundary_section_features_filename)
+
+def resolve_topologies(rotation_model, topological_features, reconstruction_time, output_filename_prefix, \
+    output_filename_extension, anchor_plate_id, outputs=None, writer=None):
+
+    output_collections = resolve_output_collections(
+            rotation_model, topological_features, reconstruction_time, anchor_plate_id, outputs)
+    write_feature_collections(
+            [(output_collections[name], output_filename(output_filename_prefix, name, reconstruction_time, output_filename_extension))
+                for name in output_names(outputs) if name in output_collections],
+            writer)
+
+
+# As resolve_topologies, but first looks each requested output up in the resolved topology cache (see
+# resolve_cache.py). Only the classes of the outputs not found are resolved, and their outputs are stored,
+# so runs asking for other outputs of the same time (e.g. the '-e xy' plotting outputs, or the crust workflow)
+# find what they have in common. The rotation model and topological features are only loaded (by
+# 'load_inputs') on a miss.
+def resolve_topologies_cached(cache, key, load_inputs, reconstruction_time, output_filename_prefix, \
+    output_filename_extension, anchor_plate_id, outputs=None, writer=None):
+
+    missing_names = []
+    for name in output_names(outputs):
+        output_key = cache.output_key(key, name)
+        cached_names = cache.lookup(output_key)
+        # An empty output is cached with no collection (and no file is written, as in resolve_topologies)
+        if cached_names is None or (name in cached_names and not cache.export(output_key, name,
+                output_filename(output_filename_prefix, name, reconstruction_time, output_filename_extension))):
+            missing_names.append(name)
+    if not missing_names:
+        return
+
+    missing_outputs = set()
+    for name in missing_names:
+        if name.startswith('anomalous_'):
+            missing_outputs.update(['anomalous', name[len('anomalous_'):]])
+        else:
+            missing_outputs.add(name)
+
+    rotation_model, topological_features = load_inputs()
+    output_collections = resolve_output_collections(
+            rotation_model, topological_features, reconstruction_time, anchor_plate_id, missing_outputs)
+    writes = []
+    for name in output_names(missing_outputs):
+        if name in missing_names and name in output_collections:
+            writes.append((output_collections[name],
+                    output_filename(output_filename_prefix, name, reconstruction_time, output_filename_extension)))
+        cache.store(cache.output_key(key, name),
+                {name: output_collections[name]} if name in output_collections else {}, evict=False)
+    write_feature_collections(writes, writer)
+    cache.evict()
 
     
 if __name__ == "__main__":
@@ -445,6 +707,20 @@ if __name__ == "__main__":
                 "- the default extension is '{0}' - supported extensions include 'shp', 'gmt' and 'xy'."
                 .format(DEFAULT_OUTPUT_FILENAME_EXTENSION))
     
+    parser.add_argument('-o', '--outputs', type=str, nargs='+', choices=OUTPUT_CLASSES, default=OUTPUT_CLASSES,
+            metavar='output_class',
+            help="The classes of output files to produce - the default is all of them: {0}. Classes that are not "
+                "requested are neither built, filtered for anomalous segments, nor written.".format(', '.join(OUTPUT_CLASSES)))
+
+    parser.add_argument('-w', '--write_queue_size', type=int, default=DEFAULT_WRITE_QUEUE_SIZE,
+            help="When resolving more than one time, the maximum number of times whose output files are written in "
+                "background processes while the next time is resolved - the default is '{0}' - zero writes each file "
+                "before continuing. Only faster with spare CPUs.".format(DEFAULT_WRITE_QUEUE_SIZE))
+    
+    age_profiler.add_arguments(parser)
+    resolve_cache.add_arguments(parser)
+    memory_monitor.add_arguments(parser)
+
     parser.add_argument('output_filename_prefix', type=str, nargs='?',
             default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
             help="The prefix of the output files containing the resolved topological boundaries and sections "
@@ -454,16 +730,67 @@ if __name__ == "__main__":
     # Parse command-line options.
     args = parser.parse_args()
     
-    rotation_model = pygplates.RotationModel(args.rotation_filenames)
-    
-    topological_features = [pygplates.FeatureCollection(topology_filename)
-            for topology_filename in args.topology_filenames]
+    # Loaded on first use, which is never when every time is found in the cache
+    loaded_inputs = []
+    def load_inputs():
+        if not loaded_inputs:
+            rotation_model = pygplates.RotationModel(args.rotation_filenames)
+            topological_features = [pygplates.FeatureCollection(topology_filename)
+                    for topology_filename in args.topology_filenames]
+            loaded_inputs.append((rotation_model, topological_features))
+        return loaded_inputs[0]
     
-    for reconstruction_time in args.reconstruction_times:
-        resolve_topologies(
-                rotation_model,
-                topological_features,
-                reconstruction_time,
-                args.output_filename_prefix,
-                args.output_filename_extension,
-                args.anchor_plate_id)
+    profiler = age_profiler.AgeProfiler.from_arguments(args, 'resolve')
+    monitor = memory_monitor.MemoryMonitor.from_arguments(args, 'resolve')
+
+    # With '-w', when resolving several times, output files are written in the background while the next time is
+    # resolved. Not when profiling though, so that the writing is part of the profile of each time.
+    writer = None
+    if len(args.reconstruction_times) > 1 and args.write_queue_size > 0 and not profiler.enabled:
+        writer = BackgroundWriter(args.write_queue_size)
+
+    # The outputs also depend on the anomalous segment filter (this script and its search radius)
+    cache = resolve_cache.ResolveCache.from_arguments(args)
+    if cache is not None:
+        cache_settings = {'script': cache.file_digests([__file__])[0], 'max_distance': max_distance}
+
+    try:
+        for time_index, reconstruction_time in enumerate(args.reconstruction_times):
+            with monitor.age(reconstruction_time):
+                if cache is not None:
+                    profiler.run(
+                            reconstruction_time,
+                            resolve_topologies_cached,
+                            cache,
+                            cache.key(args.rotation_filenames, args.topology_filenames, args.anchor_plate_id,
+                                    reconstruction_time, cache_settings),
+                            load_inputs,
+                            reconstruction_time,
+                            args.output_filename_prefix,
+                            args.output_filename_extension,
+                            args.anchor_plate_id,
+                            args.outputs,
+                            writer)
+                else:
+                    rotation_model, topological_features = load_inputs()
+                    profiler.run(
+                            reconstruction_time,
+                            resolve_topologies,
+                            rotation_model,
+                            topological_features,
+                            reconstruction_time,
+                            args.output_filename_prefix,
+                            args.output_filename_extension,
+                            args.anchor_plate_id,
+                            args.outputs,
+                            writer)
+
+            # Continue the remaining times in a fresh process once over the memory ceiling
+            if monitor.recycling_needed and time_index + 1 < len(args.reconstruction_times):
+                if writer is not None:
+                    writer.close()
+                    writer = None
+                monitor.recycle(args.reconstruction_times[time_index + 1:])
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,332 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import importlib.util
+import multiprocessing
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import grid_stack
+import spherical_tools
+
+# resolve_topologies_V.2.py is not a valid module name, so it is loaded from its path
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+
+DEFAULT_TESSELLATION_SPACING_KM = 10.0
+DEFAULT_VELOCITY_DELTA_TIME = 1.0 # Myr
+
+# Carbonated upper oceanic crust (Jarrard, 2003, G-cubed) and sediment (GLOSS, Plank and Langmuir, 1998) defaults
+DEFAULT_UPPER_CRUST_THICKNESS_KM = 0.6
+DEFAULT_UPPER_CRUST_DENSITY = 2.9 # g/cm3
+DEFAULT_SEDIMENT_DENSITY = 2.0 # g/cm3
+DEFAULT_SEDIMENT_CO2_PERCENT = 3.01 # wt %
+
+DEFAULT_OUTPUT_FILENAME_PREFIX = 'subduction_carbon_flux'
+
+# Columns of the per-point output files
+POINT_COLUMNS = ['Lon', 'Lat', 'Length_km', 'Convergence_mm_yr', 'Crust_Age_Myr', 'Crust_CO2_wt', 'Sediment_m',
+                 'Crust_Flux_Mt_yr', 'Sediment_Flux_Mt_yr']
+
+
+###################### Subduction zone points #####################
+
+
+# Resolves the topologies at 'reconstruction_time' and returns the subduction zone sub-segments left once the
+# anomalous (duplicated) segments are removed, in the same way as resolve_topologies() in resolve_topologies_V.2.py
+def resolve_subduction_sub_segments(rotation_model, topological_features, reconstruction_time, anchor_plate_id):
+
+    resolved_topologies = []
+    shared_boundary_sections = []
+    pygplates.resolve_topologies(
+            topological_features, rotation_model, resolved_topologies, reconstruction_time, shared_boundary_sections,
+            anchor_plate_id)
+
+    topology_graph = resolve_topologies_V2.TopologyGraph(shared_boundary_sections, lambda is_subduction: is_subduction)
+    return [node.shared_sub_segment for node in topology_graph.filtered_section_nodes(True)]
+
+
+# Tessellates the subduction zone sub-segments at a fixed spacing. Returns, as flat arrays, the point positions,
+# the trench length each point stands for, the azimuth of the trench-normal pointing to the overriding plate,
+# and the overriding and subducting plate IDs. Sub-segments whose plates cannot be determined are skipped.
+def tessellate_subduction_zones(subduction_sub_segments, spacing):
+
+    lons, lats, lengths, normal_azimuths, overriding_ids, subducting_ids = [], [], [], [], [], []
+    for shared_sub_segment in subduction_sub_segments:
+        plates = shared_sub_segment.get_overriding_and_subducting_plates(True)
+        if plates is None:
+            continue
+        overriding_plate, subducting_plate, polarity = plates
+
+        lat_lon_points = np.array(shared_sub_segment.get_resolved_geometry().to_lat_lon_array())
+        segment_lons, segment_lats, azimuths = spherical_tools.sample_polyline(
+            lat_lon_points[:, 1], lat_lon_points[:, 0], spacing)
+        if segment_lons.size == 0:
+            continue
+
+        # Points share the sub-segment's length equally so the total trench length is preserved
+        segment_length = spherical_tools.polyline_length(lat_lon_points[:, 1], lat_lon_points[:, 0])
+        lons.append(segment_lons)
+        lats.append(segment_lats)
+        lengths.append(np.full(segment_lons.size, segment_length / segment_lons.size))
+        normal_azimuths.append(azimuths - 90.0 if polarity == 'Left' else azimuths + 90.0)
+        overriding_ids.append(np.full(segment_lons.size, overriding_plate.get_feature().get_reconstruction_plate_id()))
+        subducting_ids.append(np.full(segment_lons.size, subducting_plate.get_feature().get_reconstruction_plate_id()))
+
+    if not lons:
+        empty = np.empty(0)
+        return empty, empty, empty, empty, empty.astype(int), empty.astype(int)
+
+    return (np.concatenate(lons), np.concatenate(lats), np.concatenate(lengths), np.concatenate(normal_azimuths),
+            np.concatenate(overriding_ids).astype(int), np.concatenate(subducting_ids).astype(int))
+
+
+###################### Convergence velocities #####################
+
+
+# Returns the angular velocity vector (radians/Myr, in the anchor plate frame) of the subducting plate relative to
+# the overriding plate, from the stage rotation between 'reconstruction_time + delta_time' and 'reconstruction_time'
+def relative_angular_velocity(rotation_model, reconstruction_time, subducting_plate_id, overriding_plate_id,
+        delta_time, anchor_plate_id):
+
+    relative_stage_rotation = rotation_model.get_rotation(
+            reconstruction_time, subducting_plate_id, reconstruction_time + delta_time, overriding_plate_id,
+            anchor_plate_id=anchor_plate_id)
+
+    # The relative stage rotation is in the overriding plate's frame, so move it into the anchor plate frame
+    overriding_plate_frame = rotation_model.get_rotation(
+            reconstruction_time, overriding_plate_id, anchor_plate_id=anchor_plate_id)
+    relative_stage_rotation = overriding_plate_frame * relative_stage_rotation * overriding_plate_frame.get_inverse()
+
+    if relative_stage_rotation.represents_identity_rotation():
+        return np.zeros(3)
+    pole, angle = relative_stage_rotation.get_euler_pole_and_angle()
+    return np.array(pole.to_xyz()) * angle / delta_time
+
+
+# Trench-normal convergence rate (mm/yr, i.e. km/Myr) at every point. One stage rotation is computed per
+# (subducting, overriding) plate pair, then all point velocities are evaluated at once as omega x r.
+def calculate_convergence_rates(rotation_model, reconstruction_time, lons, lats, normal_azimuths,
+        overriding_ids, subducting_ids, delta_time, anchor_plate_id):
+
+    if lons.size == 0:
+        return np.empty(0)
+
+    plate_pairs, pair_index = np.unique(np.stack((subducting_ids, overriding_ids), axis=-1), axis=0, return_inverse=True)
+    angular_velocities = np.array([
+        relative_angular_velocity(rotation_model, reconstruction_time, int(subducting_id), int(overriding_id),
+            delta_time, anchor_plate_id)
+        for subducting_id, overriding_id in plate_pairs])
+
+    positions = spherical_tools.lonlat_to_xyz(lons, lats) * spherical_tools.EARTH_RADIUS_KM
+    velocities = np.cross(angular_velocities[pair_index.ravel()], positions)
+
+    # Unit trench-normal vectors pointing to the overriding plate, from their local east/north components
+    lon_radians = np.radians(lons)
+    lat_radians = np.radians(lats)
+    azimuth_radians = np.radians(normal_azimuths)
+    east = np.stack((-np.sin(lon_radians), np.cos(lon_radians), np.zeros(lons.shape)), axis=-1)
+    north = np.stack((-np.sin(lat_radians) * np.cos(lon_radians), -np.sin(lat_radians) * np.sin(lon_radians),
+                      np.cos(lat_radians)), axis=-1)
+    normals = east * np.sin(azimuth_radians)[:, np.newaxis] + north * np.cos(azimuth_radians)[:, np.newaxis]
+
+    return np.einsum('ij,ij->i', velocities, normals)
+
+
+###################### Carbon flux #####################
+
+
+# Converts a volume flux (trench length km * convergence km/Myr * layer thickness km), a density (g/cm3)
+# and a CO2 content (wt %) into a CO2 mass flux in Mt/yr
+def co2_flux_mt_per_yr(lengths, convergence_rates, thicknesses, density, co2_percent):
+    return lengths * convergence_rates * thicknesses * density * (co2_percent / 100.0) * 1e-3
+
+
+# Calculates the per-point carbon flux of all subduction zones at one reconstruction time.
+# Returns a (number of points, len(POINT_COLUMNS)) array.
+def calculate_carbon_flux(rotation_model, topological_features, reconstruction_time, age_stack, sediment_stack,
+        parameters):
+
+    subduction_sub_segments = resolve_subduction_sub_segments(
+            rotation_model, topological_features, reconstruction_time, parameters['anchor_plate_id'])
+    lons, lats, lengths, normal_azimuths, overriding_ids, subducting_ids = tessellate_subduction_zones(
+            subduction_sub_segments, parameters['spacing'])
+
+    convergence_rates = calculate_convergence_rates(
+            rotation_model, reconstruction_time, lons, lats, normal_azimuths, overriding_ids, subducting_ids,
+            parameters['delta_time'], parameters['anchor_plate_id'])
+
+    crust_ages = age_stack.sample(reconstruction_time, lons, lats)
+    crust_co2 = grid_stack.crust_co2_from_age(crust_ages)
+    if sediment_stack is not None and sediment_stack.has_time(reconstruction_time):
+        sediment_thicknesses = sediment_stack.sample(reconstruction_time, lons, lats)
+    else:
+        sediment_thicknesses = np.full(lons.shape, np.nan)
+
+    # Only converging trench points carry carbon into the subduction zone
+    subducting_rates = np.clip(convergence_rates, 0.0, None)
+    crust_flux = co2_flux_mt_per_yr(lengths, subducting_rates, parameters['upper_crust_thickness'],
+            parameters['upper_crust_density'], np.nan_to_num(crust_co2))
+    sediment_flux = co2_flux_mt_per_yr(lengths, subducting_rates, np.nan_to_num(sediment_thicknesses) / 1000.0,
+            parameters['sediment_density'], parameters['sediment_co2_percent'])
+
+    return np.column_stack((lons, lats, lengths, convergence_rates, crust_ages, crust_co2, sediment_thicknesses,
+                            crust_flux, sediment_flux))
+
+
+###################### Parallel driver #####################
+
+
+# Per-process state, loaded once by each worker process
+worker_state = {}
+
+
+def initialise_worker(rotation_filenames, topology_filenames, age_grid_directory, sediment_grid_directory, parameters):
+    cache = grid_stack.TileCache(int(parameters['cache_size'] * 1024 * 1024))
+    worker_state['rotation_model'] = pygplates.RotationModel(rotation_filenames)
+    worker_state['topological_features'] = [pygplates.FeatureCollection(topology_filename)
+            for topology_filename in topology_filenames]
+    worker_state['age_stack'] = grid_stack.GridStack(age_grid_directory, cache=cache)
+    worker_state['sediment_stack'] = (grid_stack.GridStack(sediment_grid_directory, cache=cache)
+            if sediment_grid_directory else None)
+    worker_state['parameters'] = parameters
+
+
+# Returns no points for an age without an age grid (the age is skipped)
+def calculate_carbon_flux_worker(reconstruction_time):
+    if not worker_state['age_stack'].has_time(reconstruction_time):
+        return reconstruction_time, None
+    return reconstruction_time, calculate_carbon_flux(
+            worker_state['rotation_model'], worker_state['topological_features'], reconstruction_time,
+            worker_state['age_stack'], worker_state['sediment_stack'], worker_state['parameters'])
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    if not hasattr(pygplates.ResolvedTopologicalSharedSubSegment, 'get_overriding_and_subducting_plates'):
+        print('{0}: Error - imported pygplates version {1} does not support '
+              'ResolvedTopologicalSharedSubSegment.get_overriding_and_subducting_plates()'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version()),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Calculate the carbon flux (crust and sediment CO2) entering subduction zones.
+
+    Resolved subduction zones are tessellated at a fixed spacing, the trench-normal convergence velocity of
+    every point is calculated from the rotation model's stage rotations, and combined with the crustal age
+    (converted to upper crust CO2 content) and sediment thickness sampled at the point.
+    Ages are processed in parallel. Writes a per-point file for each time and a global time series.
+
+    NOTE: Separate the positional and optional arguments with '--' (workaround for bug in argparse module).
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -a AgeGrids -s SedimentGrids -t 0 1 2 -- subduction_carbon_flux"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-t', '--reconstruction_times', type=float, nargs='+', required=True,
+            metavar='reconstruction_time',
+            help='One or more times at which to calculate the carbon flux.')
+    parser.add_argument('-a', '--age_grid_directory', type=str, required=True,
+            help='Directory containing the time-dependent age grids.')
+    parser.add_argument('-s', '--sediment_grid_directory', type=str,
+            help='Directory containing the time-dependent sediment thickness grids (m).')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-d', '--spacing', type=float, default=DEFAULT_TESSELLATION_SPACING_KM,
+            help='Spacing of points along the subduction zones (km). Defaults to {0}.'.format(DEFAULT_TESSELLATION_SPACING_KM))
+    parser.add_argument('--delta_time', type=float, default=DEFAULT_VELOCITY_DELTA_TIME,
+            help='Time interval of the stage rotations (Myr). Defaults to {0}.'.format(DEFAULT_VELOCITY_DELTA_TIME))
+    parser.add_argument('--upper_crust_thickness', type=float, default=DEFAULT_UPPER_CRUST_THICKNESS_KM,
+            help='Thickness of the carbonated upper crust (km). Defaults to {0}.'.format(DEFAULT_UPPER_CRUST_THICKNESS_KM))
+    parser.add_argument('--upper_crust_density', type=float, default=DEFAULT_UPPER_CRUST_DENSITY,
+            help='Density of the upper crust (g/cm3). Defaults to {0}.'.format(DEFAULT_UPPER_CRUST_DENSITY))
+    parser.add_argument('--sediment_density', type=float, default=DEFAULT_SEDIMENT_DENSITY,
+            help='Density of the sediments (g/cm3). Defaults to {0}.'.format(DEFAULT_SEDIMENT_DENSITY))
+    parser.add_argument('--sediment_co2', type=float, default=DEFAULT_SEDIMENT_CO2_PERCENT,
+            dest='sediment_co2_percent',
+            help='CO2 content of the sediments (wt %%). Defaults to {0}.'.format(DEFAULT_SEDIMENT_CO2_PERCENT))
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('-c', '--cache_size', type=float, default=grid_stack.DEFAULT_CACHE_SIZE_MB,
+            help='Size of the grid tile cache of each process (MB). Defaults to {0}.'.format(grid_stack.DEFAULT_CACHE_SIZE_MB))
+    parser.add_argument('-o', '--output_directory', type=str, default='.',
+            help='Directory of the output files.')
+
+    parser.add_argument('output_filename_prefix', type=str, nargs='?',
+            default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
+            help="The prefix of the output files - the default prefix is '{0}'".format(DEFAULT_OUTPUT_FILENAME_PREFIX))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.output_directory):
+        os.makedirs(args.output_directory)
+
+    parameters = {
+        'anchor_plate_id': args.anchor_plate_id,
+        'spacing': args.spacing,
+        'delta_time': args.delta_time,
+        'upper_crust_thickness': args.upper_crust_thickness,
+        'upper_crust_density': args.upper_crust_density,
+        'sediment_density': args.sediment_density,
+        'sediment_co2_percent': args.sediment_co2_percent,
+        'cache_size': args.cache_size}
+
+    global_flux_filename = os.path.join(args.output_directory, 'global_{0}_data.dat'.format(args.output_filename_prefix))
+    with open(global_flux_filename, 'w') as global_flux_file:
+        global_flux_file.write('Age Trench_Length_km Crust_Flux_Mt_yr Sediment_Flux_Mt_yr Total_Flux_Mt_yr\n')
+
+        pool = multiprocessing.Pool(args.processes, initialise_worker,
+                (args.rotation_filenames, args.topology_filenames, args.age_grid_directory,
+                 args.sediment_grid_directory, parameters))
+        try:
+            # Results come back in time order, so the global time series can be written as they arrive
+            for reconstruction_time, points in pool.imap(calculate_carbon_flux_worker, args.reconstruction_times):
+                if points is None:
+                    print('{0}: Warning - skipping {1:g} Ma, no age grid of that time in "{2}"'.format(
+                            os.path.basename(__file__), reconstruction_time, args.age_grid_directory), file=sys.stderr)
+                    continue
+                point_filename = os.path.join(args.output_directory, '{0}_{1:0.2f}Ma.xy'.format(
+                        args.output_filename_prefix, reconstruction_time))
+                np.savetxt(point_filename, points, fmt='%.6f', header=' '.join(POINT_COLUMNS))
+
+                crust_flux = points[:, 7].sum()
+                sediment_flux = points[:, 8].sum()
+                global_flux_file.write('{0:g} {1:.1f} {2:.6f} {3:.6f} {4:.6f}\n'.format(
+                        reconstruction_time, points[:, 2].sum(), crust_flux, sediment_flux, crust_flux + sediment_flux))
+                global_flux_file.flush()
+        finally:
+            pool.close()
+            pool.join()
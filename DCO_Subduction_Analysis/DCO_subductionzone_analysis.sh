@@ -38,6 +38,19 @@
 #   -a    files depicting cotinental outlines  (gpml or shp)
 #   -s    files depicting present-day coastlines outlines  (gpml or shp)
 #   -p    Cross-profile length (km)
+#   -g    mask mode used to find subduction zones near carbonate platforms and continents:
+#         'global' (default) builds global GMT mask grids (grdmask/grdtrack), kept in
+#         PlateBoundaryFeatures as mask stacks (scripts/mask_stack.py extract gives back a grid);
+#         'corridor' rasterises the polygons sparsely, only inside the trench corridor searched by the
+#         cross-profiles (scripts/corridor_mask.py; the Python cross-profiles can differ from GMT's by the
+#         odd profile at the end of a subduction zone, so the lengths differ slightly from 'global');
+#         'analytic' clips the polygons against the area swept by the cross-profiles (exact lengths,
+#         independent of the profile spacing and mask resolution); 'present_day' indexes the present-day
+#         polygons by plate id once per run and rotates the cross-profile points of each age back to present
+#         day (see scripts/present_day_index.py), so the polygons are not rasterised at each age
+#   -u    update mode: only the ages affected by edits of the input files since the previous run are
+#         recomputed (see scripts/change_detection.py), the other ages are kept from Results and
+#         PlateBoundaryFeatures. Without a previous run, or with different options, every age is computed.
 
 # If there are multiple feature files or rotation files following the argument
 # flag, separate the files with a space and enclose them with a double quotes
@@ -48,8 +61,10 @@
 # The analysis will produce a folder named Results containing four dat files:
 # global_continent_arc_percentage_data, global_sz_length_carbonate_data,
 # global_sz_length_continentarc_data and global_sz_length_data.
-# A folder called PlateBoundaryFeatures will be produced, containing resolved plate boundaries
-# (subduction, MOR and transform) at each time step.
+# A folder called PlateBoundaryFeatures will be produced, containing the resolved subduction zones
+# (all, left and right polarity) and the plate boundary polygons used for the maps at each time step
+# (mid-ocean ridges and transforms are not written).
+# A folder called Maps will contain a map of each time step (rendered once all time steps are analysed).
 
 
 # For more information on this project's methodologies, refer to the blog on the EarthByte Website:
@@ -58,19 +73,38 @@
 ####################### Global Variables #######################
 directory="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 
-rm -rf PlateBoundaryFeatures
-rm -rf Results
+# The outputs of the previous run are removed unless running in update mode (-u)
+update_mode=0
+
+# Opt-in profiling of the resolve and reconstruct scripts: set DCO_PROFILE_DIR to an absolute directory to keep
+# the profiles of the slowest ages there (see scripts/age_profiler.py)
+profile_args=${DCO_PROFILE_DIR:+--profile_dir ${DCO_PROFILE_DIR}}
+
+# Opt-in resolved topology cache: set DCO_RESOLVE_CACHE to an absolute directory to resolve each output of an age once across
+# runs and workflows (see scripts/resolve_cache.py)
+cache_args=${DCO_RESOLVE_CACHE:+--cache_dir ${DCO_RESOLVE_CACHE}}
+
+# Opt-in in-process GMT: set DCO_GMT_SESSION (needs PyGMT) to run the GMT steps of the total subduction zone
+# length and of the global mask mode of every age in one call after the age loop (one GMT session per worker
+# process, without temporary files, see scripts/gmt_session.py). DCO_GMT_SESSION=compare also checks the first age
+# against the GMT command line steps and stops if they differ.
+gmt_session=${DCO_GMT_SESSION:+1}
+
+# Opt-in re-framing: set DCO_REFRAME_ANCHOR to a plate id to also write the per-age files of PlateBoundaryFeatures
+# rotated into that anchor plate's frame to Anchor_<id>/<age>, and their maps to Maps/Anchor_<id>, without resolving
+# again (see scripts/reframe_anchor.py)
+reframe_anchor=${DCO_REFRAME_ANCHOR}
 
-# Initialise for PLOTTING
+# Initialise for PLOTTING (the maps are rendered by scripts/render_maps.py after the analysis loop)
 
-frame=d # geographic -180/180/-90/90
-proj=R30/20c # Mollweide projection, central meridian, and width (in centimeters)
+central_meridian=30 # Mollweide projection central meridian
+
+# Mask mode (global, corridor, analytic or present_day), see -g
+mask_mode=global
 
 # GMT plotting defaults for reproducibility
 gmt gmtset PS_COLOR_MODEL=RGB PS_MEDIA=A2 MAP_FRAME_TYPE=plain FORMAT_GEO_MAP=ddd:mm:ssF FONT_ANNOT_PRIMARY=14p MAP_FRAME_PEN=thin FONT_LABEL=16p,Helvetica,black PROJ_LENGTH_UNIT=cm
 # coastlines=PlateMotionModel_and_GeometryFiles/Muller_etal_2019_Global_Coastlines.gpmlz
-plotting_cpt=carbonates_v2.cpt
-#plotting_cpt=carbonates.cpt
 
 # Main function called to initialise script
 main(){
@@ -88,7 +122,7 @@ local coastlines=""
 local x_prof_length=""
 
 # Parse Input Arguments
-while getopts "r:t:m:n:c:a:s:p:" opt; do
+while getopts "r:t:m:n:c:a:s:p:g:u" opt; do
 case $opt in
 r)
 rotfile="$OPTARG"
@@ -136,6 +170,18 @@ x_prof_length=$( echo $OPTARG | awk '{print int($1)*2"k"}' )
 # exit
 ;;
 
+g)
+mask_mode="$OPTARG"
+if [[ ! $mask_mode =~ ^(global|corridor|analytic|present_day)$ ]]; then
+echo >&2 "Invalid mask mode: -g $OPTARG (use global, corridor, analytic or present_day)"
+exit 1
+fi
+;;
+
+u)
+update_mode=1
+;;
+
 \?)
 echo >&2 "Invalid option: -$OPTARG"
 exit 1
@@ -319,25 +365,65 @@ local outfile_format="gmt"
 # Clean files from prior run
 rm $global_sz_length $global_sz_length_carbonate $global_sz_length_continentarc $global_continent_arc_percentage
 
+# Snapshot of the input files of the last run, used by the update mode to find the ages affected by edits
+local snapshot=Results/input_snapshot.json
+local snapshot_inputs="-m ${topologies} ${carbonate} ${continental_polygons} ${coastlines} -r ${rotfile} --settings ${mask_mode}_${x_prof_length}"
+local ages
+
+if [[ $update_mode == 1 ]] && [[ -d Results ]]
+then
+ages=$(python3 ${directory}/scripts/change_detection.py diff ${snapshot_inputs} -s ${snapshot} -t ${age} ${from_age})
+echo >&2 "Ages affected by the edits: $(echo ${ages})"
+# Keep the results of the other ages
+for result in $global_sz_length $global_sz_length_carbonate $global_sz_length_continentarc $global_continent_arc_percentage
+do
+touch Results/${result}
+awk 'NR == FNR { invalid[$1] = 1; next } !($1 in invalid)' <(echo "${ages}") Results/${result} > ${result}
+done
+else
+rm -rf PlateBoundaryFeatures
+rm -rf Results
+rm -rf Maps
+ages=$(seq ${age} ${from_age})
+fi
+
+if [[ -z ${ages} ]]
+then
+echo >&2 "No ages affected by edits since the previous run"
+rm -f $global_sz_length $global_sz_length_carbonate $global_sz_length_continentarc $global_continent_arc_percentage
+return
+fi
+
 # Create directory folders
 if [ ! -d "Results" ]
 then
 mkdir "Results"
 fi
 
+# Index the present-day carbonate platforms and continents once for all ages
+if [[ $mask_mode == "present_day" ]]
+then
+python3 ${directory}/scripts/present_day_index.py build -m ${carbonate} -o carbonate_present_day_index.npz
+python3 ${directory}/scripts/present_day_index.py build -m ${continental_polygons} -o continent_present_day_index.npz
+fi
+
 # Iterate through each 1 myr timestep, conducting subduction zone analyses
-while (( $age <= from_age ))
+for age in ${ages}
 do
 
 echo >&2 "Time Step: $age"
+rm -rf PlateBoundaryFeatures/${age}
 mkdir -p PlateBoundaryFeatures/${age}
 
-# Use pygplates to export resolved topologies and remove duplicate segments
+# Use pygplates to export resolved topologies and remove duplicate segments (only the subduction zones are analysed)
 echo ${topologies}
-python3 ${directory}/scripts/resolve_topologies_V.2.py -r ${rotfile} -m ${topologies} -t ${age} -e ${outfile_format} -- ${outfilename_prefix}
+python3 ${directory}/scripts/resolve_topologies_V.2.py -r ${rotfile} -m ${topologies} -t ${age} -e ${outfile_format} \
+--outputs subduction_boundaries subduction_boundaries_sL subduction_boundaries_sR ${profile_args} ${cache_args} -- ${outfilename_prefix}
 
-# Calculate total global subduction zone length (km)
+# Calculate total global subduction zone length (km), measured for every age after the loop in GMT session mode
+if [[ -z ${gmt_session} ]]; then
 sz_total_length_km=$(calculate_sz_length_total "$outfilename_prefix")
+fi
 
 # Calculate total subduction zone length (km) intersecting with carbonate platforms
 sz_carbonate=$(calculate_sz_length_carbonate "$rotfile" "$age" "$carbonate" "$outfilename_prefix")
@@ -345,6 +431,8 @@ sz_carbonate=$(calculate_sz_length_carbonate "$rotfile" "$age" "$carbonate" "$ou
 # Calculate total subduction zone length (km) intersecting with continents
 sz_length_con_arc=$(calculate_sz_length_continentArc "$rotfile" "$age" "$continental_polygons" "$outfilename_prefix")
 
+if [[ -z ${gmt_session} ]]; then
+
 # Calculate proportion of global subduction zones that are continental arcs opposed to intra-oceanic arcs
 con_arc_percent=$(calculate_sz_percentage_continentArc $sz_length_con_arc $sz_total_length_km)
 
@@ -354,52 +442,120 @@ echo $age $sz_carbonate >> $global_sz_length_carbonate
 echo $age $sz_length_con_arc >> $global_sz_length_continentarc
 echo $age $con_arc_percent >> $global_continent_arc_percentage
 
-python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${coastlines} -t ${age} -e gmt -- coast
+elif [[ $mask_mode != "global" ]]; then
 
-python3 ${directory}/scripts/resolve_topologies_V.2.py -r ${rotfile} -m ${topologies} -t ${age} -e xy 
-
-# Migrate all resolved feature files at each timestep to a new age-stamped folder
-mv topology*.xy *.gmt *.xml *.nc PlateBoundaryFeatures/${age}
-
-#  ### START OF PLOTTING SECTION ###
+# Only the total length (and the global mask mode) is left to the GMT session call after the loop
+echo $age $sz_carbonate >> $global_sz_length_carbonate
+echo $age $sz_length_con_arc >> $global_sz_length_continentarc
 
-carbonate_platform_grid=PlateBoundaryFeatures/${age}/carbonate_platforms_plotting_${age}.nc
+fi
 
-psfile=carbonates_${age}.ps
+python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${coastlines} -t ${age} -e gmt ${profile_args} -- coast
 
-continents=PlateBoundaryFeatures/${age}/continental_polygons_closed_${age}.gmt
-coastline=PlateBoundaryFeatures/${age}/reconstructed_coast_${age}.0Ma.gmt
-topologies_plot=PlateBoundaryFeatures/${age}/topology_boundary_polygons_${age}.00Ma.xy
-subduction_left=PlateBoundaryFeatures/${age}/topology_subduction_boundaries_sL_${age}.00Ma.xy
-subduction_right=PlateBoundaryFeatures/${age}/topology_subduction_boundaries_sR_${age}.00Ma.xy
+# Plate boundaries and subduction zones for plotting
+python3 ${directory}/scripts/resolve_topologies_V.2.py -r ${rotfile} -m ${topologies} -t ${age} -e xy \
+--outputs boundary_polygons subduction_boundaries_sL subduction_boundaries_sR ${profile_args} ${cache_args}
 
-gmt psbasemap -R${frame} -J${proj} -Ba180/a30WeSn -G224 -Y5c -P -K -V4 > $psfile
-     
-gmt psxy -R -J $continents -G210/180/140 -L -K -O -V4 >> $psfile
+# Migrate all resolved feature files at each timestep to a new age-stamped folder
+mv topology*.xy *.gmt *.xml PlateBoundaryFeatures/${age}
 
-gmt psxy -R -J $coastline -Gnavajowhite4 -K -O -V4 >> $psfile
+done
 
-gmt grdimage -C${plotting_cpt} ${carbonate_platform_grid} -J -R -V -Q -K -O -t20 >> $psfile
+rm -f carbonate_present_day_index.npz continent_present_day_index.npz
 
-gmt psxy -R -J -W1p,80 $topologies_plot -K -O -V4 -N >> $psfile
+# GMT session mode: measure every age in one call (the ages run on a process pool, one GMT session per worker),
+# from the files kept in PlateBoundaryFeatures/<age>, and append its 'age total [carbonate continent]' rows
+if [[ -n ${gmt_session} ]]
+then
+local feature_args=
+if [[ $mask_mode == "global" ]]
+then
+feature_args="--sz_left PlateBoundaryFeatures/{age}/${outfilename_prefix}subduction_boundaries_sL_{age}.00Ma.gmt \
+--sz_right PlateBoundaryFeatures/{age}/${outfilename_prefix}subduction_boundaries_sR_{age}.00Ma.gmt -c ${x_prof_length} -s 10 \
+--carbonate PlateBoundaryFeatures/{age}/reconstructed_carbonate_{age}.0Ma.gmt \
+--carbonate_grid PlateBoundaryFeatures/reconstructed_carbonate_mask_{age}.nc \
+--carbonate_profile_prefix PlateBoundaryFeatures/{age}/reconstructed_carbonate_mask_{age}.nc_ \
+--continent PlateBoundaryFeatures/{age}/continental_polygons_closed_{age}.gmt \
+--continent_grid PlateBoundaryFeatures/reconstructed_continent_raster_{age}.nc \
+--continent_profile_prefix PlateBoundaryFeatures/{age}/reconstructed_continent_raster_{age}.nc_"
+fi
 
-gmt psxy -R -J -W1p,red -Sf7p/2plt -K -O ${subduction_left} -V4 -N >> $psfile
-gmt psxy -R -J -W1p,red -Sf7p/2prt -K -O ${subduction_right} -V4 -N >> $psfile
+python3 ${directory}/scripts/gmt_session.py lengths -t ${ages} \
+-l PlateBoundaryFeatures/{age}/${outfilename_prefix}subduction_boundaries_{age}.00Ma.gmt ${feature_args} > gmt_session_lengths.txt
 
-echo "18 0 $age Ma" | gmt pstext -F+f26,Helvetica,black -R0/15/0/1 -Jx1 -N -O -V4 >> $psfile
+if [[ ${DCO_GMT_SESSION} == "compare" ]]
+then
+if ! python3 ${directory}/scripts/gmt_session.py lengths --compare -t $(echo ${ages} | awk '{ print $1 }') \
+-l PlateBoundaryFeatures/{age}/${outfilename_prefix}subduction_boundaries_{age}.00Ma.gmt ${feature_args} >&2
+then
+echo >&2 "***** ERROR ***** GMT session lengths differ from the GMT command line steps"
+exit 1
+fi
+fi
 
-gmt psconvert ${psfile} -A -Tj -P
+while read age sz_total_length_km sz_carbonate sz_length_con_arc
+do
+if [[ $mask_mode == "global" ]]
+then
+echo $age $sz_carbonate >> $global_sz_length_carbonate
+echo $age $sz_length_con_arc >> $global_sz_length_continentarc
+else
+sz_length_con_arc=$(awk -v age=$age '$1 == age { print $2 }' $global_sz_length_continentarc)
+fi
+con_arc_percent=$(calculate_sz_percentage_continentArc $sz_length_con_arc $sz_total_length_km)
+echo $age $sz_total_length_km >> $global_sz_length
+echo $age $con_arc_percent >> $global_continent_arc_percentage
+done < gmt_session_lengths.txt
 
-#  ### END OF PLOTTING SECTION ###
-# rm *.xy # *.ps
+rm gmt_session_lengths.txt
+fi
 
+# Pack the mask grids of the global mask mode into mask stacks (keyframes and per-age deltas, see
+# scripts/mask_stack.py), adding the recomputed ages to the stacks of the previous run in update mode
+if [[ $mask_mode == "global" ]]
+then
+python3 ${directory}/scripts/mask_stack.py build -o PlateBoundaryFeatures/carbonate_mask_stack.npz \
+-b PlateBoundaryFeatures/carbonate_mask_stack.npz PlateBoundaryFeatures/reconstructed_carbonate_mask_*.nc --remove
+python3 ${directory}/scripts/mask_stack.py build -o PlateBoundaryFeatures/continent_mask_stack.npz \
+-b PlateBoundaryFeatures/continent_mask_stack.npz PlateBoundaryFeatures/reconstructed_continent_raster_*.nc --remove
+fi
 
-# Increment age
-age=$(( $age + 1 ))
+# Results of recomputed ages are appended after the kept ones in update mode
+for result in $global_sz_length $global_sz_length_carbonate $global_sz_length_continentarc $global_continent_arc_percentage
+do
+sort -n -k1,1 -o ${result} ${result}
 done
 
 mv *.dat Results
 
+# Record the inputs of this run for the next update (-u)
+python3 ${directory}/scripts/change_detection.py snapshot ${snapshot_inputs} -o ${snapshot}
+
+# Render the map of every age on a process pool, from the per-age files in PlateBoundaryFeatures
+python3 ${directory}/scripts/render_maps.py -t ${ages} -o "Maps/carbonates_{age}.jpg" \
+--central_meridian ${central_meridian} \
+--continents "PlateBoundaryFeatures/{age}/continental_polygons_closed_{age}.gmt" \
+--coastlines "PlateBoundaryFeatures/{age}/reconstructed_coast_{age}.0Ma.gmt" \
+--carbonate "PlateBoundaryFeatures/{age}/reconstructed_carbonate_{age}.0Ma.gmt" \
+--topologies "PlateBoundaryFeatures/{age}/topology_boundary_polygons_{age}.00Ma.xy" \
+--subduction_left "PlateBoundaryFeatures/{age}/topology_subduction_boundaries_sL_{age}.00Ma.xy" \
+--subduction_right "PlateBoundaryFeatures/{age}/topology_subduction_boundaries_sR_{age}.00Ma.xy"
+
+# Opt-in re-framing (DCO_REFRAME_ANCHOR): the per-age files rotated into the frame of another anchor plate, and their maps
+if [[ -n ${reframe_anchor} ]]
+then
+python3 ${directory}/scripts/reframe_anchor.py -r ${rotfile} -a ${reframe_anchor} -t ${ages} \
+-i "PlateBoundaryFeatures/{age}/*.gmt" "PlateBoundaryFeatures/{age}/*.xy" -o "Anchor_${reframe_anchor}/{age}"
+python3 ${directory}/scripts/render_maps.py -t ${ages} -o "Maps/Anchor_${reframe_anchor}/carbonates_{age}.jpg" \
+--central_meridian ${central_meridian} \
+--continents "Anchor_${reframe_anchor}/{age}/continental_polygons_closed_{age}.gmt" \
+--coastlines "Anchor_${reframe_anchor}/{age}/reconstructed_coast_{age}.0Ma.gmt" \
+--carbonate "Anchor_${reframe_anchor}/{age}/reconstructed_carbonate_{age}.0Ma.gmt" \
+--topologies "Anchor_${reframe_anchor}/{age}/topology_boundary_polygons_{age}.00Ma.xy" \
+--subduction_left "Anchor_${reframe_anchor}/{age}/topology_subduction_boundaries_sL_{age}.00Ma.xy" \
+--subduction_right "Anchor_${reframe_anchor}/{age}/topology_subduction_boundaries_sR_{age}.00Ma.xy"
+fi
+
 }
 
 # Function used to calculate total global subduction zone lengths at a given timestep
@@ -502,25 +658,56 @@ local szLlayer=${outfilename_prefix}subduction_boundaries_sL_${age}.00Ma.gmt
 local szRlayer=${outfilename_prefix}subduction_boundaries_sR_${age}.00Ma.gmt
 
 local carbonate_mask_grid="reconstructed_carbonate_mask_${age}.nc"
+local carbonate_corridor_mask="reconstructed_carbonate_corridor_mask_${age}.npz"
+local sz_carbonate=0
 
 # Reconstruct carboante platform polygons with given age and plate kinetmatic model
-python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${carbonate} -t ${age} -e gmt -- carbonate
+python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${carbonate} -t ${age} -e gmt ${profile_args} -- carbonate
 
 cp reconstructed_carbonate_${age}.0Ma.gmt PlateBoundaryFeatures/${age}/reconstructed_carbonate_${age}.0Ma.gmt
 
+if [[ $mask_mode == "global" ]] && [[ -n ${gmt_session} ]]; then
+
+# Measured for every age after the loop (see run_analysis), from the copy in PlateBoundaryFeatures/${age}
+rm reconstructed_carbonate_${age}.0Ma.gmt
+return
+
+elif [[ $mask_mode == "global" ]]; then
+
 # Convert reconstructed feature from vector (gmt) into a mask grid (netCDF) format
 gmt grdmask reconstructed_carbonate_${age}.0Ma.gmt -fg -Rd -I10k -N0/1/1 -G${carbonate_mask_grid} -V
 # Try arc units to ensure geographic grid 
 # gmt grdmask reconstructed_carbonate_${age}.0Ma.gmt -fg -Rd -I1s -N0/1/1 -G${carbonate_mask_grid} -V
 # low res for testing, 1 degree
 # gmt grdmask reconstructed_carbonate_${age}.0Ma.gmt -fg -Rd -I1d -N0/1/1 -G${carbonate_mask_grid} -V
-# grid for plotting
-gmt grdmask reconstructed_carbonate_${age}.0Ma.gmt -fg -Rd -I10k -NNaN/1/1 -Gcarbonate_platforms_plotting_${age}.nc -V
 
 cp ${carbonate_mask_grid} PlateBoundaryFeatures/reconstructed_carbonate_mask_${age}.nc
 
 # Call function to calculate length of subduction zones that intersect with given feature. Receives feature mask grid and sz geometry
-local sz_carbonate=$(find_sz_length_containing_feature $carbonate_mask_grid $szLlayer $szRlayer $prof_spacing $prof_interval $prof_length)
+sz_carbonate=$(find_sz_length_containing_feature $carbonate_mask_grid $szLlayer $szRlayer $prof_spacing $prof_interval $prof_length)
+
+elif [[ $mask_mode == "analytic" ]]; then
+
+# Clip the carbonate platforms against the area swept by the cross-profiles and sum the covered trench length
+sz_carbonate=$(python3 ${directory}/scripts/analytic_intersection.py -p reconstructed_carbonate_${age}.0Ma.gmt -l $szLlayer -r $szRlayer \
+-c $prof_length)
+
+elif [[ $mask_mode == "present_day" ]]; then
+
+# Rotate the cross-profile points back to present day and query the present-day carbonate platforms
+sz_carbonate=$(python3 ${directory}/scripts/present_day_index.py length -x carbonate_present_day_index.npz -R ${rotfile} -t ${age} \
+-l $szLlayer -r $szRlayer -c $prof_length -s $prof_spacing -i $prof_interval)
+
+else
+
+# Rasterise the carbonate platforms (10 km cells) only inside the trench corridor searched by the cross-profiles,
+# and count the cross-profiles that intersect them
+sz_carbonate=$(python3 ${directory}/scripts/corridor_mask.py -p reconstructed_carbonate_${age}.0Ma.gmt -l $szLlayer -r $szRlayer \
+-c $prof_length -s $prof_spacing -i $prof_interval -g 10 -o ${carbonate_corridor_mask})
+
+mv ${carbonate_corridor_mask} PlateBoundaryFeatures/${carbonate_corridor_mask}
+
+fi
 echo >&2 "Total subduction zones with neighbouring carbonate platforms $sz_carbonate km"
 
 # clean temp files
@@ -553,25 +740,59 @@ local closed_continental_polygons="continental_polygons_closed_${age}.gmt"
 
 # Close continent featurtes masked grid (netCDF) format
 local continent_mask_grid="reconstructed_continent_raster_${age}.nc"
+local continent_corridor_mask="reconstructed_continent_corridor_mask_${age}.npz"
+local sz_length_con_arc=0
 
 # Subduction boundaries have either a left- or right-polarity depending on the original direction of digitisation.
 local szLlayer=${outfilename_prefix}subduction_boundaries_sL_${age}.00Ma.gmt
 local szRlayer=${outfilename_prefix}subduction_boundaries_sR_${age}.00Ma.gmt
 
 # reconstruct continental polygons with given age and plate kinetmatic model
-python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${continental_polygons} -t ${age} -e xy -- COB
+python3 ${directory}/scripts/reconstruct_feature.py -r ${rotfile} -m ${continental_polygons} -t ${age} -e xy ${profile_args} -- COB
 
 # Force closure of polylines to create closed continental polygons
 gmt spatial reconstructed_COB_${age}.0Ma.xy -F > ${closed_continental_polygons}
 
+cp ${closed_continental_polygons} PlateBoundaryFeatures/${age}/continental_polygons_closed_${age}.gmt
+
+if [[ $mask_mode == "global" ]] && [[ -n ${gmt_session} ]]; then
+
+# Measured for every age after the loop (see run_analysis), from the copy in PlateBoundaryFeatures/${age}
+rm reconstructed_COB_${age}.0Ma.xy ${closed_continental_polygons}
+return
+
+elif [[ $mask_mode == "global" ]]; then
+
 # Convert reconstructed feature from vector (gmt) to mask grid (netCDF) format
 gmt grdmask ${closed_continental_polygons} -Rd -I50k -fg -N0/1/1 -G${continent_mask_grid} -V
 
-cp ${closed_continental_polygons} PlateBoundaryFeatures/${age}/continental_polygons_closed_${age}.gmt
 cp ${continent_mask_grid} PlateBoundaryFeatures/reconstructed_continent_raster_${age}.nc
 
 # Call function to calculate length of subduction zones that intersect with given feature. Receives feature mask grid and SZ geometry
-local sz_length_con_arc=$(find_sz_length_containing_feature $continent_mask_grid $szLlayer $szRlayer $prof_spacing $prof_interval $prof_length)
+sz_length_con_arc=$(find_sz_length_containing_feature $continent_mask_grid $szLlayer $szRlayer $prof_spacing $prof_interval $prof_length)
+
+elif [[ $mask_mode == "analytic" ]]; then
+
+# Clip the continents against the area swept by the cross-profiles and sum the covered trench length
+sz_length_con_arc=$(python3 ${directory}/scripts/analytic_intersection.py -p ${closed_continental_polygons} -l $szLlayer -r $szRlayer \
+-c $prof_length)
+
+elif [[ $mask_mode == "present_day" ]]; then
+
+# Rotate the cross-profile points back to present day and query the present-day continents
+sz_length_con_arc=$(python3 ${directory}/scripts/present_day_index.py length -x continent_present_day_index.npz -R ${rotfile} -t ${age} \
+-l $szLlayer -r $szRlayer -c $prof_length -s $prof_spacing -i $prof_interval)
+
+else
+
+# Rasterise the continents (50 km cells) only inside the trench corridor searched by the cross-profiles,
+# and count the cross-profiles that intersect them
+sz_length_con_arc=$(python3 ${directory}/scripts/corridor_mask.py -p ${closed_continental_polygons} -l $szLlayer -r $szRlayer \
+-c $prof_length -s $prof_spacing -i $prof_interval -g 50 -o ${continent_corridor_mask})
+
+mv ${continent_corridor_mask} PlateBoundaryFeatures/${continent_corridor_mask}
+
+fi
 echo >&2 "Total length of continental arcs:  $sz_length_con_arc km"
 
 # Clean legacy files
@@ -0,0 +1,219 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import multiprocessing
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import analytic_intersection
+import corridor_mask
+import spherical_tools
+from subduction_ensemble import resolve_topologies_V2, resolve_subduction_zones, feature_segments, reconstruct_polygons
+
+
+# Metrics of each age, and whether a change is measured relative to the values (lengths) or in absolute terms (counts)
+METRICS = [
+    ('sz_length', 'relative'),
+    ('sz_length_carbonate', 'relative'),
+    ('anomalous_count', 'absolute')]
+
+DEFAULT_OUTPUT_FILENAME = 'adaptive_sz_metrics.dat'
+
+
+###################### Metrics of one age #####################
+
+
+# Total subduction zone length, length within the cross-profile distance of the carbonate platforms (on the
+# overriding side, exact clipping as in analytic_intersection.py) and number of anomalous segments at one time.
+# Anomalous segments are filtered as in resolve_topologies_V.2.py before measuring the lengths.
+def calculate_metrics(rotation_model, topological_features, carbonate_features, reconstruction_time, anchor_plate_id,
+        half_length, densify_km, max_distance=resolve_topologies_V2.max_distance):
+
+    topology_graph = resolve_subduction_zones(rotation_model, topological_features, reconstruction_time, anchor_plate_id)
+    black_list_ids = topology_graph.blacklist_ids(True, max_distance)
+
+    sz_length = sum(spherical_tools.polyline_length(lons, lats)
+            for lons, lats in feature_segments(topology_graph.section_features(True), black_list_ids))
+
+    carbonate_polygons = reconstruct_polygons(rotation_model, carbonate_features, reconstruction_time, anchor_plate_id)
+    edges = analytic_intersection.polygon_edges(carbonate_polygons, densify_km)
+    sz_carbonate = sum(
+        analytic_intersection.find_sz_length_within_distance(carbonate_polygons,
+            feature_segments(topology_graph.section_features(True, polarity), black_list_ids), half_length, side,
+            densify_km, edges)
+        for polarity, side in (('Left', 'left'), ('Right', 'right')))
+
+    return np.array([sz_length, sz_carbonate, len(topology_graph.anomalous_features(True))])
+
+
+###################### Refinement #####################
+
+
+# Returns the intervals (pairs of adjacent sampled times) that need a midpoint: any metric changes by more than
+# its threshold across the interval, and half the interval is not below the minimum step.
+def intervals_to_refine(times, values, relative_threshold, count_threshold, min_step):
+    times = np.asarray(times)
+    values = np.asarray(values)
+    steps = np.diff(times)
+    changes = np.abs(np.diff(values, axis=0))
+
+    exceeds = np.zeros(len(steps), dtype=bool)
+    for metric_index, (metric, change_type) in enumerate(METRICS):
+        if change_type == 'relative':
+            scale = np.maximum(np.abs(values[:-1, metric_index]), np.abs(values[1:, metric_index]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                exceeds |= np.where(scale > 0, changes[:, metric_index] / scale, 0.0) > relative_threshold
+        else:
+            exceeds |= changes[:, metric_index] > count_threshold
+
+    # Small tolerance so that e.g. 0.25 Myr halves are allowed with a 0.25 Myr minimum step
+    return np.flatnonzero(exceeds & (0.5 * steps >= min_step * (1.0 - 1e-9)))
+
+
+# Evaluates the coarse grid, then bisects the intervals that change too much until none is left or they reach
+# the minimum step. Each round of midpoints runs on the pool. Returns the sorted times, their metrics and the
+# refinement level of each time (0 for the coarse grid).
+def adaptive_sample(pool, coarse_times, relative_threshold, count_threshold, min_step):
+    samples = {}
+    levels = {}
+
+    new_times = sorted(set(float(time) for time in coarse_times))
+    level = 0
+    while new_times:
+        print('Refinement level {0}: {1} ages'.format(level, len(new_times)))
+        for reconstruction_time, values in pool.imap_unordered(calculate_metrics_worker, new_times):
+            samples[reconstruction_time] = values
+            levels[reconstruction_time] = level
+
+        times = sorted(samples)
+        values = np.array([samples[time] for time in times])
+        refine = intervals_to_refine(times, values, relative_threshold, count_threshold, min_step)
+        new_times = [0.5 * (times[index] + times[index + 1]) for index in refine]
+        level += 1
+
+    times = sorted(samples)
+    return times, np.array([samples[time] for time in times]), [levels[time] for time in times]
+
+
+###################### Parallel driver #####################
+
+
+# Per-process state, loaded once by each worker process
+worker_state = {}
+
+
+def initialise_worker(args):
+    worker_state['args'] = args
+    worker_state['rotation_model'] = pygplates.RotationModel(args.rotation_filenames)
+    worker_state['topological_features'] = [pygplates.FeatureCollection(filename) for filename in args.topology_filenames]
+    worker_state['carbonate_features'] = pygplates.FeatureCollection(args.carbonate_filename)
+    # Search radius (in radians) of the anomalous segment filter
+    worker_state['max_distance'] = (args.max_distance / pygplates.Earth.mean_radius_in_kms
+            if args.max_distance is not None else resolve_topologies_V2.max_distance)
+
+
+def calculate_metrics_worker(reconstruction_time):
+    args = worker_state['args']
+    return reconstruction_time, calculate_metrics(
+            worker_state['rotation_model'], worker_state['topological_features'], worker_state['carbonate_features'],
+            reconstruction_time, args.anchor_plate_id, 0.5 * args.cross_profile_length, args.densify,
+            worker_state['max_distance'])
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Adaptive time stepping of the subduction zone metrics (total length, length near carbonate platforms and
+    number of anomalous segments). The metrics are first calculated on a coarse grid of ages, then every interval
+    across which a length changes by more than the relative threshold, or the anomalous segment count by more than
+    the count threshold, is bisected, and so on until no interval changes too much or the minimum step is reached.
+    Quiet periods stay on the coarse grid while plate reorganisations get sub-Myr sampling.
+
+    Writes one table with irregular age sampling (Age, the metrics and the refinement level of each age), sorted
+    by age, which can be read by wavelet_analysis/co2_correlation.py.
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -c Active_Carbonate.gpml -t 0 410 2 --min_step 0.25 \\
+        --relative_threshold 0.05 --count_threshold 2 -o adaptive_sz_metrics.dat"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-c', '--carbonate_filename', type=str, required=True,
+            help='Carbonate platform file.')
+    parser.add_argument('-t', '--time_range', type=float, nargs=3, required=True,
+            metavar=('MIN_AGE', 'MAX_AGE', 'COARSE_STEP'), help='Coarse grid of ages (Myr).')
+    parser.add_argument('--min_step', type=float, default=0.25,
+            help='Smallest step the refinement goes down to (Myr). Defaults to 0.25.')
+    parser.add_argument('--relative_threshold', type=float, default=0.05,
+            help='Relative change of a length across an interval that triggers a bisection. Defaults to 0.05.')
+    parser.add_argument('--count_threshold', type=float, default=2,
+            help='Change of the anomalous segment count across an interval that triggers a bisection. Defaults to 2.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('--max_distance', type=float,
+            help='Search radius of the anomalous segment filter (km). Defaults to that of resolve_topologies_V.2.py.')
+    parser.add_argument('-l', '--cross_profile_length', type=corridor_mask.parse_distance_km, default=508.0,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (km). Half of it is searched on the "
+                "overriding side. Defaults to 508.")
+    parser.add_argument('-d', '--densify', type=float, default=analytic_intersection.DEFAULT_DENSIFY_KM,
+            help='Densification of the polygon edges (km). Defaults to {0:g}.'.format(analytic_intersection.DEFAULT_DENSIFY_KM))
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('-o', '--output_filename', type=str, default=DEFAULT_OUTPUT_FILENAME,
+            help="Output table. Defaults to '{0}'.".format(DEFAULT_OUTPUT_FILENAME))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    min_age, max_age, coarse_step = args.time_range
+    coarse_times = list(np.arange(min_age, max_age, coarse_step)) + [max_age]
+
+    pool = multiprocessing.Pool(args.processes, initialise_worker, (args,))
+    try:
+        times, values, levels = adaptive_sample(pool, coarse_times, args.relative_threshold, args.count_threshold,
+                args.min_step)
+    finally:
+        pool.close()
+        pool.join()
+
+    with open(args.output_filename, 'w') as output_file:
+        output_file.write('Age {0} Level\n'.format(' '.join(metric for metric, change_type in METRICS)))
+        for reconstruction_time, time_values, level in zip(times, values, levels):
+            output_file.write('{0:g} {1:.4f} {2:.4f} {3:g} {4}\n'.format(reconstruction_time, *(list(time_values) + [level])))
+
+    print('Sampled {0} ages ({1} on the coarse grid)'.format(len(times), len(coarse_times)))
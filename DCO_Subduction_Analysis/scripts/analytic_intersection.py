@@ -0,0 +1,274 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import sys
+import numpy as np
+
+import corridor_mask
+import spherical_tools
+
+
+# Polygon edges are split so that no piece is longer than this (kms). Edges are clipped as straight lines
+# in the frame of each trench edge, which is exact for short pieces near the trench.
+DEFAULT_DENSIFY_KM = 10.0
+
+
+###################### Polygon edges #####################
+
+
+# Splits the closed rings of the polygons into great circle pieces no longer than 'densify_km' and returns
+# their start and end unit vectors, the polygon index of each piece and a bounding cap (centre unit vector,
+# radius in radians) of each polygon
+def polygon_edges(polygons, densify_km):
+    starts = [np.empty((0, 3))]
+    ends = [np.empty((0, 3))]
+    polygon_indices = [np.empty(0, dtype=np.int64)]
+    cap_centres = np.zeros((len(polygons), 3))
+    cap_radii = np.full(len(polygons), -1.0)
+
+    for polygon_index, (lons, lats) in enumerate(polygons):
+        if len(lons) < 3:
+            continue
+        ring = spherical_tools.lonlat_to_xyz(lons, lats)
+        ring_ends = np.roll(ring, -1, axis=0)
+        arcs = np.arccos(np.clip(np.sum(ring * ring_ends, axis=1), -1.0, 1.0))
+
+        # Spherical linear interpolation of each edge into equal pieces
+        pieces = np.maximum(1, np.ceil(arcs * spherical_tools.EARTH_RADIUS_KM / densify_km)).astype(np.int64)
+        edge_index = np.repeat(np.arange(len(ring)), pieces)
+        fractions = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        t0 = fractions / pieces[edge_index]
+        t1 = (fractions + 1) / pieces[edge_index]
+        sin_arcs = np.sin(arcs[edge_index])
+        safe = sin_arcs > 1e-12
+
+        def interpolate(t):
+            weights_start = np.where(safe, np.sin((1.0 - t) * arcs[edge_index]) / np.where(safe, sin_arcs, 1.0), 1.0 - t)
+            weights_end = np.where(safe, np.sin(t * arcs[edge_index]) / np.where(safe, sin_arcs, 1.0), t)
+            points = weights_start[:, np.newaxis] * ring[edge_index] + weights_end[:, np.newaxis] * ring_ends[edge_index]
+            return points / np.linalg.norm(points, axis=1)[:, np.newaxis]
+
+        starts.append(interpolate(t0))
+        ends.append(interpolate(t1))
+        polygon_indices.append(np.full(len(edge_index), polygon_index, dtype=np.int64))
+
+        centre = ring.sum(axis=0)
+        centre_norm = np.linalg.norm(centre)
+        centre = centre / centre_norm if centre_norm > 1e-12 else ring[0]
+        cap_centres[polygon_index] = centre
+        cap_radii[polygon_index] = np.arccos(np.clip(np.dot(ring, centre), -1.0, 1.0)).max()
+
+    return (np.concatenate(starts), np.concatenate(ends), np.concatenate(polygon_indices), cap_centres, cap_radii)
+
+
+###################### Clipping #####################
+
+
+# Clips segments (x0, y0) -> (x1, y1) to the rectangle [0, width] x [0, height] (Liang-Barsky, vectorised).
+# Returns the clipped x range of each segment and whether any of it lies inside the rectangle.
+def clip_to_rectangle(x0, y0, x1, y1, width, height):
+    dx = x1 - x0
+    dy = y1 - y0
+    t_enter = np.zeros(x0.shape)
+    t_exit = np.ones(x0.shape)
+    accepted = np.ones(x0.shape, dtype=bool)
+    for p, q in ((-dx, x0), (dx, width - x0), (-dy, y0), (dy, height - y0)):
+        parallel = p == 0
+        accepted &= ~(parallel & (q < 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / np.where(parallel, 1.0, p)
+        t_enter = np.where(~parallel & (p < 0), np.maximum(t_enter, r), t_enter)
+        t_exit = np.where(~parallel & (p > 0), np.minimum(t_exit, r), t_exit)
+    accepted &= t_enter <= t_exit
+
+    xa = x0 + t_enter * dx
+    xb = x0 + t_exit * dx
+    return np.minimum(xa, xb), np.maximum(xa, xb), accepted
+
+
+# Merges intervals and returns them sorted and non-overlapping
+def merge_intervals(interval_starts, interval_ends):
+    order = np.argsort(interval_starts)
+    merged = []
+    for start, end in zip(interval_starts[order], interval_ends[order]):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+###################### Trench length within distance #####################
+
+
+# Exact length (kms) of the subduction zone polylines whose one-sided cross-profiles of 'half_length' kms
+# intersect a polygon. This is the limit of corridor_mask.find_sz_length_containing_mask() as the profile
+# spacing and mask cell size go to zero.
+#
+# Each trench edge is handled in a frame where it lies on the equator from longitude 0 to its length, so its
+# cross-profiles are the meridians of that frame and the area they sweep is the rectangle
+# [0, edge length] x [0, half_length] (latitude flipped for 'right'). The covered part of the edge is the
+# longitude range of the polygon edges clipped to that rectangle, plus any gap between clipped ranges that lies
+# inside a polygon (no polygon edge crosses the rectangle there, so testing one point of the gap decides it).
+def find_sz_length_within_distance(polygons, segments, half_length, side, densify_km=DEFAULT_DENSIFY_KM, edges=None):
+
+    if edges is None:
+        edges = polygon_edges(polygons, densify_km)
+    edge_starts, edge_ends, edge_polygons, cap_centres, cap_radii = edges
+    if len(edge_starts) == 0:
+        return 0.0
+
+    half_angle = half_length / spherical_tools.EARTH_RADIUS_KM
+    edge_midpoints = edge_starts + edge_ends
+    edge_midpoints /= np.linalg.norm(edge_midpoints, axis=1)[:, np.newaxis]
+    edge_half_arcs = 0.5 * np.arccos(np.clip(np.sum(edge_starts * edge_ends, axis=1), -1.0, 1.0))
+    side_sign = 1.0 if side == 'left' else -1.0
+
+    covered_angle = 0.0
+    # Gaps to test against the polygons once all edges are clipped: (angle, unit vector, candidate polygons)
+    gap_angles = []
+    gap_points = []
+    gap_candidates = []
+
+    for lons, lats in segments:
+        points = spherical_tools.lonlat_to_xyz(lons, lats)
+        for a, b in zip(points[:-1], points[1:]):
+            pole = np.cross(a, b)
+            pole_norm = np.linalg.norm(pole)
+            if pole_norm < 1e-15:
+                continue
+            pole /= pole_norm
+            axis_x = a
+            axis_y = np.cross(pole, a)
+            width = np.arctan2(np.dot(b, axis_y), np.dot(b, axis_x))
+
+            # Polygons and edge pieces that can reach the swept rectangle
+            middle = a + b
+            middle /= np.linalg.norm(middle)
+            reach = 0.5 * width + half_angle
+            candidate_polygons = np.flatnonzero(
+                (cap_radii >= 0) & (np.arccos(np.clip(np.dot(cap_centres, middle), -1.0, 1.0)) <= cap_radii + reach))
+            if candidate_polygons.size == 0:
+                continue
+            candidate_edges = np.flatnonzero(np.isin(edge_polygons, candidate_polygons))
+            candidate_edges = candidate_edges[
+                np.arccos(np.clip(np.dot(edge_midpoints[candidate_edges], middle), -1.0, 1.0)) <=
+                edge_half_arcs[candidate_edges] + reach]
+
+            intervals = []
+            if candidate_edges.size:
+                frame = np.array([axis_x, axis_y, side_sign * pole])
+                local_starts = np.dot(edge_starts[candidate_edges], frame.T)
+                local_ends = np.dot(edge_ends[candidate_edges], frame.T)
+                x0 = np.arctan2(local_starts[:, 1], local_starts[:, 0])
+                y0 = np.arcsin(np.clip(local_starts[:, 2], -1.0, 1.0))
+                x1 = np.arctan2(local_ends[:, 1], local_ends[:, 0])
+                y1 = np.arcsin(np.clip(local_ends[:, 2], -1.0, 1.0))
+                # Pieces straddling the antimeridian of the frame are far from the rectangle
+                near = np.abs(x1 - x0) < np.pi
+                clipped_starts, clipped_ends, accepted = clip_to_rectangle(
+                        x0[near], y0[near], x1[near], y1[near], width, half_angle)
+                intervals = merge_intervals(clipped_starts[accepted], clipped_ends[accepted])
+
+            boundaries = [0.0] + [value for interval in intervals for value in interval] + [width]
+            for gap_start, gap_end in zip(boundaries[0::2], boundaries[1::2]):
+                if gap_end - gap_start > 0:
+                    gap_middle = 0.5 * (gap_start + gap_end)
+                    gap_angles.append(gap_end - gap_start)
+                    gap_points.append(np.cos(gap_middle) * axis_x + np.sin(gap_middle) * axis_y)
+                    gap_candidates.append(candidate_polygons)
+            covered_angle += sum(end - start for start, end in intervals)
+
+    # Gaps lying inside a polygon are covered too
+    if gap_angles:
+        gap_angles = np.array(gap_angles)
+        gap_lons, gap_lats = spherical_tools.xyz_to_lonlat(np.array(gap_points))
+        gap_inside = np.zeros(len(gap_angles), dtype=bool)
+        for polygon_index in np.unique(np.concatenate(gap_candidates)):
+            tested = np.array([polygon_index in candidates for candidates in gap_candidates]) & ~gap_inside
+            if tested.any():
+                polygon_lons, polygon_lats = polygons[polygon_index]
+                gap_inside[tested] = spherical_tools.points_in_polygon(
+                        gap_lons[tested], gap_lats[tested], polygon_lons, polygon_lats)
+        covered_angle += gap_angles[gap_inside].sum()
+
+    return covered_angle * spherical_tools.EARTH_RADIUS_KM
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Calculate the length of subduction zones (km) with a feature (carbonate platform, continent) within
+    a given distance on the overriding side, exactly: polygon edges are clipped against the area swept by the
+    cross-profiles of each trench edge and the covered trench arcs are summed. The result does not depend on a
+    profile spacing or mask resolution. The length is printed to standard output.
+
+    With --compare, the sampled estimate of corridor_mask.py is also calculated and both are reported on
+    standard error, to validate the sampled method.
+
+    For example...
+
+    python %(prog)s -p reconstructed_carbonate_100.0Ma.gmt -l sz_sL_100.00Ma.gmt -r sz_sR_100.00Ma.gmt -c 508k"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-p', '--polygon_filenames', type=str, nargs='+', required=True,
+            metavar='polygon_filename', help='One or more GMT/xy files of reconstructed polygons.')
+    parser.add_argument('-l', '--left_filename', type=str, required=True,
+            help='GMT/xy file of the left polarity subduction zones (sL).')
+    parser.add_argument('-r', '--right_filename', type=str, required=True,
+            help='GMT/xy file of the right polarity subduction zones (sR).')
+    parser.add_argument('-c', '--cross_profile_length', type=str, required=True,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (e.g. 508k). Half of it is "
+                "searched on the overriding side of the subduction zone.")
+    parser.add_argument('-d', '--densify', type=corridor_mask.parse_distance_km, default=DEFAULT_DENSIFY_KM,
+            help='Maximum length of the polygon edge pieces (km). Defaults to {0}.'.format(DEFAULT_DENSIFY_KM))
+    parser.add_argument('--compare', type=corridor_mask.parse_distance_km, nargs=3,
+            metavar=('SPACING', 'INTERVAL', 'RESOLUTION'),
+            help='Also calculate the sampled estimate with the given profile spacing, profile interval and mask '
+                'resolution (km).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    half_length = 0.5 * corridor_mask.parse_distance_km(args.cross_profile_length)
+
+    polygons = []
+    for polygon_filename in args.polygon_filenames:
+        polygons.extend(spherical_tools.read_gmt_segments(polygon_filename))
+    left_segments = spherical_tools.read_gmt_segments(args.left_filename)
+    right_segments = spherical_tools.read_gmt_segments(args.right_filename)
+
+    edges = polygon_edges(polygons, args.densify)
+    sz_length = (
+        find_sz_length_within_distance(polygons, left_segments, half_length, 'left', edges=edges) +
+        find_sz_length_within_distance(polygons, right_segments, half_length, 'right', edges=edges))
+
+    if args.compare:
+        prof_spacing, prof_interval, resolution = args.compare
+        mask = corridor_mask.build_corridor_mask(polygons, left_segments, right_segments, half_length, resolution)
+        sampled_length = (
+            corridor_mask.find_sz_length_containing_mask(mask, left_segments, prof_spacing, prof_interval, half_length, 'left') +
+            corridor_mask.find_sz_length_containing_mask(mask, right_segments, prof_spacing, prof_interval, half_length, 'right'))
+        print('analytic {0:.3f} km, sampled {1:.3f} km, difference {2:.3f} km'.format(
+                sz_length, sampled_length, sampled_length - sz_length), file=sys.stderr)
+
+    print('{0:.10g}'.format(sz_length))
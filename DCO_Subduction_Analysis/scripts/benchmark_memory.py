@@ -0,0 +1,192 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import importlib.util
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import pygplates
+
+import memory_monitor
+import sample_model
+
+# The resolve script is not a valid module name, so it is loaded from its file
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+
+DEFAULT_NUMBER_OF_TIMES = 100
+DEFAULT_WARMUP = 10
+# Retained memory growth (MB per time) above which the run is not flat
+DEFAULT_MAX_GROWTH_MB = 0.2
+# Vertices per degree of the sample model (--sample), dense enough for a resolve to allocate a few MB
+SAMPLE_DENSITY = 20
+
+
+# Resolves and writes every output class of each time in one process (as resolve_topologies_V.2.py does with
+# a '-t' list), under the memory monitor. The outputs go to a scratch directory emptied after each time.
+# Returns the monitor, whose rows hold the memory of each time.
+def run_benchmark(rotation_model, topological_features, reconstruction_times, anchor_plate_id, output_filename_extension,
+        monitor):
+
+    scratch_directory = tempfile.mkdtemp(prefix='benchmark_memory_')
+    try:
+        for reconstruction_time in reconstruction_times:
+            with monitor.age(reconstruction_time):
+                resolve_topologies_V2.resolve_topologies(
+                        rotation_model,
+                        topological_features,
+                        reconstruction_time,
+                        os.path.join(scratch_directory, 'topology_'),
+                        output_filename_extension,
+                        anchor_plate_id)
+            for filename in os.listdir(scratch_directory):
+                os.remove(os.path.join(scratch_directory, filename))
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+    return monitor
+
+
+# Loads the sample model (see sample_model.py), written to a scratch directory removed afterwards
+def load_sample_model(density=SAMPLE_DENSITY):
+    sample_directory = tempfile.mkdtemp(prefix='benchmark_memory_sample_')
+    try:
+        rotation_filename, topology_filename = sample_model.write_sample_model(sample_directory, density)
+        return pygplates.RotationModel(rotation_filename), [pygplates.FeatureCollection(topology_filename)]
+    finally:
+        shutil.rmtree(sample_directory, ignore_errors=True)
+
+
+# Growth of the retained memory (MB per time) after the 'warmup' times, and the times the monitor flagged as
+# growing over its window. The memory per time is flat if the growth is at most the limit and nothing grew.
+def memory_growth(monitor, warmup):
+    measured = [row[2] for row in monitor.rows[warmup:]]
+    growing_times = [row[0] for row in monitor.rows[warmup:] if row[6] == 'growing']
+    return memory_monitor.growth_per_step(measured), growing_times
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Check that the memory of resolving many times in one process stays flat. Resolves and writes the topologies
+    of (by default) {0} times in one process, measuring the memory retained after each time, and fails (exit status 1)
+    if the retained memory grows by more than --max_growth MB per time after the warm-up times, or grows over
+    each of --memory_growth_window consecutive times. Use --repeat_time to resolve the same time over and over,
+    which separates leaks from the differing sizes of the topologies of different times.
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml
+    python %(prog)s -r rotations.rot -m topologies.gpml --repeat_time 100 --memory_top 10
+
+    With --sample a small synthetic plate model (see sample_model.py) is used instead of -r and -m, so the check
+    runs anywhere, for example in the tests (see tests/test_benchmark_memory.py) or with 'make test'...
+
+    python %(prog)s --sample -n 40""".format(DEFAULT_NUMBER_OF_TIMES)
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+',
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+',
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('--sample', action='store_true',
+            help='Resolve a small synthetic plate model (see sample_model.py) instead of the -r and -m files.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-n', '--number_of_times', type=int, default=DEFAULT_NUMBER_OF_TIMES,
+            help='Number of times to resolve. Defaults to {0}.'.format(DEFAULT_NUMBER_OF_TIMES))
+    parser.add_argument('--start_time', type=float, default=0,
+            help='First time (Ma). Defaults to 0.')
+    parser.add_argument('--time_step', type=float, default=1,
+            help='Interval between the times (Myr). Defaults to 1.')
+    parser.add_argument('--repeat_time', type=float,
+            help='Resolve this time every time instead.')
+    parser.add_argument('-e', '--output_filename_extension', type=str, default='gmt',
+            help="The extension of the (discarded) output files. Defaults to 'gmt'.")
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP,
+            help='Number of first times left out of the growth (caches filling up). Defaults to {0}.'.format(DEFAULT_WARMUP))
+    parser.add_argument('--max_growth', type=float, default=DEFAULT_MAX_GROWTH_MB,
+            help='Largest flat growth of the retained memory (MB per time). Defaults to {0:g}.'.format(DEFAULT_MAX_GROWTH_MB))
+    parser.add_argument('--memory_log', type=str,
+            help='Also record the memory of each time in this log (see memory_monitor.py).')
+    parser.add_argument('--memory_top', type=int, default=0,
+            help='Trace Python allocations and report the source lines that retained the most memory. Defaults to 0.')
+    parser.add_argument('--memory_growth_window', type=int, default=memory_monitor.DEFAULT_GROWTH_WINDOW,
+            help='Number of consecutive growing times that fails the run. Defaults to {0}.'.format(
+                memory_monitor.DEFAULT_GROWTH_WINDOW))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if not args.sample and not (args.rotation_filenames and args.topology_filenames):
+        parser.error('the -r and -m files are required without --sample')
+
+    if args.repeat_time is not None:
+        reconstruction_times = [args.repeat_time] * args.number_of_times
+    else:
+        reconstruction_times = [args.start_time + index * args.time_step for index in range(args.number_of_times)]
+
+    if args.sample:
+        rotation_model, topological_features = load_sample_model()
+    else:
+        rotation_model = pygplates.RotationModel(args.rotation_filenames)
+        topological_features = [pygplates.FeatureCollection(topology_filename)
+                for topology_filename in args.topology_filenames]
+
+    monitor = memory_monitor.MemoryMonitor('benchmark', args.memory_log, None, 'fail', args.memory_top,
+            args.memory_growth_window, enabled=True)
+    run_benchmark(rotation_model, topological_features, reconstruction_times, args.anchor_plate_id,
+            args.output_filename_extension, monitor)
+
+    retained = [row[2] for row in monitor.rows]
+    measured = retained[args.warmup:]
+    growth_mb, growing_times = memory_growth(monitor, args.warmup)
+
+    print('{0:>10} {1:>9} {2:>11} {3:>9} {4:>10}  {5}'.format('Age (Ma)', 'Seconds', 'Retained MB', 'Peak MB', 'Change MB', 'Status'))
+    for reconstruction_time, seconds, retained_mb, peak_mb, change_mb, traced_mb, status, allocations in monitor.rows:
+        print('{0:>10g} {1:>9.2f} {2:>11.1f} {3:>9.1f} {4:>+10.2f}  {5} {6}'.format(
+                reconstruction_time, seconds, retained_mb, peak_mb, change_mb, status, allocations if allocations != '-' else ''))
+    print('Retained memory: {0:.1f} MB after the warm-up, {1:.1f} MB at the end, {2:+.3f} MB per time (limit {3:g})'.format(
+            measured[0] if measured else 0.0, retained[-1] if retained else 0.0, growth_mb, args.max_growth))
+
+    if growth_mb > args.max_growth or growing_times:
+        if growing_times:
+            print('Retained memory grew over {0} consecutive times ending at {1}'.format(
+                    args.memory_growth_window, ' '.join('{0:g}'.format(growing_time) for growing_time in growing_times)))
+        print('FAIL: memory per time is not flat')
+        sys.exit(1)
+    print('PASS: memory per time is flat')
@@ -0,0 +1,346 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import os.path
+import sys
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+
+GPML_NAMESPACE = 'http://www.gplates.org/gplates'
+GML_NAMESPACE = 'http://www.opengis.net/gml'
+
+DISTANT_PAST = 'http://gplates.org/times/distantPast'
+DISTANT_FUTURE = 'http://gplates.org/times/distantFuture'
+
+SNAPSHOT_VERSION = 1
+
+
+def gpml_tag(name):
+    return '{{{0}}}{1}'.format(GPML_NAMESPACE, name)
+
+
+def gml_tag(name):
+    return '{{{0}}}{1}'.format(GML_NAMESPACE, name)
+
+
+###################### Feature snapshots #####################
+
+
+# Parses a time position of a valid time, where the distant past/future are infinite
+def parse_time_position(text):
+    text = (text or '').strip()
+    if text == DISTANT_PAST:
+        return math.inf
+    if text == DISTANT_FUTURE:
+        return -math.inf
+    return float(text)
+
+
+# Hash of the content of a feature element, ignoring its revision (which only records that it was saved) and
+# the indentation, so re-saving an unchanged feature gives the same hash
+def feature_hash(element):
+    digest = hashlib.sha1()
+
+    def add(node):
+        if node.tag == gpml_tag('revision'):
+            return
+        digest.update(node.tag.encode('utf-8'))
+        for name, value in sorted(node.attrib.items()):
+            digest.update('{0}={1}'.format(name, value).encode('utf-8'))
+        digest.update((node.text or '').strip().encode('utf-8'))
+        for child in node:
+            add(child)
+        digest.update(b'/')
+
+    add(element)
+    return digest.hexdigest()
+
+
+# Returns the (begin, end) valid time of a feature element (begin is the older time), infinite if it has none
+def feature_valid_time(element):
+    begin = element.find('{0}/{1}/{2}/{3}/{4}'.format(
+            gml_tag('validTime'), gml_tag('TimePeriod'), gml_tag('begin'), gml_tag('TimeInstant'), gml_tag('timePosition')))
+    end = element.find('{0}/{1}/{2}/{3}/{4}'.format(
+            gml_tag('validTime'), gml_tag('TimePeriod'), gml_tag('end'), gml_tag('TimeInstant'), gml_tag('timePosition')))
+    return (parse_time_position(begin.text) if begin is not None else math.inf,
+            parse_time_position(end.text) if end is not None else -math.inf)
+
+
+# Opens a GPML file, compressed (gpmlz) or not
+def open_gpml(filename):
+    if filename.endswith('.gpmlz'):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+# Other formats (e.g. Shapefiles) are converted to GPML with pygplates first. Their features get new ids each time
+# they are loaded, so for them a change is detected per file (any edit invalidates all their valid times).
+def convert_to_gpml(filename):
+    import pygplates
+
+    handle, gpml_filename = tempfile.mkstemp(suffix='.gpml')
+    os.close(handle)
+    pygplates.FeatureCollection(filename).write(gpml_filename)
+    return gpml_filename
+
+
+# Snapshot of the features of a file: feature id -> [content hash, begin time, end time, referenced feature ids].
+# The referenced features are the topological sections (and interiors) of topological features.
+def snapshot_feature_file(filename):
+    gpml_filename = filename
+    if not (filename.endswith('.gpml') or filename.endswith('.gpmlz')):
+        gpml_filename = convert_to_gpml(filename)
+
+    features = {}
+    try:
+        with open_gpml(gpml_filename) as gpml_file:
+            for event, element in ElementTree.iterparse(gpml_file, events=('end',)):
+                if element.tag != gml_tag('featureMember'):
+                    continue
+                for feature in element:
+                    identity = feature.findtext(gpml_tag('identity'))
+                    begin, end = feature_valid_time(feature)
+                    references = sorted(set(target.text.strip() for target in feature.iter(gpml_tag('targetFeature'))
+                            if target.text))
+                    features[identity] = [feature_hash(feature), encode_time(begin), encode_time(end), references]
+                # The features are not needed once hashed
+                element.clear()
+    finally:
+        if gpml_filename != filename:
+            os.remove(gpml_filename)
+
+    if gpml_filename != filename:
+        # Ids are not stable, so the whole file is one pseudo feature
+        digest = hashlib.sha1(''.join(sorted(value[0] for value in features.values())).encode('utf-8')).hexdigest()
+        begin = max([decode_time(value[1]) for value in features.values()] or [math.inf])
+        end = min([decode_time(value[2]) for value in features.values()] or [-math.inf])
+        features = {filename: [digest, encode_time(begin), encode_time(end), []]}
+    return features
+
+
+# JSON has no infinity, so the distant past/future are stored as strings
+def encode_time(value):
+    if math.isinf(value):
+        return 'inf' if value > 0 else '-inf'
+    return value
+
+
+def decode_time(value):
+    return float(value)
+
+
+###################### Rotation snapshots #####################
+
+
+# Snapshot of the poles of a rotation file: moving plate id -> {time: hash of the poles (without their comments)}
+def snapshot_rotation_file(filename):
+    plates = {}
+    with open(filename, 'r') as rotation_file:
+        for line in rotation_file:
+            values = line.split('!')[0].split()
+            if len(values) < 6:
+                continue
+            try:
+                moving_plate_id = int(values[0])
+                pole_time = float(values[1])
+            except ValueError:
+                continue
+            # Crossovers have two poles at the same time, so the poles of a time are hashed together
+            poles = plates.setdefault(str(moving_plate_id), {})
+            key = '{0:g}'.format(pole_time)
+            poles[key] = hashlib.sha1('{0} {1}'.format(poles.get(key, ''), ' '.join(values[:6])).encode('utf-8')).hexdigest()
+    return plates
+
+
+# Time ranges affected by the changed poles. A pole only affects the interpolation up to the neighbouring poles
+# of its plate sequence (in either version), and every plate further down the plate circuit, so the range is
+# applied to all features.
+def changed_rotation_ranges(old_plates, new_plates):
+    ranges = []
+    for plate_id in set(old_plates) | set(new_plates):
+        old_poles = old_plates.get(plate_id, {})
+        new_poles = new_plates.get(plate_id, {})
+        if old_poles == new_poles:
+            continue
+        pole_times = sorted(set(float(time) for time in old_poles) | set(float(time) for time in new_poles))
+        for index, pole_time in enumerate(pole_times):
+            key = '{0:g}'.format(pole_time)
+            if old_poles.get(key) == new_poles.get(key):
+                continue
+            younger = pole_times[index - 1] if index > 0 else -math.inf
+            older = pole_times[index + 1] if index + 1 < len(pole_times) else math.inf
+            ranges.append((older, younger))
+    return ranges
+
+
+###################### Snapshots and differences #####################
+
+
+# Snapshot of all the feature and rotation files of a run, plus a settings string (any change of the settings
+# invalidates every age)
+def create_snapshot(feature_filenames, rotation_filenames, settings=''):
+    return {
+        'version': SNAPSHOT_VERSION,
+        'settings': settings,
+        'features': dict((os.path.abspath(filename), snapshot_feature_file(filename)) for filename in feature_filenames),
+        'rotations': dict((os.path.abspath(filename), snapshot_rotation_file(filename)) for filename in rotation_filenames)}
+
+
+def read_snapshot(filename):
+    with open(filename, 'r') as snapshot_file:
+        return json.load(snapshot_file)
+
+
+def write_snapshot(snapshot, filename):
+    temporary_filename = '{0}.tmp'.format(filename)
+    with open(temporary_filename, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(temporary_filename, filename)
+
+
+# Returns the (begin, end) time ranges invalidated between two snapshots, and a description of each change.
+# Added, removed and modified features invalidate their valid time (old and new), and so do the topologies that
+# reference them, over the part of their valid time shared with the changed feature. Changed poles invalidate the
+# time between their neighbouring poles. None means that everything is invalidated (different settings or files).
+def changed_time_ranges(old_snapshot, new_snapshot):
+    if (old_snapshot.get('version') != new_snapshot['version'] or old_snapshot.get('settings') != new_snapshot['settings'] or
+            set(old_snapshot.get('features', {})) != set(new_snapshot['features']) or
+            set(old_snapshot.get('rotations', {})) != set(new_snapshot['rotations'])):
+        return None, ['settings or input files changed']
+
+    old_features = {}
+    new_features = {}
+    for filename in new_snapshot['features']:
+        old_features.update(old_snapshot['features'][filename])
+        new_features.update(new_snapshot['features'][filename])
+
+    # Changed feature id -> list of (begin, end) of its old and/or new version
+    changed = {}
+    changes = []
+    for feature_id in set(old_features) | set(new_features):
+        old_feature = old_features.get(feature_id)
+        new_feature = new_features.get(feature_id)
+        if old_feature is not None and new_feature is not None and old_feature[0] == new_feature[0]:
+            continue
+        changed[feature_id] = [(decode_time(feature[1]), decode_time(feature[2]))
+                for feature in (old_feature, new_feature) if feature is not None]
+        changes.append('{0} {1}'.format('added' if old_feature is None else 'removed' if new_feature is None else 'modified',
+                feature_id))
+
+    ranges = [time_range for time_ranges in changed.values() for time_range in time_ranges]
+
+    # Topologies referencing a changed feature change where both exist
+    referencing_topologies = set()
+    for features in (old_features, new_features):
+        for feature_id, (content_hash, begin, end, references) in features.items():
+            for reference in references:
+                for changed_begin, changed_end in changed.get(reference, []):
+                    overlap = (min(decode_time(begin), changed_begin), max(decode_time(end), changed_end))
+                    if overlap[0] >= overlap[1]:
+                        ranges.append(overlap)
+                        referencing_topologies.add(feature_id)
+    changes.extend('referencing topology {0}'.format(feature_id) for feature_id in sorted(referencing_topologies))
+
+    for filename in new_snapshot['rotations']:
+        rotation_ranges = changed_rotation_ranges(old_snapshot['rotations'][filename], new_snapshot['rotations'][filename])
+        ranges.extend(rotation_ranges)
+        if rotation_ranges:
+            changes.append('{0} poles changed in {1}'.format(len(rotation_ranges), filename))
+
+    return ranges, changes
+
+
+# The ages of the (integer) time steps from 'to_age' to 'from_age' that fall in any of the ranges
+def invalidated_ages(ranges, to_age, from_age, time_step=1):
+    ages = []
+    age = to_age
+    while age <= from_age:
+        if ranges is None or any(end <= age <= begin for begin, end in ranges):
+            ages.append(age)
+        age += time_step
+    return ages
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Detects which ages of a run are affected by edits of its input files, so that only those ages are recomputed.
+
+    'snapshot' records the feature ids, content hashes, valid times and topological section references of the
+    feature files (GPML read directly, other formats through pygplates) and the poles of the rotation files.
+    'diff' compares the current files with a snapshot and prints the invalidated ages (one per line):
+    those in the valid time of added, removed or modified features, of the topologies that reference them,
+    and between the neighbouring poles of changed rotations. With no snapshot (or different settings or files)
+    every age is printed. The changes found are reported on stderr.
+
+    For example...
+
+    python %(prog)s snapshot -m topologies.gpml carbonate.gpml -r rotations.rot -o Results/input_snapshot.json
+    python %(prog)s diff -m topologies.gpml carbonate.gpml -r rotations.rot -s Results/input_snapshot.json -t 0 230"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    def add_input_arguments(subparser):
+        subparser.add_argument('-m', '--feature_filenames', type=str, nargs='+', default=[],
+                metavar='feature_filename', help='Feature files (topologies, carbonate platforms, continents, ...).')
+        subparser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', default=[],
+                metavar='rotation_filename', help='Rotation files.')
+        subparser.add_argument('--settings', type=str, default='',
+                help='Run settings (e.g. options of the analysis) - a change of settings invalidates every age.')
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='Write a snapshot of the input files.')
+    add_input_arguments(snapshot_parser)
+    snapshot_parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help='The snapshot file (JSON).')
+
+    diff_parser = subparsers.add_parser('diff', help='Print the ages invalidated since a snapshot.')
+    add_input_arguments(diff_parser)
+    diff_parser.add_argument('-s', '--snapshot_filename', type=str, required=True,
+            help='The snapshot of the previous run. If it does not exist every age is invalidated.')
+    diff_parser.add_argument('-t', '--time_range', type=int, nargs=2, required=True,
+            metavar=('TO_AGE', 'FROM_AGE'), help='Ages of the run (youngest and oldest).')
+    diff_parser.add_argument('--time_step', type=int, default=1,
+            help='Time step of the run (Myr). Defaults to 1.')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    snapshot = create_snapshot(args.feature_filenames, args.rotation_filenames, args.settings)
+
+    if args.command == 'snapshot':
+        write_snapshot(snapshot, args.output_filename)
+    else:
+        if os.path.exists(args.snapshot_filename):
+            ranges, changes = changed_time_ranges(read_snapshot(args.snapshot_filename), snapshot)
+        else:
+            ranges, changes = None, ['no snapshot of a previous run']
+        for change in changes:
+            print('{0}: {1}'.format(os.path.basename(__file__), change), file=sys.stderr)
+        for age in invalidated_ages(ranges, args.time_range[0], args.time_range[1], args.time_step):
+            print(age)
@@ -0,0 +1,222 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import numpy as np
+
+import spherical_tools
+
+
+DEFAULT_MASK_RESOLUTION_KM = 10.0
+
+
+###################### Sparse mask #####################
+
+
+# A global longitude/latitude mask of which only the 'inside' cells are stored (as sorted flat cell indices).
+# Cells are indexed row by row from (-180, -90), with a cell size given in degrees
+# (GMT converts a 'k' increment to degrees in the same way).
+class SparseMask(object):
+
+    def __init__(self, cell_size_deg, cells):
+        self.cell_size_deg = float(cell_size_deg)
+        self.ncols = int(round(360.0 / self.cell_size_deg))
+        self.nrows = int(round(180.0 / self.cell_size_deg))
+        self.cells = np.unique(np.asarray(cells, dtype=np.int64))
+
+    @classmethod
+    def from_resolution_km(cls, resolution_km, cells=()):
+        return cls(resolution_km / spherical_tools.KM_PER_DEGREE, cells)
+
+    # Flat cell index of each point
+    def cell_index(self, lons, lats):
+        cols = np.floor((np.asarray(lons, dtype=float) + 180.0) / self.cell_size_deg).astype(np.int64) % self.ncols
+        rows = np.clip(np.floor((np.asarray(lats, dtype=float) + 90.0) / self.cell_size_deg).astype(np.int64),
+                       0, self.nrows - 1)
+        return rows * self.ncols + cols
+
+    # Centre longitude and latitude of each flat cell index
+    def cell_centres(self, cells):
+        rows, cols = np.divmod(np.asarray(cells, dtype=np.int64), self.ncols)
+        return (cols + 0.5) * self.cell_size_deg - 180.0, (rows + 0.5) * self.cell_size_deg - 90.0
+
+    # Returns True for every point that falls in an 'inside' cell
+    def sample(self, lons, lats):
+        point_cells = self.cell_index(lons, lats)
+        if self.cells.size == 0:
+            return np.zeros(point_cells.shape, dtype=bool)
+        position = np.clip(np.searchsorted(self.cells, point_cells), 0, self.cells.size - 1)
+        return self.cells[position] == point_cells
+
+    def save(self, filename):
+        np.savez_compressed(filename, cell_size_deg=self.cell_size_deg, cells=self.cells)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            return cls(float(data['cell_size_deg']), data['cells'])
+
+
+###################### Cross-profiles and trench corridor #####################
+
+
+# Builds one-sided cross-profiles along a subduction zone polyline, equivalent to the 'whiskers' kept
+# from 'gmt grdtrack -C' output in find_sz_length_containing_feature.
+# Profiles are placed every 'prof_spacing' kms and sampled every 'prof_interval' kms out to 'half_length'
+# kms on the 'left' or 'right' side of the polyline (relative to its digitisation direction).
+# Returns the longitudes and latitudes as (number of profiles, samples per profile) arrays.
+def cross_profiles(lons, lats, prof_spacing, prof_interval, half_length, side):
+    origin_lons, origin_lats, azimuths = spherical_tools.sample_polyline(lons, lats, prof_spacing)
+    distances = np.arange(0.0, half_length + 1e-9, prof_interval)
+    profile_azimuths = azimuths - 90.0 if side == 'left' else azimuths + 90.0
+
+    profile_lons, profile_lats = spherical_tools.destination(
+        origin_lons[:, np.newaxis], origin_lats[:, np.newaxis], profile_azimuths[:, np.newaxis],
+        distances[np.newaxis, :])
+    return profile_lons, profile_lats
+
+
+# Finds every mask cell lying within 'half_length' kms of the polylines on the given side, i.e. the
+# footprint of the trench corridor that the cross-profiles can ever sample.
+# The corridor is swept at half a cell so that no cell crossed by a cross-profile is missed.
+def corridor_cells(mask, segments, half_length, side):
+    step = 0.5 * mask.cell_size_deg * spherical_tools.KM_PER_DEGREE
+    cells = [np.empty(0, dtype=np.int64)]
+    for lons, lats in segments:
+        profile_lons, profile_lats = cross_profiles(lons, lats, step, step, half_length, side)
+        if profile_lons.size:
+            cells.append(np.unique(mask.cell_index(profile_lons.ravel(), profile_lats.ravel())))
+    return np.unique(np.concatenate(cells))
+
+
+# Builds a sparse mask of the polygons restricted to the trench corridor footprint of the left and right
+# polarity subduction zones. Only the footprint cell centres are tested against the polygons.
+def build_corridor_mask(polygons, left_segments, right_segments, half_length, resolution_km):
+    mask = SparseMask.from_resolution_km(resolution_km)
+
+    footprint = np.union1d(corridor_cells(mask, left_segments, half_length, 'left'),
+                           corridor_cells(mask, right_segments, half_length, 'right'))
+    centre_lons, centre_lats = mask.cell_centres(footprint)
+
+    inside = np.zeros(footprint.shape, dtype=bool)
+    for polygon_lons, polygon_lats in polygons:
+        remaining = ~inside
+        inside[remaining] = spherical_tools.points_in_polygon(
+            centre_lons[remaining], centre_lats[remaining], polygon_lons, polygon_lats)
+
+    mask.cells = footprint[inside]
+    return mask
+
+
+# Builds a sparse mask of the polygons over the whole globe, like the global GMT mask grid (grdmask) of
+# DCO_subductionzone_analysis.sh but with the cell centres tested (not the grid nodes).
+# Only the cells in each polygon's longitude/latitude bounding box are tested.
+def build_global_mask(polygons, resolution_km):
+    mask = SparseMask.from_resolution_km(resolution_km)
+
+    cells = [np.empty(0, dtype=np.int64)]
+    for polygon_lons, polygon_lats in polygons:
+        if len(polygon_lons) < 3:
+            continue
+        # Unwrapped as in spherical_tools.points_in_polygon, so boxes crossing the dateline wrap around
+        unwrapped_lons = np.degrees(np.unwrap(np.radians(np.asarray(polygon_lons, dtype=float))))
+        first_col = int(np.floor((unwrapped_lons.min() + 180.0) / mask.cell_size_deg))
+        cols = np.arange(first_col, min(int(np.floor((unwrapped_lons.max() + 180.0) / mask.cell_size_deg)) + 1,
+                first_col + mask.ncols)) % mask.ncols
+        rows = np.arange(max(0, int(np.floor((np.min(polygon_lats) + 90.0) / mask.cell_size_deg))),
+                min(mask.nrows, int(np.floor((np.max(polygon_lats) + 90.0) / mask.cell_size_deg)) + 1))
+        box = (rows[:, np.newaxis] * mask.ncols + cols[np.newaxis, :]).ravel()
+
+        centre_lons, centre_lats = mask.cell_centres(box)
+        cells.append(box[spherical_tools.points_in_polygon(centre_lons, centre_lats, polygon_lons, polygon_lats)])
+
+    mask.cells = np.unique(np.concatenate(cells))
+    return mask
+
+
+# Counts the cross-profiles (on the overriding side) that intersect the mask at least once and converts
+# the count into a subduction zone length (kms) by multiplying it by the profile spacing.
+def find_sz_length_containing_mask(mask, segments, prof_spacing, prof_interval, half_length, side):
+    intersect_count = 0
+    for lons, lats in segments:
+        profile_lons, profile_lats = cross_profiles(lons, lats, prof_spacing, prof_interval, half_length, side)
+        if profile_lons.size == 0:
+            continue
+        hits = mask.sample(profile_lons.ravel(), profile_lats.ravel()).reshape(profile_lons.shape)
+        intersect_count += int(np.count_nonzero(hits.any(axis=1)))
+    return prof_spacing * intersect_count
+
+
+# Parses a GMT style distance such as '508k' into kms
+def parse_distance_km(distance):
+    return float(str(distance).rstrip('kK'))
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Calculate the length of subduction zones (km) with a feature (carbonate platform, continent) within
+    a given cross-profile distance on the overriding side, using a sparse mask rasterised only inside the
+    trench corridor. The length is printed to standard output.
+
+    For example...
+
+    python %(prog)s -p reconstructed_carbonate_100.0Ma.gmt -l sz_sL_100.00Ma.gmt -r sz_sR_100.00Ma.gmt -c 508k"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-p', '--polygon_filenames', type=str, nargs='+', required=True,
+            metavar='polygon_filename', help='One or more GMT/xy files of reconstructed polygons.')
+    parser.add_argument('-l', '--left_filename', type=str, required=True,
+            help='GMT/xy file of the left polarity subduction zones (sL).')
+    parser.add_argument('-r', '--right_filename', type=str, required=True,
+            help='GMT/xy file of the right polarity subduction zones (sR).')
+    parser.add_argument('-c', '--cross_profile_length', type=str, required=True,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (e.g. 508k). Half of it is "
+                "searched on the overriding side of the subduction zone.")
+    parser.add_argument('-s', '--profile_spacing', type=parse_distance_km, default=10.0,
+            help='Spacing of cross-profiles along the subduction zones (km). Defaults to 10.')
+    parser.add_argument('-i', '--profile_interval', type=parse_distance_km, default=5.0,
+            help='Sampling interval along each cross-profile (km). Defaults to 5.')
+    parser.add_argument('-g', '--mask_resolution', type=parse_distance_km, default=DEFAULT_MASK_RESOLUTION_KM,
+            help='Mask cell size (km). Defaults to {0}.'.format(DEFAULT_MASK_RESOLUTION_KM))
+    parser.add_argument('-o', '--output_mask_filename', type=str,
+            help='Optionally save the sparse corridor mask (npz).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    half_length = 0.5 * parse_distance_km(args.cross_profile_length)
+
+    polygons = []
+    for polygon_filename in args.polygon_filenames:
+        polygons.extend(spherical_tools.read_gmt_segments(polygon_filename))
+    left_segments = spherical_tools.read_gmt_segments(args.left_filename)
+    right_segments = spherical_tools.read_gmt_segments(args.right_filename)
+
+    mask = build_corridor_mask(polygons, left_segments, right_segments, half_length, args.mask_resolution)
+    if args.output_mask_filename:
+        mask.save(args.output_mask_filename)
+
+    sz_length = (
+        find_sz_length_containing_mask(mask, left_segments, args.profile_spacing, args.profile_interval, half_length, 'left') +
+        find_sz_length_containing_mask(mask, right_segments, args.profile_spacing, args.profile_interval, half_length, 'right'))
+
+    print('{0:.10g}'.format(sz_length))
@@ -0,0 +1,400 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import sys
+import os
+import os.path
+import numpy as np
+import pygplates
+
+import spherical_tools
+
+
+# Scalars carried by the deforming points (named after their columns in the state and output files)
+SCALAR_COLUMNS = [
+    ('crustal_stretching_factor', 'gpml_crustal_stretching_factor'),
+    ('crustal_thinning_factor', 'gpml_crustal_thinning_factor'),
+    ('crustal_thickness', 'gpml_crustal_thickness')]
+
+# Default scalars of points without them (undeformed crust)
+DEFAULT_SCALARS = {'crustal_stretching_factor': 1.0, 'crustal_thinning_factor': 0.0, 'crustal_thickness': np.nan}
+
+CHECKPOINT_FILENAME = 'checkpoint.npz'
+SUMMARY_FILENAME = 'deformation_summary.dat'
+DEFAULT_TRENCH_DISTANCE_KM = 300.0
+DEFAULT_TRENCH_SAMPLE_SPACING_KM = 20.0
+
+
+def scalar_type(name):
+    return getattr(pygplates.ScalarType, name)
+
+
+###################### Point set state #####################
+
+
+# Positions and scalars of all the deforming points, in NumPy arrays, at the current time of the tracking.
+# Points belong to groups (one per input feature), with a reconstruction plate id and the (grid) time at which
+# the group starts being tracked. Points deactivated by the topological model (e.g. subducted) stay inactive.
+class DeformingPointState(object):
+
+    def __init__(self, time, groups, lons, lats, scalars, plate_ids, start_times, active=None, started=None):
+        self.time = time
+        self.groups = groups
+        self.lons = lons
+        self.lats = lats
+        self.scalars = scalars
+        self.plate_ids = plate_ids
+        self.start_times = start_times
+        self.active = np.ones(len(lons), dtype=bool) if active is None else active
+        self.started = np.zeros(len(lons), dtype=bool) if started is None else started
+
+    def __len__(self):
+        return len(self.lons)
+
+    # Starts tracking the groups whose start time has been reached
+    def start_groups(self):
+        self.started |= self.start_times[self.groups] >= self.time - 1e-9
+
+    # The youngest start time still to come (older than nothing if none)
+    def next_start_time(self):
+        pending = self.start_times[self.start_times < self.time - 1e-9]
+        return pending.max() if pending.size else -np.inf
+
+    def tracked(self):
+        return self.started & self.active
+
+    def save(self, filename):
+        # Written to a temporary file then renamed, so an interrupted write leaves the previous checkpoint
+        temporary_filename = '{0}.tmp.npz'.format(filename)
+        np.savez(temporary_filename, time=self.time, groups=self.groups, lons=self.lons, lats=self.lats,
+                plate_ids=self.plate_ids, start_times=self.start_times, active=self.active, started=self.started,
+                **dict(('scalar_{0}'.format(name), values) for name, values in self.scalars.items()))
+        os.replace(temporary_filename, filename)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            scalars = dict((name, data['scalar_{0}'.format(name)]) for name, type_name in SCALAR_COLUMNS)
+            return cls(float(data['time']), data['groups'], data['lons'], data['lats'], scalars,
+                    data['plate_ids'], data['start_times'], data['active'], data['started'])
+
+
+# Snaps a time onto the grid of the tracking (the grid time at or younger than it)
+def snap_to_grid(time, end_time, time_step):
+    return end_time + np.floor((time - end_time) / time_step + 1e-9) * time_step
+
+
+# Reads the deforming point features (e.g. the scalar coverages of Muller2019-Young2019-Cao2020_Deforming_Points_L7)
+# into a state. Each feature is a group that starts at its geometry import time (or the begin of its valid time),
+# snapped onto the time grid, and is not tracked before then.
+def read_deforming_points(features, end_time, time_step, start_time=None):
+    lons = []
+    lats = []
+    groups = []
+    scalars = dict((name, []) for name, type_name in SCALAR_COLUMNS)
+    plate_ids = []
+    start_times = []
+
+    geometry_import_time_name = pygplates.PropertyName.create_gpml('geometryImportTime')
+    for feature in features:
+        geometry_and_scalars = feature.get_geometry(coverage_return=pygplates.CoverageReturn.geometry_and_scalars)
+        if geometry_and_scalars:
+            geometry, coverage_scalars = geometry_and_scalars
+        else:
+            geometry = feature.get_geometry()
+            coverage_scalars = {}
+        if geometry is None:
+            continue
+
+        import_time = feature.get_value(geometry_import_time_name)
+        group_start_time = import_time.get_time() if import_time else feature.get_valid_time()[0]
+        if start_time is not None:
+            group_start_time = min(group_start_time, start_time)
+        if group_start_time < end_time:
+            continue
+
+        lat_lon_points = np.array(geometry.to_lat_lon_array())
+        number_of_points = len(lat_lon_points)
+        groups.append(np.full(number_of_points, len(plate_ids), dtype=np.int32))
+        lats.append(lat_lon_points[:, 0])
+        lons.append(lat_lon_points[:, 1])
+        for name, type_name in SCALAR_COLUMNS:
+            values = coverage_scalars.get(scalar_type(type_name))
+            scalars[name].append(np.array(values, dtype=float) if values is not None
+                    else np.full(number_of_points, DEFAULT_SCALARS[name]))
+        plate_ids.append(feature.get_reconstruction_plate_id())
+        start_times.append(snap_to_grid(group_start_time, end_time, time_step))
+
+    if not plate_ids:
+        raise ValueError('No deforming points valid before {0} Ma'.format(end_time))
+
+    start_times = np.array(start_times)
+    return DeformingPointState(start_times.max(), np.concatenate(groups), np.concatenate(lons), np.concatenate(lats),
+            dict((name, np.concatenate(values)) for name, values in scalars.items()),
+            np.array(plate_ids, dtype=np.int32), start_times)
+
+
+###################### Advection #####################
+
+
+# Advects the tracked points from the current time to 'next_time' through the resolved plates and networks of the
+# topological model, in one batched call per plate id. Returns the points at every time step of the interval
+# (youngest last) as a list of (time, point indices, lons, lats, scalars), and leaves the state at 'next_time'.
+def advect(topological_model, state, next_time, time_step):
+    times = [state.time - step * time_step for step in range(1, int(round((state.time - next_time) / time_step)) + 1)]
+    snapshots = dict((time, ([], [], [], dict((name, []) for name, type_name in SCALAR_COLUMNS))) for time in times)
+
+    tracked = state.tracked()
+    for plate_id in np.unique(state.plate_ids[state.groups[tracked]]):
+        indices = np.flatnonzero(tracked & (state.plate_ids[state.groups] == plate_id))
+        geometry = pygplates.MultiPointOnSphere(zip(state.lats[indices], state.lons[indices]))
+        initial_scalars = dict((scalar_type(type_name), state.scalars[name][indices].tolist())
+                for name, type_name in SCALAR_COLUMNS)
+
+        time_span = topological_model.reconstruct_geometry(
+                geometry, state.time, oldest_time=state.time, youngest_time=next_time, time_increment=time_step,
+                reconstruction_plate_id=int(plate_id), initial_scalars=initial_scalars)
+
+        for time in times:
+            points = time_span.get_geometry_points(time, return_inactive_points=True)
+            scalar_values = time_span.get_scalar_values(time, return_inactive_points=True)
+            active = np.array([point is not None for point in points], dtype=bool)
+            lat_lon_points = np.array([point.to_lat_lon() for point in points if point is not None]).reshape(-1, 2)
+
+            point_indices, time_lons, time_lats, time_scalars = snapshots[time]
+            point_indices.append(indices[active])
+            time_lats.append(lat_lon_points[:, 0])
+            time_lons.append(lat_lon_points[:, 1])
+            for name, type_name in SCALAR_COLUMNS:
+                values = scalar_values.get(scalar_type(type_name)) if scalar_values else None
+                time_scalars[name].append(np.array([value for value, is_active in zip(values, active) if is_active], dtype=float)
+                        if values is not None else state.scalars[name][indices[active]])
+
+            if time == times[-1]:
+                state.active[indices[~active]] = False
+                state.lats[indices[active]] = lat_lon_points[:, 0]
+                state.lons[indices[active]] = lat_lon_points[:, 1]
+                for name, type_name in SCALAR_COLUMNS:
+                    state.scalars[name][indices[active]] = time_scalars[name][-1]
+
+    state.time = next_time
+
+    results = []
+    for time in times:
+        point_indices, time_lons, time_lats, time_scalars = snapshots[time]
+        if point_indices:
+            results.append((time, np.concatenate(point_indices), np.concatenate(time_lons), np.concatenate(time_lats),
+                    dict((name, np.concatenate(values)) for name, values in time_scalars.items())))
+        else:
+            results.append((time, np.zeros(0, dtype=int), np.zeros(0), np.zeros(0),
+                    dict((name, np.zeros(0)) for name, type_name in SCALAR_COLUMNS)))
+    return results
+
+
+###################### Trench proximity #####################
+
+
+# Subduction zone lines resolved by the topological model at a time, as (longitude, latitude) arrays
+def subduction_zone_segments(topological_model, time):
+    subduction_zone_type = pygplates.FeatureType.create_gpml('SubductionZone')
+    segments = []
+    for section in topological_model.topological_snapshot(time).get_resolved_topological_sections():
+        if section.get_feature().get_feature_type() != subduction_zone_type:
+            continue
+        lat_lon_points = np.array(section.get_topological_section_geometry().to_lat_lon_array())
+        segments.append((lat_lon_points[:, 1], lat_lon_points[:, 0]))
+    return segments
+
+
+# Which points lie within 'distance_km' of the subduction zones (sampled every 'spacing_km'), in chunks of points
+def near_trenches(lons, lats, segments, distance_km, spacing_km, chunk_size=4096):
+    near = np.zeros(len(lons), dtype=bool)
+    samples = [spherical_tools.sample_polyline(segment_lons, segment_lats, spacing_km)
+            for segment_lons, segment_lats in segments if len(segment_lons) > 1]
+    if not samples or not len(lons):
+        return near
+    sample_xyz = spherical_tools.lonlat_to_xyz(np.concatenate([sample[0] for sample in samples]),
+            np.concatenate([sample[1] for sample in samples]))
+    # The samples are up to half a spacing from the line
+    min_cos = np.cos((distance_km + 0.5 * spacing_km) / spherical_tools.EARTH_RADIUS_KM)
+    point_xyz = spherical_tools.lonlat_to_xyz(lons, lats)
+    for start in range(0, len(lons), chunk_size):
+        near[start:start + chunk_size] = np.dot(point_xyz[start:start + chunk_size], sample_xyz.T).max(axis=1) >= min_cos
+    return near
+
+
+# Summary row of the tracked points at one time: number of points, mean stretching factor, and the number, mean
+# and maximum stretching factor of the points near the trenches
+def summarise(lons, lats, scalars, trench_segments, distance_km, spacing_km):
+    stretching = scalars['crustal_stretching_factor']
+    near = near_trenches(lons, lats, trench_segments, distance_km, spacing_km)
+    near_stretching = stretching[near]
+    return (len(lons),
+            np.nanmean(stretching) if len(stretching) else np.nan,
+            int(np.count_nonzero(near)),
+            np.nanmean(near_stretching) if near_stretching.size else np.nan,
+            np.nanmax(near_stretching) if near_stretching.size else np.nan)
+
+
+###################### Output #####################
+
+
+def write_points(filename, lons, lats, scalars):
+    temporary_filename = '{0}.tmp.npz'.format(filename)
+    np.savez(temporary_filename, lons=lons, lats=lats, **scalars)
+    os.replace(temporary_filename, filename)
+
+
+# Keeps the summary rows older than the checkpoint, dropping rows written after it by an interrupted run
+def truncate_summary(filename, checkpoint_time):
+    if not os.path.exists(filename):
+        return
+    with open(filename, 'r') as summary_file:
+        lines = summary_file.readlines()
+    with open(filename, 'w') as summary_file:
+        for line_index, line in enumerate(lines):
+            if line_index == 0 or float(line.split()[0]) >= checkpoint_time - 1e-9:
+                summary_file.write(line)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+    if not hasattr(pygplates, 'TopologicalModel'):
+        print('{0}: Error - the imported pygplates has no TopologicalModel (needed to deform points)'.format(
+                os.path.basename(__file__)), file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Tracks a deforming point set (e.g. Muller2019-Young2019-Cao2020_Deforming_Points_L7.gpmlz) through the resolved
+    plates and deforming networks, from its geometry import time to the end time. The whole point set is advected
+    from one time step to the next (one batched call per plate id and chunk of steps), keeping positions and the
+    crustal stretching factor, thinning factor and thickness in NumPy arrays, instead of reconstructing every
+    feature from present day at every age.
+
+    The state is checkpointed in the output directory after every chunk, and an interrupted run resumes from the
+    last checkpoint (use --restart to start over). Writes a summary per time step (number of points, mean
+    stretching factor, and the number, mean and maximum stretching factor of the points near the subduction
+    zones) and optionally the points of every time step (npz).
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml deforming_networks.gpml -p Deforming_Points_L7.gpmlz \\
+        -t 240 0 -d 300 -o DeformingPoints"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more topology files (including the deforming networks).')
+    parser.add_argument('-p', '--point_filenames', type=str, nargs='+', required=True,
+            metavar='point_filename', help='Deforming point files.')
+    parser.add_argument('-t', '--time_range', type=float, nargs=2, required=True,
+            metavar=('START_TIME', 'END_TIME'),
+            help='Oldest time (points imported at younger times start later) and youngest time.')
+    parser.add_argument('-s', '--time_step', type=float, default=1.0,
+            help='Time step (Myr). Defaults to 1.')
+    parser.add_argument('-c', '--chunk_steps', type=int, default=10,
+            help='Time steps advected per batched call, between checkpoints. Defaults to 10.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-d', '--trench_distance', type=float, default=DEFAULT_TRENCH_DISTANCE_KM,
+            help='Distance (km) from the subduction zones of the points summarised as near the trenches. '
+                'Defaults to {0:g}.'.format(DEFAULT_TRENCH_DISTANCE_KM))
+    parser.add_argument('--trench_sample_spacing', type=float, default=DEFAULT_TRENCH_SAMPLE_SPACING_KM,
+            help='Spacing (km) of the samples of the subduction zones. Defaults to {0:g}.'.format(DEFAULT_TRENCH_SAMPLE_SPACING_KM))
+    parser.add_argument('--write_points', action='store_true',
+            help='Also write the points of every time step (deforming_points_<time>Ma.npz).')
+    parser.add_argument('--restart', action='store_true',
+            help='Ignore any checkpoint and start from the start time.')
+    parser.add_argument('-o', '--output_directory', type=str, default='DeformingPoints',
+            help="Output directory (state checkpoint, summary and points). Defaults to 'DeformingPoints'.")
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    start_time, end_time = args.time_range
+    os.makedirs(args.output_directory, exist_ok=True)
+    checkpoint_filename = os.path.join(args.output_directory, CHECKPOINT_FILENAME)
+    summary_filename = os.path.join(args.output_directory, SUMMARY_FILENAME)
+
+    rotation_model = pygplates.RotationModel(args.rotation_filenames)
+    topological_features = [pygplates.FeatureCollection(filename) for filename in args.topology_filenames]
+    topological_model = pygplates.TopologicalModel(topological_features, rotation_model, anchor_plate_id=args.anchor_plate_id)
+
+    if os.path.exists(checkpoint_filename) and not args.restart:
+        state = DeformingPointState.load(checkpoint_filename)
+        truncate_summary(summary_filename, state.time)
+        results = []
+        print('Resuming from {0:g} Ma'.format(state.time))
+    else:
+        features = [feature for filename in args.point_filenames for feature in pygplates.FeatureCollection(filename)]
+        state = read_deforming_points(features, end_time, args.time_step, start_time)
+        with open(summary_filename, 'w') as summary_file:
+            summary_file.write('Age Points Mean_Stretching Near_Trench_Points Near_Trench_Mean_Stretching '
+                    'Near_Trench_Max_Stretching\n')
+
+        # The points at the start time, before any advection
+        state.start_groups()
+        tracked = state.tracked()
+        results = [(state.time, np.flatnonzero(tracked), state.lons[tracked], state.lats[tracked],
+                dict((name, values[tracked]) for name, values in state.scalars.items()))]
+    print('Tracking {0} points from {1:g} Ma to {2:g} Ma'.format(len(state), state.time, end_time))
+
+    while True:
+        if state.time > end_time + 1e-9:
+            # Chunks end where a group starts, so it joins at its start time
+            next_time = max(state.time - args.chunk_steps * args.time_step, end_time, state.next_start_time())
+            results += advect(topological_model, state, next_time, args.time_step)
+            state.start_groups()
+            # The points of a group starting now are at their start position
+            starting = state.tracked() & (state.start_times[state.groups] >= state.time - 1e-9) & \
+                    (state.start_times[state.groups] <= state.time + 1e-9)
+            if np.any(starting):
+                time, indices, lons, lats, scalars = results[-1]
+                results[-1] = (time, np.concatenate((indices, np.flatnonzero(starting))),
+                        np.concatenate((lons, state.lons[starting])), np.concatenate((lats, state.lats[starting])),
+                        dict((name, np.concatenate((scalars[name], state.scalars[name][starting]))) for name in scalars))
+
+        # Summaries (and points) of the chunk are written before its checkpoint
+        with open(summary_filename, 'a') as summary_file:
+            for time, indices, lons, lats, scalars in results:
+                trench_segments = subduction_zone_segments(topological_model, time)
+                row = summarise(lons, lats, scalars, trench_segments, args.trench_distance, args.trench_sample_spacing)
+                summary_file.write('{0:g} {1} {2:.4f} {3} {4:.4f} {5:.4f}\n'.format(time, *row))
+                if args.write_points:
+                    write_points(os.path.join(args.output_directory, 'deforming_points_{0:0.2f}Ma.npz'.format(time)),
+                            lons, lats, scalars)
+        state.save(checkpoint_filename)
+        results = []
+
+        if state.time <= end_time + 1e-9:
+            break
+        print('Reached {0:g} Ma ({1} points tracked)'.format(state.time, np.count_nonzero(state.tracked())))
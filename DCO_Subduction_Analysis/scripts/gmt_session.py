@@ -0,0 +1,472 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import ctypes
+import multiprocessing
+import multiprocessing.util
+import os.path
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+
+import spherical_tools
+
+
+# Oldest PyGMT with output virtual files and reading GMT objects back from them
+REQUIRED_PYGMT_VERSION = (0, 12)
+
+# Default GMT output format of floating point numbers (FORMAT_FLOAT_OUT), used to write the profile files as GMT does
+GMT_FLOAT_FORMAT = '{0:.12g}'
+
+
+def pygmt_version():
+    import pygmt
+    return tuple(int(number) for number in re.findall(r'\d+', pygmt.__version__)[:2])
+
+
+###################### Session #####################
+
+
+# One long-lived GMT session (GMT C API, through PyGMT) running modules in-process. Modules read and write
+# in-memory data through virtual files instead of forking 'gmt' and exchanging text files.
+class GMTSession(object):
+
+    def __init__(self):
+        from pygmt.clib import Session
+        self.lib = Session()
+        self.lib.__enter__()
+        self.destroy_data = self.lib.get_libgmt_func('GMT_Destroy_Data',
+                argtypes=[ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)], restype=ctypes.c_int)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.lib is not None:
+            self.lib.__exit__(None, None, None)
+            self.lib = None
+
+    # Runs a module on files, e.g. call('grdconvert', '{grid} -Gout.nc')
+    def call(self, module, arguments):
+        self.lib.call_module(module, arguments)
+
+    # Frees a GMT object read from an output virtual file (the session would otherwise hold it until destroyed)
+    def free(self, pointer):
+        data = ctypes.c_void_p(ctypes.cast(pointer, ctypes.c_void_p).value)
+        self.destroy_data(self.lib.session_pointer, ctypes.byref(data))
+
+    # Runs a module writing a grid, and returns the grid in memory (to be passed to 'input_grid', then freed)
+    def output_grid(self, module, arguments):
+        with self.lib.virtualfile_out(kind='grid') as grid_file:
+            self.call(module, '{0} -G{1}'.format(arguments, grid_file))
+            return self.lib.read_virtualfile(grid_file, kind='grid')
+
+    # Virtual file (context manager) reading an in-memory grid, to use as a module input file
+    def input_grid(self, grid):
+        return self.lib.open_virtualfile('GMT_IS_GRID', 'GMT_IS_SURFACE', 'GMT_IN|GMT_IS_REFERENCE', grid)
+
+    # Virtual file (context manager) reading columns of NumPy arrays, to use as a module input file
+    def input_vectors(self, *vectors):
+        return self.lib.virtualfile_from_vectors(*[np.ascontiguousarray(vector, dtype=float) for vector in vectors])
+
+    # Runs a module writing a table, with '{output}' in the arguments standing for the output,
+    # and returns its segments as a list of (header, rows x columns array)
+    def output_segments(self, module, arguments):
+        with self.lib.virtualfile_out(kind='dataset') as table_file:
+            self.call(module, arguments.format(output='->{0}'.format(table_file)))
+            dataset = self.lib.read_virtualfile(table_file, kind='dataset')
+            try:
+                return dataset_segments(dataset.contents)
+            finally:
+                self.free(dataset)
+
+
+# Copies the segments of a GMT dataset (headers without the leading '>', and the numerical columns)
+def dataset_segments(dataset):
+    segments = []
+    for table_index in range(dataset.n_tables):
+        table = dataset.table[table_index].contents
+        for segment_index in range(table.n_segments):
+            segment = table.segment[segment_index].contents
+            columns = np.array([np.ctypeslib.as_array(segment.data[column], shape=(segment.n_rows,))
+                    for column in range(segment.n_columns)]).reshape(segment.n_columns, segment.n_rows)
+            header = segment.header.decode('utf-8') if segment.header else ''
+            segments.append((header, columns.T.copy()))
+    return segments
+
+
+def write_segments(filename, segments):
+    with open(filename, 'w') as output_file:
+        for header, rows in segments:
+            output_file.write('> {0}\n'.format(header))
+            for row in rows:
+                output_file.write('\t'.join(GMT_FLOAT_FORMAT.format(value) for value in row))
+                output_file.write('\n')
+
+
+###################### Subduction zone lengths #####################
+
+
+# Total length (km) of the subduction zones of a file: 'gmt mapproject -fg -Gk' of each segment, summed, as
+# calculate_sz_length_total does with one mapproject process per segment
+def total_length(session, sz_filename):
+    total = 0.0
+    for lons, lats in spherical_tools.read_gmt_segments(sz_filename):
+        with session.input_vectors(lons, lats) as points_file:
+            rows = session.output_segments('mapproject', '{0} -fg -Gk {{output}}'.format(points_file))[-1][1]
+        if len(rows):
+            total += rows[-1, 2]
+    return int(total)
+
+
+# Number of cross-profiles ('gmt grdtrack -C -nn+c') on the subducting side that intersect a mask grid (value 1),
+# counting consecutive profiles with the same centre once, as the awk of find_sz_length_containing_feature.
+# Returns the count, and the profiles and half-profiles (for writing the profile files).
+def count_intersecting_profiles(session, grid_file, sz_filename, side, prof_length, prof_interval, prof_spacing):
+    profiles = session.output_segments('grdtrack', '{0} -G{1} -nn+c -C{2}/{3}/{4} {{output}}'.format(
+            sz_filename, grid_file, prof_length, prof_interval, prof_spacing))
+
+    half_profiles = []
+    count = 0
+    previous_centre = '0'
+    check_profile = True
+    for header, rows in profiles:
+        # The centre of a profile is the seventh field of its header line ('>' being the first)
+        fields = ('> ' + header).split()
+        centre = fields[6] if len(fields) > 6 else ''
+        if centre != previous_centre:
+            check_profile = True
+            previous_centre = centre
+        rows = rows[rows[:, 2] <= 0] if side == 'left' else rows[rows[:, 2] >= 0]
+        half_profiles.append((header, rows))
+        if check_profile and np.any(rows[:, 4] == 1):
+            count += 1
+            check_profile = False
+    return count, profiles, half_profiles
+
+
+# Length of the subduction zones whose cross-profiles intersect the polygons (mask 'gmt grdmask -Rd -fg'),
+# with the grid kept in memory between grdmask and grdtrack
+def feature_length(session, polygon_filename, sz_left, sz_right, grid_spacing, mask_values,
+        prof_length, prof_interval, prof_spacing, grid_filename=None, profile_prefix=None):
+    grid = session.output_grid('grdmask', '{0} -fg -Rd -I{1} -N{2}'.format(polygon_filename, grid_spacing, mask_values))
+    try:
+        with session.input_grid(grid) as grid_file:
+            if grid_filename:
+                session.call('grdconvert', '{0} -G{1}'.format(grid_file, grid_filename))
+            count = 0
+            for sz_filename, side, label in ((sz_left, 'left', 'L'), (sz_right, 'right', 'R')):
+                side_count, profiles, half_profiles = count_intersecting_profiles(
+                        session, grid_file, sz_filename, side, prof_length, prof_interval, prof_spacing)
+                count += side_count
+                if profile_prefix:
+                    write_segments('{0}feature_{1}_xprofiles.gmt'.format(profile_prefix, label), profiles)
+                    write_segments('{0}feature_{1}_halfxprofiles.gmt'.format(profile_prefix, label), half_profiles)
+    finally:
+        session.free(grid)
+    return float(re.sub('[A-Za-z]', '', str(prof_spacing))) * count
+
+
+# Mask grid spacing and cross-profile interval of the polygons measured by 'lengths', as in
+# calculate_sz_length_carbonate and calculate_sz_length_continentArc
+FEATURES = [
+    ('carbonate', '10k', '5'),
+    ('continent', '50k', '10')]
+
+
+# Total length, and the lengths near each of the FEATURES given, of one age (one 'lengths' row)
+def age_lengths(session, args, age_filename):
+    values = [total_length(session, age_filename(args.sz_filename))]
+    for feature, default_grid_spacing, default_prof_interval in FEATURES:
+        polygon_filename = getattr(args, feature)
+        if polygon_filename:
+            values.append(feature_length(session, age_filename(polygon_filename),
+                    age_filename(args.sz_left), age_filename(args.sz_right),
+                    getattr(args, '{0}_grid_spacing'.format(feature)), args.mask_values, args.prof_length,
+                    getattr(args, '{0}_prof_interval'.format(feature)), args.prof_spacing,
+                    age_filename(getattr(args, '{0}_grid'.format(feature))),
+                    age_filename(getattr(args, '{0}_profile_prefix'.format(feature)))))
+    return values
+
+
+###################### Comparison with the GMT command line #####################
+
+
+# awk of find_sz_length_containing_feature counting the cross-profiles (with distinct centres) intersecting the mask
+COUNT_INTERSECTING_PROFILES_AWK = (
+    'BEGIN {intersect_count=0;checkprofile=1;prevlatlong=0;} '
+    '{if (($1 == ">") && (prevlatlong != $7)) {checkprofile = 1; prevlatlong = $7;} '
+    'if (( checkprofile == 1 ) && ( $5 == 1 )) {intersect_count++; checkprofile=0;}} '
+    'END { print intersect_count }')
+
+
+def run_command_line(arguments, output_filename=None):
+    if output_filename is None:
+        return subprocess.run(arguments, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    with open(output_filename, 'w') as output_file:
+        subprocess.run(arguments, check=True, stdout=output_file)
+
+
+# calculate_sz_length_total: 'gmt gmtconvert -D' into segment files, then 'gmt mapproject -fg -Gk' of each
+def command_line_total_length(sz_filename, work_directory):
+    run_command_line(['gmt', 'gmtconvert', '-D{0}'.format(os.path.join(work_directory, 'gmtconvert_segment_sz_%d.txt')),
+            sz_filename])
+    total = 0.0
+    for segment_filename in sorted(os.listdir(work_directory)):
+        if not segment_filename.startswith('gmtconvert_segment_sz_'):
+            continue
+        rows = run_command_line(['gmt', 'mapproject', '-fg', '-Gk', os.path.join(work_directory, segment_filename)])
+        lines = rows.strip().splitlines()
+        if lines:
+            total += float(lines[-1].split()[2])
+    return int(total)
+
+
+# The global mask mode of calculate_sz_length_carbonate/continentArc: 'gmt grdmask' to a netCDF grid, 'gmt grdtrack -C'
+# to text files, the awk half-profiles and the awk count of find_sz_length_containing_feature
+def command_line_feature_length(polygon_filename, sz_left, sz_right, grid_spacing, mask_values,
+        prof_length, prof_interval, prof_spacing, work_directory):
+    grid_filename = os.path.join(work_directory, 'feature_mask.nc')
+    run_command_line(['gmt', 'grdmask', polygon_filename, '-fg', '-Rd', '-I{0}'.format(grid_spacing),
+            '-N{0}'.format(mask_values), '-G{0}'.format(grid_filename)])
+    count = 0
+    for sz_filename, side_condition, label in ((sz_left, '$3 <= 0', 'L'), (sz_right, '$3 >= 0', 'R')):
+        profiles_filename = os.path.join(work_directory, 'feature_{0}_xprofiles.gmt'.format(label))
+        half_profiles_filename = os.path.join(work_directory, 'feature_{0}_halfxprofiles.gmt'.format(label))
+        run_command_line(['gmt', 'grdtrack', sz_filename, '-G{0}'.format(grid_filename), '-nn+c',
+                '-C{0}/{1}/{2}'.format(prof_length, prof_interval, prof_spacing)], profiles_filename)
+        run_command_line(['awk', '{{ if ( $1 == ">") print $0 ; else if ({0}) print $0 }}'.format(side_condition),
+                profiles_filename], half_profiles_filename)
+        count += int(run_command_line(['awk', COUNT_INTERSECTING_PROFILES_AWK, half_profiles_filename]))
+    return float(re.sub('[A-Za-z]', '', str(prof_spacing))) * count
+
+
+# The 'lengths' row of one age from the GMT command line steps (in a scratch directory)
+def command_line_age_lengths(args, age_filename):
+    work_directory = tempfile.mkdtemp(prefix='gmt_session_compare_')
+    try:
+        values = [command_line_total_length(age_filename(args.sz_filename), work_directory)]
+        for feature, default_grid_spacing, default_prof_interval in FEATURES:
+            polygon_filename = getattr(args, feature)
+            if polygon_filename:
+                values.append(command_line_feature_length(age_filename(polygon_filename),
+                        age_filename(args.sz_left), age_filename(args.sz_right),
+                        getattr(args, '{0}_grid_spacing'.format(feature)), args.mask_values, args.prof_length,
+                        getattr(args, '{0}_prof_interval'.format(feature)), args.prof_spacing, work_directory))
+        return values
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+
+# Prints lengths as the shell does (integers without a decimal point or exponent), and rows of lengths space separated
+def format_value(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(format_value(column) for column in value)
+    return '{0:d}'.format(int(value)) if float(value).is_integer() else '{0:.12g}'.format(value)
+
+
+###################### Parallel driver #####################
+
+
+# Per-process GMT session, created once by each worker process and destroyed when the worker exits after the
+# pool is closed and joined. Pool workers leave through os._exit, so 'atexit' handlers never run there; the
+# multiprocessing finalizers (with an exit priority) do.
+worker_state = {}
+
+
+def initialise_worker(args):
+    worker_state['args'] = args
+    worker_state['session'] = GMTSession()
+    multiprocessing.util.Finalize(None, worker_state['session'].close, exitpriority=10)
+
+
+def age_worker(age):
+    args = worker_state['args']
+    return age, run_command(worker_state['session'], args, age)
+
+
+# Runs the command of the arguments for one age ('{age}' in file names standing for the age)
+def run_command(session, args, age=None):
+    def age_filename(template):
+        return template.format(age=age) if template and age is not None else template
+
+    if args.command == 'total_length':
+        return total_length(session, age_filename(args.sz_filename))
+    if args.command == 'lengths':
+        return age_lengths(session, args, age_filename)
+    return feature_length(session, age_filename(args.polygon_filename),
+            age_filename(args.sz_left), age_filename(args.sz_right), args.grid_spacing, args.mask_values,
+            args.prof_length, args.prof_interval, args.prof_spacing,
+            age_filename(args.grid_filename), age_filename(args.profile_prefix))
+
+
+if __name__ == "__main__":
+
+    # Check the imported PyGMT version.
+    try:
+        version = pygmt_version()
+    except ImportError:
+        print('{0}: Error - PyGMT is required (e.g. conda install pygmt)'.format(os.path.basename(__file__)), file=sys.stderr)
+        sys.exit(1)
+    if version < REQUIRED_PYGMT_VERSION:
+        print('{0}: Error - imported PyGMT version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), '.'.join(map(str, version)), '.'.join(map(str, REQUIRED_PYGMT_VERSION))),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Runs the GMT steps of the subduction zone lengths in-process, in one GMT session (the GMT C API through
+    PyGMT), passing grids and tables between modules in memory instead of forking 'gmt' for each step and
+    exchanging text files. The numbers are those of the GMT command line steps of DCO_subductionzone_analysis.sh:
+
+    total_length:   'gmt mapproject -fg -Gk' of each subduction zone segment, summed (calculate_sz_length_total)
+    feature_length: 'gmt grdmask' of the polygons, 'gmt grdtrack -C' cross-profiles on the subducting side of
+                    the left and right polarity subduction zones, and the spacing times the number of profiles
+                    intersecting the polygons (the global mask mode of find_sz_length_containing_feature)
+
+    lengths:        total_length, and feature_length of the carbonate platforms and continents (each if given,
+                    with the mask grid spacings and profile intervals of the driver), printed as one row per age
+
+    With '-t', file names are templates with '{age}' standing for the age, the ages run on a process pool with
+    one GMT session per worker, and 'age value(s)' lines are printed. Otherwise the value(s) are printed.
+    The driver measures every age of a run with one 'lengths -t' call.
+
+    With 'lengths --compare', the GMT command line steps of the driver (gmtconvert, mapproject, grdmask and grdtrack
+    through text files, and the driver's awk) also run on the same files, both rows are printed per age, and the
+    exit status is 1 if any value differs.
+
+    For example...
+
+    python %(prog)s total_length -l subduction_boundaries_100.00Ma.gmt
+    python %(prog)s feature_length -p reconstructed_carbonate_100.0Ma.gmt -I 10k -N 0/1/1 \\
+        -l subduction_boundaries_sL_100.00Ma.gmt -r subduction_boundaries_sR_100.00Ma.gmt -c 562k -i 5 -s 10
+    python %(prog)s lengths -t 100 -l "{age}/sz_{age}.00Ma.gmt" --sz_left "{age}/sz_sL_{age}.00Ma.gmt" \\
+        --sz_right "{age}/sz_sR_{age}.00Ma.gmt" --carbonate "{age}/carbonate_{age}.0Ma.gmt" -c 562k --compare"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    def add_age_arguments(subparser):
+        subparser.add_argument('-t', '--ages', type=int, nargs='+',
+                help="Ages to run on a process pool ('{age}' in file names standing for the age).")
+        subparser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+                help='Number of worker processes (with -t). Defaults to the number of CPUs.')
+
+    total_parser = subparsers.add_parser('total_length', help='Total subduction zone length (km).')
+    total_parser.add_argument('-l', '--sz_filename', type=str, required=True,
+            help='Subduction zone file (GMT).')
+    add_age_arguments(total_parser)
+
+    feature_parser = subparsers.add_parser('feature_length',
+            help='Length of the subduction zones near polygons (km), from a global mask grid.')
+    feature_parser.add_argument('-p', '--polygon_filename', type=str, required=True,
+            help='Polygons (GMT or xy) to mask.')
+    feature_parser.add_argument('-l', '--sz_left', type=str, required=True,
+            help='Left polarity subduction zone file (GMT).')
+    feature_parser.add_argument('-r', '--sz_right', type=str, required=True,
+            help='Right polarity subduction zone file (GMT).')
+    feature_parser.add_argument('-I', '--grid_spacing', type=str, required=True,
+            help="Mask grid spacing as given to 'gmt grdmask -I', e.g. 10k.")
+    feature_parser.add_argument('-N', '--mask_values', type=str, default='0/1/1',
+            help="Mask values as given to 'gmt grdmask -N'. Defaults to 0/1/1.")
+    feature_parser.add_argument('-c', '--prof_length', type=str, required=True,
+            help="Total cross-profile length as given to 'gmt grdtrack -C', e.g. 562k.")
+    feature_parser.add_argument('-i', '--prof_interval', type=str, required=True,
+            help='Spacing of the points along the cross-profiles.')
+    feature_parser.add_argument('-s', '--prof_spacing', type=str, required=True,
+            help='Spacing of the cross-profiles along the subduction zones (km).')
+    feature_parser.add_argument('-g', '--grid_filename', type=str,
+            help='Also write the mask grid to this netCDF file.')
+    feature_parser.add_argument('--profile_prefix', type=str,
+            help="Also write the profiles to '<prefix>feature_{L,R}_{xprofiles,halfxprofiles}.gmt'.")
+    add_age_arguments(feature_parser)
+
+    lengths_parser = subparsers.add_parser('lengths',
+            help='Total subduction zone length and lengths near the carbonate platforms and continents (km).')
+    lengths_parser.add_argument('-l', '--sz_filename', type=str, required=True,
+            help='Subduction zone file (GMT).')
+    lengths_parser.add_argument('--sz_left', type=str,
+            help='Left polarity subduction zone file (GMT).')
+    lengths_parser.add_argument('--sz_right', type=str,
+            help='Right polarity subduction zone file (GMT).')
+    lengths_parser.add_argument('-N', '--mask_values', type=str, default='0/1/1',
+            help="Mask values as given to 'gmt grdmask -N'. Defaults to 0/1/1.")
+    lengths_parser.add_argument('-c', '--prof_length', type=str,
+            help="Total cross-profile length as given to 'gmt grdtrack -C', e.g. 562k.")
+    lengths_parser.add_argument('-s', '--prof_spacing', type=str, default='10',
+            help='Spacing of the cross-profiles along the subduction zones (km). Defaults to 10.')
+    for feature, grid_spacing, prof_interval in FEATURES:
+        lengths_parser.add_argument('--{0}'.format(feature), type=str,
+                help='Polygons (GMT or xy) of the {0} length.'.format(feature))
+        lengths_parser.add_argument('--{0}_grid_spacing'.format(feature), type=str, default=grid_spacing,
+                help='Mask grid spacing of the {0} polygons. Defaults to {1}.'.format(feature, grid_spacing))
+        lengths_parser.add_argument('--{0}_prof_interval'.format(feature), type=str, default=prof_interval,
+                help='Spacing of the points along the {0} cross-profiles. Defaults to {1}.'.format(feature, prof_interval))
+        lengths_parser.add_argument('--{0}_grid'.format(feature), type=str,
+                help='Also write the {0} mask grid to this netCDF file.'.format(feature))
+        lengths_parser.add_argument('--{0}_profile_prefix'.format(feature), type=str,
+                help="Also write the {0} profiles to '<prefix>feature_{{L,R}}_{{xprofiles,halfxprofiles}}.gmt'.".format(feature))
+    lengths_parser.add_argument('--compare', action='store_true',
+            help='Also run the GMT command line steps and print their row after each row (needs the gmt program).')
+    add_age_arguments(lengths_parser)
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if args.command == 'lengths' and (args.carbonate or args.continent) and not (
+            args.sz_left and args.sz_right and args.prof_length):
+        parser.error('--carbonate and --continent need --sz_left, --sz_right and -c')
+
+    if args.command == 'lengths' and args.compare:
+        # One session, ages in turn, each followed by the command line row
+        differ = False
+        with GMTSession() as session:
+            for age in (args.ages or [None]):
+                def age_filename(template):
+                    return template.format(age=age) if template and age is not None else template
+                session_row = format_value(age_lengths(session, args, age_filename))
+                command_line_row = format_value(command_line_age_lengths(args, age_filename))
+                prefix = '{0} '.format(age) if age is not None else ''
+                print('{0}{1} session'.format(prefix, session_row))
+                print('{0}{1} command_line{2}'.format(prefix, command_line_row,
+                        '' if command_line_row == session_row else ' DIFFERS'))
+                differ = differ or command_line_row != session_row
+        sys.exit(1 if differ else 0)
+
+    if args.ages:
+        pool = multiprocessing.Pool(args.processes, initialise_worker, (args,))
+        try:
+            for age, value in sorted(pool.imap_unordered(age_worker, args.ages)):
+                print('{0} {1}'.format(age, format_value(value)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        with GMTSession() as session:
+            print(format_value(run_command(session, args)))
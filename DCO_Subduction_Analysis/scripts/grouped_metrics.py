@@ -0,0 +1,313 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import multiprocessing
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import corridor_mask
+import section_store
+import spherical_tools
+from subduction_ensemble import resolve_topologies_V2, reconstruct_polygons
+
+
+# Metrics summed over the sections of each group, then the percentage derived from the sums
+SUMMED_METRICS = ['sz_length', 'sz_length_carbonate', 'sz_length_continentarc']
+METRICS = SUMMED_METRICS + ['continent_arc_percentage']
+
+# Group key columns. 'global' puts every section in one group.
+GROUPINGS = ['global', 'overriding_plate', 'subducting_plate', 'polarity', 'region']
+
+DEFAULT_OUTPUT_FILENAME = 'grouped_sz_metrics.dat'
+
+
+###################### Sections of one age #####################
+
+
+# Resolves the topologies and returns a section store of the subduction zone sub-segments at one time
+def resolve_subduction_store(rotation_model, topological_features, reconstruction_time, anchor_plate_id):
+    resolved_topologies = []
+    shared_boundary_sections = []
+    pygplates.resolve_topologies(
+            topological_features, rotation_model, resolved_topologies, reconstruction_time, shared_boundary_sections,
+            anchor_plate_id)
+
+    subduction_zone_type = pygplates.FeatureType.create_gpml('SubductionZone')
+    builder = section_store.SectionStoreBuilder()
+    section_store.add_shared_boundary_sections(builder,
+            [section for section in shared_boundary_sections if section.get_feature().get_feature_type() == subduction_zone_type],
+            reconstruction_time)
+    return builder.build()
+
+
+# Removes the sections that the anomalous segment filter of resolve_topologies_V.2.py would remove. The anomalous
+# sections are compared like the sub-segments of its topology graph (by the topological section and vertex range
+# when they have one), and only the black-listed sections themselves are removed.
+def filter_anomalous_sections(store, max_distance=resolve_topologies_V2.max_distance):
+    anomalous_indices = np.flatnonzero(store.anomalous)
+    if anomalous_indices.size == 0:
+        return store
+
+    anomalous_features = section_store.to_feature_collection(store.select(anomalous_indices))
+    anomalous_segments = [
+        resolve_topologies_V2.AnomalousSegment(feature, store.feature_ids[anomalous_index], store.vertex_range(anomalous_index))
+        for anomalous_index, feature in zip(anomalous_indices, anomalous_features)]
+    segment_indices = dict((id(segment), anomalous_index)
+            for segment, anomalous_index in zip(anomalous_segments, anomalous_indices))
+
+    black_list = resolve_topologies_V2.build_blacklist(
+            resolve_topologies_V2.sort_segments_by_length(anomalous_segments), max_distance)
+    keep = np.ones(len(store), dtype=bool)
+    keep[[segment_indices[id(segment)] for segment in black_list]] = False
+    return store.select(keep)
+
+
+###################### Per-section metrics and keys #####################
+
+
+# Length (kms) of every section, from the flat coordinate arrays
+def section_lengths(store):
+    if len(store.lons) < 2:
+        return np.zeros(len(store))
+    vertex_arcs = spherical_tools.angular_distance(
+            store.lons[:-1], store.lats[:-1], store.lons[1:], store.lats[1:]) * spherical_tools.EARTH_RADIUS_KM
+    # Drop the arcs joining the last vertex of a section to the first vertex of the next one
+    cumulative = np.concatenate(([0.0], np.cumsum(vertex_arcs)))
+    starts = store.offsets[:-1]
+    ends = np.maximum(store.offsets[1:] - 1, starts)
+    return cumulative[ends] - cumulative[starts]
+
+
+# Length (kms) of every section whose cross-profiles on the overriding side intersect the mask, as in
+# corridor_mask.find_sz_length_containing_mask(). Sections of unknown polarity have none.
+def section_intersect_lengths(store, mask, prof_spacing, prof_interval, half_length):
+    lengths = np.zeros(len(store))
+    for index in range(len(store)):
+        polarity = store.polarities[index]
+        if polarity == section_store.POLARITY_UNKNOWN:
+            continue
+        lons, lats = store.coordinates(index)
+        lengths[index] = corridor_mask.find_sz_length_containing_mask(mask, [(lons, lats)], prof_spacing, prof_interval,
+                half_length, 'left' if polarity == section_store.POLARITY_LEFT else 'right')
+    return lengths
+
+
+# Left and right polarity sections as (longitude, latitude) arrays, to build the corridor masks
+def polarity_segments(store, polarity):
+    return [store.coordinates(index) for index in np.flatnonzero(store.polarities == polarity)]
+
+
+# Name of the region polygon containing the middle vertex of each section ('none' outside every region).
+# The first region containing it wins.
+def section_regions(store, regions):
+    names = np.full(len(store), 'none', dtype=object)
+    if not len(store):
+        return names
+    middle = (store.offsets[:-1] + np.maximum(store.offsets[1:] - 1, store.offsets[:-1])) // 2
+    middle_lons = store.lons[middle]
+    middle_lats = store.lats[middle]
+    for name, (polygon_lons, polygon_lats) in regions:
+        remaining = names == 'none'
+        inside = spherical_tools.points_in_polygon(middle_lons[remaining], middle_lats[remaining], polygon_lons, polygon_lats)
+        names[np.flatnonzero(remaining)[inside]] = name
+    return names
+
+
+# Group key of every section, for each grouping
+def section_group_keys(store, regions):
+    return {
+        'global': np.full(len(store), 'all', dtype=object),
+        'overriding_plate': np.array([str(plate_id) if plate_id != section_store.NO_PLATE_ID else 'none'
+                for plate_id in store.overriding_plate_ids], dtype=object),
+        'subducting_plate': np.array([str(plate_id) if plate_id != section_store.NO_PLATE_ID else 'none'
+                for plate_id in store.subducting_plate_ids], dtype=object),
+        'polarity': np.array([section_store.POLARITY_NAMES[polarity] for polarity in store.polarities], dtype=object),
+        'region': section_regions(store, regions)}
+
+
+###################### Group-by #####################
+
+
+# Sums each per-section metric over the groups of every grouping in one pass (np.unique + np.bincount).
+# Returns a list of (group, metric, value) rows, with groups named 'grouping:key'.
+def aggregate_groups(group_keys, section_metrics):
+    rows = []
+    for grouping in GROUPINGS:
+        keys, inverse = np.unique(group_keys[grouping].astype(str), return_inverse=True)
+        sums = dict((metric, np.bincount(inverse, weights=section_metrics[metric], minlength=len(keys)))
+                for metric in SUMMED_METRICS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sums['continent_arc_percentage'] = np.where(sums['sz_length'] > 0,
+                    100.0 * sums['sz_length_continentarc'] / sums['sz_length'], np.nan)
+        for key_index, key in enumerate(keys):
+            for metric in METRICS:
+                rows.append(('{0}:{1}'.format(grouping, key), metric, sums[metric][key_index]))
+    return rows
+
+
+# Calculates the grouped metrics of the subduction zone sections of one time
+def calculate_grouped_metrics(store, carbonate_polygons, continental_polygons, regions,
+        prof_spacing, prof_interval, half_length, carbonate_resolution, continent_resolution):
+
+    store = filter_anomalous_sections(store)
+    left_segments = polarity_segments(store, section_store.POLARITY_LEFT)
+    right_segments = polarity_segments(store, section_store.POLARITY_RIGHT)
+
+    section_metrics = {'sz_length': section_lengths(store)}
+    for metric, polygons, resolution in (
+            ('sz_length_carbonate', carbonate_polygons, carbonate_resolution),
+            ('sz_length_continentarc', continental_polygons, continent_resolution)):
+        mask = corridor_mask.build_corridor_mask(polygons, left_segments, right_segments, half_length, resolution)
+        section_metrics[metric] = section_intersect_lengths(store, mask, prof_spacing, prof_interval, half_length)
+
+    return aggregate_groups(section_group_keys(store, regions), section_metrics)
+
+
+###################### Parallel driver #####################
+
+
+# Per-process state, loaded once by each worker process
+worker_state = {}
+
+
+def initialise_worker(args):
+    worker_state['args'] = args
+    worker_state['rotation_model'] = pygplates.RotationModel(args.rotation_filenames)
+    worker_state['carbonate_features'] = pygplates.FeatureCollection(args.carbonate_filename)
+    worker_state['continental_features'] = [pygplates.FeatureCollection(filename) for filename in args.continental_filenames]
+    worker_state['region_features'] = pygplates.FeatureCollection(args.region_filename) if args.region_filename else None
+    if args.section_store_filename:
+        worker_state['store'] = section_store.SectionStore.load(args.section_store_filename)
+    else:
+        worker_state['topological_features'] = [pygplates.FeatureCollection(filename) for filename in args.topology_filenames]
+
+
+def calculate_grouped_metrics_worker(reconstruction_time):
+    args = worker_state['args']
+    rotation_model = worker_state['rotation_model']
+
+    if 'store' in worker_state:
+        store = worker_state['store'].at_time(reconstruction_time)
+        store = store.select(store.feature_types == store.type_code('gpml:SubductionZone'))
+    else:
+        store = resolve_subduction_store(rotation_model, worker_state['topological_features'], reconstruction_time,
+                args.anchor_plate_id)
+
+    regions = []
+    if worker_state['region_features'] is not None:
+        reconstructed_regions = []
+        pygplates.reconstruct(worker_state['region_features'], rotation_model, reconstructed_regions,
+                reconstruction_time, args.anchor_plate_id)
+        for reconstructed_region in reconstructed_regions:
+            lat_lon_points = np.array(reconstructed_region.get_reconstructed_geometry().to_lat_lon_array())
+            # Spaces would split the group column of the table
+            name = reconstructed_region.get_feature().get_name().replace(' ', '_') or 'unnamed'
+            regions.append((name,
+                    (lat_lon_points[:, 1], lat_lon_points[:, 0])))
+
+    return reconstruction_time, calculate_grouped_metrics(
+            store,
+            reconstruct_polygons(rotation_model, worker_state['carbonate_features'], reconstruction_time, args.anchor_plate_id),
+            reconstruct_polygons(rotation_model, worker_state['continental_features'], reconstruction_time, args.anchor_plate_id),
+            regions, args.profile_spacing, args.profile_interval, 0.5 * args.cross_profile_length,
+            args.carbonate_resolution, args.continent_resolution)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Subduction zone metrics (total length, length near carbonate platforms, continental arc length and
+    percentage) broken down by overriding plate, subducting plate, polarity and optional region polygons,
+    computed in the same pass as the global totals. Anomalous segments are filtered as in
+    resolve_topologies_V.2.py. Writes one long table with the columns Age Group Metric Value, where Group is
+    'grouping:key' (e.g. overriding_plate:701, polarity:Left, region:Tethys, global:all).
+
+    Region polygons are reconstructed with their plate ids and named by their feature name.
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -c Active_Carbonate.gpml -a COB.gpml -t 0 1 2 \\
+        --regions ocean_basins.gpml -o grouped_sz_metrics.dat"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+',
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-s', '--section_store', type=str,
+            dest='section_store_filename',
+            help='A section store (npz from section_store.py) to use instead of resolving the topologies.')
+    parser.add_argument('-c', '--carbonate_filename', type=str, required=True,
+            help='Carbonate platform file.')
+    parser.add_argument('-a', '--continental_filenames', type=str, nargs='+', required=True,
+            metavar='continental_filename', help='One or more continental polygon files.')
+    parser.add_argument('--regions', type=str,
+            dest='region_filename',
+            help='Optional region polygons (e.g. ocean basins) to group by.')
+    parser.add_argument('-t', '--reconstruction_times', type=float, nargs='+', required=True,
+            metavar='reconstruction_time', help='One or more times at which to calculate the metrics.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-l', '--cross_profile_length', type=corridor_mask.parse_distance_km, default=508.0,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (km). Half of it is searched on the "
+                "overriding side. Defaults to 508.")
+    parser.add_argument('--profile_spacing', type=corridor_mask.parse_distance_km, default=10.0,
+            help='Spacing of cross-profiles along the subduction zones (km). Defaults to 10.')
+    parser.add_argument('--profile_interval', type=corridor_mask.parse_distance_km, default=5.0,
+            help='Sampling interval along each cross-profile (km). Defaults to 5.')
+    parser.add_argument('--carbonate_resolution', type=corridor_mask.parse_distance_km, default=10.0,
+            help='Carbonate mask cell size (km). Defaults to 10.')
+    parser.add_argument('--continent_resolution', type=corridor_mask.parse_distance_km, default=50.0,
+            help='Continent mask cell size (km). Defaults to 50.')
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('-o', '--output_filename', type=str, default=DEFAULT_OUTPUT_FILENAME,
+            help="Output table. Defaults to '{0}'.".format(DEFAULT_OUTPUT_FILENAME))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if not args.topology_filenames and not args.section_store_filename:
+        parser.error('either -m/--topology_filenames or -s/--section_store is required')
+
+    pool = multiprocessing.Pool(args.processes, initialise_worker, (args,))
+    try:
+        with open(args.output_filename, 'w') as output_file:
+            output_file.write('Age Group Metric Value\n')
+            for reconstruction_time, rows in pool.imap(calculate_grouped_metrics_worker, args.reconstruction_times):
+                for group, metric, value in rows:
+                    output_file.write('{0:g} {1} {2} {3:.4f}\n'.format(reconstruction_time, group, metric, value))
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,333 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import contextlib
+import os
+import os.path
+import resource
+import sys
+import time
+import tracemalloc
+
+
+LOG_HEADER = 'Entry Pid Age Seconds RSS_MB Peak_MB Change_MB Traced_MB Status TopAllocations'
+DEFAULT_GROWTH_WINDOW = 5
+# Changes of the retained memory below this are noise (allocator caches, interned strings, etc)
+GROWTH_TOLERANCE_MB = 1.0
+MEMORY_ACTIONS = ['fail', 'recycle']
+
+
+###################### Command line #####################
+
+
+# Adds the (opt-in) memory monitoring options to the parser of an entry point
+def add_arguments(parser):
+    parser.add_argument('--memory_log', type=str,
+            help='Record the memory of each time (resident memory after it, its peak and, with --memory_top, '
+                "the Python allocations it retained) in this file. Several runs and entry points can append to "
+                "the same log (see 'python memory_monitor.py LOG').")
+    parser.add_argument('--memory_ceiling', type=float, metavar='MB',
+            help='Resident memory (MB) that a time may not exceed. What happens then is set by --memory_action.')
+    parser.add_argument('--memory_action', type=str, choices=MEMORY_ACTIONS, default='fail',
+            help="When over the ceiling, 'fail' with a report of the memory of each time, or 'recycle' the process: "
+                'it is replaced by a fresh one (same arguments) for the remaining times. Defaults to fail.')
+    parser.add_argument('--memory_top', type=int, default=0,
+            help='Trace Python allocations (tracemalloc, which slows everything down) and record the source lines '
+                'that retained the most memory over each time. Defaults to 0 (not traced).')
+    parser.add_argument('--memory_growth_window', type=int, default=DEFAULT_GROWTH_WINDOW,
+            help='Warn when the retained memory grew (by more than {0:g} MB) over this many consecutive times. '
+                'Defaults to {1}.'.format(GROWTH_TOLERANCE_MB, DEFAULT_GROWTH_WINDOW))
+
+
+###################### Memory #####################
+
+
+# Resident memory of this process in bytes
+def resident_bytes():
+    try:
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No procfs, so the best we have is the peak
+        return peak_bytes()
+
+
+# Peak resident memory of this process in bytes (since the last reset_peak)
+def peak_bytes():
+    try:
+        with open('/proc/self/status', 'r') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Resets the peak resident memory to the current one (Linux 4.0+), so the peak of each time can be measured.
+# Returns False if it cannot be (the peak is then the peak of the process).
+def reset_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs_file:
+            clear_refs_file.write('5')
+    except OSError:
+        return False
+    return True
+
+
+# Least-squares slope of a sequence of values (e.g. retained MB per time)
+def growth_per_step(values):
+    number_of_values = len(values)
+    if number_of_values < 2:
+        return 0.0
+    mean_index = (number_of_values - 1) / 2.0
+    mean_value = sum(values) / float(number_of_values)
+    covariance = sum((index - mean_index) * (value - mean_value) for index, value in enumerate(values))
+    variance = sum((index - mean_index) ** 2 for index in range(number_of_values))
+    return covariance / variance
+
+
+# Whether the last 'window' changes of a sequence of values all exceed 'tolerance'
+def is_growing(values, window, tolerance=GROWTH_TOLERANCE_MB):
+    if window < 1 or len(values) <= window:
+        return False
+    recent_values = values[-window - 1:]
+    return all(later - earlier > tolerance for earlier, later in zip(recent_values[:-1], recent_values[1:]))
+
+
+# The source lines that retained the most memory between two tracemalloc snapshots,
+# as 'file:line=+KB' without spaces
+def top_allocations(snapshot, previous_snapshot, number_of_allocations):
+    differences = snapshot.compare_to(previous_snapshot, 'lineno')
+    labels = []
+    for difference in differences[:number_of_allocations]:
+        if difference.size_diff == 0:
+            break
+        frame = difference.traceback[0]
+        labels.append('{0}:{1}={2:+.1f}KB'.format(os.path.basename(frame.filename), frame.lineno, difference.size_diff / 1024.0))
+    return ','.join(labels)
+
+
+###################### Monitor #####################
+
+
+# Measures the memory of each age run inside one process (the times of '-t'), to find memory that builds up
+# across ages. After each age it records the resident memory retained, the peak during the age and (optionally)
+# the Python source lines that retained memory, warns when the retained memory keeps growing, and enforces
+# the ceiling. With no log and no ceiling the ages just run.
+class MemoryMonitor(object):
+
+    def __init__(self, entry, log_filename=None, ceiling_mb=None, action='fail', number_of_allocations=0,
+            growth_window=DEFAULT_GROWTH_WINDOW, enabled=None):
+        self.entry = entry
+        self.log_filename = log_filename
+        self.ceiling_mb = ceiling_mb
+        self.action = action
+        self.number_of_allocations = number_of_allocations
+        self.growth_window = growth_window
+        # Measures with a log or a ceiling (or when asked to, e.g. by benchmark_memory.py)
+        self.enabled = enabled if enabled is not None else (bool(log_filename) or ceiling_mb is not None)
+        # Rows of (age, seconds, retained MB, peak MB, change MB, traced MB, status, top allocations)
+        self.rows = []
+        self.over_ceiling = False
+        self.warned_growth = False
+        self.snapshot = None
+        self.first_snapshot = None
+        if self.enabled and number_of_allocations > 0:
+            tracemalloc.start()
+            self.snapshot = self.first_snapshot = tracemalloc.take_snapshot()
+        if log_filename:
+            log_directory = os.path.dirname(os.path.abspath(log_filename))
+            os.makedirs(log_directory, exist_ok=True)
+            if not os.path.exists(log_filename):
+                self._append_log(LOG_HEADER)
+
+    @classmethod
+    def from_arguments(cls, args, entry):
+        return cls(entry, args.memory_log, args.memory_ceiling, args.memory_action, args.memory_top,
+                args.memory_growth_window)
+
+    # Whether this process should be replaced by a fresh one before the next age (see recycle)
+    @property
+    def recycling_needed(self):
+        return self.over_ceiling and self.action == 'recycle'
+
+    @contextlib.contextmanager
+    def age(self, reconstruction_time):
+        if not self.enabled:
+            yield
+            return
+
+        retained_before = resident_bytes()
+        reset_peak()
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self._record(reconstruction_time, seconds, retained_before)
+
+    def _record(self, reconstruction_time, seconds, retained_before):
+        retained_mb = resident_bytes() / 1e6
+        peak_mb = max(peak_bytes(), retained_before) / 1e6
+        change_mb = retained_mb - retained_before / 1e6
+
+        traced_mb = 0.0
+        allocations = '-'
+        if self.snapshot is not None:
+            traced_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            snapshot = tracemalloc.take_snapshot()
+            allocations = top_allocations(snapshot, self.snapshot, self.number_of_allocations) or '-'
+            self.snapshot = snapshot
+
+        retained = [row[2] for row in self.rows] + [retained_mb]
+        status = 'ok'
+        if is_growing(retained, self.growth_window):
+            status = 'growing'
+            if not self.warned_growth:
+                self.warned_growth = True
+                print('{0}: Warning - retained memory grew over each of the last {1} times (now {2:.1f} MB at {3:g} Ma, '
+                        '{4:+.2f} MB per time)'.format(self.entry, self.growth_window, retained_mb, reconstruction_time,
+                                growth_per_step(retained[-self.growth_window - 1:])),
+                    file=sys.stderr)
+
+        # Over the ceiling if this age peaked above it, or if the next age would (assuming it needs the working
+        # memory of this age on top of what is now retained)
+        if self.ceiling_mb is not None:
+            working_mb = max(peak_mb - retained_before / 1e6, 0.0)
+            if peak_mb > self.ceiling_mb or retained_mb + working_mb > self.ceiling_mb:
+                self.over_ceiling = True
+                status = 'ceiling'
+
+        self.rows.append((reconstruction_time, seconds, retained_mb, peak_mb, change_mb, traced_mb, status, allocations))
+        if self.log_filename:
+            self._append_log('{0} {1} {2:g} {3:.3f} {4:.1f} {5:.1f} {6:+.2f} {7:.2f} {8} {9}'.format(
+                    self.entry, os.getpid(), reconstruction_time, seconds, retained_mb, peak_mb, change_mb, traced_mb,
+                    status, allocations))
+
+        # Recycling cannot help if a fresh process is over the ceiling after a single age
+        if self.over_ceiling and (self.action == 'fail' or len(self.rows) == 1):
+            print(self.report(), file=sys.stderr)
+            sys.exit(1)
+
+    def _append_log(self, line):
+        # Appended in one write, so runs sharing the log do not interleave their lines
+        with open(self.log_filename, 'a') as log_file:
+            log_file.write(line + '\n')
+
+    # A report of the memory of each age run by this process
+    def report(self):
+        lines = ['{0}: Error - over the memory ceiling of {1:g} MB (pid {2})'.format(self.entry, self.ceiling_mb, os.getpid())]
+        lines.append('{0:>10} {1:>9} {2:>11} {3:>9} {4:>10}  {5}'.format(
+                'Age (Ma)', 'Seconds', 'Retained MB', 'Peak MB', 'Change MB', 'Status'))
+        for reconstruction_time, seconds, retained_mb, peak_mb, change_mb, traced_mb, status, allocations in self.rows:
+            lines.append('{0:>10g} {1:>9.2f} {2:>11.1f} {3:>9.1f} {4:>+10.2f}  {5}'.format(
+                    reconstruction_time, seconds, retained_mb, peak_mb, change_mb, status))
+        retained = [row[2] for row in self.rows]
+        lines.append('Retained memory grew by {0:+.2f} MB per time over {1} times'.format(growth_per_step(retained), len(retained)))
+        if self.first_snapshot is not None:
+            lines.append('Python allocations retained since the first time:')
+            for allocation in top_allocations(self.snapshot, self.first_snapshot, self.number_of_allocations).split(','):
+                if allocation:
+                    lines.append('    {0}'.format(allocation))
+        if len(self.rows) == 1 and self.action == 'recycle':
+            lines.append('A single time exceeds the ceiling, so recycling the process cannot help')
+        return '\n'.join(lines)
+
+    # Replaces this process by a fresh one, with the same arguments, for the remaining ages. Anything the entry
+    # point writes in the background must be finished first. Does not return.
+    def recycle(self, remaining_times):
+        if self.log_filename:
+            self._append_log('{0} {1} {2:g} 0.000 {3:.1f} {3:.1f} +0.00 0.00 recycled -'.format(
+                    self.entry, os.getpid(), remaining_times[0], resident_bytes() / 1e6))
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable] + recycled_arguments(sys.argv, remaining_times))
+
+
+# The command line of an entry point with its times ('-t') replaced by 'remaining_times'. A later '-t' overrides
+# an earlier one, so it is inserted before the '--' separating the positional arguments (if any).
+def recycled_arguments(arguments, remaining_times):
+    times_arguments = ['-t'] + ['{0!r}'.format(float(remaining_time)) for remaining_time in remaining_times]
+    if '--' in arguments:
+        separator_index = arguments.index('--')
+        return arguments[:separator_index] + times_arguments + arguments[separator_index:]
+    return arguments + times_arguments
+
+
+###################### Log #####################
+
+
+# Reads a memory log as a list of [entry, pid, age, seconds, retained MB, peak MB, change MB, traced MB, status, allocations]
+def read_log(log_filename):
+    rows = []
+    with open(log_filename, 'r') as log_file:
+        for line in log_file:
+            values = line.split()
+            if len(values) < 10 or values[0] == 'Entry':
+                continue
+            rows.append([values[0], int(values[1]), float(values[2]), float(values[3]), float(values[4]),
+                    float(values[5]), float(values[6]), float(values[7]), values[8], values[9]])
+    return rows
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Summarise a memory log written with --memory_log (by resolve_topologies_V.2.py or reconstruct_feature.py):
+    for each process (entry point and pid, and again after each recycling) the number of times, the retained memory before and after them,
+    its growth per time, the largest peak and whether growth was flagged.
+
+    For example...
+
+    python %(prog)s memory.log
+    python %(prog)s memory.log --times"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('log_filename', type=str,
+            help='The memory log.')
+    parser.add_argument('--times', action='store_true',
+            help='Also list every time, with the allocations it retained (if traced).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    # A recycled process keeps its pid, so its rows after the 'recycled' row are those of the fresh process
+    processes = {}
+    recycles = {}
+    for row in read_log(args.log_filename):
+        if row[8] == 'recycled':
+            recycles[(row[0], row[1])] = recycles.get((row[0], row[1]), 0) + 1
+        else:
+            processes.setdefault((row[0], row[1], recycles.get((row[0], row[1]), 0)), []).append(row)
+
+    print('{0:<12} {1:>8} {2:>6} {3:>11} {4:>10} {5:>12} {6:>9}  {7}'.format(
+            'Entry', 'Pid', 'Times', 'First MB', 'Last MB', 'MB per time', 'Peak MB', 'Flags'))
+    for (entry, pid, recycle), rows in processes.items():
+        retained = [row[4] for row in rows]
+        flags = sorted(set(row[8] for row in rows if row[8] != 'ok'))
+        print('{0:<12} {1:>8} {2:>6} {3:>11.1f} {4:>10.1f} {5:>+12.3f} {6:>9.1f}  {7}'.format(
+                entry, pid, len(rows), retained[0], retained[-1], growth_per_step(retained),
+                max(row[5] for row in rows), ','.join(flags) or '-'))
+        if args.times:
+            for row in rows:
+                print('    {0:>8g} Ma {1:>9.1f} MB {2:>+8.2f} MB  {3}'.format(row[2], row[4], row[6], row[9]))
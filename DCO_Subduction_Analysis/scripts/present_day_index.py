@@ -0,0 +1,250 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import corridor_mask
+import spherical_tools
+
+
+###################### Present-day index #####################
+
+
+# Bounding cap (unit centre vector and angular radius in radians) of a ring of points
+def bounding_cap(lons, lats):
+    xyz = spherical_tools.lonlat_to_xyz(lons, lats)
+    centre = xyz.sum(axis=0)
+    norm = np.linalg.norm(centre)
+    if norm < 1e-9:
+        # No meaningful centre (e.g. a ring around a great circle), the cap is the whole sphere
+        return np.array([0.0, 0.0, 1.0]), np.pi
+    centre /= norm
+    return centre, float(np.arccos(np.clip(np.dot(xyz, centre).min(), -1.0, 1.0)))
+
+
+# 3x3 matrix of a pygplates finite rotation (rotating column vectors)
+def rotation_matrix(finite_rotation):
+    pole, angle = finite_rotation.get_euler_pole_and_angle()
+    x, y, z = pole.to_xyz()
+    cross = np.array([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+    return np.identity(3) + np.sin(angle) * cross + (1.0 - np.cos(angle)) * np.dot(cross, cross)
+
+
+# The present-day polygons (e.g. carbonate platforms or continents) of a run, partitioned by plate id, with a
+# bounding cap per polygon and per plate. The polygons are rigid on their plates, so a point is inside a
+# polygon reconstructed to some age exactly when the point rotated back to present day by the inverse of the
+# polygon plate's rotation is inside the present-day polygon. The index is built once per run, and each age
+# only rotates the query points (not the polygon vertices). The points are tested on the sphere (with
+# pygplates), so polygons enclosing a pole or crossing the dateline (e.g. Antarctica) are handled.
+class PresentDayPolygonIndex(object):
+
+    def __init__(self, polygons, plate_ids, begin_times, end_times):
+        self.polygons = polygons
+        self.plate_ids = np.asarray(plate_ids, dtype=np.int64)
+        self.begin_times = np.asarray(begin_times, dtype=float)
+        self.end_times = np.asarray(end_times, dtype=float)
+
+        self.polygon_geometries = [pygplates.PolygonOnSphere(list(zip(lats, lons))) for lons, lats in polygons]
+
+        caps = [bounding_cap(lons, lats) for lons, lats in polygons]
+        self.cap_centres = np.array([centre for centre, radius in caps]).reshape(-1, 3)
+        self.cap_radii = np.array([radius for centre, radius in caps])
+
+        # Each plate's polygons, and a cap around all of them (from the polygon caps)
+        self.plates = {}
+        for plate_id in np.unique(self.plate_ids):
+            polygon_indices = np.flatnonzero(self.plate_ids == plate_id)
+            centre = self.cap_centres[polygon_indices].sum(axis=0)
+            norm = np.linalg.norm(centre)
+            if norm < 1e-9:
+                centre, radius = np.array([0.0, 0.0, 1.0]), np.pi
+            else:
+                centre /= norm
+                radius = min(np.pi, float(np.max(np.arccos(np.clip(np.dot(self.cap_centres[polygon_indices], centre), -1.0, 1.0)) +
+                        self.cap_radii[polygon_indices])))
+            self.plates[int(plate_id)] = (polygon_indices, centre, radius)
+
+    # Polygon rings of features, closing polylines as polygons (as 'gmt spatial -F' does for the COBs)
+    @classmethod
+    def from_features(cls, features):
+        polygons = []
+        plate_ids = []
+        begin_times = []
+        end_times = []
+        for feature in features:
+            begin_time, end_time = feature.get_valid_time()
+            for geometry in feature.get_geometries():
+                if not isinstance(geometry, (pygplates.PolygonOnSphere, pygplates.PolylineOnSphere)):
+                    continue
+                lat_lon_points = np.array(geometry.to_lat_lon_array())
+                if len(lat_lon_points) < 3:
+                    continue
+                polygons.append((lat_lon_points[:, 1], lat_lon_points[:, 0]))
+                plate_ids.append(feature.get_reconstruction_plate_id())
+                begin_times.append(float(begin_time))
+                end_times.append(float(end_time))
+        return cls(polygons, plate_ids, begin_times, end_times)
+
+    def save(self, filename):
+        vertex_counts = np.array([len(lons) for lons, lats in self.polygons], dtype=np.int64)
+        np.savez_compressed(filename, vertex_counts=vertex_counts,
+                lons=np.concatenate([lons for lons, lats in self.polygons]) if self.polygons else np.empty(0),
+                lats=np.concatenate([lats for lons, lats in self.polygons]) if self.polygons else np.empty(0),
+                plate_ids=self.plate_ids, begin_times=self.begin_times, end_times=self.end_times)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            offsets = np.concatenate(([0], np.cumsum(data['vertex_counts'])))
+            lons = data['lons']
+            lats = data['lats']
+            polygons = [(lons[start:end], lats[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+            return cls(polygons, data['plate_ids'], data['begin_times'], data['end_times'])
+
+    # Which of the points (at 'reconstruction_time') are inside a polygon reconstructed to that time
+    def contains(self, rotation_model, reconstruction_time, lons, lats, anchor_plate_id=0):
+        xyz = spherical_tools.lonlat_to_xyz(np.ravel(lons), np.ravel(lats)).reshape(-1, 3)
+        inside = np.zeros(len(xyz), dtype=bool)
+        valid = (self.begin_times >= reconstruction_time) & (self.end_times <= reconstruction_time)
+
+        for plate_id, (polygon_indices, plate_centre, plate_radius) in self.plates.items():
+            polygon_indices = polygon_indices[valid[polygon_indices]]
+            if polygon_indices.size == 0:
+                continue
+            rotation = rotation_matrix(rotation_model.get_rotation(reconstruction_time, plate_id, anchor_plate_id=anchor_plate_id))
+
+            # Only the points within the plate's (reconstructed) cap are rotated back to present day
+            candidates = np.flatnonzero(~inside & (np.dot(xyz, np.dot(rotation, plate_centre)) >= np.cos(plate_radius)))
+            if candidates.size == 0:
+                continue
+            present_day_xyz = np.dot(xyz[candidates], rotation)
+
+            for polygon_index in polygon_indices:
+                in_cap = ~inside[candidates] & (
+                        np.dot(present_day_xyz, self.cap_centres[polygon_index]) >= np.cos(self.cap_radii[polygon_index]))
+                if not in_cap.any():
+                    continue
+                polygon = self.polygon_geometries[polygon_index]
+                hits = np.array([polygon.is_point_in_polygon(tuple(point)) for point in present_day_xyz[in_cap]], dtype=bool)
+                inside[candidates[in_cap][hits]] = True
+        return inside
+
+
+# Counts the cross-profiles (on the overriding side, as corridor_mask.py) that intersect the polygons of the
+# index at least once and converts the count into a subduction zone length (kms)
+def find_sz_length_containing_polygons(index, rotation_model, reconstruction_time, segments, prof_spacing, prof_interval,
+        half_length, side, anchor_plate_id=0):
+    profiles = [corridor_mask.cross_profiles(lons, lats, prof_spacing, prof_interval, half_length, side)
+            for lons, lats in segments]
+    profiles = [(profile_lons, profile_lats) for profile_lons, profile_lats in profiles if profile_lons.size]
+    if not profiles:
+        return 0.0
+
+    # All the sample points of the age are queried at once
+    profile_lons = np.concatenate([profile_lons for profile_lons, profile_lats in profiles])
+    profile_lats = np.concatenate([profile_lats for profile_lons, profile_lats in profiles])
+    hits = index.contains(rotation_model, reconstruction_time, profile_lons, profile_lats, anchor_plate_id)
+    return prof_spacing * int(np.count_nonzero(hits.reshape(profile_lons.shape).any(axis=1)))
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Length of subduction zones (km) with a feature (carbonate platform, continent) within a given cross-profile
+    distance on the overriding side, without reconstructing or rasterising the features at each age.
+
+    build:  index the present-day polygons by plate id (once per run)
+    length: rotate the cross-profile sample points of an age back to present day, by plate, and query the index.
+            With several ages, file names are templates with '{age}' standing for the age and 'age length'
+            lines are printed, otherwise the length is printed.
+
+    For example...
+
+    python %(prog)s build -m Active_Carbonate.gpml -o carbonate_index.npz
+    python %(prog)s length -x carbonate_index.npz -R rotations.rot -t 100 -l sz_sL_100.00Ma.gmt -r sz_sR_100.00Ma.gmt -c 508k"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    build_parser = subparsers.add_parser('build', help='Index present-day polygons by plate id.')
+    build_parser.add_argument('-m', '--feature_filenames', type=str, nargs='+', required=True,
+            metavar='feature_filename', help='One or more polygon (or closed polyline) feature files.')
+    build_parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help='The index (npz).')
+
+    length_parser = subparsers.add_parser('length', help='Length of the subduction zones near the indexed polygons.')
+    length_parser.add_argument('-x', '--index_filename', type=str, required=True,
+            help='The index (npz) written by build.')
+    length_parser.add_argument('-R', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    length_parser.add_argument('-t', '--reconstruction_times', type=float, nargs='+', required=True,
+            metavar='reconstruction_time', help='One or more ages.')
+    length_parser.add_argument('-l', '--left_filename', type=str, required=True,
+            help='GMT/xy file of the left polarity subduction zones (sL).')
+    length_parser.add_argument('-r', '--right_filename', type=str, required=True,
+            help='GMT/xy file of the right polarity subduction zones (sR).')
+    length_parser.add_argument('-c', '--cross_profile_length', type=str, required=True,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (e.g. 508k). Half of it is "
+                "searched on the overriding side of the subduction zone.")
+    length_parser.add_argument('-s', '--profile_spacing', type=corridor_mask.parse_distance_km, default=10.0,
+            help='Spacing of cross-profiles along the subduction zones (km). Defaults to 10.')
+    length_parser.add_argument('-i', '--profile_interval', type=corridor_mask.parse_distance_km, default=5.0,
+            help='Sampling interval along each cross-profile (km). Defaults to 5.')
+    length_parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        features = [feature for filename in args.feature_filenames for feature in pygplates.FeatureCollection(filename)]
+        PresentDayPolygonIndex.from_features(features).save(args.output_filename)
+
+    else:
+        index = PresentDayPolygonIndex.load(args.index_filename)
+        rotation_model = pygplates.RotationModel(args.rotation_filenames)
+        half_length = 0.5 * corridor_mask.parse_distance_km(args.cross_profile_length)
+
+        for reconstruction_time in args.reconstruction_times:
+            age = '{0:g}'.format(reconstruction_time)
+            sz_length = sum(
+                find_sz_length_containing_polygons(index, rotation_model, reconstruction_time,
+                    spherical_tools.read_gmt_segments(filename.format(age=age)),
+                    args.profile_spacing, args.profile_interval, half_length, side, args.anchor_plate_id)
+                for filename, side in ((args.left_filename, 'left'), (args.right_filename, 'right')))
+            if len(args.reconstruction_times) > 1:
+                print('{0} {1:.10g}'.format(age, sz_length))
+            else:
+                print('{0:.10g}'.format(sz_length))
@@ -0,0 +1,424 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import sys
+import os
+import os.path
+import numpy as np
+import pygplates
+
+import corridor_mask
+import present_day_index
+import resolve_cache
+import spherical_tools
+from subduction_ensemble import METRICS, resolve_topologies_V2, feature_segments
+
+
+# Levels of detail, coarsest first: the tolerance (km) the trenches and polygons are simplified to, and the
+# cross-profile spacing and intervals (km) along the carbonate and continent profiles. 'full' is the resolution
+# of DCO_subductionzone_analysis.sh (in its 'present_day' mask mode, which tests the polygons themselves).
+LEVELS = [
+    ('coarse', {'tolerance': 25.0, 'profile_spacing': 50.0, 'carbonate_interval': 25.0, 'continent_interval': 25.0}),
+    ('medium', {'tolerance': 10.0, 'profile_spacing': 25.0, 'carbonate_interval': 10.0, 'continent_interval': 20.0}),
+    ('fine', {'tolerance': 2.0, 'profile_spacing': 10.0, 'carbonate_interval': 5.0, 'continent_interval': 10.0}),
+    ('full', {'tolerance': 0.0, 'profile_spacing': 10.0, 'carbonate_interval': 5.0, 'continent_interval': 10.0})]
+LEVEL_NAMES = [name for name, settings in LEVELS]
+FULL_LEVEL = len(LEVELS) - 1
+
+# Bump when the simplification changes, so cached levels are rebuilt
+LEVELS_VERSION = 1
+DEFAULT_CACHE_DIR = 'QuickLookLevels'
+DEFAULT_CALIBRATION_AGES = 5
+DEFAULT_OUTPUT_FILENAME_PREFIX = 'quick_look_'
+
+
+###################### Spherical Douglas-Peucker #####################
+
+
+# Angular distances (radians) of unit vectors to the great circle arc from 'start' to 'end'. Points whose
+# projection on the great circle falls outside the arc are measured to the nearer end of the arc.
+def distances_to_arc(points, start, end):
+    to_start = np.arccos(np.clip(np.dot(points, start), -1.0, 1.0))
+    pole = np.cross(start, end)
+    pole_norm = np.linalg.norm(pole)
+    if pole_norm < 1e-12:
+        return to_start
+    pole /= pole_norm
+    to_end = np.arccos(np.clip(np.dot(points, end), -1.0, 1.0))
+    to_circle = np.abs(np.arcsin(np.clip(np.dot(points, pole), -1.0, 1.0)))
+    projections = points - np.outer(np.dot(points, pole), pole)
+    within_arc = (np.dot(np.cross(start, projections), pole) >= 0) & (np.dot(np.cross(projections, end), pole) >= 0)
+    return np.where(within_arc, to_circle, np.minimum(to_start, to_end))
+
+
+# Indices of the vertices of a polyline kept by the Douglas-Peucker algorithm on the sphere: every dropped vertex
+# is within 'tolerance_km' of the great circle arcs of the simplified polyline. The end vertices are always kept.
+def simplify_polyline(lons, lats, tolerance_km):
+    number_of_points = len(lons)
+    if tolerance_km <= 0 or number_of_points < 3:
+        return np.arange(number_of_points)
+
+    points = spherical_tools.lonlat_to_xyz(lons, lats)
+    tolerance = tolerance_km / spherical_tools.EARTH_RADIUS_KM
+    keep = np.zeros(number_of_points, dtype=bool)
+    keep[0] = keep[-1] = True
+    ranges = [(0, number_of_points - 1)]
+    while ranges:
+        first, last = ranges.pop()
+        if last - first < 2:
+            continue
+        distances = distances_to_arc(points[first + 1:last], points[first], points[last])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            middle = first + 1 + farthest
+            keep[middle] = True
+            ranges.append((first, middle))
+            ranges.append((middle, last))
+    return np.flatnonzero(keep)
+
+
+# Indices of the vertices of a closed ring kept by the Douglas-Peucker algorithm on the sphere. The ring is split
+# at its first vertex and the vertex farthest from it, and at least three vertices are kept so it stays a polygon.
+# A closing vertex (repeating the first) is kept if present.
+def simplify_ring(lons, lats, tolerance_km):
+    number_of_points = len(lons)
+    closed = number_of_points > 1 and lons[0] == lons[-1] and lats[0] == lats[-1]
+    if closed:
+        number_of_points -= 1
+    if tolerance_km <= 0 or number_of_points < 4:
+        return np.arange(len(lons))
+
+    points = spherical_tools.lonlat_to_xyz(lons[:number_of_points], lats[:number_of_points])
+    split = int(np.argmax(np.dot(points, -points[0])))
+    if split == 0:
+        return np.arange(len(lons))
+    # The second half runs back round to the first vertex (index 'number_of_points' stands for it)
+    ring_lons = np.append(lons[:number_of_points], lons[0])
+    ring_lats = np.append(lats[:number_of_points], lats[0])
+    kept = np.union1d(simplify_polyline(ring_lons[:split + 1], ring_lats[:split + 1], tolerance_km),
+            split + simplify_polyline(ring_lons[split:], ring_lats[split:], tolerance_km))
+    kept = kept[kept < number_of_points]
+
+    if len(kept) < 3:
+        distances = distances_to_arc(points, points[0], points[split])
+        distances[kept] = -1.0
+        kept = np.union1d(kept, [int(np.argmax(distances))])
+    if closed:
+        kept = np.append(kept, number_of_points)
+    return kept
+
+
+# Simplifies polylines given as (longitude, latitude) array pairs
+def simplify_segments(segments, tolerance_km):
+    if tolerance_km <= 0:
+        return segments
+    simplified_segments = []
+    for lons, lats in segments:
+        kept = simplify_polyline(lons, lats, tolerance_km)
+        simplified_segments.append((lons[kept], lats[kept]))
+    return simplified_segments
+
+
+###################### Cached polygon levels #####################
+
+
+# The present-day polygons of some files simplified to the tolerance of each level, as present_day_index.py
+# indexes (which reconstruct rigidly by rotating the query points back to present day). The levels are built
+# once and cached in 'cache_dir', keyed by the contents of the files, so later runs only load them.
+def polygon_levels(filenames, cache_dir):
+    key = json.dumps({'files': [resolve_cache.hash_file(filename) for filename in filenames], 'version': LEVELS_VERSION,
+            'tolerances': [settings['tolerance'] for name, settings in LEVELS]}, sort_keys=True)
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    level_filenames = [os.path.join(cache_dir, '{0}_{1}_{2:g}km.npz'.format(
+                os.path.splitext(os.path.basename(filenames[0]))[0], digest[:16], settings['tolerance']))
+            for name, settings in LEVELS]
+    if all(os.path.exists(level_filename) for level_filename in level_filenames):
+        return [present_day_index.PresentDayPolygonIndex.load(level_filename) for level_filename in level_filenames]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    features = []
+    for filename in filenames:
+        features.extend(pygplates.FeatureCollection(filename))
+    full_index = present_day_index.PresentDayPolygonIndex.from_features(features)
+
+    indexes = []
+    for (name, settings), level_filename in zip(LEVELS, level_filenames):
+        polygons = []
+        for lons, lats in full_index.polygons:
+            kept = simplify_ring(lons, lats, settings['tolerance'])
+            polygons.append((lons[kept], lats[kept]))
+        index = present_day_index.PresentDayPolygonIndex(
+                polygons, full_index.plate_ids, full_index.begin_times, full_index.end_times)
+        # Written under a temporary name and renamed, so concurrent runs never load a partial level
+        temporary_filename = '{0}.{1}.npz'.format(level_filename[:-len('.npz')], os.getpid())
+        index.save(temporary_filename)
+        os.replace(temporary_filename, level_filename)
+        indexes.append(index)
+    return indexes
+
+
+###################### Metrics of one age #####################
+
+
+# Resolves the topologies as resolve_topologies() does (anomalous segments filtered) and returns the (longitude,
+# latitude) arrays of all, left and right polarity subduction zones
+def resolve_subduction_segments(rotation_model, topological_features, reconstruction_time, anchor_plate_id):
+    output_collections = resolve_topologies_V2.resolve_output_collections(
+            rotation_model, topological_features, reconstruction_time, anchor_plate_id,
+            resolve_topologies_V2.SUBDUCTION_OUTPUT_CLASSES)
+    return [feature_segments(output_collections.get(name, [])) for name in resolve_topologies_V2.SUBDUCTION_OUTPUT_CLASSES]
+
+
+# The metrics (as METRICS) of one age at a level of detail: the trenches are simplified to the level's tolerance,
+# and the cross-profiles (of 'half_length' kms on the overriding side) use its spacing and intervals against the
+# polygons simplified to the same tolerance
+def calculate_level_metrics(rotation_model, reconstruction_time, anchor_plate_id, subduction_segments,
+        carbonate_index, continental_index, level, half_length):
+
+    settings = LEVELS[level][1]
+    all_segments, left_segments, right_segments = (simplify_segments(segments, settings['tolerance'])
+            for segments in subduction_segments)
+
+    sz_length = sum(spherical_tools.polyline_length(lons, lats) for lons, lats in all_segments)
+    intersect_lengths = []
+    for index, prof_interval in (
+            (carbonate_index, settings['carbonate_interval']),
+            (continental_index, settings['continent_interval'])):
+        intersect_lengths.append(sum(
+            present_day_index.find_sz_length_containing_polygons(index, rotation_model, reconstruction_time, segments,
+                settings['profile_spacing'], prof_interval, half_length, side, anchor_plate_id)
+            for segments, side in ((left_segments, 'left'), (right_segments, 'right'))))
+
+    sz_carbonate, sz_length_con_arc = intersect_lengths
+    con_arc_percent = 100.0 * sz_length_con_arc / sz_length if sz_length > 0 else np.nan
+    return np.array([sz_length, sz_carbonate, sz_length_con_arc, con_arc_percent])
+
+
+###################### Error calibration #####################
+
+
+# Error of each level against full resolution, from the metrics of the calibration ages at every level
+# (a (number of ages, number of levels, len(METRICS)) array). Lengths get a root mean square relative error
+# and the percentage a root mean square error in percentage points. Returns a (number of levels, len(METRICS)) array.
+def calibrate_errors(calibration_values):
+    full_values = calibration_values[:, FULL_LEVEL:FULL_LEVEL + 1, :]
+    differences = calibration_values - full_values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_differences = np.where(np.abs(full_values) > 0, differences / full_values, 0.0)
+    errors = np.sqrt(np.nanmean(relative_differences ** 2, axis=0))
+    percentage_index = METRICS.index('continent_arc_percentage')
+    errors[:, percentage_index] = np.sqrt(np.nanmean(differences[:, :, percentage_index] ** 2, axis=0))
+    return errors
+
+
+# Estimated error of the metrics of an age calculated at a level, in the units of the metrics
+def estimated_errors(values, level_errors):
+    errors = np.abs(values) * level_errors
+    percentage_index = METRICS.index('continent_arc_percentage')
+    errors[percentage_index] = level_errors[percentage_index]
+    return errors
+
+
+# The calibration ages: 'number_of_ages' ages spread evenly over the ages of the run
+def calibration_ages(times, number_of_ages):
+    if number_of_ages <= 0 or not times:
+        return []
+    indices = np.unique(np.round(np.linspace(0, len(times) - 1, min(number_of_ages, len(times)))).astype(int))
+    return [times[index] for index in indices]
+
+
+# The level of each age: the finest level of the refinement windows (min age, max age, level) it falls in,
+# otherwise the default level
+def age_levels(times, default_level, refine_windows):
+    levels = []
+    for reconstruction_time in times:
+        level = default_level
+        for min_age, max_age, window_level in refine_windows:
+            if min_age <= reconstruction_time <= max_age:
+                level = max(level, window_level)
+        levels.append(level)
+    return levels
+
+
+###################### Parallel driver #####################
+
+
+# Per-process state, loaded once by each worker process
+worker_state = {}
+
+
+def initialise_worker(args):
+    worker_state['args'] = args
+    worker_state['rotation_model'] = pygplates.RotationModel(args.rotation_filenames)
+    worker_state['topological_features'] = [pygplates.FeatureCollection(filename) for filename in args.topology_filenames]
+    # Already built (and cached) by the main process, so these are loads
+    worker_state['carbonate_levels'] = polygon_levels(args.carbonate_filenames, args.cache_dir)
+    worker_state['continental_levels'] = polygon_levels(args.continental_filenames, args.cache_dir)
+
+
+# Calculates the metrics of one age at each of the requested levels, resolving the topologies once
+def calculate_levels_worker(task):
+    reconstruction_time, levels = task
+    args = worker_state['args']
+    rotation_model = worker_state['rotation_model']
+    subduction_segments = resolve_subduction_segments(
+            rotation_model, worker_state['topological_features'], reconstruction_time, args.anchor_plate_id)
+    return reconstruction_time, dict((level, calculate_level_metrics(
+            rotation_model, reconstruction_time, args.anchor_plate_id, subduction_segments,
+            worker_state['carbonate_levels'][level], worker_state['continental_levels'][level], level,
+            0.5 * args.cross_profile_length)) for level in levels)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Quick look at the subduction zone metrics (total length, length near carbonate platforms, continental arc
+    length and percentage) on simplified geometries. The trenches and the carbonate and continental polygons are
+    simplified with the Douglas-Peucker algorithm on the sphere at the tolerance of a level of detail (the polygon
+    levels are cached), and the cross-profiles use the coarser spacing and intervals of that level:
+
+        {0}
+
+    A few calibration ages, spread over the run, are also calculated at every level including full resolution,
+    giving the error of each level against full resolution. The metrics of every age are written with their
+    estimated error (the calibrated error of their level). Windows of ages can be moved to finer levels with
+    --refine, e.g. around a reorganisation seen in the coarse curves.
+
+    Writes '<prefix>metrics.dat' (Age, Level, and each metric followed by its estimated error) and
+    '<prefix>calibration.dat' (the error of each level and metric).
+
+    NOTE: Separate the positional and optional arguments with '--' (workaround for bug in argparse module).
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -c Active_Carbonate.gpml -a COB.gpml -t 0 410 1 \\
+        --refine 100 140 fine --refine 250 260 full -- quick_look_""".format('\n        '.join(
+            '{0:<7} tolerance {1:g} km, profile spacing {2:g} km, intervals {3:g}/{4:g} km'.format(name,
+                settings['tolerance'], settings['profile_spacing'], settings['carbonate_interval'],
+                settings['continent_interval']) for name, settings in LEVELS))
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-c', '--carbonate_filenames', type=str, nargs='+', required=True,
+            metavar='carbonate_filename', help='One or more carbonate platform files.')
+    parser.add_argument('-a', '--continental_filenames', type=str, nargs='+', required=True,
+            metavar='continental_filename', help='One or more continental polygon files.')
+    parser.add_argument('-t', '--time_range', type=float, nargs=3, required=True,
+            metavar=('MIN_AGE', 'MAX_AGE', 'STEP'), help='Ages (Myr).')
+    parser.add_argument('--level', type=str, choices=LEVEL_NAMES, default=LEVEL_NAMES[0],
+            help="Level of detail of the ages outside the refinement windows. Defaults to '{0}'.".format(LEVEL_NAMES[0]))
+    parser.add_argument('--refine', type=str, nargs=3, action='append', default=[],
+            metavar=('MIN_AGE', 'MAX_AGE', 'LEVEL'),
+            help='Calculate the ages of a window at a finer level. Can be repeated.')
+    parser.add_argument('--calibration_ages', type=int, default=DEFAULT_CALIBRATION_AGES,
+            help='Number of ages also calculated at every level to estimate the errors. Defaults to {0} '
+                '(0 for no error estimates).'.format(DEFAULT_CALIBRATION_AGES))
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-l', '--cross_profile_length', type=corridor_mask.parse_distance_km, default=508.0,
+            help="Total cross-profile length as given to 'gmt grdtrack -C' (km). Half of it is searched on the "
+                "overriding side. Defaults to 508.")
+    parser.add_argument('--cache_dir', type=str, default=DEFAULT_CACHE_DIR,
+            help="Directory of the cached polygon levels. Defaults to '{0}'.".format(DEFAULT_CACHE_DIR))
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+
+    parser.add_argument('output_filename_prefix', type=str, nargs='?',
+            default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
+            help="The prefix of the output files - the default prefix is '{0}'".format(DEFAULT_OUTPUT_FILENAME_PREFIX))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    refine_windows = []
+    for min_age, max_age, level_name in args.refine:
+        if level_name not in LEVEL_NAMES:
+            parser.error("argument --refine: invalid level '{0}' (choose from {1})".format(level_name, ', '.join(LEVEL_NAMES)))
+        refine_windows.append((float(min_age), float(max_age), LEVEL_NAMES.index(level_name)))
+
+    min_age, max_age, step = args.time_range
+    times = [float(reconstruction_time) for reconstruction_time in np.arange(min_age, max_age + 0.5 * step, step)]
+    levels = age_levels(times, LEVEL_NAMES.index(args.level), refine_windows)
+
+    # Each age at its level, and the calibration ages at every level too
+    calibration_times = calibration_ages(times, args.calibration_ages)
+    tasks = []
+    for reconstruction_time, level in zip(times, levels):
+        if reconstruction_time in calibration_times:
+            tasks.append((reconstruction_time, list(range(len(LEVELS)))))
+        else:
+            tasks.append((reconstruction_time, [level]))
+
+    # Simplify (or load) the polygon levels once, before the workers load them
+    polygon_levels(args.carbonate_filenames, args.cache_dir)
+    polygon_levels(args.continental_filenames, args.cache_dir)
+
+    results = {}
+    pool = multiprocessing.Pool(args.processes, initialise_worker, (args,))
+    try:
+        for reconstruction_time, level_values in pool.imap_unordered(calculate_levels_worker, tasks):
+            results[reconstruction_time] = level_values
+    finally:
+        pool.close()
+        pool.join()
+
+    level_errors = np.full((len(LEVELS), len(METRICS)), np.nan)
+    level_errors[FULL_LEVEL] = 0.0
+    if calibration_times:
+        level_errors = calibrate_errors(np.array([[results[reconstruction_time][level] for level in range(len(LEVELS))]
+                for reconstruction_time in calibration_times]))
+
+    with open('{0}calibration.dat'.format(args.output_filename_prefix), 'w') as calibration_file:
+        calibration_file.write('# Calibrated against full resolution at ages {0}\n'.format(
+                ' '.join('{0:g}'.format(reconstruction_time) for reconstruction_time in calibration_times) or '(none)'))
+        calibration_file.write('# Lengths: RMS relative error, continent_arc_percentage: RMS error (percentage points)\n')
+        calibration_file.write('Level {0}\n'.format(' '.join(METRICS)))
+        for level, name in enumerate(LEVEL_NAMES):
+            calibration_file.write('{0} {1}\n'.format(name, ' '.join('{0:.4f}'.format(error) for error in level_errors[level])))
+
+    with open('{0}metrics.dat'.format(args.output_filename_prefix), 'w') as metrics_file:
+        metrics_file.write('Age Level {0}\n'.format(' '.join('{0} {0}_error'.format(metric) for metric in METRICS)))
+        for reconstruction_time, level in zip(times, levels):
+            values = results[reconstruction_time][level]
+            errors = estimated_errors(values, level_errors[level])
+            metrics_file.write('{0:g} {1} {2}\n'.format(reconstruction_time, LEVEL_NAMES[level],
+                    ' '.join('{0:.4f} {1:.4f}'.format(value, error) for value, error in zip(values, errors))))
+
+    print('Calculated {0} ages ({1} calibration ages at every level)'.format(len(times), len(calibration_times)))
+    for level, name in enumerate(LEVEL_NAMES):
+        print('{0:<7} {1}'.format(name, '  '.join('{0} {1:.1%}'.format(metric, error) if metric != 'continent_arc_percentage'
+                else '{0} {1:.2f} pts'.format(metric, error) for metric, error in zip(METRICS, level_errors[level]))))
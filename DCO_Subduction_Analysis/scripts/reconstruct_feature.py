@@ -22,6 +22,9 @@ import sys
 import os.path
 import pygplates
 
+import age_profiler
+import memory_monitor
+
 
 DEFAULT_OUTPUT_FILENAME_PREFIX = 'features'
 DEFAULT_OUTPUT_FILENAME_EXTENSION = 'gmt'
@@ -71,6 +74,9 @@ if __name__ == "__main__":
                 "- the default extension is '{0}' - supported extensions include 'shp', 'gmt' and 'xy'."
                 .format(DEFAULT_OUTPUT_FILENAME_EXTENSION))
     
+    age_profiler.add_arguments(parser)
+    memory_monitor.add_arguments(parser)
+
     parser.add_argument('output_filename_prefix', type=str, nargs='?',
             default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
             help="The prefix of the output files containing the resolved topological boundaries and sections "
@@ -85,10 +91,20 @@ if __name__ == "__main__":
     topological_features = [pygplates.FeatureCollection(topology_filename)
             for topology_filename in args.topology_filenames]
     
-    for reconstruction_time in args.reconstruction_times:
-        reconstruct_features(
-                rotation_model,
-                topological_features,
-                reconstruction_time,
-                args.output_filename_prefix,
-                args.output_filename_extension)
\ No newline at end of file
+    profiler = age_profiler.AgeProfiler.from_arguments(args, 'reconstruct')
+    monitor = memory_monitor.MemoryMonitor.from_arguments(args, 'reconstruct')
+
+    for time_index, reconstruction_time in enumerate(args.reconstruction_times):
+        with monitor.age(reconstruction_time):
+            profiler.run(
+                    reconstruction_time,
+                    reconstruct_features,
+                    rotation_model,
+                    topological_features,
+                    reconstruction_time,
+                    args.output_filename_prefix,
+                    args.output_filename_extension)
+
+        # Continue the remaining times in a fresh process once over the memory ceiling
+        if monitor.recycling_needed and time_index + 1 < len(args.reconstruction_times):
+            monitor.recycle(args.reconstruction_times[time_index + 1:])
\ No newline at end of file
@@ -0,0 +1,261 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import glob
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import spherical_tools
+
+
+# Returns the 3x3 rotation matrix that moves geometries from the 'from_anchor_plate_id' frame into the
+# 'to_anchor_plate_id' frame at 'reconstruction_time' (the total rotation of one anchor plate relative to the other).
+# Lengths and intersections do not depend on the anchor plate, so this single rotation is all that changes.
+def get_reframing_matrix(rotation_model, reconstruction_time, from_anchor_plate_id, to_anchor_plate_id):
+
+    finite_rotation = rotation_model.get_rotation(
+            reconstruction_time, from_anchor_plate_id, fixed_plate_id=to_anchor_plate_id)
+    if finite_rotation.represents_identity_rotation():
+        return np.identity(3)
+
+    # Rodrigues' rotation formula
+    pole, angle = finite_rotation.get_euler_pole_and_angle()
+    axis = np.array(pole.to_xyz())
+    cross_product_matrix = np.array([
+        [0.0, -axis[2], axis[1]],
+        [axis[2], 0.0, -axis[0]],
+        [-axis[1], axis[0], 0.0]])
+    return (np.identity(3) + np.sin(angle) * cross_product_matrix +
+            (1.0 - np.cos(angle)) * np.dot(cross_product_matrix, cross_product_matrix))
+
+
+# Reads a GMT/xy text file (resolved sections, reconstructed polygons, cross-profiles) and returns the lines before
+# its first segment, and its segments as (header lines, data rows). The header of a segment is its '>' line and the
+# comment lines following it (e.g. the '# @D' attributes and '# @P' polygon marker of OGR GMT files). A data row is
+# the longitude/latitude (first two columns) and the other columns of a data line, copied unchanged.
+def read_text_segments(filename):
+    with open(filename, 'r') as text_file:
+        lines = text_file.read().splitlines()
+
+    file_header = []
+    segments = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('>'):
+            segments.append(([line], []))
+        elif not stripped or stripped.startswith('#'):
+            if not segments:
+                file_header.append(line)
+            elif not segments[-1][1]:
+                segments[-1][0].append(line)
+        else:
+            values = stripped.split()
+            if not segments:
+                segments.append(([], []))
+            segments[-1][1].append((float(values[0]), float(values[1]), values[2:]))
+
+    return file_header, segments
+
+
+# Polygon rings are marked '# @P' (exterior) or '# @H' (hole) in OGR GMT files; otherwise a closed segment is a ring
+def is_polygon_ring(header, rows):
+    if any(line.strip() in ('# @P', '# @H') for line in header):
+        return True
+    return len(rows) > 3 and rows[0][:2] == rows[-1][:2]
+
+
+# Splits a re-framed segment at the dateline, as the GMT/xy export of pygplates does, returning the data rows of
+# each piece. Rings are wrapped as polygons (so a ring around a pole is closed along the dateline and the pole).
+# Points added on the dateline copy the other columns of their preceding (or, first in a piece, following)
+# original point.
+def wrap_rows(date_line_wrapper, rows, is_ring):
+    lons = np.array([row[0] for row in rows])
+    crossing_lons = np.append(lons, lons[0]) if is_ring else lons
+    if len(rows) < 2 or not np.any(np.abs(np.diff(crossing_lons)) > 180.0):
+        return [rows]
+
+    is_closed = is_ring and rows[0][:2] == rows[-1][:2]
+    ring_rows = rows[:-1] if is_closed else rows
+    lat_lons = [(lat, lon) for lon, lat, other_columns in ring_rows]
+    if is_ring:
+        pieces = [(piece.get_exterior_points(), piece.get_is_original_exterior_point_flags())
+                for piece in date_line_wrapper.wrap(pygplates.PolygonOnSphere(lat_lons))]
+    else:
+        pieces = [(piece.get_points(), piece.get_is_original_point_flags())
+                for piece in date_line_wrapper.wrap(pygplates.PolylineOnSphere(lat_lons))]
+
+    # Original points are matched to their rows by position
+    row_xyz = spherical_tools.lonlat_to_xyz(np.array([row[0] for row in ring_rows]), np.array([row[1] for row in ring_rows]))
+    def original_other_columns(point):
+        xyz = np.array(pygplates.PointOnSphere(point.get_latitude(), point.get_longitude()).to_xyz())
+        return ring_rows[int(np.argmax(np.dot(row_xyz, xyz)))][2]
+
+    wrapped_rows = []
+    for points, is_original_flags in pieces:
+        other_columns = [original_other_columns(point) if is_original else None
+                for point, is_original in zip(points, is_original_flags)]
+        known = [columns for columns in other_columns if columns is not None]
+        previous_columns = known[0] if known else []
+        piece_rows = []
+        for point, columns in zip(points, other_columns):
+            previous_columns = columns if columns is not None else previous_columns
+            piece_rows.append((point.get_longitude(), point.get_latitude(), previous_columns))
+        if is_closed:
+            piece_rows.append(piece_rows[0])
+        wrapped_rows.append(piece_rows)
+    return wrapped_rows
+
+
+# Header of the pieces of a segment split at the dateline after the first. In OGR GMT files they are further parts
+# of the same (multi-)geometry, so only the '>' line and the polygon marker are repeated, not the attributes.
+def continuation_header(header, is_ogr_gmt):
+    if not is_ogr_gmt:
+        return list(header)
+    return ['>'] + [line for line in header if line.strip() in ('# @P', '# @H')]
+
+
+# Writes a text file from its header lines and segments, with the '# @R' region of OGR GMT files (written by
+# pygplates) set to the bounds of the re-framed coordinates (keeping the padding OGR reserves for it)
+def write_text_segments(filename, file_header, segments):
+    lons = [row[0] for header, rows in segments for row in rows]
+    lats = [row[1] for header, rows in segments for row in rows]
+    lines = []
+    for line in file_header:
+        if line.startswith('# @R') and lons:
+            region = '# @R{0:.12g}/{1:.12g}/{2:.12g}/{3:.12g}'.format(min(lons), max(lons), min(lats), max(lats))
+            line = region.ljust(len(line))
+        lines.append(line)
+    for header, rows in segments:
+        lines.extend(header)
+        for lon, lat, other_columns in rows:
+            lines.append(' '.join(['{0:.13g}'.format(lon), '{0:.13g}'.format(lat)] + list(other_columns)))
+
+    with open(filename, 'w') as text_file:
+        text_file.write('\n'.join(lines) + '\n')
+
+
+# Re-frames all the cached files of one reconstruction time. The coordinates of every file are gathered into one
+# array and rotated at once, then wrapped at the dateline and written under the output directory with the same
+# file names.
+def reframe_files(rotation_model, reconstruction_time, input_filenames, output_directory,
+        from_anchor_plate_id, to_anchor_plate_id):
+
+    rotation_matrix = get_reframing_matrix(
+            rotation_model, reconstruction_time, from_anchor_plate_id, to_anchor_plate_id)
+
+    files = [read_text_segments(input_filename) for input_filename in input_filenames]
+    if not files:
+        return
+
+    all_coordinates = np.array([row[:2] for file_header, segments in files for header, rows in segments for row in rows],
+            dtype=float).reshape(-1, 2)
+    points = spherical_tools.lonlat_to_xyz(all_coordinates[:, 0], all_coordinates[:, 1])
+    lons, lats = spherical_tools.xyz_to_lonlat(np.dot(points, rotation_matrix.T))
+    all_reframed = iter(zip(lons, lats))
+
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    date_line_wrapper = pygplates.DateLineWrapper()
+    for input_filename, (file_header, segments) in zip(input_filenames, files):
+        is_ogr_gmt = any(line.startswith('# @V') for line in file_header)
+        reframed_segments = []
+        for header, rows in segments:
+            reframed_rows = [(float(lon), float(lat), other_columns)
+                    for (original_lon, original_lat, other_columns), (lon, lat) in zip(rows, all_reframed)]
+            for piece_index, piece_rows in enumerate(
+                    wrap_rows(date_line_wrapper, reframed_rows, is_polygon_ring(header, rows))):
+                reframed_segments.append(
+                        (header if piece_index == 0 else continuation_header(header, is_ogr_gmt), piece_rows))
+        output_filename = os.path.join(output_directory, os.path.basename(input_filename))
+        write_text_segments(output_filename, file_header, reframed_segments)
+
+
+# Formats a reconstruction time the way the workflows name their per-age folders (e.g. 10 rather than 10.0)
+def format_time(reconstruction_time):
+    return '{0:g}'.format(reconstruction_time)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Re-frame cached outputs (resolved sections, reconstructed features, cross-profiles) from one anchor plate
+    to another, without resolving or reconstructing again. The coordinates of all files of a time are rotated
+    at once by the total rotation of the original anchor plate relative to the new one, then segments (and polygon
+    rings) crossing the dateline are split there and the '# @R' region of OGR GMT files is updated.
+    Only GMT/xy text files are supported - the first two columns of each data line are taken as
+    longitude and latitude and any other columns are copied unchanged.
+
+    DCO_subductionzone_analysis.sh runs it after the analysis when DCO_REFRAME_ANCHOR is set to an anchor plate id,
+    re-framing the per-age files of PlateBoundaryFeatures into Anchor_<id> and rendering their maps.
+
+    For example...
+
+    python %(prog)s -r rotations.rot -a 701 -t 0 1 2 -i "PlateBoundaryFeatures/{age}/*.xy" -o "Anchor_701/{age}" """
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-a', '--anchor', type=int, required=True,
+            dest='anchor_plate_id',
+            help='Anchor plate id of the new frame.')
+    parser.add_argument('-f', '--from_anchor', type=int, default=0,
+            dest='from_anchor_plate_id',
+            help='Anchor plate id the cached files were produced with. Defaults to zero.')
+    parser.add_argument('-t', '--reconstruction_times', type=float, nargs='+', required=True,
+            metavar='reconstruction_time',
+            help='One or more times of the cached files.')
+    parser.add_argument('-i', '--input_filenames', type=str, nargs='+', required=True,
+            metavar='input_filename',
+            help="One or more cached file names or glob patterns, with '{age}' standing for the time.")
+    parser.add_argument('-o', '--output_directory', type=str, required=True,
+            help="Directory of the re-framed files, with '{age}' standing for the time.")
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    rotation_model = pygplates.RotationModel(args.rotation_filenames)
+
+    for reconstruction_time in args.reconstruction_times:
+        age = format_time(reconstruction_time)
+        input_filenames = []
+        for input_pattern in args.input_filenames:
+            input_filenames.extend(sorted(glob.glob(input_pattern.format(age=age))))
+
+        reframe_files(
+                rotation_model,
+                reconstruction_time,
+                input_filenames,
+                args.output_directory.format(age=age),
+                args.from_anchor_plate_id,
+                args.anchor_plate_id)
@@ -0,0 +1,469 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import multiprocessing
+import os
+import os.path
+import subprocess
+import numpy as np
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.patches import Ellipse
+
+import spherical_tools
+
+
+DEFAULT_WIDTH_INCHES = 8.0
+DEFAULT_DPI = 150
+
+# Subduction teeth, about the size of the 7p/2p GMT teeth on a 20 cm wide map
+DEFAULT_TOOTH_SPACING_KM = 500.0
+DEFAULT_TOOTH_SIZE_KM = 150.0
+
+# Extent of the Mollweide projection of a unit sphere
+MAP_HALF_WIDTH = 2.0 * np.sqrt(2.0)
+MAP_HALF_HEIGHT = np.sqrt(2.0)
+
+
+###################### Projection #####################
+
+
+# Mollweide projection (unit sphere) centred on 'central_meridian'
+class Mollweide(object):
+
+    def __init__(self, central_meridian):
+        self.central_meridian = float(central_meridian)
+
+    # Longitudes relative to the central meridian, in [-180, 180)
+    def relative_lons(self, lons):
+        return (np.asarray(lons, dtype=float) - self.central_meridian + 180.0) % 360.0 - 180.0
+
+    # Projects longitudes (already relative to the central meridian, may extend past +/-180) and latitudes
+    def forward_relative(self, relative_lons, lats):
+        lams = np.radians(relative_lons)
+        phis = np.radians(np.asarray(lats, dtype=float))
+        target = np.pi * np.sin(phis)
+        thetas = phis.copy()
+        # Newton iterations on 2*theta + sin(2*theta) = pi*sin(phi), with the poles handled separately
+        for iteration in range(20):
+            denominator = 2.0 + 2.0 * np.cos(2.0 * thetas)
+            step = np.where(denominator > 1e-12, (2.0 * thetas + np.sin(2.0 * thetas) - target) / np.maximum(denominator, 1e-12), 0.0)
+            thetas -= step
+            if np.all(np.abs(step) < 1e-10):
+                break
+        return 2.0 * np.sqrt(2.0) / np.pi * lams * np.cos(thetas), np.sqrt(2.0) * np.sin(thetas)
+
+    def forward(self, lons, lats):
+        return self.forward_relative(self.relative_lons(lons), lats)
+
+    # Longitudes and latitudes of map coordinates, NaN outside the map
+    def inverse(self, xs, ys):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        inside = (xs / MAP_HALF_WIDTH)**2 + (ys / MAP_HALF_HEIGHT)**2 <= 1.0
+        thetas = np.arcsin(np.clip(ys / np.sqrt(2.0), -1.0, 1.0))
+        lats = np.degrees(np.arcsin(np.clip((2.0 * thetas + np.sin(2.0 * thetas)) / np.pi, -1.0, 1.0)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lams = np.pi * xs / (2.0 * np.sqrt(2.0) * np.cos(thetas))
+        lons = (np.degrees(lams) + self.central_meridian + 180.0) % 360.0 - 180.0
+        return np.where(inside, lons, np.nan), np.where(inside, lats, np.nan)
+
+
+# Clips a ring of (relative longitude, latitude) points to the longitudes between 'lon_min' and 'lon_max'
+# (Sutherland-Hodgman against the two meridians). Points on a clipped edge lie exactly on that meridian.
+def clip_ring_to_lons(relative, lats, lon_min, lon_max):
+    points = list(zip(relative, lats))
+    for inside, boundary in ((lambda lon: lon >= lon_min, lon_min), (lambda lon: lon <= lon_max, lon_max)):
+        clipped = []
+        for index, (lon, lat) in enumerate(points):
+            previous_lon, previous_lat = points[index - 1]
+            if inside(lon) != inside(previous_lon):
+                fraction = (boundary - previous_lon) / (lon - previous_lon)
+                clipped.append((boundary, previous_lat + fraction * (lat - previous_lat)))
+            if inside(lon):
+                clipped.append((lon, lat))
+        points = clipped
+        if not points:
+            break
+    return points
+
+
+# Inserts points every 'spacing' degrees of latitude along edges that follow a meridian (the map edge and the
+# closing edges to a pole), which are curved on the map
+def densify_meridian_edges(points, spacing=1.0):
+    densified = []
+    for index, (lon, lat) in enumerate(points):
+        previous_lon, previous_lat = points[index - 1]
+        if lon == previous_lon and abs(lat - previous_lat) > spacing:
+            number_of_steps = int(np.ceil(abs(lat - previous_lat) / spacing))
+            densified.extend((lon, previous_lat + (lat - previous_lat) * step / number_of_steps)
+                    for step in range(1, number_of_steps))
+        densified.append((lon, lat))
+    return densified
+
+
+# Projects a polygon ring. The ring is unwrapped about the central meridian, so it may extend past the map edge
+# (central meridian +/- 180); it is then cut at the edge into pieces that are each closed along the edge.
+# A ring enclosing a pole (its longitudes wind once around) is first closed along the pole row, so the wedge
+# between the ring and the pole is filled.
+def project_polygon(projection, lons, lats):
+    relative = np.degrees(np.unwrap(np.radians(projection.relative_lons(lons))))
+    lats = np.asarray(lats, dtype=float)
+    # Longitude change going once around the closed ring: +/-360 if it encloses a pole, otherwise 0
+    closed = np.degrees(np.unwrap(np.radians(projection.relative_lons(np.append(lons, lons[0])))))
+    winding = closed[-1] - closed[0]
+    if abs(winding) > 180.0:
+        # Enclosed pole on the side of the ring's mean latitude
+        pole_lat = 90.0 if np.mean(lats) > 0.0 else -90.0
+        end_lon = relative[0] + winding
+        relative = np.concatenate((relative, [end_lon, end_lon, relative[0]]))
+        lats = np.concatenate((lats, [lats[0], pole_lat, pole_lat]))
+    elif relative.min() >= -180.0 and relative.max() <= 180.0:
+        xs, ys = projection.forward_relative(relative, lats)
+        return [np.column_stack((xs, ys))]
+
+    rings = []
+    for shift in np.arange(np.floor((relative.min() + 180.0) / 360.0), np.ceil((relative.max() - 180.0) / 360.0) + 1.0) * -360.0:
+        points = clip_ring_to_lons(relative + shift, lats, -180.0, 180.0)
+        if len(points) < 3:
+            continue
+        piece_lons, piece_lats = zip(*densify_meridian_edges(points))
+        xs, ys = projection.forward_relative(piece_lons, piece_lats)
+        rings.append(np.column_stack((xs, ys)))
+    return rings
+
+
+# Projects a polyline and splits it where it crosses the map edge
+def project_polyline(projection, lons, lats):
+    relative = projection.relative_lons(lons)
+    xs, ys = projection.forward_relative(relative, lats)
+    breaks = np.flatnonzero(np.abs(np.diff(relative)) > 180.0) + 1
+    points = np.column_stack((xs, ys))
+    return [part for part in np.split(points, breaks) if len(part) > 1]
+
+
+###################### Layers #####################
+
+
+# Reads the segments of a GMT/xy file, or returns nothing if the file does not exist (e.g. no carbonate
+# platforms at that age)
+def read_layer(filename):
+    if not filename or not os.path.exists(filename):
+        return []
+    return spherical_tools.read_gmt_segments(filename)
+
+
+# Triangles (subduction teeth) along polylines, on the 'left' or 'right' side of their digitisation direction
+def subduction_teeth(segments, side, spacing_km, size_km):
+    teeth = []
+    for lons, lats in segments:
+        sample_lons, sample_lats, azimuths = spherical_tools.sample_polyline(lons, lats, spacing_km)
+        if sample_lons.size == 0:
+            continue
+        sample_lons, sample_lats, azimuths = sample_lons[1:], sample_lats[1:], azimuths[1:]
+        side_azimuths = azimuths - 90.0 if side == 'left' else azimuths + 90.0
+        base_lons_a, base_lats_a = spherical_tools.destination(sample_lons, sample_lats, azimuths, -0.5 * size_km)
+        base_lons_b, base_lats_b = spherical_tools.destination(sample_lons, sample_lats, azimuths, 0.5 * size_km)
+        apex_lons, apex_lats = spherical_tools.destination(sample_lons, sample_lats, side_azimuths, size_km)
+        for tooth in zip(base_lons_a, base_lats_a, apex_lons, apex_lats, base_lons_b, base_lats_b):
+            teeth.append((np.array(tooth[0::2]), np.array(tooth[1::2])))
+    return teeth
+
+
+# Mask stacks opened by this process, kept open so successive ages only apply one delta each
+mask_stacks = {}
+
+
+# Longitude, latitude and value arrays of a netCDF grid (COARDS or GMT style), or of the age of a mask stack
+def read_grid(filename, age=None):
+    import mask_stack
+    if filename.endswith('.npz') and mask_stack.is_mask_stack(filename):
+        if filename not in mask_stacks:
+            mask_stacks[filename] = mask_stack.MaskStack(filename)
+        stack = mask_stacks[filename]
+        if not stack.has_time(age):
+            return None
+        return stack.lons, stack.lats, stack.grid(age)
+
+    import netCDF4
+    with netCDF4.Dataset(filename, 'r') as dataset:
+        names = list(dataset.variables)
+        lon_name = next(name for name in names if name.lower() in ('lon', 'longitude', 'x'))
+        lat_name = next(name for name in names if name.lower() in ('lat', 'latitude', 'y'))
+        value_name = next(name for name in names if dataset.variables[name].ndim == 2)
+        values = np.ma.filled(dataset.variables[value_name][:].astype(float), np.nan)
+        return np.array(dataset.variables[lon_name][:], dtype=float), np.array(dataset.variables[lat_name][:], dtype=float), values
+
+
+###################### Renderer #####################
+
+
+# Draws the maps of successive ages on one figure. The basemap (ocean, graticule, outline) is rendered once
+# into an image, and the map position of every image pixel is kept so raster layers are only looked up.
+# Per-age layers are added, saved and removed again.
+class MapRenderer(object):
+
+    def __init__(self, central_meridian, width_inches, dpi, style):
+        self.projection = Mollweide(central_meridian)
+        self.style = style
+        self.dpi = dpi
+        self.figure = plt.figure(figsize=(width_inches, 0.5 * width_inches), dpi=dpi)
+        self.axes = self.figure.add_axes([0.0, 0.0, 1.0, 1.0])
+        self.axes.set_xlim(-MAP_HALF_WIDTH * 1.02, MAP_HALF_WIDTH * 1.02)
+        self.axes.set_ylim(-MAP_HALF_HEIGHT * 1.04, MAP_HALF_HEIGHT * 1.04)
+        self.axes.set_axis_off()
+        self.extent = self.axes.get_xlim() + self.axes.get_ylim()
+        self.outline = Ellipse((0.0, 0.0), 2.0 * MAP_HALF_WIDTH, 2.0 * MAP_HALF_HEIGHT, transform=self.axes.transData)
+
+        self.render_basemap()
+        self.pixel_lons, self.pixel_lats = self.pixel_coordinates()
+        self.grid_index_cache = {}
+
+    # Renders the static layers once and replaces them by their image
+    def render_basemap(self):
+        static_artists = [self.axes.add_patch(Ellipse((0.0, 0.0), 2.0 * MAP_HALF_WIDTH, 2.0 * MAP_HALF_HEIGHT,
+                facecolor=self.style['ocean_color'], edgecolor='none'))]
+        graticule = []
+        for lat in range(-60, 90, 30):
+            graticule.extend(project_polyline(self.projection, np.linspace(-180, 180, 361), np.full(361, lat)))
+        for lon in range(-180, 180, 30):
+            graticule.extend(project_polyline(self.projection, np.full(181, lon), np.linspace(-90, 90, 181)))
+        static_artists.append(self.axes.add_collection(LineCollection(graticule, colors='0.8', linewidths=0.3)))
+        static_artists.append(self.axes.add_patch(Ellipse((0.0, 0.0), 2.0 * MAP_HALF_WIDTH, 2.0 * MAP_HALF_HEIGHT,
+                facecolor='none', edgecolor='black', linewidth=0.8)))
+
+        self.figure.canvas.draw()
+        basemap = np.asarray(self.figure.canvas.buffer_rgba()).copy()
+        for artist in static_artists:
+            artist.remove()
+        self.axes.imshow(basemap, extent=self.extent, origin='upper', zorder=0, interpolation='nearest')
+        self.axes.set_xlim(self.extent[:2])
+        self.axes.set_ylim(self.extent[2:])
+
+    # Longitude and latitude of the centre of every image pixel (NaN off the map)
+    def pixel_coordinates(self):
+        width, height = self.figure.canvas.get_width_height()
+        xs = self.extent[0] + (np.arange(width) + 0.5) * (self.extent[1] - self.extent[0]) / width
+        ys = self.extent[3] - (np.arange(height) + 0.5) * (self.extent[3] - self.extent[2]) / height
+        return self.projection.inverse(*np.meshgrid(xs, ys))
+
+    # Grid row/column of every pixel, cached per grid geometry (all ages of a grid series share it)
+    def grid_indices(self, grid_lons, grid_lats):
+        key = (len(grid_lons), len(grid_lats), grid_lons[0], grid_lons[-1], grid_lats[0], grid_lats[-1])
+        if key not in self.grid_index_cache:
+            on_map = np.isfinite(self.pixel_lons)
+            lon_step = (grid_lons[-1] - grid_lons[0]) / (len(grid_lons) - 1)
+            lat_step = (grid_lats[-1] - grid_lats[0]) / (len(grid_lats) - 1)
+            columns = np.round((np.where(on_map, self.pixel_lons, 0.0) - grid_lons[0]) / lon_step).astype(np.int64)
+            columns = np.where((columns < 0) | (columns >= len(grid_lons)), columns % int(round(360.0 / abs(lon_step))), columns)
+            rows = np.round((np.where(on_map, self.pixel_lats, 0.0) - grid_lats[0]) / lat_step).astype(np.int64)
+            self.grid_index_cache[key] = (
+                np.clip(rows, 0, len(grid_lats) - 1), np.clip(columns, 0, len(grid_lons) - 1), on_map)
+        return self.grid_index_cache[key]
+
+    def add_polygons(self, segments, **kwargs):
+        rings = [ring for lons, lats in segments if len(lons) > 2 for ring in project_polygon(self.projection, lons, lats)]
+        collection = PolyCollection(rings, **kwargs)
+        collection.set_clip_path(self.outline)
+        return self.axes.add_collection(collection)
+
+    def add_lines(self, segments, **kwargs):
+        lines = [part for lons, lats in segments for part in project_polyline(self.projection, lons, lats)]
+        return self.axes.add_collection(LineCollection(lines, **kwargs))
+
+    def add_points(self, segments, color, size):
+        if not segments:
+            return None
+        xs, ys = self.projection.forward(np.concatenate([lons for lons, lats in segments]),
+                np.concatenate([lats for lons, lats in segments]))
+        return self.axes.scatter(xs, ys, s=size, c=color, linewidths=0, zorder=5)
+
+    # Shows the cells of a grid that are finite and non-zero (e.g. a mask grid) in one color
+    def add_grid_mask(self, filename, color, alpha, age=None):
+        grid = read_grid(filename, age)
+        if grid is None:
+            # Not an age of the mask stack
+            return None
+        grid_lons, grid_lats, values = grid
+        rows, columns, on_map = self.grid_indices(grid_lons, grid_lats)
+        pixel_values = values[rows, columns]
+        shown = on_map & np.isfinite(pixel_values) & (pixel_values != 0)
+        image = np.zeros(shown.shape + (4,))
+        image[shown] = matplotlib.colors.to_rgba(color, alpha)
+        return self.axes.imshow(image, extent=self.extent, origin='upper', zorder=1, interpolation='nearest')
+
+    # Draws the layers of one age and saves the frame
+    def render(self, age, layers, output_filename):
+        style = self.style
+        artists = []
+        if layers.get('grid') and os.path.exists(layers['grid']):
+            artists.append(self.add_grid_mask(layers['grid'], style['grid_color'], style['grid_alpha'], age))
+        artists.append(self.add_polygons(read_layer(layers.get('continents')),
+                facecolors=style['continent_color'], edgecolors='none', zorder=2))
+        artists.append(self.add_polygons(read_layer(layers.get('coastlines')),
+                facecolors=style['coastline_color'], edgecolors='none', zorder=2))
+        artists.append(self.add_polygons(read_layer(layers.get('carbonate')),
+                facecolors=style['carbonate_color'], edgecolors='none', alpha=0.8, zorder=3))
+        artists.append(self.add_lines(read_layer(layers.get('topologies')), colors='0.31', linewidths=0.6, zorder=4))
+        for side in ('left', 'right'):
+            segments = read_layer(layers.get('subduction_' + side))
+            artists.append(self.add_lines(segments, colors='red', linewidths=0.8, zorder=4))
+            artists.append(self.add_polygons(
+                    subduction_teeth(segments, side, style['tooth_spacing'], style['tooth_size']),
+                    facecolors='red', edgecolors='none', zorder=4))
+        for filename, color, size in layers.get('points', []):
+            artists.append(self.add_points(read_layer(filename), color, float(size)))
+        artists.append(self.axes.text(0.98, 0.02, '{0} Ma'.format(age), transform=self.axes.transAxes,
+                ha='right', va='bottom', fontsize=14))
+
+        output_directory = os.path.dirname(output_filename)
+        if output_directory and not os.path.isdir(output_directory):
+            os.makedirs(output_directory, exist_ok=True)
+        self.figure.savefig(output_filename, dpi=self.dpi)
+
+        for artist in artists:
+            if artist is not None:
+                artist.remove()
+
+
+###################### Parallel driver #####################
+
+
+# Per-process renderer, built once by each worker process
+worker_state = {}
+
+
+def initialise_worker(central_meridian, width_inches, dpi, style):
+    worker_state['renderer'] = MapRenderer(central_meridian, width_inches, dpi, style)
+
+
+def render_worker(task):
+    age, layers, output_filename = task
+    worker_state['renderer'].render(age, layers, output_filename)
+    return output_filename
+
+
+# Layer file names of one age, from the '{age}' templates
+def age_layers(args, age):
+    layers = {}
+    for name in ('grid', 'continents', 'coastlines', 'carbonate', 'topologies', 'subduction_left', 'subduction_right'):
+        template = getattr(args, name)
+        if template:
+            layers[name] = template.format(age=age)
+    layers['points'] = [(template.format(age=age), color, size) for template, color, size in (args.points or [])]
+    return layers
+
+
+# Assembles frames into an animation with ffmpeg (frames listed in order, each shown for 1/fps seconds)
+def write_animation(frame_filenames, animation_filename, fps):
+    list_filename = animation_filename + '.frames.txt'
+    with open(list_filename, 'w') as list_file:
+        for frame_filename in frame_filenames:
+            list_file.write("file '{0}'\nduration {1}\n".format(os.path.abspath(frame_filename), 1.0 / fps))
+    try:
+        subprocess.check_call(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_filename,
+                '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', animation_filename])
+    finally:
+        os.remove(list_filename)
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Render per-age maps (Mollweide) from the per-age outputs of the resolve and reconstruct scripts, on a process
+    pool. Each worker renders the static basemap once and reuses it, with the projection of its pixels, for every
+    age it draws. Layer file names are templates with '{age}' standing for the age; missing files are skipped.
+    Frames are written as PNG or JPEG (from the output file extension) and can be assembled into an animation
+    with ffmpeg.
+
+    For example...
+
+    python %(prog)s -t $(seq 0 250) -o "Maps/carbonates_{age}.jpg" \\
+        --continents "PlateBoundaryFeatures/{age}/continental_polygons_closed_{age}.gmt" \\
+        --subduction_left "PlateBoundaryFeatures/{age}/topology_subduction_boundaries_sL_{age}.00Ma.xy" \\
+        --subduction_right "PlateBoundaryFeatures/{age}/topology_subduction_boundaries_sR_{age}.00Ma.xy" \\
+        --animation Maps/carbonates.mp4"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-t', '--ages', type=int, nargs='+', required=True,
+            help='Ages to render.')
+    parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help="Frame file name template, e.g. 'Maps/carbonates_{age}.jpg'.")
+    parser.add_argument('--grid', type=str,
+            help='Mask grid (netCDF), or mask stack (see mask_stack.py), shown where it is finite and non-zero.')
+    parser.add_argument('--continents', type=str, help='Continental polygons (GMT/xy).')
+    parser.add_argument('--coastlines', type=str, help='Coastline polygons (GMT/xy).')
+    parser.add_argument('--carbonate', type=str, help='Carbonate platform polygons (GMT/xy).')
+    parser.add_argument('--topologies', type=str, help='Plate boundary polygons or lines (GMT/xy).')
+    parser.add_argument('--subduction_left', type=str, help='Left polarity subduction zones (GMT/xy).')
+    parser.add_argument('--subduction_right', type=str, help='Right polarity subduction zones (GMT/xy).')
+    parser.add_argument('--points', type=str, nargs=3, action='append',
+            metavar=('FILENAME', 'COLOR', 'SIZE'),
+            help='Points (all vertices of a GMT/xy file) drawn in a color and marker size. Can be repeated.')
+    parser.add_argument('--grid_color', type=str, default='tan', help="Color of the grid mask. Defaults to 'tan'.")
+    parser.add_argument('--grid_alpha', type=float, default=0.5, help='Opacity of the grid mask. Defaults to 0.5.')
+    parser.add_argument('--continent_color', type=str, default='#d2b48c',
+            help="Color of the continental polygons. Defaults to '#d2b48c'.")
+    parser.add_argument('--coastline_color', type=str, default='#8b795e',
+            help="Color of the coastline polygons. Defaults to '#8b795e'.")
+    parser.add_argument('--carbonate_color', type=str, default='#00b4d8',
+            help="Color of the carbonate platforms. Defaults to '#00b4d8'.")
+    parser.add_argument('--central_meridian', type=float, default=30.0,
+            help='Central meridian of the map. Defaults to 30.')
+    parser.add_argument('--width', type=float, default=DEFAULT_WIDTH_INCHES,
+            help='Frame width (inches). Defaults to {0}.'.format(DEFAULT_WIDTH_INCHES))
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI,
+            help='Frame resolution (dots per inch). Defaults to {0}.'.format(DEFAULT_DPI))
+    parser.add_argument('--animation', type=str,
+            help='Optionally assemble the frames into this animation (e.g. an mp4 file) with ffmpeg.')
+    parser.add_argument('--fps', type=float, default=10.0,
+            help='Frames per second of the animation. Defaults to 10.')
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    style = {
+        'ocean_color': '#e0e0e0',
+        'grid_color': args.grid_color,
+        'grid_alpha': args.grid_alpha,
+        'continent_color': args.continent_color,
+        'coastline_color': args.coastline_color,
+        'carbonate_color': args.carbonate_color,
+        'tooth_spacing': DEFAULT_TOOTH_SPACING_KM,
+        'tooth_size': DEFAULT_TOOTH_SIZE_KM}
+
+    tasks = [(age, age_layers(args, age), args.output_filename.format(age=age)) for age in args.ages]
+
+    pool = multiprocessing.Pool(args.processes, initialise_worker, (args.central_meridian, args.width, args.dpi, style))
+    try:
+        frame_filenames = pool.map(render_worker, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+    if args.animation:
+        write_animation(frame_filenames, args.animation, args.fps)
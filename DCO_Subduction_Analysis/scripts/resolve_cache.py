@@ -0,0 +1,305 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import os.path
+import shutil
+import time
+import uuid
+
+
+# Bump when the layout of the entries changes, so older entries are no longer found
+CACHE_FORMAT_VERSION = 2
+# Format-neutral (native GPlates) format of the stored collections
+STORED_EXTENSION = 'gpmlz'
+MANIFEST_FILENAME = 'manifest.json'
+DIGESTS_FILENAME = 'file_digests.json'
+LOCK_FILENAME = '.lock'
+DEFAULT_CACHE_SIZE_MB = 2048
+
+
+###################### Command line #####################
+
+
+# Adds the (opt-in) cache options to the parser of an entry point
+def add_arguments(parser):
+    parser.add_argument('--cache_dir', type=str,
+            help='Look up each time in this resolved topology cache before resolving, and store it there when '
+                'resolving. Entries are keyed by the contents of the rotation and topology files, the anchor plate '
+                'and the time, so the directory can be shared by several runs and workflows.')
+    parser.add_argument('--cache_size', type=float, default=DEFAULT_CACHE_SIZE_MB,
+            help='Size of the cache (MB) above which the least recently used entries are evicted. '
+                'Defaults to {0}.'.format(DEFAULT_CACHE_SIZE_MB))
+
+
+###################### Keys #####################
+
+
+class CacheLock(object):
+
+    def __init__(self, cache_dir):
+        self.filename = os.path.join(cache_dir, LOCK_FILENAME)
+
+    def __enter__(self):
+        self.lock_file = open(self.filename, 'w')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.lock_file.close()
+
+
+def hash_file(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Copies the files (and directories) in 'source_directory' whose names start with 'name' into 'destination_directory',
+# replacing 'name' with 'new_name' in their names (and in the names of the files in those directories).
+def copy_renamed(source_directory, destination_directory, name, new_name):
+    for source_name in os.listdir(source_directory):
+        if not source_name.startswith(name):
+            continue
+        source_path = os.path.join(source_directory, source_name)
+        destination_path = os.path.join(destination_directory, new_name + source_name[len(name):])
+        if os.path.isdir(source_path):
+            os.makedirs(destination_path, exist_ok=True)
+            copy_renamed(source_path, destination_path, name, new_name)
+        else:
+            shutil.copyfile(source_path, destination_path)
+
+
+###################### Cache #####################
+
+
+# Content-addressed cache of the output collections of resolved topologies. An entry holds one output of
+# one time (named after its output files, e.g. 'subduction_boundaries_sL') in a format-neutral form, and
+# the conversions to other file extensions as they are requested. Entries are written to a temporary directory
+# and renamed into place, so concurrent writers never expose partial entries (the first rename wins), and the
+# least recently used entries are evicted once the cache exceeds its size.
+class ResolveCache(object):
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_arguments(cls, args):
+        if not args.cache_dir:
+            return None
+        return cls(args.cache_dir, int(args.cache_size * 1024 * 1024))
+
+    # Digests of files, remembered by path, size and modification time so unchanged files are hashed once
+    # (the drivers run the resolve script once per time)
+    def file_digests(self, filenames):
+        digests_filename = os.path.join(self.cache_dir, DIGESTS_FILENAME)
+        with CacheLock(self.cache_dir):
+            known_digests = {}
+            if os.path.exists(digests_filename):
+                with open(digests_filename, 'r') as digests_file:
+                    known_digests = json.load(digests_file)
+
+            digests = []
+            changed = False
+            for filename in filenames:
+                status = os.stat(filename)
+                path = os.path.abspath(filename)
+                signature = [status.st_size, status.st_mtime_ns]
+                known = known_digests.get(path)
+                if known is None or known[0] != signature:
+                    known = [signature, hash_file(filename)]
+                    known_digests[path] = known
+                    changed = True
+                digests.append(known[1])
+
+            if changed:
+                temporary_filename = '{0}.{1}'.format(digests_filename, uuid.uuid4().hex)
+                with open(temporary_filename, 'w') as digests_file:
+                    json.dump(known_digests, digests_file)
+                os.replace(temporary_filename, digests_filename)
+        return digests
+
+    # Key of the resolved topologies of one time. 'settings' holds anything else the outputs depend on.
+    # Each output is cached under its own key (see output_key).
+    def key(self, rotation_filenames, topology_filenames, anchor_plate_id, reconstruction_time, settings=None):
+        description = {
+            'version': CACHE_FORMAT_VERSION,
+            'rotations': self.file_digests(rotation_filenames),
+            'topologies': self.file_digests(topology_filenames),
+            'anchor_plate_id': anchor_plate_id,
+            'time': '{0:0.2f}'.format(reconstruction_time),
+            'settings': settings}
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+
+    # Key of one output (e.g. 'subduction_boundaries_sL') of the resolved topologies of 'key'. Outputs are cached
+    # separately, so runs asking for different outputs of the same time share what they have in common.
+    def output_key(self, key, name):
+        return hashlib.sha256('{0}:{1}'.format(key, name).encode('utf-8')).hexdigest()
+
+    def entry_directory(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    # The names of the collections of an entry (None if not cached), marking the entry as recently used
+    def lookup(self, key):
+        manifest_filename = os.path.join(self.entry_directory(key), MANIFEST_FILENAME)
+        try:
+            with open(manifest_filename, 'r') as manifest_file:
+                names = json.load(manifest_file)['names']
+            os.utime(manifest_filename)
+        except (OSError, ValueError):
+            return None
+        return names
+
+    # Stores collections (a dictionary of name to pygplates feature collection, empty for an empty output).
+    # Unless 'evict' is False, least recently used entries are then evicted to fit the cache size.
+    def store(self, key, collections, evict=True):
+        entry_directory = self.entry_directory(key)
+        if os.path.isdir(entry_directory):
+            return
+        os.makedirs(os.path.dirname(entry_directory), exist_ok=True)
+
+        temporary_directory = os.path.join(self.cache_dir, 'tmp-{0}'.format(uuid.uuid4().hex))
+        os.makedirs(temporary_directory)
+        try:
+            for name, feature_collection in collections.items():
+                feature_collection.write(os.path.join(temporary_directory, '{0}.{1}'.format(name, STORED_EXTENSION)))
+            with open(os.path.join(temporary_directory, MANIFEST_FILENAME), 'w') as manifest_file:
+                json.dump({'names': sorted(collections), 'created': time.time()}, manifest_file)
+            try:
+                os.rename(temporary_directory, entry_directory)
+            except OSError:
+                # Another process stored the same entry first
+                pass
+        finally:
+            if os.path.isdir(temporary_directory):
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+
+        if evict:
+            self.evict()
+
+    # Writes a cached collection to 'filename', converting it to the file's extension once per entry and extension.
+    # Some formats write several files (a shapefile also has its .shx, .dbf, .prj and .shp.gplates.xml, and
+    # a directory of per-geometry-type shapefiles for mixed geometries), so each conversion is written to a
+    # temporary directory renamed into place, and everything in it is copied out renamed after 'filename'.
+    # Returns False if the entry has gone (e.g. evicted by another process).
+    def export(self, key, name, filename):
+        import pygplates
+        entry_directory = self.entry_directory(key)
+        extension = filename.rsplit('.', 1)[-1]
+        converted_directory = os.path.join(entry_directory, 'converted-{0}'.format(extension))
+        try:
+            if not os.path.isdir(converted_directory):
+                feature_collection = pygplates.FeatureCollection(
+                        os.path.join(entry_directory, '{0}.{1}'.format(name, STORED_EXTENSION)))
+                temporary_directory = os.path.join(entry_directory, 'tmp-{0}'.format(uuid.uuid4().hex))
+                os.makedirs(temporary_directory)
+                try:
+                    feature_collection.write(os.path.join(temporary_directory, '{0}.{1}'.format(name, extension)))
+                    try:
+                        os.rename(temporary_directory, converted_directory)
+                    except OSError:
+                        # Another process converted it first
+                        pass
+                finally:
+                    if os.path.isdir(temporary_directory):
+                        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+            filename_root = filename[:-len(extension) - 1]
+            copy_renamed(converted_directory, os.path.dirname(filename_root) or '.', name, os.path.basename(filename_root))
+        except (OSError, pygplates.OpenFileForReadingError):
+            return False
+        return True
+
+    # Entries as (last used, bytes, directory), oldest first
+    def entries(self):
+        entries = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_directory = os.path.join(self.cache_dir, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_directory):
+                continue
+            for key in os.listdir(prefix_directory):
+                entry_directory = os.path.join(prefix_directory, key)
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry_directory, MANIFEST_FILENAME))
+                    size = sum(os.path.getsize(os.path.join(directory, filename))
+                            for directory, directories, filenames in os.walk(entry_directory) for filename in filenames)
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry_directory))
+        return sorted(entries)
+
+    # Removes the least recently used entries until the cache fits in its size. An entry is renamed away
+    # before being deleted, so readers see it either whole or gone.
+    def evict(self):
+        with CacheLock(self.cache_dir):
+            entries = self.entries()
+            total_bytes = sum(size for last_used, size, entry_directory in entries)
+            # Always keep the most recently used entry (e.g. the one just stored)
+            for last_used, size, entry_directory in entries[:-1]:
+                if total_bytes <= self.max_bytes:
+                    break
+                trash_directory = os.path.join(self.cache_dir, 'tmp-{0}'.format(uuid.uuid4().hex))
+                try:
+                    os.rename(entry_directory, trash_directory)
+                except OSError:
+                    continue
+                shutil.rmtree(trash_directory, ignore_errors=True)
+                total_bytes -= size
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Show the entries of a resolved topology cache written with --cache_dir (by resolve_topologies_V.2.py),
+    most recently used first, or evict entries down to a size.
+
+    For example...
+
+    python %(prog)s ResolveCache
+    python %(prog)s ResolveCache --evict 500"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('cache_dir', type=str,
+            help='The cache directory.')
+    parser.add_argument('--evict', type=float, metavar='SIZE_MB',
+            help='Evict the least recently used entries until the cache is at most this size (MB).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    cache = ResolveCache(args.cache_dir)
+    if args.evict is not None:
+        cache.max_bytes = int(args.evict * 1024 * 1024)
+        cache.evict()
+
+    entries = cache.entries()
+    for last_used, size, entry_directory in reversed(entries):
+        print('{0}  {1}  {2:>8.2f} MB'.format(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used)),
+                os.path.basename(entry_directory), size / 1e6))
+    print('{0} entries, {1:.1f} MB'.format(len(entries), sum(size for last_used, size, entry_directory in entries) / 1e6))
@@ -0,0 +1,151 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import os
+import os.path
+import pygplates
+
+
+# Rotation and topology files of the sample model, in the output directory
+ROTATION_FILENAME = 'sample_rotations.rot'
+TOPOLOGY_FILENAME = 'sample_topologies.gpml'
+# Carbonate platform and continental polygon files of the sample model (see write_sample_polygons)
+CARBONATE_FILENAME = 'sample_carbonate.gpml'
+CONTINENTAL_FILENAME = 'sample_continents.gpml'
+# Vertices per degree along the boundary sections
+DEFAULT_DENSITY = 2
+
+
+# A polyline from 'start' to 'end' (lat, lon) with 'density' vertices per degree of its longest coordinate change
+def dense_line(start, end, density):
+    number_of_points = max(int(max(abs(end[0] - start[0]), abs(end[1] - start[1])) * density), 1) + 1
+    return [(start[0] + (end[0] - start[0]) * index / (number_of_points - 1),
+            start[1] + (end[1] - start[1]) * index / (number_of_points - 1))
+        for index in range(number_of_points)]
+
+
+# A boundary section through the 'corners' (lat, lon)
+def section_feature(feature_type, corners, plate_id, name, density, subduction_polarity=None):
+    points = [corners[0]]
+    for start, end in zip(corners[:-1], corners[1:]):
+        points.extend(dense_line(start, end, density)[1:])
+    feature = pygplates.Feature(feature_type)
+    feature.set_geometry(pygplates.PolylineOnSphere(points))
+    feature.set_reconstruction_plate_id(plate_id)
+    feature.set_name(name)
+    feature.set_valid_time(pygplates.GeoTimeInstant.create_distant_past(), pygplates.GeoTimeInstant.create_distant_future())
+    if subduction_polarity:
+        feature.set_enumeration(pygplates.PropertyName.create_gpml('subductionPolarity'), subduction_polarity)
+    return feature
+
+
+# A plate polygon closed by the 'sections'
+def plate_feature(plate_id, sections):
+    feature = pygplates.Feature(pygplates.FeatureType.gpml_topological_closed_plate_boundary)
+    feature.set_topological_geometry(pygplates.GpmlTopologicalPolygon(
+        [pygplates.GpmlTopologicalSection.create(section, topological_geometry_type=pygplates.GpmlTopologicalPolygon)
+            for section in sections]))
+    feature.set_reconstruction_plate_id(plate_id)
+    feature.set_valid_time(pygplates.GeoTimeInstant.create_distant_past(), pygplates.GeoTimeInstant.create_distant_future())
+    return feature
+
+
+# Rotation sequence of 'plate_id' relative to plate zero, rotating by 'rate' degrees per Myr about 'pole'
+def rotation_feature(plate_id, pole, rate):
+    return pygplates.Feature.create_total_reconstruction_sequence(0, plate_id, pygplates.GpmlIrregularSampling([
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation(pole, 0.0)), 0.0),
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation(pole, rate * 200.0)), 200.0)]))
+
+
+# Writes a small synthetic plate model to 'directory' for the benchmarks and tests, so they run without the
+# plate model files: two plates meeting at a left-polarity subduction zone, closed by mid-ocean ridges, and
+# moving slowly so each time resolves differently. Returns the rotation and topology filenames.
+def write_sample_model(directory, density=DEFAULT_DENSITY):
+    subduction_zone = section_feature(pygplates.FeatureType.gpml_subduction_zone,
+            [(-40, 0), (0, 5), (40, 0)], 201, 'Sample trench', density, 'Left')
+    west_ridge = section_feature(pygplates.FeatureType.gpml_mid_ocean_ridge,
+            [(40, 0), (40, -60), (-40, -60), (-40, 0)], 101, 'Sample west ridge', density)
+    east_ridge = section_feature(pygplates.FeatureType.gpml_mid_ocean_ridge,
+            [(40, 0), (40, 60), (-40, 60), (-40, 0)], 201, 'Sample east ridge', density)
+
+    rotation_filename = os.path.join(directory, ROTATION_FILENAME)
+    topology_filename = os.path.join(directory, TOPOLOGY_FILENAME)
+    pygplates.FeatureCollection([
+            rotation_feature(101, (90, 0), 0.001),
+            rotation_feature(201, (0, 90), 0.0005)]).write(rotation_filename)
+    pygplates.FeatureCollection([
+            subduction_zone, west_ridge, east_ridge,
+            plate_feature(101, [subduction_zone, west_ridge]),
+            plate_feature(201, [subduction_zone, east_ridge])]).write(topology_filename)
+    return rotation_filename, topology_filename
+
+
+# A polygon on a plate through the 'corners' (lat, lon)
+def polygon_feature(corners, plate_id, name, density):
+    points = []
+    for start, end in zip(corners, corners[1:] + corners[:1]):
+        points.extend(dense_line(start, end, density)[:-1])
+    feature = pygplates.Feature()
+    feature.set_geometry(pygplates.PolygonOnSphere(points))
+    feature.set_reconstruction_plate_id(plate_id)
+    feature.set_name(name)
+    return feature
+
+
+# Writes carbonate platform and continental polygons for the sample model to 'directory': a carbonate platform
+# and a continent on the overriding (west) plate within a few hundred kms of the trench, and a continent around
+# the south pole on a fixed plate. Returns the carbonate and continental filenames.
+def write_sample_polygons(directory, density=DEFAULT_DENSITY):
+    carbonate_filename = os.path.join(directory, CARBONATE_FILENAME)
+    continental_filename = os.path.join(directory, CONTINENTAL_FILENAME)
+    pygplates.FeatureCollection([
+            polygon_feature([(-5, 1), (5, 1), (5, 3.5), (-5, 3.5)], 101, 'Sample platform', density)]).write(
+                carbonate_filename)
+    pygplates.FeatureCollection([
+            polygon_feature([(-35, -4), (-15, -4), (-15, -1), (-35, -1)], 101, 'Sample continent', density),
+            polygon_feature([(-70, lon) for lon in range(-180, 180, 30)], 802, 'Sample polar continent', density)]).write(
+                continental_filename)
+    return carbonate_filename, continental_filename
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Write the small synthetic plate model used by the benchmarks and tests (see benchmark_memory.py --sample)
+    to a directory, as {0} and {1}, with carbonate platform and continental polygons as {2} and {3}.
+
+    For example...
+
+    python %(prog)s SampleModel""".format(ROTATION_FILENAME, TOPOLOGY_FILENAME, CARBONATE_FILENAME, CONTINENTAL_FILENAME)
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('directory', type=str,
+            help='Directory to write the model to (created if needed).')
+    parser.add_argument('--density', type=float, default=DEFAULT_DENSITY,
+            help='Vertices per degree along the boundary sections. Defaults to {0}.'.format(DEFAULT_DENSITY))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for filename in write_sample_model(args.directory, args.density) + write_sample_polygons(args.directory, args.density):
+        print(filename)
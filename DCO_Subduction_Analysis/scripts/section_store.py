@@ -0,0 +1,366 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import importlib.util
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+# resolve_topologies_V.2.py is not a valid module name, so it is loaded from its path
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+
+# Polarity codes of the 'polarities' column
+POLARITY_UNKNOWN = 0
+POLARITY_LEFT = 1
+POLARITY_RIGHT = 2
+POLARITY_NAMES = ['Unknown', 'Left', 'Right']
+
+# Plate id columns use this for 'none' (e.g. no overriding plate found)
+NO_PLATE_ID = -1
+
+FEATURE_ID_DTYPE = 'S64'
+
+# Columns of the store (name, dtype). 'lons'/'lats' hold the vertices of all sections, one section after the
+# other; section i spans [offsets[i], offsets[i + 1]). The other columns have one entry per section.
+# 'vertex_starts'/'vertex_ends' hold the range of topological section vertices covered by an anomalous
+# sub-segment (as found by resolve_topologies_V.2.py), NaN when unknown.
+COORDINATE_COLUMNS = [('lons', np.float64), ('lats', np.float64)]
+SECTION_COLUMNS = [
+    ('offsets', np.int64),
+    ('times', np.float64),
+    ('feature_ids', FEATURE_ID_DTYPE),
+    ('feature_types', np.int16),   # index into SectionStore.type_names
+    ('polarities', np.int8),
+    ('plate_ids', np.int32),
+    ('overriding_plate_ids', np.int32),
+    ('subducting_plate_ids', np.int32),
+    ('anomalous', np.bool_),
+    ('vertex_starts', np.float64),
+    ('vertex_ends', np.float64)]
+COLUMNS = COORDINATE_COLUMNS + SECTION_COLUMNS
+
+
+###################### Section record #####################
+
+
+# One section of a store, as plain values (a lightweight view for iteration; the store keeps the arrays)
+class SectionRecord(object):
+
+    __slots__ = ('time', 'feature_id', 'feature_type', 'polarity', 'plate_id', 'overriding_plate_id',
+                 'subducting_plate_id', 'anomalous', 'vertex_range', 'lons', 'lats')
+
+    def __init__(self, time, feature_id, feature_type, polarity, plate_id, overriding_plate_id,
+            subducting_plate_id, anomalous, vertex_range, lons, lats):
+        self.time = time
+        self.feature_id = feature_id
+        self.feature_type = feature_type
+        self.polarity = polarity
+        self.plate_id = plate_id
+        self.overriding_plate_id = overriding_plate_id
+        self.subducting_plate_id = subducting_plate_id
+        self.anomalous = anomalous
+        self.vertex_range = vertex_range
+        self.lons = lons
+        self.lats = lats
+
+
+###################### Section store #####################
+
+
+# Resolved boundary sections of one or many ages held as flat columns (struct of arrays) instead of
+# pygplates features and Python lists. 'type_names' maps the 'feature_types' codes to feature type names
+# (e.g. 'gpml:SubductionZone').
+class SectionStore(object):
+
+    def __init__(self, columns, type_names):
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+        self.type_names = list(type_names)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name, dtype in COLUMNS)
+
+    # Longitude and latitude arrays (views) of section 'index'
+    def coordinates(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.lons[start:end], self.lats[start:end]
+
+    # Range (start, end) of the topological section vertices covered by section 'index', or None if unknown
+    def vertex_range(self, index):
+        if np.isnan(self.vertex_starts[index]):
+            return None
+        return (float(self.vertex_starts[index]), float(self.vertex_ends[index]))
+
+    def record(self, index):
+        lons, lats = self.coordinates(index)
+        return SectionRecord(
+            float(self.times[index]), self.feature_ids[index].decode('ascii'),
+            self.type_names[self.feature_types[index]], POLARITY_NAMES[self.polarities[index]],
+            int(self.plate_ids[index]), int(self.overriding_plate_ids[index]), int(self.subducting_plate_ids[index]),
+            bool(self.anomalous[index]), self.vertex_range(index), lons, lats)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    # Code of a feature type name in the 'feature_types' column, or -1 if no section has that type
+    def type_code(self, type_name):
+        return self.type_names.index(type_name) if type_name in self.type_names else -1
+
+    # Distinct times in the store
+    def unique_times(self):
+        return np.unique(self.times)
+
+    # Returns a new store with the sections selected by a boolean mask or an index array
+    def select(self, selection):
+        indices = np.arange(len(self))[selection]
+        starts = self.offsets[indices]
+        counts = self.offsets[indices + 1] - starts
+        vertex_indices = (np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) +
+                          np.arange(counts.sum()))
+        columns = dict((name, getattr(self, name)[indices]) for name, dtype in SECTION_COLUMNS if name != 'offsets')
+        columns['offsets'] = np.concatenate(([0], np.cumsum(counts)))
+        columns['lons'] = self.lons[vertex_indices]
+        columns['lats'] = self.lats[vertex_indices]
+        return SectionStore(columns, self.type_names)
+
+    # Sections of one reconstruction time
+    def at_time(self, reconstruction_time):
+        return self.select(self.times == reconstruction_time)
+
+    ###################### Save and load #####################
+
+    def save(self, filename):
+        columns = dict((name, getattr(self, name)) for name, dtype in COLUMNS)
+        np.savez(filename, type_names=np.array(self.type_names, dtype=str), **columns)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            columns = dict((name, data[name]) for name, dtype in COLUMNS)
+            return cls(columns, [str(name) for name in data['type_names']])
+
+
+###################### Building stores #####################
+
+
+# Accumulates sections and builds a SectionStore once
+class SectionStoreBuilder(object):
+
+    def __init__(self):
+        self.type_names = []
+        self.lons = []
+        self.lats = []
+        self.counts = []
+        self.section_columns = dict((name, []) for name, dtype in SECTION_COLUMNS if name != 'offsets')
+
+    def add(self, reconstruction_time, feature_id, feature_type, polarity, plate_id, overriding_plate_id,
+            subducting_plate_id, anomalous, lat_lon_points, vertex_range=None):
+        if feature_type not in self.type_names:
+            self.type_names.append(feature_type)
+        lat_lon_points = np.asarray(lat_lon_points, dtype=np.float64).reshape(-1, 2)
+        self.lats.append(lat_lon_points[:, 0])
+        self.lons.append(lat_lon_points[:, 1])
+        self.counts.append(len(lat_lon_points))
+        vertex_start, vertex_end = vertex_range if vertex_range is not None else (np.nan, np.nan)
+        for name, value in (
+                ('times', reconstruction_time),
+                ('feature_ids', feature_id.encode('ascii')),
+                ('feature_types', self.type_names.index(feature_type)),
+                ('polarities', POLARITY_NAMES.index(polarity) if polarity in POLARITY_NAMES else POLARITY_UNKNOWN),
+                ('plate_ids', plate_id),
+                ('overriding_plate_ids', overriding_plate_id),
+                ('subducting_plate_ids', subducting_plate_id),
+                ('anomalous', anomalous),
+                ('vertex_starts', vertex_start),
+                ('vertex_ends', vertex_end)):
+            self.section_columns[name].append(value)
+
+    # Adds the sections of another store (e.g. one age resolved by a worker process)
+    def extend(self, store):
+        for record in store:
+            self.add(record.time, record.feature_id, record.feature_type, record.polarity, record.plate_id,
+                record.overriding_plate_id, record.subducting_plate_id, record.anomalous,
+                np.column_stack((record.lats, record.lons)), record.vertex_range)
+
+    def build(self):
+        columns = dict((name, np.array(self.section_columns[name], dtype=dtype))
+                for name, dtype in SECTION_COLUMNS if name != 'offsets')
+        columns['offsets'] = np.concatenate(([0], np.cumsum(self.counts, dtype=np.int64)))
+        columns['lons'] = np.concatenate(self.lons) if self.lons else np.zeros(0)
+        columns['lats'] = np.concatenate(self.lats) if self.lats else np.zeros(0)
+        return SectionStore(columns, self.type_names)
+
+
+# Returns 'Left', 'Right' or 'Unknown' from the subductionPolarity property of a feature
+def get_polarity(feature):
+    polarity_property = feature.get(pygplates.PropertyName.create_gpml('subductionPolarity'))
+    if polarity_property:
+        polarity = polarity_property.get_value().get_content()
+        if polarity in POLARITY_NAMES:
+            return polarity
+    return 'Unknown'
+
+
+def get_plate_id(resolved_topology):
+    if resolved_topology is None:
+        return NO_PLATE_ID
+    return resolved_topology.get_feature().get_reconstruction_plate_id()
+
+
+# Adds the shared sub-segments of resolved boundary sections (from pygplates.resolve_topologies) at one time.
+# A sub-segment not shared by exactly two topologies is flagged anomalous, as in resolve_topologies_V.2.py,
+# and keeps the range of section vertices it covers for the anomalous segment filter.
+def add_shared_boundary_sections(builder, shared_boundary_sections, reconstruction_time):
+    for shared_boundary_section in shared_boundary_sections:
+        section_feature = shared_boundary_section.get_feature()
+        feature_type = section_feature.get_feature_type().to_qualified_string()
+        polarity = get_polarity(section_feature)
+
+        section_vertex_indices = None
+        for shared_sub_segment in shared_boundary_section.get_shared_sub_segments():
+            anomalous = len(shared_sub_segment.get_sharing_resolved_topologies()) != 2
+            vertex_range = None
+            if anomalous:
+                # The section vertices are only indexed for sections with anomalous sub-segments
+                if section_vertex_indices is None:
+                    section_vertex_indices = {}
+                    for index, point in enumerate(shared_boundary_section.get_topological_section_geometry().get_points()):
+                        section_vertex_indices.setdefault(resolve_topologies_V2.point_key(point), index)
+                vertex_range = resolve_topologies_V2.sub_segment_vertex_range(
+                        section_vertex_indices, shared_sub_segment.get_resolved_geometry())
+
+            overriding_plate_id = subducting_plate_id = NO_PLATE_ID
+            if feature_type == 'gpml:SubductionZone':
+                overriding_and_subducting_plates = shared_sub_segment.get_overriding_and_subducting_plates()
+                if overriding_and_subducting_plates:
+                    overriding_plate, subducting_plate = overriding_and_subducting_plates
+                    overriding_plate_id = get_plate_id(overriding_plate)
+                    subducting_plate_id = get_plate_id(subducting_plate)
+
+            builder.add(
+                reconstruction_time,
+                shared_sub_segment.get_feature().get_feature_id().get_string(),
+                feature_type,
+                polarity,
+                shared_sub_segment.get_feature().get_reconstruction_plate_id(),
+                overriding_plate_id,
+                subducting_plate_id,
+                anomalous,
+                shared_sub_segment.get_resolved_geometry().to_lat_lon_array(),
+                vertex_range)
+
+
+# Resolves the topologies at each time and returns a store of all resolved boundary sections
+def resolve_section_store(rotation_model, topological_features, reconstruction_times, anchor_plate_id=0):
+    builder = SectionStoreBuilder()
+    for reconstruction_time in reconstruction_times:
+        resolved_topologies = []
+        shared_boundary_sections = []
+        pygplates.resolve_topologies(
+                topological_features, rotation_model, resolved_topologies, reconstruction_time,
+                shared_boundary_sections, anchor_plate_id)
+        add_shared_boundary_sections(builder, shared_boundary_sections, reconstruction_time)
+    return builder.build()
+
+
+# Adds the features of a collection (e.g. resolve_topologies_V.2.py output) as sections at one time.
+# Each geometry of a feature becomes a section.
+def add_feature_collection(builder, feature_collection, reconstruction_time, anomalous=False):
+    for feature in feature_collection:
+        feature_id = feature.get_feature_id().get_string()
+        feature_type = feature.get_feature_type().to_qualified_string()
+        polarity = get_polarity(feature)
+        plate_id = feature.get_reconstruction_plate_id()
+        for geometry in feature.get_geometries():
+            builder.add(reconstruction_time, feature_id, feature_type, polarity, plate_id,
+                NO_PLATE_ID, NO_PLATE_ID, anomalous, geometry.to_lat_lon_array())
+
+
+# Returns a pygplates feature collection of the store's sections (e.g. to export with pygplates).
+# Each section becomes a feature with a new feature id; type, plate id and polarity are kept.
+def to_feature_collection(store):
+    features = []
+    for record in store:
+        feature = pygplates.Feature(pygplates.FeatureType.create_from_qualified_string(record.feature_type))
+        feature.set_geometry(pygplates.PolylineOnSphere(list(zip(record.lats, record.lons))))
+        feature.set_reconstruction_plate_id(record.plate_id)
+        if record.polarity != 'Unknown':
+            feature.set_enumeration(pygplates.PropertyName.create_gpml('subductionPolarity'), record.polarity)
+        features.append(feature)
+    return pygplates.FeatureCollection(features)
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Resolve topologies at many times and save every resolved boundary section into one compact section store
+    (npz): flat coordinate arrays with offsets, and one column per section for time, feature id, feature type,
+    subduction polarity, plate id, overriding and subducting plate ids, the anomalous flag and the section
+    vertices covered by anomalous sub-segments.
+    Stores are loaded with SectionStore.load().
+
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -t 0 250 -o sections_0-250Ma.npz"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-t', '--time_range', type=int, nargs=2, required=True,
+            metavar=('MIN_AGE', 'MAX_AGE'), help='Range of times to resolve (inclusive, 1 Myr step).')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help='Section store file (npz).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    rotation_model = pygplates.RotationModel(args.rotation_filenames)
+    topological_features = [pygplates.FeatureCollection(filename) for filename in args.topology_filenames]
+
+    store = resolve_section_store(rotation_model, topological_features,
+            range(args.time_range[0], args.time_range[1] + 1), args.anchor_plate_id)
+    store.save(args.output_filename)
+    print('{0} sections, {1} vertices, {2:.1f} MB'.format(len(store), len(store.lons), store.nbytes / 1e6))
@@ -0,0 +1,187 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import numpy as np
+
+
+# Mean Earth radius (kms), same value as pygplates.Earth.mean_radius_in_kms
+EARTH_RADIUS_KM = 6371.009
+
+# Length (kms) of one degree along a great circle, used by GMT to convert 'k' grid increments to degrees
+KM_PER_DEGREE = 2.0 * np.pi * EARTH_RADIUS_KM / 360.0
+
+
+###################### Coordinate conversions #####################
+
+
+# Converts longitude and latitude arrays (degrees) into an (N,3) array of unit vectors
+def lonlat_to_xyz(lons, lats):
+    lons = np.radians(np.asarray(lons, dtype=float))
+    lats = np.radians(np.asarray(lats, dtype=float))
+    cos_lats = np.cos(lats)
+    return np.stack((cos_lats * np.cos(lons), cos_lats * np.sin(lons), np.sin(lats)), axis=-1)
+
+
+# Converts an (N,3) array of (not necessarily unit) vectors back into longitude and latitude arrays (degrees)
+def xyz_to_lonlat(xyz):
+    xyz = np.asarray(xyz, dtype=float)
+    lons = np.degrees(np.arctan2(xyz[..., 1], xyz[..., 0]))
+    lats = np.degrees(np.arctan2(xyz[..., 2], np.hypot(xyz[..., 0], xyz[..., 1])))
+    return lons, lats
+
+
+###################### Great circle measurements #####################
+
+
+# Angular distance (radians) between two sets of points, using the haversine formula
+def angular_distance(lons1, lats1, lons2, lats2):
+    lons1, lats1, lons2, lats2 = (np.radians(np.asarray(a, dtype=float)) for a in (lons1, lats1, lons2, lats2))
+    dlat = lats2 - lats1
+    dlon = lons2 - lons1
+    a = np.sin(dlat / 2.0)**2 + np.cos(lats1) * np.cos(lats2) * np.sin(dlon / 2.0)**2
+    return 2.0 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Initial azimuth (degrees clockwise from north) of the great circle from point 1 to point 2
+def azimuth(lons1, lats1, lons2, lats2):
+    lons1, lats1, lons2, lats2 = (np.radians(np.asarray(a, dtype=float)) for a in (lons1, lats1, lons2, lats2))
+    dlon = lons2 - lons1
+    y = np.sin(dlon) * np.cos(lats2)
+    x = np.cos(lats1) * np.sin(lats2) - np.sin(lats1) * np.cos(lats2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x))
+
+
+# Point reached after travelling 'distances_km' from the start points along the given azimuths (degrees)
+def destination(lons, lats, azimuths, distances_km):
+    lons, lats, azimuths = (np.radians(np.asarray(a, dtype=float)) for a in (lons, lats, azimuths))
+    delta = np.asarray(distances_km, dtype=float) / EARTH_RADIUS_KM
+    dest_lats = np.arcsin(np.clip(
+        np.sin(lats) * np.cos(delta) + np.cos(lats) * np.sin(delta) * np.cos(azimuths), -1.0, 1.0))
+    dest_lons = lons + np.arctan2(
+        np.sin(azimuths) * np.sin(delta) * np.cos(lats),
+        np.cos(delta) - np.sin(lats) * np.sin(dest_lats))
+    return (np.degrees(dest_lons) + 180.0) % 360.0 - 180.0, np.degrees(dest_lats)
+
+
+# Total length (kms) of a polyline given as longitude and latitude arrays
+def polyline_length(lons, lats):
+    if len(lons) < 2:
+        return 0.0
+    return float(np.sum(angular_distance(lons[:-1], lats[:-1], lons[1:], lats[1:])) * EARTH_RADIUS_KM)
+
+
+# Samples a polyline at equal distance 'spacing_km' from its first vertex. Returns the sample positions
+# and the azimuth of the polyline at each of them (the azimuth of the great circle segment they fall on)
+def sample_polyline(lons, lats, spacing_km):
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    if len(lons) < 2:
+        return np.empty(0), np.empty(0), np.empty(0)
+
+    segment_lengths = angular_distance(lons[:-1], lats[:-1], lons[1:], lats[1:]) * EARTH_RADIUS_KM
+    cumulative = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+    distances = np.arange(0.0, cumulative[-1] + 1e-9, spacing_km)
+
+    # Locate the segment each sample falls on, ignoring degenerate (zero length) segments
+    segment_index = np.clip(np.searchsorted(cumulative, distances, side='right') - 1, 0, len(segment_lengths) - 1)
+    offsets = distances - cumulative[segment_index]
+    segment_azimuths = azimuth(lons[:-1], lats[:-1], lons[1:], lats[1:])
+
+    sample_lons, sample_lats = destination(
+        lons[segment_index], lats[segment_index], segment_azimuths[segment_index], offsets)
+    return sample_lons, sample_lats, segment_azimuths[segment_index]
+
+
+###################### Polygon tests #####################
+
+
+# Tests which points fall inside a polygon using a ray crossing test in longitude/latitude space.
+# The polygon longitudes are unwrapped so polygons crossing the dateline are handled, and the
+# query longitudes are shifted into the unwrapped range. Polygons enclosing a pole are not supported.
+def points_in_polygon(lons, lats, polygon_lons, polygon_lats):
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    inside = np.zeros(lons.shape, dtype=bool)
+    if len(polygon_lons) < 3 or lons.size == 0:
+        return inside
+
+    # Unwrap polygon longitudes so consecutive vertices never jump by more than 180 degrees
+    poly_lons = np.degrees(np.unwrap(np.radians(np.asarray(polygon_lons, dtype=float))))
+    poly_lats = np.asarray(polygon_lats, dtype=float)
+    min_lon = poly_lons.min()
+    query_lons = (lons - min_lon) % 360.0 + min_lon
+
+    # Bounding box prefilter
+    candidates = ((query_lons <= poly_lons.max()) & (lats >= poly_lats.min()) & (lats <= poly_lats.max()))
+    if not candidates.any():
+        return inside
+    x = query_lons[candidates]
+    y = lats[candidates]
+
+    # Close the ring (if not already closed) and test every edge against every candidate point at once
+    x1 = poly_lons
+    y1 = poly_lats
+    x2 = np.roll(poly_lons, -1)
+    y2 = np.roll(poly_lats, -1)
+    crossing = np.zeros(x.shape, dtype=bool)
+    for ex1, ey1, ex2, ey2 in zip(x1, y1, x2, y2):
+        if ey1 == ey2:
+            continue
+        straddles = (ey1 > y) != (ey2 > y)
+        x_intersect = ex1 + (y - ey1) * (ex2 - ex1) / (ey2 - ey1)
+        crossing ^= straddles & (x < x_intersect)
+
+    inside[candidates] = crossing
+    return inside
+
+
+###################### GMT multi-segment text files #####################
+
+
+# Reads a GMT/OGR-GMT multi-segment text file (as written by pygplates with a 'gmt' or 'xy' extension)
+# and returns a list of (longitude, latitude) array pairs, one per segment. Comment lines are ignored.
+def read_gmt_segments(filename):
+    segments = []
+    current = []
+    with open(filename, 'r') as gmt_file:
+        for line in gmt_file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('>'):
+                if current:
+                    segments.append(current)
+                current = []
+                continue
+            values = line.split()
+            current.append((float(values[0]), float(values[1])))
+    if current:
+        segments.append(current)
+
+    return [(np.array([point[0] for point in segment]), np.array([point[1] for point in segment]))
+            for segment in segments]
+
+
+# Writes a list of (longitude, latitude) array pairs as a GMT multi-segment text file
+def write_gmt_segments(filename, segments):
+    with open(filename, 'w') as gmt_file:
+        for lons, lats in segments:
+            gmt_file.write('>\n')
+            for lon, lat in zip(lons, lats):
+                gmt_file.write('{0:.10f} {1:.10f}\n'.format(lon, lat))
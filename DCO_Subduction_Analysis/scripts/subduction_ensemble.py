@@ -0,0 +1,334 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import importlib.util
+import multiprocessing
+import sys
+import os.path
+import numpy as np
+import pygplates
+
+import analytic_intersection
+import corridor_mask
+import present_day_index
+import spherical_tools
+
+# resolve_topologies_V.2.py is not a valid module name, so it is loaded from its path
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+
+# Metrics of each member, as in the Results files of DCO_subductionzone_analysis.sh
+METRICS = ['sz_length', 'sz_length_carbonate', 'sz_length_continentarc', 'continent_arc_percentage']
+
+# Varied parameters, with the default (min, max) range each member is drawn from
+PARAMETER_RANGES = [
+    ('max_distance', (50.0, 50.0)),         # km, search radius of the anomalous segment filter
+    ('profile_spacing', (10.0, 10.0)),      # km, spacing of the cross-profiles
+    ('profile_interval', (5.0, 10.0)),      # km, sampling interval along the cross-profiles
+    ('profile_length', (254.0, 254.0)),     # km, distance searched on the overriding side
+    ('carbonate_resolution', (10.0, 10.0)), # km, carbonate mask cell size
+    ('continent_resolution', (50.0, 50.0))] # km, continent mask cell size
+
+# Mask modes, as the '-g' option of DCO_subductionzone_analysis.sh (whose default is 'global')
+MASK_MODES = ['global', 'corridor', 'analytic', 'present_day']
+DEFAULT_MASK_MODE = 'global'
+
+DEFAULT_PERCENTILES = [5, 16, 50, 84, 95]
+DEFAULT_OUTPUT_FILENAME_PREFIX = 'ensemble_'
+
+
+###################### Members #####################
+
+
+# Draws 'number_of_members' parameter sets uniformly from the given ranges. Each member also picks one of the
+# carbonate files. Returns a list of dictionaries.
+def generate_members(number_of_members, parameter_ranges, number_of_carbonate_files, seed):
+    random_state = np.random.RandomState(seed)
+    members = []
+    for member_index in range(number_of_members):
+        member = {}
+        for name, (minimum, maximum) in parameter_ranges:
+            member[name] = float(random_state.uniform(minimum, maximum)) if maximum > minimum else float(minimum)
+        member['carbonate_index'] = int(random_state.randint(number_of_carbonate_files))
+        members.append(member)
+    return members
+
+
+###################### Shared per-age inputs #####################
+
+
+# Resolves the topologies once and returns the topology graph of the subduction zones, from which the features
+# (all, left and right polarity) and the black list of anomalous sub-segments are found as in resolve_topologies_V.2.py
+def resolve_subduction_zones(rotation_model, topological_features, reconstruction_time, anchor_plate_id):
+
+    resolved_topologies = []
+    shared_boundary_sections = []
+    pygplates.resolve_topologies(
+            topological_features, rotation_model, resolved_topologies, reconstruction_time, shared_boundary_sections,
+            anchor_plate_id)
+
+    return resolve_topologies_V2.TopologyGraph(shared_boundary_sections, lambda is_subduction: is_subduction)
+
+
+# Returns the (longitude, latitude) arrays of every geometry of the features not in the black list
+def feature_segments(features, black_list_ids=()):
+    segments = []
+    for feature in features:
+        if feature.get_feature_id() in black_list_ids:
+            continue
+        for geometry in feature.get_geometries():
+            lat_lon_points = np.array(geometry.to_lat_lon_array())
+            segments.append((lat_lon_points[:, 1], lat_lon_points[:, 0]))
+    return segments
+
+
+# Reconstructs polygon features and returns the (longitude, latitude) arrays of their reconstructed geometries
+def reconstruct_polygons(rotation_model, features, reconstruction_time, anchor_plate_id):
+    reconstructed_feature_geometries = []
+    pygplates.reconstruct(features, rotation_model, reconstructed_feature_geometries, reconstruction_time, anchor_plate_id)
+    polygons = []
+    for reconstructed_feature_geometry in reconstructed_feature_geometries:
+        lat_lon_points = np.array(reconstructed_feature_geometry.get_reconstructed_geometry().to_lat_lon_array())
+        polygons.append((lat_lon_points[:, 1], lat_lon_points[:, 0]))
+    return polygons
+
+
+###################### Ensemble of one age #####################
+
+
+# Calculates the metrics of every member at one reconstruction time. Topologies are resolved and polygons
+# reconstructed only once, and the anomalous segment filter runs once per distinct 'max_distance'.
+# The subduction zones near the polygons are found with the given mask mode (see MASK_MODES):
+# a 'global' mask is built once per distinct polygon input and resolution, a 'corridor' mask once per distinct
+# polygon input, resolution, profile length and 'max_distance' (whose filtered subduction zones the corridors
+# follow). The 'analytic' and 'present_day' modes do not rasterise, so they ignore the mask resolutions.
+# 'present_day_indices' maps each polygon input (carbonate file index, or 'continent') to its present-day polygon
+# index (only used by the 'present_day' mode, see build_present_day_indices).
+# Returns a (number of members, len(METRICS)) array.
+def calculate_ensemble(rotation_model, topological_features, carbonate_features, continental_features,
+        reconstruction_time, anchor_plate_id, members, mask_mode=DEFAULT_MASK_MODE, present_day_indices=None):
+
+    topology_graph = resolve_subduction_zones(rotation_model, topological_features, reconstruction_time, anchor_plate_id)
+    carbonate_polygons = [reconstruct_polygons(rotation_model, features, reconstruction_time, anchor_plate_id)
+            for features in carbonate_features]
+    continental_polygons = reconstruct_polygons(rotation_model, continental_features, reconstruction_time, anchor_plate_id)
+
+    filtered_subduction_zones = {}
+    masks = {}
+    polygon_edges = {}
+    results = np.full((len(members), len(METRICS)), np.nan)
+    for member_index, member in enumerate(members):
+
+        max_distance = member['max_distance']
+        if max_distance not in filtered_subduction_zones:
+            # The search radius of the anomalous segment filter is in radians
+            black_list_ids = topology_graph.blacklist_ids(True, max_distance / pygplates.Earth.mean_radius_in_kms)
+            filtered_subduction_zones[max_distance] = tuple(
+                feature_segments(topology_graph.section_features(True, polarity), black_list_ids)
+                for polarity in (None, 'Left', 'Right'))
+        all_segments, left_segments, right_segments = filtered_subduction_zones[max_distance]
+
+        sz_length = sum(spherical_tools.polyline_length(lons, lats) for lons, lats in all_segments)
+
+        intersect_lengths = []
+        for polygon_input, polygons, resolution in (
+                (member['carbonate_index'], carbonate_polygons[member['carbonate_index']], member['carbonate_resolution']),
+                ('continent', continental_polygons, member['continent_resolution'])):
+            sides = ((left_segments, 'left'), (right_segments, 'right'))
+
+            if mask_mode == 'analytic':
+                if polygon_input not in polygon_edges:
+                    polygon_edges[polygon_input] = analytic_intersection.polygon_edges(
+                            polygons, analytic_intersection.DEFAULT_DENSIFY_KM)
+                intersect_lengths.append(sum(
+                    analytic_intersection.find_sz_length_within_distance(polygons, segments, member['profile_length'],
+                        side, edges=polygon_edges[polygon_input])
+                    for segments, side in sides))
+                continue
+
+            if mask_mode == 'present_day':
+                intersect_lengths.append(sum(
+                    present_day_index.find_sz_length_containing_polygons(present_day_indices[polygon_input], rotation_model, reconstruction_time,
+                        segments, member['profile_spacing'], member['profile_interval'], member['profile_length'], side,
+                        anchor_plate_id)
+                    for segments, side in sides))
+                continue
+
+            if mask_mode == 'global':
+                mask_key = (polygon_input, resolution)
+                if mask_key not in masks:
+                    masks[mask_key] = corridor_mask.build_global_mask(polygons, resolution)
+            else:
+                mask_key = (polygon_input, resolution, member['profile_length'], max_distance)
+                if mask_key not in masks:
+                    masks[mask_key] = corridor_mask.build_corridor_mask(
+                            polygons, left_segments, right_segments, member['profile_length'], resolution)
+            intersect_lengths.append(sum(
+                corridor_mask.find_sz_length_containing_mask(masks[mask_key], segments, member['profile_spacing'],
+                    member['profile_interval'], member['profile_length'], side)
+                for segments, side in sides))
+
+        sz_carbonate, sz_length_con_arc = intersect_lengths
+        con_arc_percent = 100.0 * sz_length_con_arc / sz_length if sz_length > 0 else np.nan
+        results[member_index] = (sz_length, sz_carbonate, sz_length_con_arc, con_arc_percent)
+
+    return results
+
+
+###################### Parallel driver #####################
+
+
+# Per-process state, loaded once by each worker process
+worker_state = {}
+
+
+# The present-day polygon index of each polygon input (carbonate file index, or 'continent'), built once per worker
+def build_present_day_indices(carbonate_features, continental_features):
+    present_day_indices = dict((carbonate_index, present_day_index.PresentDayPolygonIndex.from_features(features))
+        for carbonate_index, features in enumerate(carbonate_features))
+    present_day_indices['continent'] = present_day_index.PresentDayPolygonIndex.from_features(
+            [feature for feature_collection in continental_features for feature in feature_collection])
+    return present_day_indices
+
+
+def initialise_worker(rotation_filenames, topology_filenames, carbonate_filenames, continental_filenames,
+        anchor_plate_id, members, mask_mode=DEFAULT_MASK_MODE):
+    worker_state['rotation_model'] = pygplates.RotationModel(rotation_filenames)
+    worker_state['topological_features'] = [pygplates.FeatureCollection(filename) for filename in topology_filenames]
+    worker_state['carbonate_features'] = [pygplates.FeatureCollection(filename) for filename in carbonate_filenames]
+    worker_state['continental_features'] = [pygplates.FeatureCollection(filename) for filename in continental_filenames]
+    worker_state['anchor_plate_id'] = anchor_plate_id
+    worker_state['members'] = members
+    worker_state['mask_mode'] = mask_mode
+    worker_state['present_day_indices'] = (
+            build_present_day_indices(worker_state['carbonate_features'], worker_state['continental_features'])
+            if mask_mode == 'present_day' else None)
+
+
+def calculate_ensemble_worker(reconstruction_time):
+    return reconstruction_time, calculate_ensemble(
+            worker_state['rotation_model'], worker_state['topological_features'], worker_state['carbonate_features'],
+            worker_state['continental_features'], reconstruction_time, worker_state['anchor_plate_id'],
+            worker_state['members'], worker_state['mask_mode'], worker_state['present_day_indices'])
+
+
+if __name__ == "__main__":
+
+    # Check the imported pygplates version.
+    required_version = pygplates.Version(9)
+    if not hasattr(pygplates, 'Version') or pygplates.Version.get_imported_version() < required_version:
+        print('{0}: Error - imported pygplates version {1} but version {2} or greater is required'.format(
+                os.path.basename(__file__), pygplates.Version.get_imported_version(), required_version),
+            file=sys.stderr)
+        sys.exit(1)
+
+
+    __description__ = \
+    """Parameter ensemble of the subduction zone metrics (total length, length near carbonate platforms,
+    continental arc length and percentage). Members draw the anomalous segment search radius, the cross-profile
+    spacing, interval and length, the mask resolutions and the carbonate file from the given ranges.
+    Topologies are resolved once per age and shared by all members, and ages run on a process pool.
+    The mask mode is that of the '-g' option of DCO_subductionzone_analysis.sh ('global' by default, as there).
+    Writes the percentile bands of each metric per age in one table, and the metrics of every member.
+
+    NOTE: Separate the positional and optional arguments with '--' (workaround for bug in argparse module).
+    For example...
+
+    python %(prog)s -r rotations.rot -m topologies.gpml -c Active.gpml Accumulated.gpml -a COB.gpml -t 0 1 2 \\
+        --members 200 --profile_interval 5 10 -- ensemble_"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-r', '--rotation_filenames', type=str, nargs='+', required=True,
+            metavar='rotation_filename', help='One or more rotation files.')
+    parser.add_argument('-m', '--topology_filenames', type=str, nargs='+', required=True,
+            metavar='topology_filename', help='One or more files topology files.')
+    parser.add_argument('-c', '--carbonate_filenames', type=str, nargs='+', required=True,
+            metavar='carbonate_filename',
+            help='Carbonate platform files. Each member uses one of them (e.g. Active or Accumulated platforms).')
+    parser.add_argument('-a', '--continental_filenames', type=str, nargs='+', required=True,
+            metavar='continental_filename', help='One or more continental polygon files.')
+    parser.add_argument('-t', '--reconstruction_times', type=float, nargs='+', required=True,
+            metavar='reconstruction_time', help='One or more times at which to calculate the ensemble.')
+    parser.add_argument('--anchor', type=int, default=0,
+            dest='anchor_plate_id',
+            help='Anchor plate id used for reconstructing. Defaults to zero.')
+    parser.add_argument('--members', type=int, default=100,
+            help='Number of ensemble members. Defaults to 100.')
+    parser.add_argument('--seed', type=int, default=0,
+            help='Seed of the random parameter draws. Defaults to 0.')
+    for name, (minimum, maximum) in PARAMETER_RANGES:
+        parser.add_argument('--{0}'.format(name), type=float, nargs=2, default=[minimum, maximum],
+                metavar=('MIN', 'MAX'),
+                help='Range of {0} (km). Defaults to {1:g} {2:g}.'.format(name, minimum, maximum))
+    parser.add_argument('-g', '--mask_mode', type=str, choices=MASK_MODES, default=DEFAULT_MASK_MODE,
+            help="How the subduction zones near the polygons are found, as the '-g' option of "
+                "DCO_subductionzone_analysis.sh. Defaults to '{0}'.".format(DEFAULT_MASK_MODE))
+    parser.add_argument('--percentiles', type=float, nargs='+', default=DEFAULT_PERCENTILES,
+            help='Percentiles of the bands. Defaults to {0}.'.format(' '.join(str(p) for p in DEFAULT_PERCENTILES)))
+    parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes. Defaults to the number of CPUs.')
+
+    parser.add_argument('output_filename_prefix', type=str, nargs='?',
+            default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
+            help="The prefix of the output files - the default prefix is '{0}'".format(DEFAULT_OUTPUT_FILENAME_PREFIX))
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    parameter_ranges = [(name, tuple(getattr(args, name))) for name, default_range in PARAMETER_RANGES]
+    members = generate_members(args.members, parameter_ranges, len(args.carbonate_filenames), args.seed)
+
+    # Parameters of each member, so the ensemble can be reproduced and members traced
+    with open('{0}members.dat'.format(args.output_filename_prefix), 'w') as members_file:
+        members_file.write('Member {0} Carbonate_File\n'.format(' '.join(name for name, default_range in PARAMETER_RANGES)))
+        for member_index, member in enumerate(members):
+            members_file.write('{0} {1} {2}\n'.format(member_index,
+                    ' '.join('{0:g}'.format(member[name]) for name, default_range in PARAMETER_RANGES),
+                    args.carbonate_filenames[member['carbonate_index']]))
+
+    bands_file = open('{0}percentile_bands.dat'.format(args.output_filename_prefix), 'w')
+    member_values_file = open('{0}member_values.dat'.format(args.output_filename_prefix), 'w')
+    bands_file.write('Age Metric {0}\n'.format(' '.join('P{0:g}'.format(percentile) for percentile in args.percentiles)))
+    member_values_file.write('Age Member {0}\n'.format(' '.join(METRICS)))
+
+    pool = multiprocessing.Pool(args.processes, initialise_worker,
+            (args.rotation_filenames, args.topology_filenames, args.carbonate_filenames, args.continental_filenames,
+             args.anchor_plate_id, members, args.mask_mode))
+    try:
+        for reconstruction_time, results in pool.imap(calculate_ensemble_worker, args.reconstruction_times):
+            bands = np.nanpercentile(results, args.percentiles, axis=0)
+            for metric_index, metric in enumerate(METRICS):
+                bands_file.write('{0:g} {1} {2}\n'.format(reconstruction_time, metric,
+                        ' '.join('{0:.4f}'.format(value) for value in bands[:, metric_index])))
+            for member_index, values in enumerate(results):
+                member_values_file.write('{0:g} {1} {2}\n'.format(reconstruction_time, member_index,
+                        ' '.join('{0:.4f}'.format(value) for value in values)))
+            bands_file.flush()
+            member_values_file.flush()
+    finally:
+        pool.close()
+        pool.join()
+        bands_file.close()
+        member_values_file.close()
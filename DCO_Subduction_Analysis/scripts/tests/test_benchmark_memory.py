@@ -0,0 +1,81 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Self-contained memory check of the multi-time resolve on the sample model (no plate model files needed), and
+# a check that a leak fails it. Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+#
+# or 'make test' from the top of the repository.
+
+
+import os
+import os.path
+import subprocess
+import sys
+import unittest
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import benchmark_memory
+import memory_monitor
+
+
+NUMBER_OF_TIMES = 30
+WARMUP = 10
+# Memory each time retains in the leaking run (MB)
+LEAK_MB = 2
+
+
+class MemoryCheckTest(unittest.TestCase):
+
+    # The benchmark passes on the sample model in a reduced number of times
+    def test_sample_model_memory_is_flat(self):
+        process = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS_DIRECTORY, 'benchmark_memory.py'), '--sample',
+                    '-n', str(NUMBER_OF_TIMES), '--warmup', str(WARMUP)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=600)
+        self.assertEqual(process.returncode, 0, process.stdout + process.stderr)
+        self.assertIn('PASS: memory per time is flat', process.stdout)
+
+    # A resolve that retains memory every time is caught
+    def test_leak_is_detected(self):
+        rotation_model, topological_features = benchmark_memory.load_sample_model()
+        resolve_topologies = benchmark_memory.resolve_topologies_V2.resolve_topologies
+        leaked = []
+        def leaking_resolve_topologies(*args, **kwargs):
+            leaked.append(b'x' * (LEAK_MB * 1024 * 1024))
+            return resolve_topologies(*args, **kwargs)
+
+        benchmark_memory.resolve_topologies_V2.resolve_topologies = leaking_resolve_topologies
+        try:
+            monitor = memory_monitor.MemoryMonitor('test', enabled=True)
+            benchmark_memory.run_benchmark(rotation_model, topological_features, [float(index) for index in range(NUMBER_OF_TIMES)],
+                    0, 'gmt', monitor)
+        finally:
+            benchmark_memory.resolve_topologies_V2.resolve_topologies = resolve_topologies
+
+        growth_mb, growing_times = benchmark_memory.memory_growth(monitor, WARMUP)
+        self.assertGreater(growth_mb, benchmark_memory.DEFAULT_MAX_GROWTH_MB)
+        self.assertTrue(growing_times)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Regression check of the black list of anomalous segments: the topology graph (which compares sub-segments of
+# the same section by the section vertices they cover) must black-list exactly the segments that comparing
+# geometries does. Uses the bundled plate model, whose sections have many rubber-band sub-segments. Run from
+# this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import importlib.util
+import os
+import os.path
+import sys
+import unittest
+import pygplates
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+# The resolve script is not a valid module name, so it is loaded from its file
+_resolve_spec = importlib.util.spec_from_file_location(
+    'resolve_topologies_V2', os.path.join(SCRIPTS_DIRECTORY, 'resolve_topologies_V.2.py'))
+resolve_topologies_V2 = importlib.util.module_from_spec(_resolve_spec)
+_resolve_spec.loader.exec_module(resolve_topologies_V2)
+
+MODEL_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(SCRIPTS_DIRECTORY)), 'PlateMotionModel_and_GeometryFiles',
+        'Muller2019-Young2019-Cao2020_410Ma_WithDeformationFrom240Ma')
+ROTATION_FILENAME = os.path.join(MODEL_DIRECTORY, 'Muller2019-Young2019-Cao2020_CombinedRotations.rot')
+TOPOLOGY_FILENAME = os.path.join(MODEL_DIRECTORY, 'Muller2019-Young2019-Cao2020_PlateBoundaries.gpmlz')
+AGES = [0.0, 10.0, 50.0, 100.0]
+
+
+def is_rubber_band(segment):
+    return segment.vertex_range is not None and any(index != int(index) for index in segment.vertex_range)
+
+
+@unittest.skipUnless(os.path.exists(TOPOLOGY_FILENAME), 'bundled plate model not found')
+class BlacklistTest(unittest.TestCase):
+
+    def test_graph_blacklist_matches_geometry(self):
+        rotation_model = pygplates.RotationModel(ROTATION_FILENAME)
+        topological_features = [pygplates.FeatureCollection(TOPOLOGY_FILENAME)]
+        number_of_rubber_bands = 0
+        for reconstruction_time in AGES:
+            shared_boundary_sections = []
+            pygplates.resolve_topologies(topological_features, rotation_model, [], reconstruction_time, shared_boundary_sections)
+            topology_graph = resolve_topologies_V2.TopologyGraph(shared_boundary_sections)
+            for is_subduction in (True, False):
+                anomalous_segments = topology_graph.anomalous_segments(is_subduction)
+                number_of_rubber_bands += sum(1 for segment in anomalous_segments if is_rubber_band(segment))
+                # Without the section and vertex range every comparison is geometric (as before the graph)
+                geometry_black_list_ids = set(resolve_topologies_V2.find_segment_blacklist_ids(
+                        [resolve_topologies_V2.AnomalousSegment(segment.feature) for segment in anomalous_segments]))
+                self.assertEqual(topology_graph.blacklist_ids(is_subduction), geometry_black_list_ids,
+                        '{0:g} Ma, {1}'.format(reconstruction_time, 'subduction zones' if is_subduction else 'other sections'))
+        self.assertGreater(number_of_rubber_bands, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
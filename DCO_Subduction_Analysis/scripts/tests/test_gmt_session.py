@@ -0,0 +1,91 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Checks that each pool worker of gmt_session.py closes its GMT session when the pool is closed and joined.
+# The session is replaced by one recording its closing, so neither GMT nor PyGMT is needed. Run from this
+# folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import multiprocessing
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import gmt_session
+
+
+NUMBER_OF_PROCESSES = 2
+
+
+# Writes a file named after its process when opened and when closed
+class RecordingSession(object):
+
+    directory = None
+
+    def __init__(self):
+        with open(os.path.join(RecordingSession.directory, 'opened_{0}'.format(os.getpid())), 'w'):
+            pass
+
+    def close(self):
+        with open(os.path.join(RecordingSession.directory, 'closed_{0}'.format(os.getpid())), 'w'):
+            pass
+
+
+def worker_pid(age):
+    return os.getpid()
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs the fork start method')
+class WorkerSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        RecordingSession.directory = tempfile.mkdtemp(prefix='gmt_session_test_')
+        self.session_class = gmt_session.GMTSession
+        gmt_session.GMTSession = RecordingSession
+
+    def tearDown(self):
+        gmt_session.GMTSession = self.session_class
+        shutil.rmtree(RecordingSession.directory, ignore_errors=True)
+
+    def test_worker_sessions_are_closed(self):
+        pool = multiprocessing.get_context('fork').Pool(NUMBER_OF_PROCESSES, gmt_session.initialise_worker, (None,))
+        try:
+            pids = set(pool.map(worker_pid, range(10)))
+        finally:
+            pool.close()
+            pool.join()
+        # A worker may not be given any age, so the sessions are matched by the files of the opened ones
+        filenames = os.listdir(RecordingSession.directory)
+        opened_pids = set(filename[len('opened_'):] for filename in filenames if filename.startswith('opened_'))
+        closed_pids = set(filename[len('closed_'):] for filename in filenames if filename.startswith('closed_'))
+        self.assertEqual(len(opened_pids), NUMBER_OF_PROCESSES)
+        self.assertTrue(set(str(pid) for pid in pids) <= opened_pids)
+        self.assertEqual(closed_pids, opened_pids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Checks of the present-day polygon index on synthetic polygons (including rings around the poles) and on the
+# Antarctic COB polygon of the bundled plate model. Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pygplates
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import present_day_index
+
+COB_FILENAME = os.path.join(os.path.dirname(os.path.dirname(SCRIPTS_DIRECTORY)), 'PlateMotionModel_and_GeometryFiles',
+        'Muller2019-Young2019-Cao2020_410Ma_WithDeformationFrom240Ma', 'Global_EarthByte_GeeK07_COB_Terranes.gpmlz')
+# Antarctica COB polygons (plate 802) of the bundled COB file
+ANTARCTICA_FEATURE_INDICES = [6, 499]
+
+
+def polygon_feature(geometry, plate_id):
+    feature = pygplates.Feature()
+    feature.set_geometry(geometry)
+    feature.set_reconstruction_plate_id(plate_id)
+    return feature
+
+
+# A ring at a latitude around a pole
+def polar_ring(lat):
+    return [(lat, lon) for lon in range(-180, 180, 10)]
+
+
+# Plate 101 rotates 10 degrees eastwards about the north pole over 100 Myr, the others stay fixed
+def rotation_model():
+    return pygplates.RotationModel([pygplates.Feature.create_total_reconstruction_sequence(0, 101, pygplates.GpmlIrregularSampling([
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation((90, 0), 0.0)), 0.0),
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation((90, 0), np.radians(10.0))), 100.0)]))])
+
+
+class PresentDayPolygonIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = present_day_index.PresentDayPolygonIndex.from_features([
+            polygon_feature(pygplates.PolygonOnSphere([(0, 0), (0, 10), (10, 10), (10, 0)]), 101),
+            # Polylines are closed as polygons
+            polygon_feature(pygplates.PolylineOnSphere([(20, 0), (20, 10), (30, 10), (30, 0)]), 101),
+            polygon_feature(pygplates.PolygonOnSphere(polar_ring(-70)), 802),
+            polygon_feature(pygplates.PolygonOnSphere(polar_ring(75)), 102)])
+        self.rotation_model = rotation_model()
+
+    def contains(self, index, reconstruction_time, lon_lats):
+        lons, lats = zip(*lon_lats)
+        return list(index.contains(self.rotation_model, reconstruction_time, np.array(lons, dtype=float), np.array(lats, dtype=float)))
+
+    def test_present_day(self):
+        self.assertEqual(self.contains(self.index, 0.0, [(5, 5), (15, 5), (5, 25), (5, 35)]), [True, False, True, False])
+
+    # Points are rotated back to present day by the plate's rotation
+    def test_reconstructed(self):
+        self.assertEqual(self.contains(self.index, 100.0, [(15, 5), (5, 5), (15, 25)]), [True, False, True])
+
+    # Rings around a pole contain the pole and their whole interior, across the dateline
+    def test_pole_enclosing(self):
+        self.assertEqual(self.contains(self.index, 0.0, [(0, -90), (-175, -80), (175, -80), (95, -71), (0, -60)]),
+                [True, True, True, True, False])
+        self.assertEqual(self.contains(self.index, 0.0, [(0, 90), (-170, 89), (180, 80), (45, 70)]),
+                [True, True, True, False])
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp(prefix='present_day_index_test_')
+        try:
+            filename = os.path.join(directory, 'index.npz')
+            self.index.save(filename)
+            loaded_index = present_day_index.PresentDayPolygonIndex.load(filename)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        lon_lats = [(5, 5), (15, 5), (0, -90), (120, 80), (45, 70)]
+        self.assertEqual(self.contains(loaded_index, 0.0, lon_lats), self.contains(self.index, 0.0, lon_lats))
+
+    # Interior of the Antarctic COB polygons, which enclose the south pole
+    @unittest.skipUnless(os.path.exists(COB_FILENAME), 'bundled COB file not found')
+    def test_antarctica(self):
+        features = pygplates.FeatureCollection(COB_FILENAME)
+        index = present_day_index.PresentDayPolygonIndex.from_features(
+                [features[feature_index] for feature_index in ANTARCTICA_FEATURE_INDICES])
+        lons = np.arange(-180.0, 180.0, 15.0)
+        self.assertTrue(all(self.contains(index, 0.0, [(lon, -85) for lon in lons])))
+        self.assertFalse(any(self.contains(index, 0.0, [(lon, -40) for lon in lons])))
+
+
+if __name__ == "__main__":
+    unittest.main()
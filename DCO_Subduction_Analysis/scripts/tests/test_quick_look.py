@@ -0,0 +1,86 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# End-to-end run of quick_look.py on the sample model and polygons (see sample_model.py), building and then
+# loading the cached polygon levels. Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import sample_model
+
+
+AGES = ['0', '2', '4']
+
+
+def read_table(filename):
+    with open(filename, 'r') as table_file:
+        rows = [line.split() for line in table_file if not line.startswith('#')]
+    return rows[0], rows[1:]
+
+
+class QuickLookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='quick_look_test_')
+        self.rotation_filename, self.topology_filename = sample_model.write_sample_model(self.directory)
+        self.carbonate_filename, self.continental_filename = sample_model.write_sample_polygons(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_quick_look(self):
+        process = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS_DIRECTORY, 'quick_look.py'),
+                    '-r', self.rotation_filename, '-m', self.topology_filename,
+                    '-c', self.carbonate_filename, '-a', self.continental_filename,
+                    '-t', AGES[0], AGES[-1], '2', '-n', '1', '--calibration_ages', '2',
+                    '--cache_dir', os.path.join(self.directory, 'cache'), '--', os.path.join(self.directory, 'quick_look_')],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=600)
+        self.assertEqual(process.returncode, 0, process.stdout + process.stderr)
+        return read_table(os.path.join(self.directory, 'quick_look_metrics.dat'))
+
+    def test_quick_look(self):
+        header, rows = self.run_quick_look()
+        self.assertEqual([row[0] for row in rows], AGES)
+        self.assertTrue(all(row[1] == 'coarse' for row in rows))
+        for metric in ('sz_length', 'sz_length_carbonate', 'sz_length_continentarc'):
+            self.assertTrue(all(float(row[header.index(metric)]) > 0 for row in rows), metric)
+
+        calibration_header, calibration_rows = read_table(os.path.join(self.directory, 'quick_look_calibration.dat'))
+        self.assertEqual([row[0] for row in calibration_rows], ['coarse', 'medium', 'fine', 'full'])
+        self.assertTrue(all(float(error) == 0.0 for error in calibration_rows[-1][1:]))
+
+        # A second run loads the cached polygon levels and gives the same metrics
+        self.assertEqual(self.run_quick_look(), (header, rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
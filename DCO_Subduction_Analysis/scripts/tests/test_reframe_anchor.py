@@ -0,0 +1,97 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Checks of the re-framing of cached GMT/xy files: segments rotated across the dateline are split there (keeping
+# their other columns), rings around a pole are closed along the dateline, and the OGR GMT region is updated.
+# Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pygplates
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import reframe_anchor
+
+
+# Plate 701 is rotated 30 degrees eastwards about the north pole relative to plate 0 at 10 Ma
+def rotation_model():
+    return pygplates.RotationModel([pygplates.Feature.create_total_reconstruction_sequence(0, 701, pygplates.GpmlIrregularSampling([
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation((90, 0), 0.0)), 0.0),
+        pygplates.GpmlTimeSample(pygplates.GpmlFiniteRotation(pygplates.FiniteRotation((90, 0), np.radians(30.0))), 10.0)]))])
+
+
+OGR_HEADER = ['# @VGMT1.0 @GMULTIPOLYGON', '# @R0/20/-70/10' + ' ' * 40, '# FEATURE_DATA']
+
+
+class ReframeAnchorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='reframe_anchor_test_')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # Writes a file, re-frames it into the frame of plate 701 (moving it 30 degrees westwards) and reads it back
+    def reframe(self, lines):
+        input_filename = os.path.join(self.directory, 'input.gmt')
+        with open(input_filename, 'w') as input_file:
+            input_file.write('\n'.join(lines) + '\n')
+        reframe_anchor.reframe_files(rotation_model(), 10.0, [input_filename], os.path.join(self.directory, 'output'), 0, 701)
+        return reframe_anchor.read_text_segments(os.path.join(self.directory, 'output', 'input.gmt'))
+
+    def test_polyline_split_at_dateline(self):
+        file_header, segments = self.reframe(['> profile', '-152 10 -100 1', '-151 10 -50 2', '-149 10 50 3', '-148 10 100 4'])
+        self.assertEqual([header for header, rows in segments], [['> profile'], ['> profile']])
+        lons = [[round(row[0], 6) for row in rows] for header, rows in segments]
+        self.assertEqual(lons, [[178, 179, 180], [-180, -179, -178]])
+        # The dateline points copy the other columns of a neighbouring original point
+        self.assertEqual([[row[2] for row in rows] for header, rows in segments],
+                [[['-100', '1'], ['-50', '2'], ['-50', '2']], [['50', '3'], ['50', '3'], ['100', '4']]])
+
+    def test_not_crossing(self):
+        file_header, segments = self.reframe(['> line', '40 0', '50 5'])
+        self.assertEqual(len(segments), 1)
+        np.testing.assert_allclose([row[:2] for row in segments[0][1]], [(10, 0), (20, 5)], atol=1e-9)
+
+    # An OGR GMT ring around the south pole: the pieces after the first repeat the '>' line and polygon marker (not
+    # the attributes), and the region covers the dateline and the pole
+    def test_polar_ring(self):
+        ring = ['{0} -70'.format(lon) for lon in range(-180, 180, 30)]
+        file_header, segments = self.reframe(OGR_HEADER + ['>', '# @D802|Antarctica', '# @P'] + ring + [ring[0]])
+        self.assertEqual(segments[0][0], ['>', '# @D802|Antarctica', '# @P'])
+        self.assertTrue(all(header == ['>', '# @P'] for header, rows in segments[1:]))
+        self.assertTrue(all(rows[0][:2] == rows[-1][:2] for header, rows in segments))
+        lats = [row[1] for header, rows in segments for row in rows]
+        self.assertAlmostEqual(min(lats), -90.0)
+        self.assertEqual(file_header[1].split()[1], '@R-180/180/-90/-70')
+        self.assertEqual(len(file_header[1]), len(OGR_HEADER[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Checks of the polygon projection of the map renderer on polygons crossing the map edge and enclosing a pole.
+# The Mollweide projection of the unit sphere is equal-area, so the projected rings must cover the polygon's
+# spherical area (in steradians). Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import os
+import os.path
+import sys
+import unittest
+import numpy as np
+import pygplates
+
+SCRIPTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+import render_maps
+
+COB_FILENAME = os.path.join(os.path.dirname(os.path.dirname(SCRIPTS_DIRECTORY)), 'PlateMotionModel_and_GeometryFiles',
+        'Muller2019-Young2019-Cao2020_410Ma_WithDeformationFrom240Ma', 'Global_EarthByte_GeeK07_COB_Terranes.gpmlz')
+# Antarctica COB polygon (plate 802, encloses the south pole) of the bundled COB file
+ANTARCTICA_FEATURE_INDEX = 6
+CENTRAL_MERIDIANS = [0.0, 30.0, -150.0, 180.0]
+
+
+def projected_area(rings):
+    return sum(0.5 * abs(np.dot(ring[:, 0], np.roll(ring[:, 1], 1)) - np.dot(ring[:, 1], np.roll(ring[:, 0], 1))) for ring in rings)
+
+
+class ProjectPolygonTest(unittest.TestCase):
+
+    # Projects a polygon (tessellated, since the rings are drawn with straight edges on the map) at each
+    # central meridian and checks the projected rings stay on the map and cover the polygon's area
+    def assertCoversArea(self, polygon, tolerance=0.01):
+        lat_lons = polygon.to_tessellated(np.radians(0.2)).to_lat_lon_array()
+        for central_meridian in CENTRAL_MERIDIANS:
+            rings = render_maps.project_polygon(render_maps.Mollweide(central_meridian), lat_lons[:, 1], lat_lons[:, 0])
+            for ring in rings:
+                self.assertTrue(np.all((ring[:, 0] / render_maps.MAP_HALF_WIDTH)**2 +
+                        (ring[:, 1] / render_maps.MAP_HALF_HEIGHT)**2 <= 1.0 + 1e-9), central_meridian)
+            self.assertAlmostEqual(projected_area(rings) / polygon.get_area(), 1.0, delta=tolerance, msg=central_meridian)
+
+    def test_inside_map(self):
+        self.assertCoversArea(pygplates.PolygonOnSphere([(0, 0), (0, 10), (10, 10), (10, 0)]))
+
+    # Crosses the dateline, and the map edge (which is only at the dateline for a central meridian of 0)
+    def test_crossing_map_edge(self):
+        self.assertCoversArea(pygplates.PolygonOnSphere([(-20, 170), (-20, -170), (20, -170), (20, 170)]))
+        self.assertCoversArea(pygplates.PolygonOnSphere([(-20, -160), (-20, -140), (20, -140), (20, -160)]))
+
+    def test_pole_enclosing(self):
+        self.assertCoversArea(pygplates.PolygonOnSphere([(-70, lon) for lon in range(-180, 180, 10)]))
+        self.assertCoversArea(pygplates.PolygonOnSphere([(75, lon) for lon in range(180, -180, -10)]))
+
+    @unittest.skipUnless(os.path.exists(COB_FILENAME), 'bundled COB file not found')
+    def test_antarctica(self):
+        self.assertCoversArea(pygplates.FeatureCollection(COB_FILENAME)[ANTARCTICA_FEATURE_INDEX].get_geometry())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,55 +1,32 @@
 #!/bin/bash
 
 # Continental gridding automated script
+#
+# Each age is a task of the age_work_queue.py work queue (reconstruct, grid, plot). Workers claim ages, retry
+# failed ones and move the grids into ContinentalGrids. To spread the work over several nodes, run
+#   python age_work_queue.py work -q WorkQueue -n <cores>
+# on the other nodes too (the queue directory must be on a filesystem they share).
 
 rotation_file=Muller_etal_2019_CombinedRotations.rot
 continental_geometries=Global_EarthByte_GeeK07_COB_Terranes_ContinentsOnly.gpml
 
-rm -rf CONTINENTAL_GRIDS_*
+framegrid=d
+grdspace=0.1d # m is arc-minute, d is degree
+anchored_plate=0
 
 age1=40 #larger number
 age2=38 #smaller number
 proc_tot=4
-script=helper_script_make_continental_grids.sh
+queue=WorkQueue
 
-mkdir ContinentalGrids
+mkdir -p ContinentalGrids
 
-step=$(echo "($age1-$age2)/$proc_tot" | bc -l | awk '{ print int($1)+1}')
-#echo $step
-nproc=$(echo "($age1-$age2)/$step" | bc -l | awk '{ print int($1)+1}')
-#echo $nproc
+python age_work_queue.py init -q ${queue} --reset -a ${age2} ${age1} -o ContinentalGrids \
+	--stage reconstruct "python {root}/reconstruct_features_v2.py -r {root}/${rotation_file} -m {root}/${continental_geometries} -t {age} -e xy --anchor ${anchored_plate} -- cobs" \
+	--stage grid "gmt grdmask reconstructed_cobs_{age}.0Ma.xy -R${framegrid} -I${grdspace} -NNaN/1/1 -fg -V -Gcontinental_grid_{age}.nc" \
+	--stage plot "gmt grdimage -C{root}/continents.cpt continental_grid_{age}.nc -JW200/10 -Rd -B30 -V > continental_grid_{age}.ps && gmt ps2raster continental_grid_{age}.ps -A -Tg -P" \
+	--collect "continental_grid_{age}.nc" "continental_grid_{age}.png"
 
-proc=0
-while (($proc <= ($nproc-1)))
-
-do
-	
-	age_max=$(echo "$age1-($proc*$step)" | bc -l)
-	age_min=$(echo "$age_max-($step-1)" | bc -l)
-
-	if [ $age_min -lt $age2 ];
-	then
-		age_min=$age2
-	fi	
-	
-	mkdir CONTINENTAL_GRIDS_${age_min}_${age_max}	
-
-	cp ${script} CONTINENTAL_GRIDS_${age_min}_${age_max}
-	cp reconstruct_features_v2.py CONTINENTAL_GRIDS_${age_min}_${age_max}
-	cp continents.cpt CONTINENTAL_GRIDS_${age_min}_${age_max}
-	cp $rotation_file CONTINENTAL_GRIDS_${age_min}_${age_max}/CombinedRotations.rot
-	cp $continental_geometries CONTINENTAL_GRIDS_${age_min}_${age_max}/ContinentalTerranes.gpml
-		
-	cd CONTINENTAL_GRIDS_${age_min}_${age_max}/	
-
-	nohup ./${script} ${age_min} ${age_max} > stdout_${age_max}-${age_min} & 
-	echo "Continental gridding job for ages " ${age_min} " to " ${age_max} " launched!"
-	cd ..	
-		
-proc=$(($proc + 1))
-done	
-	
-
-
-	
-	
+nohup python age_work_queue.py work -q ${queue} -n ${proc_tot} > stdout_${age1}-${age2} &
+echo "Continental gridding jobs for ages " ${age2} " to " ${age1} " launched! Check progress with: python age_work_queue.py status -q ${queue}"
+echo "Once done, pack the grids into a mask stack (read by STEP2) with: python mask_stack.py build -o ContinentalGrids/continental_grids.npz -b ContinentalGrids/continental_grids.npz ContinentalGrids/continental_grid_*.nc --remove"
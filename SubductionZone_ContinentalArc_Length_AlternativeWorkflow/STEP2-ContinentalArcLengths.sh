@@ -5,13 +5,15 @@ gmt gmtset PS_COLOR_MODEL=RGB PS_MEDIA=A2 MAP_FRAME_TYPE=plain FORMAT_GEO_MAP=dd
 rotation_file=Muller_etal_2019_CombinedRotations.rot
 coastline_file=Muller_etal_2019_Coastlines.gpmlz
 
-# Projection
-width=16
-proj="W100/${width}c"
-region=d
+# Maps (Mollweide, central meridian 100) are rendered by render_maps.py once all ages are analysed
 
 anchored_plate=0
 
+# Continental grids packed into a mask stack by STEP1 (mask_stack.py build) are sampled straight from the stack
+# by continental_arc_lengths.py (all ages in one run, no grid extracted and no 'gmt grdtrack'), otherwise the
+# per-age grids of ContinentalGrids are used with GMT
+continental_stack=ContinentalGrids/continental_grids.npz
+
 prof_spacing=50k # IN KM, e.g. 50k, Cross profile are created at x km spacing from each other
 prof_interval=20k # IN KM, e.g. 20k, Spacing of points ALONG the cross-profile
 
@@ -39,6 +41,16 @@ do
 		python reconstruct_features_v2.py -r ${rotation_file} -m ${coastline_file} -a ${anchored_plate} -t $age -e gmt -- coasts
 		
 		coastlines=reconstructed_coasts_${age}.0Ma.gmt
+		map_layers=MapLayers/${scenario}km/${age}
+		mkdir -p ${map_layers}
+
+		# The lengths of all ages are measured from the stack after this loop
+		if [[ -f ${continental_stack} ]]; then
+			mv $coastlines ${map_layers}/
+			age=$(($age + 1))
+			continue
+		fi
+
 		topologies=GPlates_Export/topology_${age}.00Ma.gmt
 		subduction_boundaries=GPlates_Export/topology_subduction_boundaries_${age}.00Ma.gmt
 		subduction_left=GPlates_Export/topology_subduction_boundaries_sL_${age}.00Ma.gmt
@@ -102,37 +114,39 @@ do
 		# Return value
 		echo "Continental arc length is $continental_arc_length km and is $continental_arc_portion of global subduction length ${subduction_length_total} km."
 
-		psfile=ContinentalArcLength_${scenario}km_${age}Ma.ps
-		
-		gmt grdimage -P -J${proj} -R${region} -V -K -Y5c $continental_grid -t50 -Ccontinents.cpt  > $psfile
-
-		gmt psxy $coastlines -W0.1p,black -J -R -K -O -V >> $psfile
-
-		gmt psxy -R -J -W1.0p,100 -K -O ${topologies}  -V >> $psfile
-		gmt psxy -R -J -W2.0p,black -Sf8p/1.5plt -K -O ${subduction_left} -Gred -V >> $psfile
-		gmt psxy -R -J -W2.0p,black -Sf8p/1.5prt -K -O ${subduction_right} -Gred -V >> $psfile
-
-		gmt psxy -R -J -Sc2.0p ${scenario}km_feature_L_halfxprofiles_SZcontinent.gmt -Gmagenta -K -O -V >> $psfile
-		gmt psxy -R -J -Sc2.0p ${scenario}km_feature_R_halfxprofiles_SZcontinent.gmt -Gmagenta -K -O -V >> $psfile
-
-		gmt psxy -R -J -Sc0.1p ${scenario}km_feature_L_halfxprofiles.gmt -K -O -V >> $psfile
-		gmt psxy -R -J -Sc0.1p ${scenario}km_feature_R_halfxprofiles.gmt -K -O -V >> $psfile
-
-		gmt psxy -R -J -Sc0.2p ${scenario}km_feature_L_halfxprofiles_continent.gmt -Gyellow -K -O -V >> $psfile
-		gmt psxy -R -J -Sc0.2p ${scenario}km_feature_R_halfxprofiles_continent.gmt -Gyellow -K -O -V >> $psfile
-
-		gmt psxy -R -J -Sc1.5p ${scenario}km_feature_L_halfxprofiles_SZcontinent.gmt -Gmagenta -K -O -V >> $psfile
-		gmt psxy -R -J -Sc1.5p ${scenario}km_feature_R_halfxprofiles_SZcontinent.gmt -Gmagenta -K -O -V >> $psfile
-
-		echo "11 -0.7 40 0 1 5 $age Ma" | gmt pstext -R0/${width}/0/1 -Jx1 -N -O >> $psfile
-		 
-		gmt ps2raster -Tj -A -E400 $psfile
-
+		# Keep the layers of this age for the maps, rendered once all ages are done
+		mv $coastlines ${scenario}km_feature_?_halfxprofiles*.gmt ${map_layers}/
 
 		age=$(($age + 1))
 	done
 
+	# Cross-profiles sampled from the continental mask stack, writing the same tables and map layers
+	if [[ -f ${continental_stack} ]]; then
+		python continental_arc_lengths.py -s ${continental_stack} -t $(seq 0 $max_age) -p ${scenario} \
+			--prof_spacing ${prof_spacing_for_calc} --prof_interval ${prof_interval_for_calc} \
+			--layers "MapLayers/${scenario}km/{age}/${scenario}km_feature"
+	fi
+
+	# Render the maps of all ages on a process pool
+	map_grid="ContinentalGrids/continental_grid_{age}.nc"
+	if [[ -f ${continental_stack} ]]; then
+		map_grid=${continental_stack}
+	fi
+	python render_maps.py -t $(seq 0 $max_age) -o "ContinentalArcLength_${scenario}km_{age}Ma.jpg" \
+		--central_meridian 100 --width 6.3 \
+		--grid "${map_grid}" --grid_color "#ff2000" --grid_alpha 0.5 \
+		--coastlines "MapLayers/${scenario}km/{age}/reconstructed_coasts_{age}.0Ma.gmt" \
+		--topologies "GPlates_Export/topology_{age}.00Ma.gmt" \
+		--subduction_left "GPlates_Export/topology_subduction_boundaries_sL_{age}.00Ma.gmt" \
+		--subduction_right "GPlates_Export/topology_subduction_boundaries_sR_{age}.00Ma.gmt" \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_L_halfxprofiles.gmt" black 0.2 \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_R_halfxprofiles.gmt" black 0.2 \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_L_halfxprofiles_continent.gmt" yellow 0.5 \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_R_halfxprofiles_continent.gmt" yellow 0.5 \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_L_halfxprofiles_SZcontinent.gmt" magenta 4 \
+		--points "MapLayers/${scenario}km/{age}/${scenario}km_feature_R_halfxprofiles_SZcontinent.gmt" magenta 4
+
 
 done
 
-rm *.gmt *.ps
\ No newline at end of file
+rm -rf *.gmt MapLayers
\ No newline at end of file
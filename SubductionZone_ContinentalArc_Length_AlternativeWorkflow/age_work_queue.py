@@ -0,0 +1,434 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import os.path
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+
+# Queue directory layout. A task is one JSON file that moves between the state directories with os.rename,
+# which is atomic on a shared filesystem, so no lock server or broker is needed.
+TASK_STATES = ['pending', 'running', 'done', 'failed']
+CONFIG_FILENAME = 'config.json'
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_HEARTBEAT_TIMEOUT = 600 # seconds without a heartbeat before a running task is requeued
+DEFAULT_POLL_INTERVAL = 10 # seconds between claims while other workers still hold tasks
+
+
+###################### Queue layout #####################
+
+
+def state_directory(queue_directory, state):
+    return os.path.join(queue_directory, state)
+
+
+def task_name(age):
+    return 'age_{0:g}'.format(age)
+
+
+def read_config(queue_directory):
+    with open(os.path.join(queue_directory, CONFIG_FILENAME), 'r') as config_file:
+        return json.load(config_file)
+
+
+def read_task(filename):
+    with open(filename, 'r') as task_file:
+        return json.load(task_file)
+
+
+# Replaces the task file in place (write to a temporary file, then rename over it)
+def write_task(filename, task):
+    temporary_filename = '{0}.tmp.{1}'.format(filename, uuid.uuid4().hex)
+    with open(temporary_filename, 'w') as task_file:
+        json.dump(task, task_file)
+    os.replace(temporary_filename, filename)
+
+
+# Current time as seen by the shared filesystem. Heartbeats are file modification times, so they are compared
+# against the filesystem clock rather than the clock of this node (nodes' clocks may differ).
+def filesystem_now(queue_directory):
+    clock_filename = os.path.join(queue_directory, 'clock.{0}.{1}'.format(socket.gethostname(), os.getpid()))
+    with open(clock_filename, 'w'):
+        pass
+    now = os.path.getmtime(clock_filename)
+    os.remove(clock_filename)
+    return now
+
+
+# Replaces the '{age}', '{root}' and '{scratch}' placeholders of a stage command or collect pattern.
+# Plain replacement, so commands can still contain braces (e.g. awk programs).
+def substitute(template, age, root_directory, scratch_directory):
+    return template.replace('{age}', '{0:g}'.format(age)).replace(
+            '{root}', root_directory).replace('{scratch}', scratch_directory)
+
+
+###################### Initialise #####################
+
+
+# Creates the queue directory, its configuration and one pending task per age.
+# 'stages' is a list of (name, command) run in order for each age.
+def initialise_queue(queue_directory, ages, stages, collect_patterns, output_directory, root_directory,
+        max_attempts, heartbeat_timeout, reset=False):
+
+    if os.path.exists(queue_directory):
+        if not reset:
+            raise ValueError('Queue directory {0} already exists (use --reset to replace it)'.format(queue_directory))
+        shutil.rmtree(queue_directory)
+
+    for state in TASK_STATES:
+        os.makedirs(state_directory(queue_directory, state))
+    for directory in ('markers', 'logs', 'scratch'):
+        os.makedirs(os.path.join(queue_directory, directory))
+
+    config = {
+        'stages': [[name, command] for name, command in stages],
+        'collect': list(collect_patterns),
+        'output_directory': os.path.abspath(output_directory),
+        'root_directory': os.path.abspath(root_directory),
+        'max_attempts': max_attempts,
+        'heartbeat_timeout': heartbeat_timeout}
+    with open(os.path.join(queue_directory, CONFIG_FILENAME), 'w') as config_file:
+        json.dump(config, config_file, indent=4)
+
+    for age in ages:
+        task = {'age': age, 'attempts': 0, 'worker': None, 'error': None}
+        write_task(os.path.join(state_directory(queue_directory, 'pending'), task_name(age) + '.json'), task)
+
+
+###################### Claim and requeue #####################
+
+
+# Claims a pending task by renaming it into the running directory under a name unique to this claim, which
+# also records the claim time (filesystem clock). Only one worker can win the rename. The renamed file keeps the
+# modification time it got when the task was written, so the claim time in the name (set by the same rename)
+# is what stops a concurrent requeue from seeing the new claim as stale. Returns the running filename, or None
+# if no task is pending.
+def claim_task(queue_directory, worker_id):
+    claim_time = filesystem_now(queue_directory)
+    pending_directory = state_directory(queue_directory, 'pending')
+    for pending_filename in sorted(glob.glob(os.path.join(pending_directory, '*.json'))):
+        name = os.path.basename(pending_filename)[:-len('.json')]
+        running_filename = os.path.join(
+                state_directory(queue_directory, 'running'), '{0}@{1}@{2:.3f}'.format(name, uuid.uuid4().hex, claim_time))
+        try:
+            os.rename(pending_filename, running_filename)
+        except OSError:
+            # Another worker claimed it first
+            continue
+
+        # The worker is recorded in place: replacing the file (as write_task does) would recreate the running
+        # file if the task had been requeued in the meantime, and the age would then run twice
+        try:
+            os.utime(running_filename, None)
+            with open(running_filename, 'r+') as task_file:
+                task = json.load(task_file)
+                task['worker'] = worker_id
+                task_file.seek(0)
+                json.dump(task, task_file)
+                task_file.truncate()
+        except OSError:
+            # Requeued in the meantime
+            continue
+        return running_filename
+
+    return None
+
+
+# Claim time (filesystem clock) recorded in the name of a running task file, or None for an older name
+def claim_time(running_filename):
+    parts = os.path.basename(running_filename).split('@')
+    try:
+        return float(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+# Moves a running task into 'state' (its plain name). Returns False if this claim no longer owns the task
+# (it went stale and was requeued). Ownership is taken first, by renaming the running file of this claim to
+# a temporary name in the state directory, which fails once a requeue has moved it away. Writing the task
+# before that would recreate the running file of a requeued claim and release the task a second time.
+def release_task(queue_directory, running_filename, task, state):
+    name = os.path.basename(running_filename).split('@')[0]
+    state_filename = os.path.join(state_directory(queue_directory, state), name + '.json')
+    releasing_filename = '{0}.tmp.{1}'.format(state_filename, uuid.uuid4().hex)
+    try:
+        os.rename(running_filename, releasing_filename)
+    except OSError:
+        return False
+    write_task(releasing_filename, task)
+    os.rename(releasing_filename, state_filename)
+    return True
+
+
+# Puts running tasks whose last heartbeat (or claim, if later) is older than the timeout back into pending, or
+# into failed once they have used up their attempts. Any worker may do this, and a rename race leaves only one
+# winner. 'now' defaults to the current filesystem time.
+def requeue_stale_tasks(queue_directory, heartbeat_timeout, max_attempts, now=None):
+    if now is None:
+        now = filesystem_now(queue_directory)
+    for running_filename in glob.glob(os.path.join(state_directory(queue_directory, 'running'), '*@*')):
+        if '.tmp.' in running_filename:
+            continue
+        try:
+            last_alive = max(os.path.getmtime(running_filename), claim_time(running_filename) or 0.0)
+            if now - last_alive <= heartbeat_timeout:
+                continue
+            task = read_task(running_filename)
+        except (OSError, ValueError):
+            continue
+
+        task['attempts'] += 1
+        task['error'] = 'no heartbeat from worker {0} for {1} seconds'.format(task['worker'], heartbeat_timeout)
+        state = 'failed' if task['attempts'] >= max_attempts else 'pending'
+        if release_task(queue_directory, running_filename, task, state):
+            print('Requeued stale task {0} ({1})'.format(task_name(task['age']), state))
+
+
+###################### Heartbeat #####################
+
+
+# Touches the running task file every 'interval' seconds from a background thread while a task runs
+class Heartbeat(object):
+
+    def __init__(self, running_filename, interval):
+        self.running_filename = running_filename
+        self.interval = interval
+        self.lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.running_filename, None)
+            except OSError:
+                # The task was requeued by another worker
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+###################### Work #####################
+
+
+# Runs the stages of one task in its scratch directory, skipping stages already marked done by an earlier
+# attempt, then moves the collected results to the output directory. Raises RuntimeError on a failed stage.
+def run_task(queue_directory, config, age):
+
+    name = task_name(age)
+    root_directory = config['root_directory']
+    scratch_directory = os.path.join(queue_directory, 'scratch', name)
+    marker_directory = os.path.join(queue_directory, 'markers', name)
+    for directory in (scratch_directory, marker_directory, config['output_directory']):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    with open(os.path.join(queue_directory, 'logs', name + '.log'), 'a') as log_file:
+        for stage_name, command in config['stages']:
+            marker_filename = os.path.join(marker_directory, stage_name + '.done')
+            if os.path.exists(marker_filename):
+                continue
+
+            command = substitute(command, age, root_directory, scratch_directory)
+            log_file.write('### {0} {1} on {2}: {3}\n'.format(time.ctime(), stage_name, socket.gethostname(), command))
+            log_file.flush()
+            return_code = subprocess.call(command, shell=True, cwd=scratch_directory,
+                    stdout=log_file, stderr=subprocess.STDOUT)
+            if return_code != 0:
+                raise RuntimeError('stage {0} exited with code {1}'.format(stage_name, return_code))
+
+            with open(marker_filename, 'w'):
+                pass
+
+        for pattern in config['collect']:
+            for filename in glob.glob(os.path.join(scratch_directory, substitute(pattern, age, root_directory, scratch_directory))):
+                shutil.move(filename, os.path.join(config['output_directory'], os.path.basename(filename)))
+
+    shutil.rmtree(scratch_directory, ignore_errors=True)
+
+
+# Claims and runs tasks until no task is pending or running
+def work(queue_directory, poll_interval):
+
+    config = read_config(queue_directory)
+    worker_id = '{0}:{1}'.format(socket.gethostname(), os.getpid())
+    heartbeat_interval = max(1.0, config['heartbeat_timeout'] / 4.0)
+
+    while True:
+        requeue_stale_tasks(queue_directory, config['heartbeat_timeout'], config['max_attempts'])
+
+        running_filename = claim_task(queue_directory, worker_id)
+        if running_filename is None:
+            if not glob.glob(os.path.join(state_directory(queue_directory, 'running'), '*@*')):
+                return
+            time.sleep(poll_interval)
+            continue
+
+        task = read_task(running_filename)
+        print('Worker {0} running {1}'.format(worker_id, task_name(task['age'])))
+
+        heartbeat = Heartbeat(running_filename, heartbeat_interval)
+        try:
+            run_task(queue_directory, config, task['age'])
+            task['error'] = None
+            state = 'done'
+        except Exception as error:
+            task['attempts'] += 1
+            task['error'] = str(error)
+            state = 'failed' if task['attempts'] >= config['max_attempts'] else 'pending'
+        finally:
+            heartbeat.stop()
+
+        if heartbeat.lost or not release_task(queue_directory, running_filename, task, state):
+            print('Worker {0} lost {1} to a requeue'.format(worker_id, task_name(task['age'])))
+        elif state != 'done':
+            print('Worker {0}: {1} failed ({2}), moved to {3}'.format(
+                    worker_id, task_name(task['age']), task['error'], state), file=sys.stderr)
+
+
+def work_worker(args):
+    work(*args)
+
+
+###################### Status #####################
+
+
+def print_status(queue_directory):
+    for state in TASK_STATES:
+        filenames = [filename for filename in glob.glob(os.path.join(state_directory(queue_directory, state), '*'))
+                if '.tmp.' not in filename]
+        print('{0}: {1}'.format(state, len(filenames)))
+        if state in ('running', 'failed'):
+            for filename in sorted(filenames):
+                task = read_task(filename)
+                print('    {0} worker={1} attempts={2} error={3}'.format(
+                        task_name(task['age']), task['worker'], task['attempts'], task['error']))
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Work queue of per-age tasks on a shared filesystem. Any number of workers, on one node or several
+    nodes sharing the queue directory, claim ages and run the configured stages for each of them.
+    Running tasks send heartbeats; tasks without a heartbeat are requeued, failed tasks are retried up to
+    a maximum number of attempts, and stages already done are not run again. Results matching the collect
+    patterns are moved to one output directory.
+
+    Stage commands run in a per-task scratch directory, with '{age}' replaced by the age, '{root}' by the
+    root directory (where the inputs are) and '{scratch}' by the scratch directory.
+
+    For example...
+
+    python %(prog)s init -q WorkQueue -a 0 250 -o ContinentalGrids \\
+        --stage reconstruct "python {root}/reconstruct_features_v2.py -r {root}/rotations.rot -m {root}/cobs.gpml -t {age} -e xy -- cobs" \\
+        --stage grid "gmt grdmask reconstructed_cobs_{age}.0Ma.xy -Rd -I0.1d -NNaN/1/1 -fg -Gcontinental_grid_{age}.nc" \\
+        --collect "continental_grid_{age}.nc"
+    python %(prog)s work -q WorkQueue -n 8        (on each node)
+    python %(prog)s status -q WorkQueue"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+
+    init_parser = subparsers.add_parser('init', help='Create the queue and one task per age.')
+    init_parser.add_argument('-q', '--queue', type=str, required=True,
+            help='Queue directory (on a filesystem shared by all nodes).')
+    init_parser.add_argument('-a', '--ages', type=int, nargs=2, metavar=('MIN_AGE', 'MAX_AGE'),
+            help='Range of ages (inclusive, 1 Myr step).')
+    init_parser.add_argument('-t', '--times', type=float, nargs='+',
+            help='Explicit list of ages (instead of a range).')
+    init_parser.add_argument('--stage', type=str, nargs=2, action='append', required=True,
+            metavar=('NAME', 'COMMAND'), dest='stages',
+            help='A stage name and its command. Repeat for several stages, run in the given order.')
+    init_parser.add_argument('--collect', type=str, nargs='+', default=[],
+            metavar='PATTERN', help='Glob patterns of the result files to move to the output directory.')
+    init_parser.add_argument('-o', '--output_directory', type=str, required=True,
+            help='Shared output directory of the collected results.')
+    init_parser.add_argument('--root', type=str, default=os.getcwd(),
+            dest='root_directory',
+            help='Root directory substituted for {root}. Defaults to the current directory.')
+    init_parser.add_argument('--max_attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+            help='Number of attempts before a task is failed. Defaults to {0}.'.format(DEFAULT_MAX_ATTEMPTS))
+    init_parser.add_argument('--heartbeat_timeout', type=float, default=DEFAULT_HEARTBEAT_TIMEOUT,
+            help='Seconds without a heartbeat before a running task is requeued. Defaults to {0}.'.format(
+                DEFAULT_HEARTBEAT_TIMEOUT))
+    init_parser.add_argument('--reset', action='store_true',
+            help='Replace an existing queue directory.')
+
+    work_parser = subparsers.add_parser('work', help='Run workers until the queue is drained.')
+    work_parser.add_argument('-q', '--queue', type=str, required=True,
+            help='Queue directory.')
+    work_parser.add_argument('-n', '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes on this node. Defaults to the number of CPUs.')
+    work_parser.add_argument('--poll_interval', type=float, default=DEFAULT_POLL_INTERVAL,
+            help='Seconds between claims while other workers still hold tasks. Defaults to {0}.'.format(
+                DEFAULT_POLL_INTERVAL))
+
+    status_parser = subparsers.add_parser('status', help='Print the number of tasks in each state.')
+    status_parser.add_argument('-q', '--queue', type=str, required=True,
+            help='Queue directory.')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        if args.times:
+            ages = args.times
+        elif args.ages:
+            ages = list(range(args.ages[0], args.ages[1] + 1))
+        else:
+            parser.error('init requires --ages or --times')
+        try:
+            initialise_queue(args.queue, ages, args.stages, args.collect, args.output_directory, args.root_directory,
+                    args.max_attempts, args.heartbeat_timeout, args.reset)
+        except ValueError as error:
+            print('{0}: Error - {1}'.format(os.path.basename(__file__), error), file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == 'work':
+        if args.processes > 1:
+            pool = multiprocessing.Pool(args.processes)
+            pool.map(work_worker, [(args.queue, args.poll_interval)] * args.processes)
+            pool.close()
+            pool.join()
+        else:
+            work(args.queue, args.poll_interval)
+        print_status(args.queue)
+
+    elif args.command == 'status':
+        print_status(args.queue)
+
+    else:
+        parser.print_help()
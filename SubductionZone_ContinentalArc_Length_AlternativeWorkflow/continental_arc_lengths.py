@@ -0,0 +1,192 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import os
+import os.path
+import sys
+import numpy as np
+
+import mask_stack
+import spherical_tools
+
+
+###################### Cross-profiles #####################
+
+
+# Builds one-sided cross-profiles along a subduction zone polyline, equivalent to the 'whiskers' kept from
+# 'gmt grdtrack -C' output in STEP2 (the left side has negative distances, as in GMT).
+# Profiles are placed every 'prof_spacing' kms and sampled every 'prof_interval' kms out to 'half_length'
+# kms on the 'left' or 'right' side of the polyline (relative to its digitisation direction).
+# Returns the profile origins and the longitudes, latitudes, distances and azimuths of their samples as
+# (number of profiles, samples per profile) arrays.
+def cross_profiles(lons, lats, prof_spacing, prof_interval, half_length, side):
+    origin_lons, origin_lats, azimuths = spherical_tools.sample_polyline(lons, lats, prof_spacing)
+    distances = np.arange(0.0, half_length + 1e-9, prof_interval)
+    profile_azimuths = azimuths - 90.0 if side == 'left' else azimuths + 90.0
+
+    profile_lons, profile_lats = spherical_tools.destination(
+        origin_lons[:, np.newaxis], origin_lats[:, np.newaxis], profile_azimuths[:, np.newaxis],
+        distances[np.newaxis, :])
+    profile_distances = np.broadcast_to(-distances if side == 'left' else distances, profile_lons.shape)
+    return origin_lons, origin_lats, profile_lons, profile_lats, profile_distances, \
+        np.broadcast_to(profile_azimuths[:, np.newaxis] % 360.0, profile_lons.shape)
+
+
+# Cross-profiles of every polyline of a file, concatenated
+def file_cross_profiles(filename, prof_spacing, prof_interval, half_length, side):
+    profiles = [cross_profiles(lons, lats, prof_spacing, prof_interval, half_length, side)
+            for lons, lats in (spherical_tools.read_gmt_segments(filename) if os.path.exists(filename) else [])]
+    samples = len(np.arange(0.0, half_length + 1e-9, prof_interval))
+    if not profiles:
+        return tuple([np.zeros(0)] * 2 + [np.zeros((0, samples))] * 4)
+    return tuple(np.concatenate(arrays) for arrays in zip(*profiles))
+
+
+###################### Map layers #####################
+
+
+# Writes the cross-profiles as the 'halfxprofiles' files of STEP2 (longitude, latitude, distance, azimuth and
+# mask value), only the mask samples for the '_continent' file, and the profile origins intersecting the mask
+# for the '_SZcontinent' file
+def write_profile_layers(filename_prefix, origin_lons, origin_lats, profile_lons, profile_lats, distances, azimuths,
+        values, hits):
+    with open(filename_prefix + '.gmt', 'w') as all_file, open(filename_prefix + '_continent.gmt', 'w') as continent_file:
+        for index in range(len(origin_lons)):
+            header = '> Cross profile number -L{0} at {1:.6f}/{2:.6f}\n'.format(index, origin_lons[index], origin_lats[index])
+            rows = ['{0:.6f}\t{1:.6f}\t{2:g}\t{3:.6f}\t{4:g}\n'.format(*row) for row in zip(
+                    profile_lons[index], profile_lats[index], distances[index], azimuths[index], values[index])]
+            all_file.write(header)
+            all_file.writelines(rows)
+            if hits[index].any():
+                continent_file.write(header)
+                continent_file.writelines(row for row, hit in zip(rows, hits[index]) if hit)
+
+    with open(filename_prefix + '_SZcontinent.gmt', 'w') as origin_file:
+        for lon, lat in zip(origin_lons[hits.any(axis=1)], origin_lats[hits.any(axis=1)]):
+            origin_file.write('{0:.6f} {1:.6f}\n'.format(lon, lat))
+
+
+###################### Lengths of one age #####################
+
+
+# Total subduction zone length (kms), and the portion and length of it whose cross-profiles (on the overriding
+# side) intersect the continental mask of the age, sampled straight from the mask stack (nearest node, as
+# 'gmt grdtrack -nn'). The portion is the number of intersecting profiles over the number of profiles, as in
+# STEP2. Writes the map layers of the age when 'layer_prefix' is given.
+def continental_arc_lengths(stack, age, subduction_filename, left_filename, right_filename, prof_spacing, prof_interval,
+        half_length, layer_prefix=None):
+
+    subduction_length_total = sum(spherical_tools.polyline_length(lons, lats)
+            for lons, lats in (spherical_tools.read_gmt_segments(subduction_filename) if os.path.exists(subduction_filename) else []))
+
+    number_of_profiles = 0
+    number_of_continental_profiles = 0
+    for filename, side, layer_name in ((left_filename, 'left', 'L'), (right_filename, 'right', 'R')):
+        origin_lons, origin_lats, profile_lons, profile_lats, distances, azimuths = file_cross_profiles(
+                filename, prof_spacing, prof_interval, half_length, side)
+        values = stack.sample(age, profile_lons.ravel(), profile_lats.ravel()).reshape(profile_lons.shape)
+        hits = values == 1
+        number_of_profiles += len(origin_lons)
+        number_of_continental_profiles += int(np.count_nonzero(hits.any(axis=1)))
+        if layer_prefix:
+            write_profile_layers('{0}_{1}_halfxprofiles'.format(layer_prefix, layer_name), origin_lons, origin_lats,
+                    profile_lons, profile_lats, distances, azimuths, values, hits)
+
+    continental_arc_portion = number_of_continental_profiles / number_of_profiles if number_of_profiles else 0.0
+    return subduction_length_total, continental_arc_portion, int(continental_arc_portion * subduction_length_total)
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Measure the continental arc length of STEP2 for many ages, sampling the continental masks straight from the
+    mask stack of STEP1 (no netCDF grid is extracted and 'gmt grdtrack' is not run). The cross-profiles are
+    generated in Python like the one-sided 'whiskers' STEP2 keeps from 'gmt grdtrack -C', so the counts can differ
+    from GMT's by the odd profile at the end of a subduction zone.
+
+    The lines 'age value' are appended to the total length, portion and length tables, as STEP2 does. With
+    --layers the cross-profile files used for the maps are written for every age.
+
+    For example...
+
+    python %(prog)s -s ContinentalGrids/continental_grids.npz -t $(seq 0 250) -p 281 --prof_spacing 50 --prof_interval 20 \\
+        --layers "MapLayers/281km/{age}/281km_feature" """
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-s', '--stack_filename', type=str, required=True,
+            help='Mask stack of the continental grids (see mask_stack.py).')
+    parser.add_argument('-t', '--ages', type=float, nargs='+', required=True,
+            metavar='age', help='Ages to measure.')
+    parser.add_argument('-p', '--profile_length', type=float, required=True,
+            help='Distance (kms) from the trench into the overriding plate.')
+    parser.add_argument('--prof_spacing', type=float, default=50.0,
+            help='Spacing (kms) of the cross-profiles. Defaults to 50.')
+    parser.add_argument('--prof_interval', type=float, default=20.0,
+            help='Spacing (kms) of the points along the cross-profiles. Defaults to 20.')
+    parser.add_argument('--subduction', type=str, default='GPlates_Export/topology_subduction_boundaries_{age}.00Ma.gmt',
+            help="Subduction zones of an age ('{age}' is replaced by the age).")
+    parser.add_argument('--subduction_left', type=str, default='GPlates_Export/topology_subduction_boundaries_sL_{age}.00Ma.gmt',
+            help='Left polarity subduction zones of an age.')
+    parser.add_argument('--subduction_right', type=str, default='GPlates_Export/topology_subduction_boundaries_sR_{age}.00Ma.gmt',
+            help='Right polarity subduction zones of an age.')
+    parser.add_argument('--layers', type=str,
+            help="Prefix of the cross-profile map layers of an age ('{age}' is replaced by the age).")
+    parser.add_argument('--total_length_filename', type=str, default='total_sz_length.txt')
+    parser.add_argument('--portion_filename', type=str,
+            help='Defaults to continental_arc_portion_<profile length>km.txt.')
+    parser.add_argument('--length_filename', type=str,
+            help='Defaults to continental_arc_length_<profile length>km.txt.')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    scenario = '{0:g}'.format(args.profile_length)
+    portion_filename = args.portion_filename or 'continental_arc_portion_{0}km.txt'.format(scenario)
+    length_filename = args.length_filename or 'continental_arc_length_{0}km.txt'.format(scenario)
+
+    with mask_stack.MaskStack(args.stack_filename) as stack:
+        for age in args.ages:
+            if not stack.has_time(age):
+                print('{0}: Warning - no continental mask for {1:g} Ma in {2}, skipping'.format(
+                        os.path.basename(__file__), age, args.stack_filename), file=sys.stderr)
+                continue
+
+            layer_prefix = None
+            if args.layers:
+                layer_prefix = args.layers.format(age='{0:g}'.format(age))
+                if os.path.dirname(layer_prefix):
+                    os.makedirs(os.path.dirname(layer_prefix), exist_ok=True)
+
+            subduction_length_total, continental_arc_portion, continental_arc_length = continental_arc_lengths(
+                    stack, age, args.subduction.format(age='{0:g}'.format(age)),
+                    args.subduction_left.format(age='{0:g}'.format(age)), args.subduction_right.format(age='{0:g}'.format(age)),
+                    args.prof_spacing, args.prof_interval, args.profile_length, layer_prefix)
+
+            with open(args.total_length_filename, 'a') as total_file:
+                total_file.write('{0:g} {1:g}\n'.format(age, subduction_length_total))
+            with open(portion_filename, 'a') as portion_file:
+                portion_file.write('{0:g} {1:.20f}\n'.format(age, continental_arc_portion))
+            with open(length_filename, 'a') as length_file:
+                length_file.write('{0:g} {1}\n'.format(age, continental_arc_length))
+
+            print('Continental arc length at {0:g} Ma is {1} km and is {2:.4f} of global subduction length {3:g} km.'.format(
+                    age, continental_arc_length, continental_arc_portion, subduction_length_total))
@@ -0,0 +1,413 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import io
+import json
+import os
+import os.path
+import re
+import sys
+import zipfile
+import numpy as np
+import netCDF4
+
+
+# Mask grids are matched on the age that ends their name, e.g. 'continental_grid_110.nc'
+DEFAULT_GRID_FILENAME_PATTERN = r'(?P<time>\d+(?:\.\d+)?)(?:Ma)?\.(?:nc|grd)$'
+DEFAULT_KEYFRAME_INTERVAL = 10
+INFO_MEMBER = 'info.json'
+FORMAT_VERSION = 1
+
+
+###################### Mask grids #####################
+
+
+# Returns the names of the longitude, latitude and value variables of a netCDF grid (COARDS or GMT style)
+def find_grid_variables(dataset):
+    variable_names = list(dataset.variables)
+    lon_name = next(name for name in variable_names if name.lower() in ('lon', 'longitude', 'x'))
+    lat_name = next(name for name in variable_names if name.lower() in ('lat', 'latitude', 'y'))
+    z_name = next(name for name in variable_names if len(dataset.variables[name].dimensions) == 2)
+    return lon_name, lat_name, z_name
+
+
+# Reads a mask grid (e.g. 'gmt grdmask -N0/1/1' or '-NNaN/1/1') as longitudes, latitudes, the boolean mask of the
+# nodes inside (finite and non-zero), the value of the nodes outside (NaN or 0) and the netCDF attributes
+def read_mask_grid(filename):
+    with netCDF4.Dataset(filename, 'r') as dataset:
+        lon_name, lat_name, z_name = find_grid_variables(dataset)
+        values = np.ma.filled(np.ma.asarray(dataset.variables[z_name][:], dtype=float), np.nan)
+        attributes = {
+            'names': [lon_name, lat_name, z_name],
+            'global': dict((name, attribute_value(dataset.getncattr(name))) for name in dataset.ncattrs()),
+            'variables': dict((name, dict((attribute, attribute_value(dataset.variables[name].getncattr(attribute)))
+                    for attribute in dataset.variables[name].ncattrs() if attribute != '_FillValue'))
+                for name in (lon_name, lat_name, z_name))}
+        return (np.asarray(dataset.variables[lon_name][:], dtype=float), np.asarray(dataset.variables[lat_name][:], dtype=float),
+                np.isfinite(values) & (values != 0), np.nan if np.isnan(values).any() else 0.0, attributes)
+
+
+# netCDF attributes as JSON values
+def attribute_value(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# Writes a mask as a netCDF grid that GMT reads like the original (same variable names and attributes)
+def write_mask_grid(filename, lons, lats, values, attributes):
+    lon_name, lat_name, z_name = attributes['names']
+    with netCDF4.Dataset(filename, 'w') as dataset:
+        dataset.setncatts(attributes['global'])
+        dataset.createDimension(lon_name, len(lons))
+        dataset.createDimension(lat_name, len(lats))
+        for name, coordinates in ((lon_name, lons), (lat_name, lats)):
+            variable = dataset.createVariable(name, 'f8', (name,))
+            variable.setncatts(attributes['variables'].get(name, {}))
+            variable[:] = coordinates
+        variable = dataset.createVariable(z_name, 'f4', (lat_name, lon_name), fill_value=np.float32(np.nan), zlib=True)
+        variable.setncatts(dict((attribute, value) for attribute, value in attributes['variables'].get(z_name, {}).items()
+                if attribute != 'actual_range'))
+        variable[:] = values
+
+
+# Finds the mask grids of a list of filenames and returns a dictionary mapping each grid's age to its path
+def grid_filenames_by_time(filenames, pattern=DEFAULT_GRID_FILENAME_PATTERN):
+    regex = re.compile(pattern)
+    grid_files = {}
+    for filename in filenames:
+        match = regex.search(os.path.basename(filename))
+        if not match:
+            raise ValueError('No age in mask grid filename {0}'.format(filename))
+        grid_files[float(match.group('time'))] = filename
+    return grid_files
+
+
+###################### Delta encoding #####################
+
+
+# Run lengths of the XOR of two flattened masks: the lengths of the alternating runs of unchanged and changed
+# cells (starting with an unchanged run), in the smallest unsigned type that holds them. Adjacent ages differ
+# in a thin band of cells, so a delta is a few runs per changed coastline crossing.
+def encode_delta(previous_mask, mask):
+    changed = np.logical_xor(previous_mask, mask)
+    toggles = np.flatnonzero(np.diff(np.concatenate(([False], changed, [False])).astype(np.int8)))
+    run_lengths = np.diff(np.concatenate(([0], toggles)))
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if run_lengths.size == 0 or run_lengths.max() <= np.iinfo(dtype).max:
+            return run_lengths.astype(dtype)
+
+
+def apply_delta(previous_mask, run_lengths):
+    toggles = np.cumsum(run_lengths.astype(np.int64))
+    # The last toggle can be one past the last cell (a changed run ending the grid)
+    flips = np.zeros(previous_mask.size + 1, dtype=bool)
+    flips[toggles] = True
+    return np.logical_xor(previous_mask, np.logical_xor.accumulate(flips)[:previous_mask.size])
+
+
+def encode_keyframe(mask):
+    return np.packbits(mask)
+
+
+def decode_keyframe(packed, size):
+    return np.unpackbits(packed, count=size).astype(bool)
+
+
+###################### Mask stacks #####################
+
+
+# Writes a mask stack, one age at a time (sequentially, in any order of ages), holding only the previous mask.
+# The stack is a zip archive (readable with numpy.load) of a bit-packed keyframe every 'keyframe_interval' ages
+# and the run-length XOR deltas between them, all deflated.
+class MaskStackWriter(object):
+
+    def __init__(self, filename, lons, lats, outside_value, attributes, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.filename = filename
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+        self.outside_value = outside_value
+        self.attributes = attributes
+        self.keyframe_interval = keyframe_interval
+        self.times = []
+        self.previous_mask = None
+        # Written under a temporary name and renamed when closed, so a stack is never left half written
+        self.temporary_filename = '{0}.tmp'.format(filename)
+        self.archive = zipfile.ZipFile(self.temporary_filename, 'w', zipfile.ZIP_DEFLATED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            self.archive.close()
+            os.remove(self.temporary_filename)
+
+    def write_array(self, name, array):
+        with self.archive.open('{0}.npy'.format(name), 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, np.asarray(array), allow_pickle=False)
+
+    def append(self, time, mask):
+        mask = np.asarray(mask, dtype=bool).ravel()
+        if mask.size != self.lons.size * self.lats.size:
+            raise ValueError('Mask of {0} Ma has {1} nodes, the stack {2}'.format(time, mask.size, self.lons.size * self.lats.size))
+
+        index = len(self.times)
+        if index % self.keyframe_interval == 0:
+            self.write_array('key_{0}'.format(index), encode_keyframe(mask))
+        else:
+            self.write_array('delta_{0}'.format(index), encode_delta(self.previous_mask, mask))
+        self.times.append(float(time))
+        self.previous_mask = mask
+
+    def close(self):
+        self.write_array('lons', self.lons)
+        self.write_array('lats', self.lats)
+        self.write_array('times', np.array(self.times))
+        info = {
+            'version': FORMAT_VERSION,
+            'keyframe_interval': self.keyframe_interval,
+            'outside_value': None if np.isnan(self.outside_value) else self.outside_value,
+            'attributes': self.attributes}
+        self.archive.writestr(INFO_MEMBER, json.dumps(info))
+        self.archive.close()
+        os.replace(self.temporary_filename, self.filename)
+
+
+def is_mask_stack(filename):
+    if not zipfile.is_zipfile(filename):
+        return False
+    with zipfile.ZipFile(filename) as archive:
+        return INFO_MEMBER in archive.namelist()
+
+
+# Random access (and streaming) reads of a mask stack. The last decoded mask is kept, so reading the ages in
+# order only applies one delta per age, and any other age decodes its keyframe and at most
+# 'keyframe_interval - 1' deltas.
+class MaskStack(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.archive = zipfile.ZipFile(filename)
+        info = json.loads(self.archive.read(INFO_MEMBER).decode('utf-8'))
+        if info['version'] > FORMAT_VERSION:
+            raise ValueError('{0}: mask stack version {1} is not supported'.format(filename, info['version']))
+        self.keyframe_interval = info['keyframe_interval']
+        self.outside_value = np.nan if info['outside_value'] is None else info['outside_value']
+        self.attributes = info['attributes']
+        self.lons = self.read_array('lons')
+        self.lats = self.read_array('lats')
+        self.times = [float(time) for time in self.read_array('times')]
+        self.time_indices = dict((time, index) for index, time in enumerate(self.times))
+        self.current_index = None
+        self.current_mask = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+
+    def read_array(self, name):
+        return np.lib.format.read_array(io.BytesIO(self.archive.read('{0}.npy'.format(name))), allow_pickle=False)
+
+    @property
+    def shape(self):
+        return (self.lats.size, self.lons.size)
+
+    def has_time(self, time):
+        return float(time) in self.time_indices
+
+    # The boolean mask (lat, lon) of an age
+    def mask(self, time):
+        try:
+            index = self.time_indices[float(time)]
+        except KeyError:
+            raise ValueError('{0}: no mask for {1} Ma'.format(self.filename, time))
+
+        keyframe_index = index - index % self.keyframe_interval
+        if self.current_index is None or not keyframe_index <= self.current_index <= index:
+            self.current_index = keyframe_index
+            self.current_mask = decode_keyframe(self.read_array('key_{0}'.format(keyframe_index)), self.lons.size * self.lats.size)
+        while self.current_index < index:
+            self.current_index += 1
+            self.current_mask = apply_delta(self.current_mask, self.read_array('delta_{0}'.format(self.current_index)))
+        return self.current_mask.reshape(self.shape)
+
+    # The grid values of an age (1 inside, and NaN or 0 outside as in the original grids)
+    def grid(self, time):
+        return np.where(self.mask(time), 1.0, self.outside_value)
+
+    # Iterates over (age, mask) in the order of the stack, or of 'times'
+    def iterate(self, times=None):
+        for time in (self.times if times is None else times):
+            yield time, self.mask(time)
+
+    # Nearest node values of an age at points (as 'gmt grdtrack -nn'), NaN outside the grid
+    def sample(self, time, lons, lats):
+        values = self.grid(time)
+        lon_step = (self.lons[-1] - self.lons[0]) / (self.lons.size - 1)
+        lat_step = (self.lats[-1] - self.lats[0]) / (self.lats.size - 1)
+        columns = np.round((np.asarray(lons, dtype=float) - self.lons[0]) / lon_step).astype(np.int64)
+        # Global grids wrap in longitude
+        columns = np.where((columns < 0) | (columns >= self.lons.size), columns % int(round(360.0 / abs(lon_step))), columns)
+        rows = np.round((np.asarray(lats, dtype=float) - self.lats[0]) / lat_step).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.lats.size) & (columns >= 0) & (columns < self.lons.size)
+        samples = np.full(rows.shape, np.nan)
+        samples[inside] = values[rows[inside], columns[inside]]
+        return samples
+
+
+# Builds a stack from mask grids, taking the ages not in 'grid_files' from a 'base' stack (e.g. when only some
+# ages were regenerated). The grids are read one at a time.
+def build_mask_stack(filename, grid_files, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, base_filename=None):
+    base = MaskStack(base_filename) if base_filename and os.path.exists(base_filename) else None
+    times = sorted(set(grid_files) | set(base.times if base else []))
+    if not times:
+        raise ValueError('No mask grids to build {0} from'.format(filename))
+
+    writer = None
+    try:
+        for time in times:
+            if time in grid_files:
+                lons, lats, mask, outside_value, attributes = read_mask_grid(grid_files[time])
+            else:
+                lons, lats, mask, outside_value, attributes = base.lons, base.lats, base.mask(time), base.outside_value, base.attributes
+            if writer is None:
+                writer = MaskStackWriter(filename, lons, lats, outside_value, attributes, keyframe_interval)
+            elif lons.size != writer.lons.size or lats.size != writer.lats.size:
+                raise ValueError('Mask of {0} Ma is {1}x{2} nodes, the stack {3}x{4}'.format(
+                        time, lats.size, lons.size, writer.lats.size, writer.lons.size))
+            writer.append(time, mask)
+    except Exception:
+        if writer is not None:
+            writer.archive.close()
+            os.remove(writer.temporary_filename)
+        raise
+    finally:
+        if base is not None:
+            base.close()
+    writer.close()
+    return times
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Temporally delta-encoded storage of per-age mask grids (e.g. the continental grids of STEP1, or the
+    carbonate and continent masks of the global mask mode). A stack keeps a bit-packed keyframe every N ages and
+    run-length XOR deltas between them, so a full stack takes one to two orders of magnitude less disk (and read
+    I/O) than its netCDF grids.
+
+    build:   pack mask grids into a stack (with --base, ages not given are kept from an existing stack)
+    extract: write the mask of an age as a netCDF grid (e.g. for 'gmt grdtrack')
+    sample:  append the mask value of an age (nearest node) to the points of a table (GMT segment headers kept)
+    info:    list the ages and sizes of a stack
+
+    For example...
+
+    python %(prog)s build -o ContinentalGrids/continental_grids.npz ContinentalGrids/continental_grid_*.nc --remove
+    python %(prog)s extract ContinentalGrids/continental_grids.npz -t 110 -o continental_grid_110.nc
+    python %(prog)s sample ContinentalGrids/continental_grids.npz -t 110 -i points.xy"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    build_parser = subparsers.add_parser('build', help='Pack mask grids into a stack.')
+    build_parser.add_argument('grid_filenames', type=str, nargs='*', metavar='grid_filename',
+            help='Mask grids, with the age ending their name.')
+    build_parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help='The stack.')
+    build_parser.add_argument('-k', '--keyframe_interval', type=int, default=DEFAULT_KEYFRAME_INTERVAL,
+            help='Number of ages per keyframe. Defaults to {0}.'.format(DEFAULT_KEYFRAME_INTERVAL))
+    build_parser.add_argument('-b', '--base', type=str,
+            help='Existing stack (can be the output) whose ages are kept unless given a grid.')
+    build_parser.add_argument('-p', '--pattern', type=str, default=DEFAULT_GRID_FILENAME_PATTERN,
+            help="Regular expression matching grid filenames, with a named group 'time'.")
+    build_parser.add_argument('--remove', action='store_true',
+            help='Remove the grids once the stack is written.')
+
+    extract_parser = subparsers.add_parser('extract', help='Write the mask of an age as a netCDF grid.')
+    extract_parser.add_argument('stack_filename', type=str)
+    extract_parser.add_argument('-t', '--time', type=float, required=True,
+            help='The age.')
+    extract_parser.add_argument('-o', '--output_filename', type=str, required=True,
+            help='The netCDF grid.')
+
+    sample_parser = subparsers.add_parser('sample', help='Sample the mask of an age at points.')
+    sample_parser.add_argument('stack_filename', type=str)
+    sample_parser.add_argument('-t', '--time', type=float, required=True,
+            help='The age.')
+    sample_parser.add_argument('-i', '--input_filename', type=str,
+            help='Table of points (longitude and latitude first). Defaults to standard input.')
+
+    info_parser = subparsers.add_parser('info', help='List the ages and sizes of a stack.')
+    info_parser.add_argument('stack_filename', type=str)
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        grid_files = grid_filenames_by_time(args.grid_filenames, args.pattern)
+        times = build_mask_stack(args.output_filename, grid_files, args.keyframe_interval, args.base)
+        grid_bytes = sum(os.path.getsize(filename) for filename in grid_files.values())
+        print('Packed {0} ages into {1} ({2:.1f} MB, from {3:.1f} MB of new grids)'.format(
+                len(times), args.output_filename, os.path.getsize(args.output_filename) / 1e6, grid_bytes / 1e6))
+        if args.remove:
+            for filename in grid_files.values():
+                os.remove(filename)
+
+    elif args.command == 'extract':
+        with MaskStack(args.stack_filename) as stack:
+            write_mask_grid(args.output_filename, stack.lons, stack.lats, stack.grid(args.time), stack.attributes)
+
+    elif args.command == 'sample':
+        with MaskStack(args.stack_filename) as stack:
+            input_file = open(args.input_filename, 'r') if args.input_filename else sys.stdin
+            try:
+                lines = [line.rstrip('\n') for line in input_file]
+            finally:
+                if input_file is not sys.stdin:
+                    input_file.close()
+            points = [index for index, line in enumerate(lines) if line.strip() and line.split()[0][0] not in '>#']
+            coordinates = np.array([[float(value) for value in lines[index].split()[:2]] for index in points]).reshape(-1, 2)
+            values = stack.sample(args.time, coordinates[:, 0], coordinates[:, 1])
+            for index, value in zip(points, values):
+                lines[index] = '{0}\t{1:g}'.format(lines[index], value)
+            for line in lines:
+                print(line)
+
+    else:
+        with MaskStack(args.stack_filename) as stack:
+            stored_bytes = dict((member.filename, member.compress_size) for member in stack.archive.infolist())
+            print('{0}: {1} ages, {2}x{3} nodes, keyframe every {4} ages'.format(
+                    args.stack_filename, len(stack.times), stack.lats.size, stack.lons.size, stack.keyframe_interval))
+            for index, time in enumerate(stack.times):
+                name = '{0}_{1}.npy'.format('key' if index % stack.keyframe_interval == 0 else 'delta', index)
+                print('{0:>10g} Ma  {1:<5} {2:>10d} bytes'.format(time, name.split('_')[0], stored_bytes[name]))
@@ -24,6 +24,8 @@ import sys
 import os.path
 import pygplates
 
+import age_profiler
+
 
 DEFAULT_OUTPUT_FILENAME_PREFIX = 'features'
 DEFAULT_OUTPUT_FILENAME_EXTENSION = 'gmt'
@@ -73,6 +75,8 @@ if __name__ == "__main__":
                 "- the default extension is '{0}' - supported extensions include 'shp', 'gmt' and 'xy'."
                 .format(DEFAULT_OUTPUT_FILENAME_EXTENSION))
     
+    age_profiler.add_arguments(parser)
+
     parser.add_argument('output_filename_prefix', type=str, nargs='?',
             default='{0}'.format(DEFAULT_OUTPUT_FILENAME_PREFIX),
             help="The prefix of the output files containing the reconstructed features."
@@ -91,8 +95,12 @@ if __name__ == "__main__":
     features = [pygplates.FeatureCollection(feature_filename)
             for feature_filename in args.feature_filenames]
     
+    profiler = age_profiler.AgeProfiler.from_arguments(args, 'reconstruct')
+
     for reconstruction_time in args.reconstruction_times:
-        reconstruct_features(
+        profiler.run(
+                reconstruction_time,
+                reconstruct_features,
                 rotation_model,
                 features,
                 reconstruction_time,
@@ -0,0 +1,157 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+# Local checks of the work queue: several worker processes draining one queue, a new claim not looking stale
+# (also to a requeue racing the claim), and a stale claim releasing after its task was requeued. Run from this folder's parent with
+#
+#     python -m unittest discover -s tests
+
+
+import glob
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+WORKFLOW_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKFLOW_DIRECTORY)
+
+import age_work_queue
+
+
+AGES = list(range(24))
+NUMBER_OF_WORKERS = 4
+
+
+def task_files(queue_directory, state):
+    return [filename for filename in glob.glob(os.path.join(age_work_queue.state_directory(queue_directory, state), '*'))
+            if '.tmp.' not in filename]
+
+
+class WorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='age_work_queue_test_')
+        self.queue_directory = os.path.join(self.directory, 'WorkQueue')
+        self.output_directory = os.path.join(self.directory, 'Output')
+        self.runs_filename = os.path.join(self.directory, 'runs.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def initialise(self, heartbeat_timeout=age_work_queue.DEFAULT_HEARTBEAT_TIMEOUT):
+        # Each run of a task appends its age to one log (short appends are atomic), then writes its result
+        stages = [
+            ('run', 'echo {age} >> {root}/runs.log && sleep 0.05'),
+            ('result', 'echo {age} > result_{age}.txt')]
+        age_work_queue.initialise_queue(self.queue_directory, AGES, stages, ['result_{age}.txt'], self.output_directory,
+                self.directory, age_work_queue.DEFAULT_MAX_ATTEMPTS, heartbeat_timeout)
+
+    # Worker processes started together on one queue run every age exactly once and leave nothing pending
+    def test_workers_run_every_age_once(self):
+        self.initialise()
+
+        workers = [subprocess.Popen(
+                [sys.executable, os.path.join(WORKFLOW_DIRECTORY, 'age_work_queue.py'), 'work', '-q', self.queue_directory,
+                    '-n', '1', '--poll_interval', '0.1'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+            for worker_index in range(NUMBER_OF_WORKERS)]
+        for worker in workers:
+            stderr = worker.communicate(timeout=120)[1]
+            self.assertEqual(worker.returncode, 0, stderr)
+
+        with open(self.runs_filename, 'r') as runs_file:
+            runs = sorted(int(line) for line in runs_file)
+        self.assertEqual(runs, AGES)
+
+        done_ages = sorted(age_work_queue.read_task(filename)['age'] for filename in task_files(self.queue_directory, 'done'))
+        self.assertEqual(done_ages, AGES)
+        for state in ('pending', 'running', 'failed'):
+            self.assertEqual(task_files(self.queue_directory, state), [])
+        self.assertEqual(sorted(os.listdir(self.output_directory)), sorted('result_{0}.txt'.format(age) for age in AGES))
+
+    # A just-claimed task is not stale, even though its file was written long before the claim
+    def test_new_claim_is_not_stale(self):
+        self.initialise(heartbeat_timeout=60)
+        for filename in task_files(self.queue_directory, 'pending'):
+            os.utime(filename, (0, 0))
+
+        claim = age_work_queue.claim_task(self.queue_directory, 'new')
+        age_work_queue.requeue_stale_tasks(self.queue_directory, 60, age_work_queue.DEFAULT_MAX_ATTEMPTS)
+        self.assertTrue(os.path.exists(claim))
+        self.assertEqual(age_work_queue.read_task(claim)['worker'], 'new')
+        self.assertEqual(len(task_files(self.queue_directory, 'pending')), len(AGES) - 1)
+
+    # A requeue running between the claim's rename and its recording of the worker leaves the claim alone, and the
+    # age is not also put back into pending
+    def test_requeue_during_claim(self):
+        self.initialise(heartbeat_timeout=60)
+        for filename in task_files(self.queue_directory, 'pending'):
+            os.utime(filename, (0, 0))
+
+        rename = os.rename
+        requeued = []
+        def rename_then_requeue(source, destination):
+            rename(source, destination)
+            if not requeued and os.path.dirname(source) == age_work_queue.state_directory(self.queue_directory, 'pending'):
+                requeued.append(destination)
+                age_work_queue.requeue_stale_tasks(self.queue_directory, 60, age_work_queue.DEFAULT_MAX_ATTEMPTS)
+
+        age_work_queue.os.rename = rename_then_requeue
+        try:
+            claim = age_work_queue.claim_task(self.queue_directory, 'new')
+        finally:
+            age_work_queue.os.rename = rename
+        self.assertEqual(claim, requeued[0])
+        self.assertTrue(os.path.exists(claim))
+        claimed_age = age_work_queue.read_task(claim)['age']
+        pending_ages = [age_work_queue.read_task(filename)['age'] for filename in task_files(self.queue_directory, 'pending')]
+        self.assertNotIn(claimed_age, pending_ages)
+
+    # A slow worker whose task went stale and was claimed again cannot release it (only the new claim does)
+    def test_stale_claim_cannot_release(self):
+        self.initialise(heartbeat_timeout=60)
+
+        slow_claim = age_work_queue.claim_task(self.queue_directory, 'slow')
+        slow_task = age_work_queue.read_task(slow_claim)
+        # Requeue as if the slow worker had sent no heartbeat for longer than the timeout
+        age_work_queue.requeue_stale_tasks(self.queue_directory, 60, age_work_queue.DEFAULT_MAX_ATTEMPTS,
+                now=age_work_queue.filesystem_now(self.queue_directory) + 61)
+        self.assertFalse(os.path.exists(slow_claim))
+
+        # The requeued task is the first pending one again
+        new_claim = age_work_queue.claim_task(self.queue_directory, 'new')
+        new_task = age_work_queue.read_task(new_claim)
+        self.assertEqual(new_task['age'], slow_task['age'])
+
+        self.assertFalse(age_work_queue.release_task(self.queue_directory, slow_claim, slow_task, 'done'))
+        self.assertFalse(os.path.exists(slow_claim))
+        self.assertTrue(os.path.exists(new_claim))
+        self.assertEqual(task_files(self.queue_directory, 'done'), [])
+
+        self.assertTrue(age_work_queue.release_task(self.queue_directory, new_claim, new_task, 'done'))
+        done_tasks = [age_work_queue.read_task(filename) for filename in task_files(self.queue_directory, 'done')]
+        self.assertEqual([(task['age'], task['worker']) for task in done_tasks], [(slow_task['age'], 'new')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,352 @@
+
+"""
+    Copyright (C) 2026 The University of Sydney, Australia
+
+    This program is free software; you can redistribute it and/or modify it under
+    the terms of the GNU General Public License, version 2, as published by
+    the Free Software Foundation.
+
+    This program is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+    for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+
+import argparse
+import os.path
+import numpy as np
+
+
+DEFAULT_MAX_LAG = 30 # Myr
+DEFAULT_SEGMENT_LENGTH = 64 # samples per Welch segment
+DEFAULT_SURROGATES = 1000
+DEFAULT_BATCH_SIZE = 100
+
+
+###################### Reading series #####################
+
+
+# Converts a table entry to float when it is numeric.
+def convert(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# Reads the numeric rows of a whitespace or comma separated text file, skipping header and comment lines.
+# Returns the header (column names of the last non-numeric line before the data, if any) and the rows.
+def read_table(filename):
+    header = None
+    rows = []
+    with open(filename, 'r') as table_file:
+        for line in table_file:
+            line = line.strip()
+            if not line or line.startswith('#') or line.startswith('%'):
+                continue
+            values = [value.strip() for value in line.split(',')] if filename.endswith('.csv') else line.split()
+            try:
+                rows.append([float(value) for value in values])
+            except ValueError:
+                try:
+                    # A text column in the data (e.g. a group name), the age column is always numeric
+                    float(values[0])
+                    rows.append([convert(value) for value in values])
+                except ValueError:
+                    if not rows:
+                        header = values
+    return header, rows
+
+
+# Reads the series of a file as a dict of name -> (ages, values).
+#  - plain two (or more) column files (age value ...) give one series from the second column,
+#  - tables with an 'Age' header give one series per other numeric column,
+#  - long tables with a 'Value' column (e.g. grouped_sz_metrics.dat) give one series per combination of the
+#    other columns, and tables with a 'Member' column (ensemble member values) one series per member and column.
+def read_series(filename, prefix=None):
+    prefix = prefix or os.path.splitext(os.path.basename(filename))[0]
+    header, rows = read_table(filename)
+    series = {}
+
+    def add(name, age, value):
+        try:
+            value = float(value)
+        except ValueError:
+            return
+        series.setdefault(name, ([], []))
+        series[name][0].append(float(age))
+        series[name][1].append(value)
+
+    if header is None or header[0].lower() != 'age':
+        for row in rows:
+            add(prefix, row[0], row[1])
+    elif 'Value' in header:
+        value_column = header.index('Value')
+        key_columns = [column for column in range(1, len(header)) if column != value_column]
+        for row in rows:
+            key = ':'.join(str(row[column]) if not isinstance(row[column], float) else '{0:g}'.format(row[column])
+                    for column in key_columns)
+            add('{0}:{1}'.format(prefix, key), row[0], row[value_column])
+    elif 'Member' in header:
+        member_column = header.index('Member')
+        for row in rows:
+            for column in range(1, len(header)):
+                if column != member_column:
+                    add('{0}:member{1:g}:{2}'.format(prefix, row[member_column], header[column]), row[0], row[column])
+    else:
+        for row in rows:
+            for column in range(1, len(header)):
+                add('{0}:{1}'.format(prefix, header[column]), row[0], row[column])
+
+    return dict((name, (np.array(ages), np.array(values))) for name, (ages, values) in series.items())
+
+
+# Linearly interpolates every series onto the common age grid. Ages outside a series' range are NaN.
+# Returns the names and a (number of series, number of ages) array.
+def resample(series, grid):
+    names = sorted(series)
+    resampled = np.full((len(names), len(grid)), np.nan)
+    for index, name in enumerate(names):
+        ages, values = series[name]
+        order = np.argsort(ages)
+        ages, values = ages[order], values[order]
+        valid = np.isfinite(values)
+        if np.count_nonzero(valid) < 2:
+            continue
+        ages, values = ages[valid], values[valid]
+        inside = (grid >= ages[0]) & (grid <= ages[-1])
+        resampled[index, inside] = np.interp(grid[inside], ages, values)
+    return names, resampled
+
+
+###################### Lagged correlation #####################
+
+
+# Pearson correlation of every metric series with every record at each lag, ignoring NaNs (pairwise overlap).
+# A positive lag compares metric(age + lag) with record(age), i.e. the metric leads.
+# 'metrics' is (..., S, T) - leading axes (e.g. surrogates) are batched too - and 'records' is (R, T).
+# Returns (..., S, R, number of lags).
+def lagged_correlation(metrics, records, lags, min_overlap=10):
+    metric_valid = np.isfinite(metrics)
+    record_valid = np.isfinite(records)
+    x = np.where(metric_valid, metrics, 0.0)
+    y = np.where(record_valid, records, 0.0)
+    mx = metric_valid.astype(float)
+    my = record_valid.astype(float)
+    length = metrics.shape[-1]
+
+    correlations = np.full(metrics.shape[:-1] + (records.shape[0], len(lags)), np.nan)
+    for lag_index, lag in enumerate(lags):
+        # metric sample i + lag pairs with record sample i
+        if lag >= 0:
+            xs, mxs = x[..., lag:], mx[..., lag:]
+            ys, mys = y[:, :length - lag], my[:, :length - lag]
+        else:
+            xs, mxs = x[..., :length + lag], mx[..., :length + lag]
+            ys, mys = y[:, -lag:], my[:, -lag:]
+
+        n = np.matmul(mxs, mys.T)
+        sum_x = np.matmul(xs, mys.T)
+        sum_y = np.matmul(mxs, ys.T)
+        sum_xy = np.matmul(xs, ys.T)
+        sum_xx = np.matmul(xs * xs, mys.T)
+        sum_yy = np.matmul(mxs, (ys * ys).T)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            numerator = n * sum_xy - sum_x * sum_y
+            denominator = np.sqrt(np.maximum(n * sum_xx - sum_x**2, 0.0) * np.maximum(n * sum_yy - sum_y**2, 0.0))
+            correlations[..., lag_index] = np.where((n >= min_overlap) & (denominator > 0), numerator / denominator, np.nan)
+    return correlations
+
+
+###################### Spectral coherence #####################
+
+
+# Fills the NaNs of each series with its mean (after the series is known to overlap the grid), so the FFT
+# can run on all series at once. The filled samples carry no variance.
+def fill_gaps(series):
+    means = np.nanmean(np.where(np.isfinite(series), series, np.nan), axis=-1, keepdims=True)
+    return np.where(np.isfinite(series), series, np.nan_to_num(means))
+
+
+# Welch segment spectra of a (..., T) array: Hann windowed, mean removed, 50% overlap. Returns (..., K, F).
+def segment_spectra(series, segment_length):
+    segment_length = min(segment_length, series.shape[-1])
+    step = max(1, segment_length // 2)
+    starts = range(0, series.shape[-1] - segment_length + 1, step)
+    segments = np.stack([series[..., start:start + segment_length] for start in starts], axis=-2)
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    return np.fft.rfft(segments * np.hanning(segment_length), axis=-1)
+
+
+# Magnitude squared coherence of every metric series (..., S, T) with every record (R, T), from the averaged
+# Welch cross spectra. Returns (..., S, R, F) and the frequencies (cycles per grid step).
+def coherence(metrics, records, segment_length):
+    metric_spectra = segment_spectra(fill_gaps(metrics), segment_length)
+    record_spectra = segment_spectra(fill_gaps(records), segment_length)
+    cross = np.einsum('...skf,rkf->...srf', metric_spectra, np.conj(record_spectra)) / metric_spectra.shape[-2]
+    metric_power = np.mean(np.abs(metric_spectra)**2, axis=-2)
+    record_power = np.mean(np.abs(record_spectra)**2, axis=-2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.abs(cross)**2 / (metric_power[..., :, np.newaxis, :] * record_power[np.newaxis, :, :])
+    frequencies = np.fft.rfftfreq(min(segment_length, metrics.shape[-1]))
+    return np.nan_to_num(values), frequencies
+
+
+###################### Significance #####################
+
+
+# Phase randomised surrogates of each series (same power spectrum, so the same autocorrelation, but no
+# relation to the records). Gaps are kept as NaN. Returns (number of surrogates, S, T).
+def phase_randomised_surrogates(series, number_of_surrogates, random_state):
+    valid = np.isfinite(series)
+    filled = fill_gaps(series)
+    means = filled.mean(axis=-1, keepdims=True)
+    spectra = np.fft.rfft(filled - means, axis=-1)
+    phases = np.exp(2j * np.pi * random_state.uniform(size=(number_of_surrogates,) + spectra.shape))
+    # Keep the zero (and Nyquist) frequency real
+    phases[..., 0] = 1.0
+    if series.shape[-1] % 2 == 0:
+        phases[..., -1] = 1.0
+    surrogates = np.fft.irfft(spectra * phases, n=series.shape[-1], axis=-1) + means
+    return np.where(valid, surrogates, np.nan)
+
+
+# Fraction of surrogates whose statistics reach the observed ones: the peak absolute lagged correlation and
+# the peak coherence (over the tested frequencies) of each metric/record pair. Surrogates are run in batches.
+def bootstrap_p_values(metrics, records, lags, segment_length, frequency_mask, observed_correlation, observed_coherence,
+        number_of_surrogates, batch_size, seed):
+    random_state = np.random.RandomState(seed)
+    exceed_correlation = np.zeros(observed_correlation.shape)
+    exceed_coherence = np.zeros(observed_coherence.shape)
+    remaining = number_of_surrogates
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        remaining -= batch
+        surrogates = phase_randomised_surrogates(metrics, batch, random_state)
+        surrogate_correlation = np.nanmax(np.abs(lagged_correlation(surrogates, records, lags)), axis=-1)
+        surrogate_coherence = coherence(surrogates, records, segment_length)[0][..., frequency_mask].max(axis=-1)
+        exceed_correlation += np.sum(np.nan_to_num(surrogate_correlation) >= observed_correlation, axis=0)
+        exceed_coherence += np.sum(surrogate_coherence >= observed_coherence, axis=0)
+    return (exceed_correlation + 1.0) / (number_of_surrogates + 1.0), (exceed_coherence + 1.0) / (number_of_surrogates + 1.0)
+
+
+if __name__ == "__main__":
+
+    __description__ = \
+    """Screen metric series (subduction lengths, carbon fluxes, ensemble members, grouped metrics, scenario sweeps)
+    against CO2 records. All series are resampled onto a common age grid, then for every metric/record pair at once:
+    the lagged cross-correlation, the FFT (Welch) magnitude squared coherence, and bootstrap p-values of the peak
+    correlation and peak coherence against phase randomised surrogates of the metric series.
+
+    A positive lag means the metric leads the CO2 record (metric at age + lag against CO2 at age).
+
+    For example...
+
+    python %(prog)s -m global_sz_length_data.dat global_sz_length_carbonate_data.dat ../ensemble_member_values.dat \\
+        -c ../CO2/proxy_royer_230-0Ma.dat ../CO2/proxy_park_230-0Ma.dat ../CO2/copse_bergman_230-0Ma.dat \\
+        ../foster_royer_lunt17.csv -g 0 230 1 -o co2_screening.dat"""
+
+    # The command-line parser.
+    parser = argparse.ArgumentParser(description = __description__, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('-m', '--metric_filenames', type=str, nargs='+', required=True,
+            metavar='metric_filename', help='Files of metric series (see above for the supported layouts).')
+    parser.add_argument('-c', '--record_filenames', type=str, nargs='+', required=True,
+            metavar='record_filename', help='CO2 record files (age and CO2 in the first two columns).')
+    parser.add_argument('-g', '--grid', type=float, nargs=3, default=[0.0, 230.0, 1.0],
+            metavar=('MIN_AGE', 'MAX_AGE', 'STEP'), help='Common age grid (Myr). Defaults to 0 230 1.')
+    parser.add_argument('-l', '--max_lag', type=float, default=DEFAULT_MAX_LAG,
+            help='Largest lag tested either way (Myr). Defaults to {0}.'.format(DEFAULT_MAX_LAG))
+    parser.add_argument('-w', '--segment_length', type=int, default=DEFAULT_SEGMENT_LENGTH,
+            help='Welch segment length for the coherence (grid samples). Defaults to {0}.'.format(DEFAULT_SEGMENT_LENGTH))
+    parser.add_argument('--periods', type=float, nargs=2, default=[0.0, np.inf],
+            metavar=('MIN_PERIOD', 'MAX_PERIOD'), help='Period band (Myr) of the peak coherence. Defaults to all periods.')
+    parser.add_argument('-n', '--surrogates', type=int, default=DEFAULT_SURROGATES,
+            help='Number of surrogates for the p-values (0 to skip). Defaults to {0}.'.format(DEFAULT_SURROGATES))
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Surrogates processed at once. Defaults to {0}.'.format(DEFAULT_BATCH_SIZE))
+    parser.add_argument('--seed', type=int, default=0,
+            help='Seed of the surrogates. Defaults to 0.')
+    parser.add_argument('-o', '--output_filename', type=str, default='co2_screening.dat',
+            help="Summary table, one row per metric/record pair. Defaults to 'co2_screening.dat'.")
+    parser.add_argument('--lag_output_filename', type=str,
+            help='Optionally write the correlation at every lag (long table).')
+    parser.add_argument('--coherence_output_filename', type=str,
+            help='Optionally write the coherence at every period (long table).')
+
+    # Parse command-line options.
+    args = parser.parse_args()
+
+    grid_start, grid_stop, grid_step = args.grid
+    grid = np.arange(grid_start, grid_stop + 0.5 * grid_step, grid_step)
+
+    metric_series = {}
+    for filename in args.metric_filenames:
+        metric_series.update(read_series(filename))
+    record_series = {}
+    for filename in args.record_filenames:
+        record_series.update(read_series(filename))
+
+    metric_names, metrics = resample(metric_series, grid)
+    record_names, records = resample(record_series, grid)
+
+    max_lag_steps = int(round(args.max_lag / grid_step))
+    lags = np.arange(-max_lag_steps, max_lag_steps + 1)
+    correlations = lagged_correlation(metrics, records, lags)
+    coherences, frequencies = coherence(metrics, records, args.segment_length)
+
+    with np.errstate(divide='ignore'):
+        periods = grid_step / frequencies
+    frequency_mask = (frequencies > 0) & (periods >= args.periods[0]) & (periods <= args.periods[1])
+    band_coherences = np.where(frequency_mask, coherences, -1.0)
+
+    abs_correlations = np.nan_to_num(np.abs(correlations), nan=-1.0)
+    best_lag_index = abs_correlations.argmax(axis=-1)
+    best_correlation = np.take_along_axis(correlations, best_lag_index[..., np.newaxis], axis=-1)[..., 0]
+    zero_lag_correlation = correlations[..., max_lag_steps]
+    peak_frequency_index = band_coherences.argmax(axis=-1)
+    peak_coherence = np.take_along_axis(coherences, peak_frequency_index[..., np.newaxis], axis=-1)[..., 0]
+
+    p_correlation = np.full(best_correlation.shape, np.nan)
+    p_coherence = np.full(peak_coherence.shape, np.nan)
+    if args.surrogates > 0:
+        p_correlation, p_coherence = bootstrap_p_values(metrics, records, lags, args.segment_length, frequency_mask,
+                np.nan_to_num(np.abs(best_correlation)), peak_coherence, args.surrogates, args.batch_size, args.seed)
+
+    with open(args.output_filename, 'w') as output_file:
+        output_file.write('Series Record Correlation_Lag0 Best_Lag Correlation_Best_Lag P_Correlation '
+                'Peak_Coherence Peak_Period P_Coherence\n')
+        for series_index, series_name in enumerate(metric_names):
+            for record_index, record_name in enumerate(record_names):
+                output_file.write('{0} {1} {2:.4f} {3:g} {4:.4f} {5:.4f} {6:.4f} {7:.4g} {8:.4f}\n'.format(
+                    series_name, record_name,
+                    zero_lag_correlation[series_index, record_index],
+                    lags[best_lag_index[series_index, record_index]] * grid_step,
+                    best_correlation[series_index, record_index],
+                    p_correlation[series_index, record_index],
+                    peak_coherence[series_index, record_index],
+                    periods[peak_frequency_index[series_index, record_index]],
+                    p_coherence[series_index, record_index]))
+
+    if args.lag_output_filename:
+        with open(args.lag_output_filename, 'w') as lag_file:
+            lag_file.write('Series Record Lag Correlation\n')
+            for series_index, series_name in enumerate(metric_names):
+                for record_index, record_name in enumerate(record_names):
+                    for lag_index, lag in enumerate(lags):
+                        lag_file.write('{0} {1} {2:g} {3:.4f}\n'.format(series_name, record_name, lag * grid_step,
+                                correlations[series_index, record_index, lag_index]))
+
+    if args.coherence_output_filename:
+        with open(args.coherence_output_filename, 'w') as coherence_file:
+            coherence_file.write('Series Record Period Coherence\n')
+            for series_index, series_name in enumerate(metric_names):
+                for record_index, record_name in enumerate(record_names):
+                    for frequency_index in np.flatnonzero(frequencies > 0):
+                        coherence_file.write('{0} {1} {2:.4g} {3:.4f}\n'.format(series_name, record_name,
+                                periods[frequency_index], coherences[series_index, record_index, frequency_index]))